@@ -1,12 +1,25 @@
 """
 Aplicativo Desktop Marmitaria
 Inicia Django em background e abre janela PyQt6 com WebView
+
+A janela carrega o frontend pelo esquema marmitaria://app/, atendido dentro
+do processo (core/inprocess.py): as requisições da WebView vão direto para
+o Django, sem servidor HTTP nem porta. Com DESKTOP_TRANSPORT='http' a janela
+volta a usar o servidor em 127.0.0.1:8000; DESKTOP_HTTP_HOST sobe o servidor
+também no modo em processo (terminais na rede).
+
+Com --smoke-test o aplicativo abre, confere o frontend e uma chamada da API
+feita pela página e sai com código 0 ou 1 (validação do executável no build).
 """
+import time
+
+# Início da medição das fases da inicialização (core/bootstrap.py)
+STARTED = time.perf_counter()
+
+import logging
 import os
 import sys
 import threading
-import time
-import socket
 from pathlib import Path
 
 # Configurar caminhos ANTES de importar Django
@@ -31,21 +44,200 @@ else:
 
 # Configurar Django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'marmitaria.settings')
+# Sem o Django admin por padrão: menos imports na abertura
+os.environ.setdefault('ADMIN_ENABLED', 'False')
 
 # Importar Django após configurar os caminhos
+SETUP_STARTED = time.perf_counter()
 import django
 django.setup()
 
 # Importar módulos do Django
-from django.core.management import call_command
-from django.contrib.auth.models import User, Group
-from django.db import connection
+from django.conf import settings
+
+from core import inprocess
+from core.bootstrap import StartupTimer, prepare_database
+from core.server import Server
+
+startup = StartupTimer(STARTED)
+startup.record('imports', STARTED, SETUP_STARTED)
+startup.record('django.setup', SETUP_STARTED)
 
 # Importar PyQt6
-from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QMessageBox
-from PyQt6.QtWebEngineWidgets import QWebEngineView
-from PyQt6.QtCore import QUrl, QTimer, pyqtSignal, QObject
-from PyQt6.QtGui import QIcon
+with startup.phase('PyQt6'):
+    from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QMessageBox
+    from PyQt6.QtWebEngineWidgets import QWebEngineView
+    from PyQt6.QtWebEngineCore import QWebEngineUrlScheme, QWebEngineUrlSchemeHandler
+    from PyQt6.QtCore import QIODevice, QTimer, QUrl, pyqtSignal, QObject
+    from PyQt6.QtGui import QIcon
+
+logger = logging.getLogger('marmitaria.desktop')
+
+# --smoke-test: abre a janela, confere o frontend e a API e encerra
+SMOKE_TEST = '--smoke-test' in sys.argv
+SMOKE_TEST_TIMEOUT_MS = 120000
+# Roda na página carregada: espera o React montar a tela e chama a API pelo
+# transporte da janela (sem token: 401). O resultado volta pelo título.
+SMOKE_TEST_SCRIPT = """
+(() => {
+    const deadline = Date.now() + 30000;
+    const check = () => {
+        const root = document.getElementById('root');
+        if (!root || !root.childElementCount) {
+            if (Date.now() < deadline) {
+                setTimeout(check, 100);
+            } else {
+                document.title = 'smoke-test:frontend não montou';
+            }
+            return;
+        }
+        fetch('/api/user/').then(
+            (response) => {
+                const status = response.headers.get('X-Marmitaria-Status') || response.status;
+                document.title = 'smoke-test:' + status;
+            },
+            (error) => { document.title = 'smoke-test:' + error; },
+        );
+    };
+    check();
+})();
+"""
+
+
+def register_scheme():
+    """Registra marmitaria:// (antes de criar a QApplication)"""
+    scheme = QWebEngineUrlScheme(inprocess.SCHEME.encode('ascii'))
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    # Origem segura (localStorage, fetch e módulos JS como em http://)
+    scheme.setFlags(
+        QWebEngineUrlScheme.Flag.SecureScheme
+        | QWebEngineUrlScheme.Flag.CorsEnabled
+        | QWebEngineUrlScheme.Flag.FetchApiAllowed
+    )
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+
+class ResponseBody(QIODevice):
+    """
+    Corpo da resposta de uma requisição do esquema.
+
+    Preenchido pela thread do WSGIDispatcher (start/write/finish) e lido
+    pelo Qt Web Engine na thread principal, conforme as partes chegam.
+    Filho do job: é destruído junto quando a WebView cancela a requisição,
+    e o próximo write devolve False (o dispatcher para de gerar a resposta).
+    """
+    headers_ready = pyqtSignal(int, object)
+    data_ready = pyqtSignal()
+    body_finished = pyqtSignal()
+
+    def __init__(self, job):
+        super().__init__(job)
+        self.job = job
+        self.buffer = bytearray()
+        self.finished = False
+        self.lock = threading.Lock()
+        self.open(QIODevice.OpenModeFlag.ReadOnly)
+        # Emitidos na thread do dispatcher, entregues na thread principal
+        self.headers_ready.connect(self.reply)
+        self.data_ready.connect(self.readyRead)
+        self.body_finished.connect(self.readChannelFinished)
+
+    # Chamados na thread do dispatcher
+
+    def start(self, status, headers):
+        try:
+            self.headers_ready.emit(status, headers)
+        except RuntimeError:
+            pass
+
+    def write(self, chunk):
+        with self.lock:
+            self.buffer += chunk
+        try:
+            self.data_ready.emit()
+        except RuntimeError:
+            # Job destruído: requisição cancelada
+            return False
+        return True
+
+    def finish(self):
+        with self.lock:
+            self.finished = True
+        try:
+            self.data_ready.emit()
+            self.body_finished.emit()
+        except RuntimeError:
+            pass
+
+    # Thread principal
+
+    def reply(self, status, headers):
+        content_type, location, additional = b'application/octet-stream', None, {}
+        for name, value in headers:
+            key = name.lower()
+            if key == 'content-type':
+                content_type = value.encode('latin-1')
+            elif key == 'location':
+                location = value
+            else:
+                additional.setdefault(name.encode('latin-1'), []).append(value.encode('latin-1'))
+        try:
+            if 300 <= status < 400 and location:
+                self.job.redirect(self.job.requestUrl().resolved(QUrl(location)))
+                return
+            self.job.setAdditionalResponseHeaders(additional)
+            self.job.reply(content_type, self)
+        except RuntimeError:
+            pass
+
+    def isSequential(self):
+        return True
+
+    def bytesAvailable(self):
+        with self.lock:
+            return len(self.buffer) + super().bytesAvailable()
+
+    def atEnd(self):
+        with self.lock:
+            return self.finished and not self.buffer
+
+    def readData(self, maxlen):
+        with self.lock:
+            if not self.buffer:
+                # None = -1: fim do corpo
+                return None if self.finished else b''
+            data = bytes(self.buffer[:maxlen])
+            del self.buffer[:maxlen]
+            return data
+
+    def writeData(self, data):
+        return -1
+
+
+class SchemeHandler(QWebEngineUrlSchemeHandler):
+    """Entrega as requisições de marmitaria:// ao WSGIDispatcher"""
+
+    def __init__(self, dispatcher, parent=None):
+        super().__init__(parent)
+        self.dispatcher = dispatcher
+
+    def requestStarted(self, job):
+        headers = {
+            bytes(name).decode('latin-1'): bytes(value).decode('latin-1')
+            for name, value in job.requestHeaders().items()
+        }
+        request_body = job.requestBody()
+        body = bytes(request_body.readAll()) if request_body is not None else b''
+        device = ResponseBody(job)
+        self.dispatcher.submit(
+            bytes(job.requestMethod()).decode('ascii'),
+            bytes(job.requestUrl().toEncoded()).decode('ascii'),
+            headers,
+            body,
+            device.start,
+            device.write,
+            device.finish,
+        )
 
 
 class DjangoServer(QObject):
@@ -57,36 +249,40 @@ class DjangoServer(QObject):
         super().__init__()
         self.server_thread = None
         self.server_running = False
+        self.server = None
+        self.dispatcher = None
     
     def start_server(self):
         """Inicia o servidor Django em uma thread separada"""
         def run_server():
             try:
-                # Executar migrações se necessário
-                call_command('migrate', '--noinput', verbosity=0)
-                
-                # Criar grupos se não existirem
-                try:
-                    call_command('create_groups', verbosity=0)
-                except Exception as e:
-                    print(f"Aviso ao criar grupos: {e}")
-                
-                # Criar admin padrão se não existir
-                try:
-                    if not User.objects.filter(username='admin').exists():
-                        call_command('create_default_admin', verbosity=0)
-                except Exception as e:
-                    print(f"Aviso ao criar admin: {e}")
-                
-                # Aguardar um pouco para garantir que tudo está pronto
-                time.sleep(0.5)
-                
-                # Iniciar servidor Django
+                # migrate, grupos e admin só se o schema mudou desde a última
+                # abertura (impressão digital gravada no banco)
+                prepare_database(startup)
+
+                server_started = time.perf_counter()
+                host = settings.DESKTOP_HTTP_HOST
+                if settings.DESKTOP_TRANSPORT == 'inprocess':
+                    # A janela fala direto com o Django: pronto sem porta
+                    self.dispatcher = inprocess.WSGIDispatcher()
+                    startup.record('servidor', server_started)
+                    self.server_running = True
+                    self.server_ready.emit()
+                    if not host:
+                        return
+                    listening = None
+                else:
+                    # server_ready é emitido assim que a porta aceita conexões
+                    def listening():
+                        startup.record('servidor', server_started)
+                        self.server_ready.emit()
+
+                self.server = Server(host or '127.0.0.1', 8000, embedded=True, on_ready=listening)
                 self.server_running = True
-                self.server_ready.emit()
-                
-                # Executar servidor (bloqueia até ser interrompido)
-                call_command('runserver', '127.0.0.1:8000', use_reloader=False, verbosity=0)
+
+                # Executar servidor (bloqueia até stop_server); waitress com
+                # várias threads, ou runserver se não estiver instalado
+                self.server.run()
             except Exception as e:
                 self.server_error.emit(str(e))
                 self.server_running = False
@@ -95,8 +291,12 @@ class DjangoServer(QObject):
         self.server_thread.start()
     
     def stop_server(self):
-        """Para o servidor Django"""
+        """Para o servidor Django, esperando as requisições em andamento"""
         self.server_running = False
+        if self.server is not None:
+            self.server.stop()
+        if self.dispatcher is not None:
+            self.dispatcher.shutdown()
 
 
 class MainWindow(QMainWindow):
@@ -105,6 +305,13 @@ class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.django_server = DjangoServer()
+        self.frontend_started = None
+        self.scheme_handler = None
+        self.smoke_test_running = SMOKE_TEST
+        if settings.DESKTOP_TRANSPORT == 'inprocess':
+            self.frontend_url = inprocess.URL
+        else:
+            self.frontend_url = 'http://127.0.0.1:8000/'
         self.setup_ui()
         self.setup_server()
     
@@ -128,6 +335,7 @@ class MainWindow(QMainWindow):
         # Conectar sinais do servidor Django
         self.django_server.server_ready.connect(self.on_server_ready)
         self.django_server.server_error.connect(self.on_server_error)
+        self.webview.loadFinished.connect(self.on_load_finished)
     
     def setup_server(self):
         """Inicia o servidor Django"""
@@ -177,47 +385,79 @@ class MainWindow(QMainWindow):
         # Iniciar servidor Django
         self.django_server.start_server()
     
-    def check_server_ready(self, attempts=0):
-        """Verifica se o servidor está pronto"""
-        max_attempts = 30
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            result = sock.connect_ex(('127.0.0.1', 8000))
-            sock.close()
-            if result == 0:
-                # Servidor está pronto
-                self.load_frontend()
-            elif attempts < max_attempts:
-                # Tentar novamente após 500ms
-                QTimer.singleShot(500, lambda: self.check_server_ready(attempts + 1))
-            else:
-                self.show_error("Timeout: O servidor não iniciou a tempo.")
-        except Exception as e:
-            if attempts < max_attempts:
-                QTimer.singleShot(500, lambda: self.check_server_ready(attempts + 1))
-            else:
-                self.show_error(f"Erro ao verificar servidor: {e}")
-    
     def on_server_ready(self):
-        """Chamado quando o servidor Django está pronto"""
-        # Verificar se o servidor está realmente acessível
-        QTimer.singleShot(500, lambda: self.check_server_ready())
+        """Chamado quando o servidor Django passa a aceitar conexões"""
+        dispatcher = self.django_server.dispatcher
+        if dispatcher is not None and self.scheme_handler is None:
+            self.scheme_handler = SchemeHandler(dispatcher, self)
+            self.webview.page().profile().installUrlSchemeHandler(
+                inprocess.SCHEME.encode('ascii'), self.scheme_handler
+            )
+        self.load_frontend()
     
     def load_frontend(self):
         """Carrega o frontend no WebView"""
         try:
             # Carregar o frontend local
-            url = QUrl("http://127.0.0.1:8000")
+            self.frontend_started = time.perf_counter()
+            url = QUrl(self.frontend_url)
             self.webview.setUrl(url)
         except Exception as e:
             self.show_error(f"Erro ao carregar frontend: {e}")
     
+    def on_load_finished(self, ok):
+        """Primeira carga do frontend: fim da inicialização"""
+        # A tela de carregamento (setHtml) também emite loadFinished
+        if self.frontend_started is None or startup.total_ms is not None:
+            return
+        if not self.webview.url().toString().startswith(self.frontend_url):
+            return
+        startup.record('frontend', self.frontend_started)
+        logger.info(startup.finish())
+        if SMOKE_TEST:
+            self.smoke_test(ok)
+    
+    def smoke_test(self, ok):
+        """--smoke-test: frontend carregado, API pela página e nenhuma porta aberta"""
+        if not ok:
+            self.finish_smoke_test('o frontend não carregou')
+            return
+        in_process = settings.DESKTOP_TRANSPORT == 'inprocess' and not settings.DESKTOP_HTTP_HOST
+        if in_process and self.django_server.server is not None:
+            self.finish_smoke_test('servidor HTTP iniciado no modo em processo')
+            return
+        self.webview.titleChanged.connect(self.on_smoke_test_title)
+        self.webview.page().runJavaScript(SMOKE_TEST_SCRIPT)
+    
+    def on_smoke_test_title(self, title):
+        prefix = 'smoke-test:'
+        if not title.startswith(prefix):
+            return
+        result = title[len(prefix):]
+        self.finish_smoke_test(None if result == '401' else f'a API respondeu {result} (esperado: 401)')
+    
+    def finish_smoke_test(self, error):
+        """Encerra o --smoke-test: código 0 (ok) ou 1 (erro)"""
+        if not self.smoke_test_running:
+            return
+        self.smoke_test_running = False
+        if error:
+            logger.error('Smoke test (%s): %s', settings.DESKTOP_TRANSPORT, error)
+        else:
+            logger.info('Smoke test (%s): ok', settings.DESKTOP_TRANSPORT)
+        self.close()
+        QApplication.exit(1 if error else 0)
+    
     def on_server_error(self, error_msg):
         """Chamado quando há erro no servidor Django"""
         self.show_error(f"Erro ao iniciar servidor:\n{error_msg}")
     
     def show_error(self, message):
         """Mostra uma mensagem de erro"""
+        if self.smoke_test_running:
+            # Sem diálogo modal: ninguém para fechá-lo no build
+            self.finish_smoke_test(message)
+            return
         msg_box = QMessageBox(self)
         msg_box.setIcon(QMessageBox.Icon.Critical)
         msg_box.setWindowTitle("Erro")
@@ -233,12 +473,18 @@ class MainWindow(QMainWindow):
 
 def main():
     """Função principal"""
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     # Criar aplicação Qt
-    app = QApplication(sys.argv)
+    with startup.phase('janela'):
+        register_scheme()
+        app = QApplication(sys.argv)
+        
+        # Criar e mostrar janela principal
+        window = MainWindow()
+        window.show()
     
-    # Criar e mostrar janela principal
-    window = MainWindow()
-    window.show()
+    if SMOKE_TEST:
+        QTimer.singleShot(SMOKE_TEST_TIMEOUT_MS, lambda: window.finish_smoke_test('tempo esgotado'))
     
     # Executar loop de eventos
     sys.exit(app.exec())
@@ -0,0 +1,375 @@
+"""
+Benchmark dos relatórios, exportações CSV, lista de pedidos e do fluxo do caixa.
+
+Para cada tamanho de base (número de pedidos gerados pelo seed_marmitaria)
+mede cada endpoint pela pilha completa (middlewares, JWT, permissões),
+registrando tempo (mediana e máximo), número de consultas e pico de memória
+alocada. O resultado é gravado em JSON e pode ser comparado com um baseline
+salvo: o processo termina com código 1 se algum limite de regressão for
+ultrapassado.
+
+Uso (a partir de backend/):
+    python benchmarks/bench_api.py --sizes 10000
+    python benchmarks/bench_api.py --sizes 10000,100000,1000000
+    python benchmarks/bench_api.py --sizes 10000 --baseline benchmarks/baseline.json
+    python benchmarks/bench_api.py --sizes 10000 --update-baseline
+
+O cache de relatórios é desligado durante a medição, para medir o cálculo.
+Os tempos do baseline dependem da máquina: gere um baseline próprio antes
+de comparar em outro ambiente.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from common import BACKEND_DIR, setup_django, test_database, timed
+
+# Mede a configuração de produção: com DEBUG o Django guarda cada consulta
+os.environ.setdefault('DEBUG', 'False')
+setup_django()
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+from rest_framework_simplejwt.tokens import RefreshToken  # noqa: E402
+
+DEFAULT_SIZES = '10000,100000,1000000'
+DEFAULT_BASELINE = os.path.join(BACKEND_DIR, 'benchmarks', 'baseline.json')
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+
+REPORTS = ['dashboard', 'sales', 'products', 'orders', 'financial', 'expenses',
+           'heatmap', 'baskets', 'forecast']
+CSV_EXPORTS = ['sales', 'products', 'orders', 'financial', 'expenses', 'heatmap', 'baskets']
+
+
+def _get(path):
+    def request(clients, state):
+        return clients['admin'].get(path)
+    return request
+
+
+def _create_order(clients, state):
+    response = clients['caixa'].post('/api/orders/', {'notes': 'benchmark'}, format='json')
+    state['order_id'] = response.data['data']['id']
+    return response
+
+
+def _add_item(clients, state):
+    return clients['caixa'].post(
+        f"/api/orders/{state['order_id']}/add_item/",
+        {'product_id': state['product_id'], 'quantity': 2},
+        format='json',
+    )
+
+
+def _pay(clients, state):
+    """Cria o pagamento e o finaliza (duas requisições, como no caixa)."""
+    response = clients['caixa'].post(
+        '/api/payments/', {'order': state['order_id'], 'method': 'pix'}, format='json',
+    )
+    payment_id = response.data['data']['id']
+    return clients['caixa'].post(f'/api/payments/{payment_id}/finalize/')
+
+
+def _list_open_orders(clients, state):
+    return clients['caixa'].get('/api/orders/')
+
+
+def build_cases():
+    """Lista ordenada de (nome, função). O fluxo do caixa depende da ordem."""
+    cases = [(f'reports.{name}', _get(f'/api/reports/{name}/')) for name in REPORTS]
+    cases.append(('reports.batch', _get(
+        '/api/reports/batch/?reports=dashboard,sales,products,orders,financial,expenses',
+    )))
+    cases += [
+        (f'csv.{name}', _get(f'/api/reports/{name}/export_csv/')) for name in CSV_EXPORTS
+    ]
+    cases += [
+        ('orders.list', _get('/api/orders/')),
+        ('orders.list_compact', _get('/api/orders/?view=compact')),
+    ]
+    cases += [
+        ('pos.create_order', _create_order),
+        ('pos.add_item', _add_item),
+        ('pos.pay', _pay),
+        ('pos.list_open_orders', _list_open_orders),
+    ]
+    return cases
+
+
+class QueryCounter:
+    """
+    Conta as consultas executadas no bloco.
+
+    Usa execute_wrapper em vez de CaptureQueriesContext: com DEBUG ligado o
+    log de consultas do Django (limitado a 9000 entradas) já está cheio
+    depois do seed e a contagem por diferença daria zero.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+    def __len__(self):
+        return self.count
+
+
+def _consume(response):
+    # Respostas em streaming só são geradas quando lidas
+    if getattr(response, 'streaming', False):
+        for _ in response.streaming_content:
+            pass
+    else:
+        response.content
+
+
+def _clients():
+    clients = {}
+    usernames = {
+        'admin': User.objects.filter(is_superuser=True).order_by('id').first(),
+        'caixa': User.objects.filter(groups__name='Caixa').order_by('id').first(),
+    }
+    for role, user in usernames.items():
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        clients[role] = client
+    return clients
+
+
+def measure(func, clients, state, repeat):
+    """
+    Mede um caso: uma execução de aquecimento, uma com contagem de consultas,
+    uma com tracemalloc (pico de memória) e `repeat` execuções cronometradas.
+
+    Os casos do caixa são reexecutados na mesma sequência (pedido novo a
+    cada rodada), então cada chamada de func deve funcionar sozinha dado o
+    estado da rodada anterior.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = func(clients, state)
+        _consume(response)
+
+        with QueryCounter() as queries:
+            response = func(clients, state)
+            _consume(response)
+
+        tracemalloc.start()
+        _consume(func(clients, state))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            _consume(func(clients, state))
+            times.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'status': response.status_code,
+        'wall_ms': round(statistics.median(times), 2),
+        'wall_ms_max': round(max(times), 2),
+        'queries': len(queries),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def measure_pos(cases, clients, state, repeat):
+    """
+    O fluxo do caixa é medido em rodadas completas (criar, adicionar item,
+    pagar, listar), já que cada passo depende do anterior.
+    """
+    timings = {name: [] for name, _ in cases}
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for round_number in range(repeat + 2):
+            for name, func in cases:
+                if round_number == 0:
+                    _consume(func(clients, state))  # aquecimento
+                elif round_number == 1:
+                    with QueryCounter() as queries:
+                        tracemalloc.start()
+                        response = func(clients, state)
+                        _consume(response)
+                        _, peak = tracemalloc.get_traced_memory()
+                        tracemalloc.stop()
+                    results[name] = {
+                        'status': response.status_code,
+                        'queries': len(queries),
+                        'peak_kb': round(peak / 1024, 1),
+                    }
+                else:
+                    start = time.perf_counter()
+                    _consume(func(clients, state))
+                    timings[name].append((time.perf_counter() - start) * 1000)
+    for name, times in timings.items():
+        results[name]['wall_ms'] = round(statistics.median(times), 2)
+        results[name]['wall_ms_max'] = round(max(times), 2)
+    return results
+
+
+def run_size(size, repeat, seed):
+    """Gera uma base com `size` pedidos e mede todos os casos."""
+    results = {}
+    with test_database():
+        with contextlib.redirect_stdout(io.StringIO()):
+            call_command('create_groups', stdout=io.StringIO())
+        timed(f'seed ({size} pedidos)', lambda: call_command(
+            'seed_marmitaria', orders=size, seed=seed, stdout=io.StringIO(),
+        ))
+
+        from core.models import Product
+        clients = _clients()
+        state = {'product_id': Product.objects.filter(is_available=True).values_list(
+            'id', flat=True,
+        ).first()}
+
+        cases = build_cases()
+        pos_cases = [(name, func) for name, func in cases if name.startswith('pos.')]
+        for name, func in cases:
+            if name.startswith('pos.'):
+                continue
+            results[name] = measure(func, clients, state, repeat)
+            print(f'  {name:<28} {results[name]["wall_ms"]:9.1f} ms  '
+                  f'{results[name]["queries"]:4d} consultas  {results[name]["peak_kb"]:9.1f} KB')
+        for name, result in measure_pos(pos_cases, clients, state, repeat).items():
+            results[name] = result
+            print(f'  {name:<28} {result["wall_ms"]:9.1f} ms  '
+                  f'{result["queries"]:4d} consultas  {result["peak_kb"]:9.1f} KB')
+    return results
+
+
+def compare(current, baseline, time_threshold, memory_threshold, min_ms, min_kb):
+    """
+    Compara o resultado com o baseline.
+
+    Regressão quando, para o mesmo tamanho e caso:
+    - o tempo mediano passa de baseline x (1 + time_threshold) e a diferença
+      é maior que min_ms (ruído em endpoints muito rápidos);
+    - o número de consultas aumenta;
+    - o pico de memória passa de baseline x (1 + memory_threshold) e a
+      diferença é maior que min_kb;
+    - o status HTTP muda.
+
+    Returns:
+        Lista de mensagens de regressão
+    """
+    regressions = []
+    for size, cases in current['results'].items():
+        base_cases = baseline.get('results', {}).get(size)
+        if not base_cases:
+            print(f'Sem baseline para {size} pedidos; comparação ignorada.')
+            continue
+        for name, result in cases.items():
+            base = base_cases.get(name)
+            if base is None:
+                continue
+            prefix = f'[{size}] {name}'
+            if result['status'] != base['status']:
+                regressions.append(f'{prefix}: status {base["status"]} -> {result["status"]}')
+            if (result['wall_ms'] > base['wall_ms'] * (1 + time_threshold)
+                    and result['wall_ms'] - base['wall_ms'] > min_ms):
+                regressions.append(
+                    f'{prefix}: tempo {base["wall_ms"]:.1f} -> {result["wall_ms"]:.1f} ms'
+                )
+            if result['queries'] > base['queries']:
+                regressions.append(
+                    f'{prefix}: consultas {base["queries"]} -> {result["queries"]}'
+                )
+            if (result['peak_kb'] > base['peak_kb'] * (1 + memory_threshold)
+                    and result['peak_kb'] - base['peak_kb'] > min_kb):
+                regressions.append(
+                    f'{prefix}: memória {base["peak_kb"]:.0f} -> {result["peak_kb"]:.0f} KB'
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f'Tamanhos da base em pedidos, separados por vírgula ({DEFAULT_SIZES})')
+    parser.add_argument('--repeat', type=int, default=5, help='Execuções cronometradas por caso')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Arquivo JSON de saída (padrão: benchmarks/results/)')
+    parser.add_argument('--baseline', help='Baseline para comparação (ex.: benchmarks/baseline.json)')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help=f'Grava o resultado como baseline ({DEFAULT_BASELINE})')
+    parser.add_argument('--time-threshold', type=float, default=0.25,
+                        help='Aumento relativo de tempo tolerado (padrão: 0.25)')
+    parser.add_argument('--memory-threshold', type=float, default=0.5,
+                        help='Aumento relativo de memória tolerado (padrão: 0.5)')
+    parser.add_argument('--min-ms', type=float, default=5.0,
+                        help='Diferença mínima de tempo considerada regressão (padrão: 5 ms)')
+    parser.add_argument('--min-kb', type=float, default=512.0,
+                        help='Diferença mínima de memória considerada regressão (padrão: 512 KB)')
+    args = parser.parse_args()
+
+    settings.REPORT_CACHE_ENABLED = False
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+
+    output = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'results': {},
+    }
+    for size in sizes:
+        print(f'\n== {size} pedidos ==')
+        output['results'][str(size)] = run_size(size, args.repeat, args.seed)
+
+    if args.update_baseline:
+        path = DEFAULT_BASELINE
+    elif args.output:
+        path = args.output
+    else:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f'bench_api_{datetime.now():%Y%m%d_%H%M%S}.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+    print(f'\nResultado gravado em {path}')
+
+    if args.baseline and not args.update_baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(
+            output, baseline, args.time_threshold, args.memory_threshold,
+            args.min_ms, args.min_kb,
+        )
+        if regressions:
+            print('\nRegressões em relação ao baseline:')
+            for message in regressions:
+                print(f'  - {message}')
+            sys.exit(1)
+        print('\nSem regressões em relação ao baseline.')
+
+
+if __name__ == '__main__':
+    main()
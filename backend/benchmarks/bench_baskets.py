@@ -0,0 +1,142 @@
+"""
+Benchmark da análise de cesta (reports/baskets.py).
+
+Cria um banco de teste temporário com um histórico sintético, mede a
+contagem em blocos usada pelo relatório e compara com o self-join de
+OrderItem por pedido, conferindo que os dois contam os mesmos pares.
+
+Uso (a partir de backend/):
+    python benchmarks/bench_baskets.py                 # 1.000.000 de itens
+    python benchmarks/bench_baskets.py --items 200000 --skip-naive
+    python benchmarks/bench_baskets.py --products 400 --max-basket 30
+"""
+import argparse
+import random
+import resource
+from datetime import timedelta
+from decimal import Decimal
+
+from common import setup_django, test_database, timed
+
+setup_django()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+BATCH_SIZE = 20000
+CATEGORIES = ['marmitas', 'bebidas', 'sobremesas', 'acompanhamentos']
+
+
+def populate(items, products, seed, max_basket=6):
+    """Gera pedidos pagos com 1 a max_basket itens e produtos com popularidade desigual."""
+    from core.models import Product
+    from orders.models import Order
+    from payments.models import PaymentStatus
+
+    rng = random.Random(seed)
+    user = User.objects.create_user('bench', password='bench')
+    Product.objects.bulk_create([
+        Product(
+            name=f'Produto {i}', category=CATEGORIES[i % len(CATEGORIES)],
+            price=Decimal('10.00') + i,
+        )
+        for i in range(products)
+    ])
+    product_ids = list(Product.objects.values_list('id', flat=True))
+    weights = [1 / (rank + 1) for rank in range(len(product_ids))]
+    now = timezone.now()
+
+    # Itens e pagamentos são inseridos com executemany: pelo ORM a carga
+    # de 1 milhão de itens leva minutos e não é o que está sendo medido
+    item_sql = (
+        'INSERT INTO orders_orderitem (order_id, product_id, quantity, price, created_at) '
+        'VALUES (%s, %s, 1, 10, %s)'
+    )
+    payment_sql = (
+        'INSERT INTO payments_payment '
+        '(order_id, method, status, amount, paid_at, created_at, updated_at) '
+        'VALUES (%s, %s, %s, %s, %s, %s, %s)'
+    )
+    created = 0
+    with connection.cursor() as cursor:
+        while created < items:
+            orders = Order.objects.bulk_create(
+                [Order(customer=user, is_open=False) for _ in range(BATCH_SIZE // 4)]
+            )
+            order_items = []
+            payments = []
+            for order in orders:
+                size = min(rng.randint(1, max_basket), items - created)
+                if size <= 0:
+                    break
+                for product_id in rng.choices(product_ids, weights=weights, k=size):
+                    order_items.append((order.id, product_id, now))
+                created += size
+                paid_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+                payments.append((
+                    order.id, 'pix', PaymentStatus.COMPLETED.value, 10 * size, paid_at, now, now,
+                ))
+            cursor.executemany(item_sql, order_items)
+            cursor.executemany(payment_sql, payments)
+    return created
+
+
+def naive_pairs():
+    """Self-join de OrderItem por pedido, agrupado no banco."""
+    sql = '''
+        SELECT a.product_id, b.product_id, COUNT(DISTINCT a.order_id)
+        FROM orders_orderitem a
+        JOIN orders_orderitem b ON a.order_id = b.order_id AND a.product_id < b.product_id
+        JOIN payments_payment p ON p.order_id = a.order_id AND p.status = 'completed'
+        GROUP BY a.product_id, b.product_id
+    '''
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        return {(a, b): count for a, b, count in cursor.fetchall()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--items', type=int, default=1_000_000)
+    parser.add_argument('--products', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--max-basket', type=int, default=6, help='Máximo de itens por pedido')
+    parser.add_argument('--skip-naive', action='store_true', help='Não executa o self-join')
+    args = parser.parse_args()
+
+    from reports.baskets import count_baskets, top_pairs
+    from reports.definitions import REPORTS
+    from reports.engine import ReportEngine, ReportFilters
+
+    with test_database():
+        created, _ = timed(f'populate ({args.items} itens)', lambda: populate(
+            args.items, args.products, args.seed, args.max_basket,
+        ))
+
+        filters = ReportFilters.from_query_params({})
+        definition = REPORTS['baskets']
+
+        def streaming():
+            engine = ReportEngine(filters)
+            data = engine.run(definition.sections(filters))
+            counts = count_baskets(data['baskets'])
+            return counts, top_pairs(counts, limit=10)
+
+        (counts, top), _ = timed('contagem em blocos (relatório)', streaming)
+        _, report_time = timed('relatório completo (build)', lambda: definition.build(
+            ReportEngine(filters).run(definition.sections(filters)), filters,
+        ))
+        print(f'pedidos: {counts.baskets}  pares distintos: {len(counts.pairs)}  '
+              f'pico de memória: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024} MB')
+
+        if not args.skip_naive:
+            naive, _ = timed('self-join no banco', naive_pairs)
+            status = 'OK' if naive == dict(counts.pairs) else 'DIVERGENTE'
+            print(f'conferência dos pares: {status}')
+
+        print('top 3:', [(pair, metrics['count'], round(metrics['lift'], 2)) for pair, metrics in top[:3]])
+
+
+if __name__ == '__main__':
+    main()
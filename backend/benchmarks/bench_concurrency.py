@@ -0,0 +1,235 @@
+"""
+Benchmark de concorrência: caixas gravando e leitores consultando ao mesmo tempo.
+
+Para cada perfil do banco, roda durante --duration segundos:
+- --writers threads fazendo o fluxo do caixa (criar pedido, adicionar item,
+  criar e finalizar o pagamento), como vários caixas simultâneos;
+- --readers threads lendo a listagem de pedidos e o relatório de vendas.
+
+Perfis comparados:
+- default: SQLite padrão (journal de rollback, sem busy_timeout além do
+  padrão do driver) e CONN_MAX_AGE=0, reabrindo a conexão a cada requisição;
+- production: perfil de core/sqlite.py (WAL, pragmas) e conexões persistentes.
+
+O banco é um arquivo temporário (o WAL não existe em memória), criado e
+removido a cada perfil. Cada requisição termina como num servidor: com
+close_old_connections(), que fecha ou reaproveita a conexão conforme
+CONN_MAX_AGE. Erros ("database is locked", status 5xx) são contados.
+
+Uso (a partir de backend/):
+    python benchmarks/bench_concurrency.py
+    python benchmarks/bench_concurrency.py --writers 8 --readers 8 --duration 20
+    python benchmarks/bench_concurrency.py --profiles production
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from common import BACKEND_DIR, setup_django, test_database, timed
+
+os.environ.setdefault('DEBUG', 'False')
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import close_old_connections, connections  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+from rest_framework_simplejwt.tokens import RefreshToken  # noqa: E402
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+
+PROFILES = {
+    'default': {'SQLITE_PROFILE': 'default', 'CONN_MAX_AGE': 0},
+    'production': {'SQLITE_PROFILE': 'production', 'CONN_MAX_AGE': 600},
+}
+
+
+def _client(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+def _ok(response):
+    if response.status_code >= 500:
+        detail = getattr(response, 'data', None) or {}
+        raise RuntimeError(f'status {response.status_code}: {detail.get("error", "")}')
+    return response
+
+
+def writer_round(clients, product_id):
+    """Um atendimento completo do caixa (4 requisições de escrita)."""
+    caixa = clients['caixa']
+    order = _ok(caixa.post('/api/orders/', {'notes': 'concorrência'}, format='json'))
+    order_id = order.data['data']['id']
+    _ok(caixa.post(f'/api/orders/{order_id}/add_item/',
+                   {'product_id': product_id, 'quantity': 1}, format='json'))
+    payment = _ok(caixa.post('/api/payments/', {'order': order_id, 'method': 'pix'}, format='json'))
+    _ok(caixa.post(f"/api/payments/{payment.data['data']['id']}/finalize/"))
+
+
+def reader_round(clients, product_id):
+    """Uma leitura do admin: listagem de pedidos e relatório de vendas."""
+    _ok(clients['admin'].get('/api/orders/'))
+    _ok(clients['admin'].get('/api/reports/sales/'))
+
+
+class Worker(threading.Thread):
+    def __init__(self, func, users, product_id, deadline):
+        super().__init__(daemon=True)
+        self.func = func
+        self.users = users
+        self.product_id = product_id
+        self.deadline = deadline
+        self.latencies = []
+        self.errors = {}
+
+    def run(self):
+        clients = {role: _client(user) for role, user in self.users.items()}
+        try:
+            while time.perf_counter() < self.deadline:
+                start = time.perf_counter()
+                try:
+                    self.func(clients, self.product_id)
+                    self.latencies.append((time.perf_counter() - start) * 1000)
+                except Exception as exc:
+                    message = str(exc).splitlines()[0][:80] or type(exc).__name__
+                    self.errors[message] = self.errors.get(message, 0) + 1
+                finally:
+                    # Fim da "requisição": como o handler WSGI faz
+                    close_old_connections()
+        finally:
+            connections.close_all()
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def _summary(workers, duration):
+    latencies = [latency for worker in workers for latency in worker.latencies]
+    errors = {}
+    for worker in workers:
+        for message, count in worker.errors.items():
+            errors[message] = errors.get(message, 0) + count
+    return {
+        'rounds': len(latencies),
+        'rounds_per_s': round(len(latencies) / duration, 2),
+        'p50_ms': round(statistics.median(latencies), 1) if latencies else 0.0,
+        'p95_ms': round(_percentile(latencies, 0.95), 1),
+        'errors': sum(errors.values()),
+        'error_messages': errors,
+    }
+
+
+def run_profile(name, args):
+    """Cria um banco em arquivo com o perfil `name` e mede a carga concorrente."""
+    database = settings.DATABASES['default']
+    for key, value in PROFILES[name].items():
+        if key == 'CONN_MAX_AGE':
+            database[key] = value
+        else:
+            setattr(settings, key, value)
+
+    with tempfile.TemporaryDirectory() as directory:
+        database['TEST']['NAME'] = os.path.join(directory, 'bench_concurrency.sqlite3')
+        with test_database():
+            with contextlib.redirect_stdout(io.StringIO()):
+                call_command('create_groups', stdout=io.StringIO())
+            timed(f'seed ({args.orders} pedidos)', lambda: call_command(
+                'seed_marmitaria', orders=args.orders, seed=args.seed, stdout=io.StringIO(),
+            ))
+            from core.models import Product
+            users = {
+                'admin': User.objects.filter(is_superuser=True).order_by('id').first(),
+                'caixa': User.objects.filter(groups__name='Caixa').order_by('id').first(),
+            }
+            product_id = Product.objects.filter(is_available=True).values_list('id', flat=True).first()
+            connections.close_all()
+
+            deadline = time.perf_counter() + args.duration
+            writers = [Worker(writer_round, users, product_id, deadline) for _ in range(args.writers)]
+            readers = [Worker(reader_round, users, product_id, deadline) for _ in range(args.readers)]
+            started = time.perf_counter()
+            # As views ainda imprimem mensagens de debug; redirect_stdout troca
+            # o sys.stdout do processo, então envolve todas as threads
+            with contextlib.redirect_stdout(io.StringIO()):
+                for worker in writers + readers:
+                    worker.start()
+                for worker in writers + readers:
+                    worker.join()
+            elapsed = time.perf_counter() - started
+            connections.close_all()
+
+    return {
+        'writers': _summary(writers, elapsed),
+        'readers': _summary(readers, elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--profiles', default='default,production',
+                        help='Perfis a comparar, separados por vírgula (padrão: default,production)')
+    parser.add_argument('--writers', type=int, default=4, help='Threads do caixa (padrão: 4)')
+    parser.add_argument('--readers', type=int, default=4, help='Threads de leitura (padrão: 4)')
+    parser.add_argument('--duration', type=float, default=10, help='Segundos por perfil (padrão: 10)')
+    parser.add_argument('--orders', type=int, default=5000, help='Pedidos na base (padrão: 5000)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Arquivo JSON de saída (padrão: benchmarks/results/)')
+    args = parser.parse_args()
+
+    if connections['default'].vendor != 'sqlite':
+        parser.error('o benchmark compara perfis do SQLite (DB_ENGINE=sqlite)')
+    profiles = [name.strip() for name in args.profiles.split(',') if name.strip()]
+    unknown = set(profiles) - set(PROFILES)
+    if unknown:
+        parser.error(f'perfis desconhecidos: {", ".join(sorted(unknown))}')
+
+    # Mede o banco, não o cache dos relatórios
+    settings.REPORT_CACHE_ENABLED = False
+    output = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'writers': args.writers,
+            'readers': args.readers,
+            'duration_s': args.duration,
+            'orders': args.orders,
+        },
+        'results': {},
+    }
+    for name in profiles:
+        print(f'\n== perfil {name}: {args.writers} caixas, {args.readers} leitores, {args.duration:g}s ==')
+        result = output['results'][name] = run_profile(name, args)
+        for role, label in (('writers', 'atendimentos'), ('readers', 'leituras')):
+            summary = result[role]
+            print(f'  {label:<13} {summary["rounds"]:6d}  {summary["rounds_per_s"]:8.1f}/s  '
+                  f'p50 {summary["p50_ms"]:7.1f} ms  p95 {summary["p95_ms"]:7.1f} ms  '
+                  f'erros {summary["errors"]}')
+            for message, count in summary['error_messages'].items():
+                print(f'    {count:5d}x {message}')
+
+    if args.output:
+        path = args.output
+    else:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f'bench_concurrency_{datetime.now():%Y%m%d_%H%M%S}.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+    print(f'\nResultado gravado em {path}')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
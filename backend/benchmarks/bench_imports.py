@@ -0,0 +1,228 @@
+"""
+Tempo de import da inicialização do aplicativo desktop.
+
+Roda o caminho de inicialização do servidor do desktop (app_desktop.py sem a
+janela: django.setup(), bootstrap, servidor, aplicação WSGI e URLconf) num
+processo novo com `python -X importtime`, várias vezes, e mostra:
+- o tempo total de import (mediana das execuções);
+- os pacotes e os módulos que mais custam (tempo próprio, sem os filhos);
+- os módulos mais caros pelo tempo acumulado (com tudo o que importam).
+
+O resultado é gravado em JSON e pode ser comparado com um baseline salvo: o
+processo termina com código 1 se o tempo total passar do limite.
+
+Uso (a partir de backend/):
+    python benchmarks/bench_imports.py
+    python benchmarks/bench_imports.py --qt
+    python benchmarks/bench_imports.py --baseline benchmarks/baseline_imports.json
+    python benchmarks/bench_imports.py --update-baseline
+
+--qt inclui os imports do PyQt6 (precisa estar instalado). A primeira
+execução, que pode compilar .pyc, é descartada. Os tempos dependem da
+máquina: gere um baseline próprio antes de comparar em outro ambiente.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from datetime import datetime
+
+from common import BACKEND_DIR
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+DEFAULT_BASELINE = os.path.join(BACKEND_DIR, 'benchmarks', 'baseline_imports.json')
+
+# O que o desktop importa antes de mostrar a primeira página
+DESKTOP_ENTRY = '''
+import os
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'marmitaria.settings')
+os.environ.setdefault('ADMIN_ENABLED', 'False')
+import django
+django.setup()
+from core.bootstrap import StartupTimer, prepare_database
+from core.server import Server
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+get_wsgi_application()
+get_resolver().url_patterns
+'''
+
+QT_IMPORTS = '''
+from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QMessageBox
+from PyQt6.QtWebEngineWidgets import QWebEngineView
+from PyQt6.QtCore import QUrl, pyqtSignal, QObject
+from PyQt6.QtGui import QIcon
+'''
+
+
+def parse_importtime(output):
+    """
+    Linhas do -X importtime: [(módulo, próprio µs, acumulado µs, nível)].
+
+    O nível é a profundidade na árvore de imports (0 = importado direto
+    pelo código medido).
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((name.strip(), int(own), int(cumulative), depth))
+    return modules
+
+
+def run_entry(code, env):
+    """Executa o código num processo novo; retorna os módulos importados."""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        sys.stderr.write(completed.stderr[-2000:])
+        raise SystemExit(f'O código medido terminou com erro ({completed.returncode}).')
+    return parse_importtime(completed.stderr)
+
+
+def summarize(runs, top):
+    """Mediana do total e os módulos/pacotes mais caros da execução mediana."""
+    totals = [sum(own for _, own, _, _ in modules) / 1000 for modules in runs]
+    median_run = sorted(zip(totals, range(len(runs))))[len(runs) // 2][1]
+    modules = runs[median_run]
+
+    packages = defaultdict(int)
+    for name, own, _, _ in modules:
+        packages[name.split('.')[0]] += own
+
+    def ms(value):
+        return round(value / 1000, 2)
+
+    return {
+        'import_ms': round(statistics.median(totals), 1),
+        'import_ms_max': round(max(totals), 1),
+        'modules': len(modules),
+        'packages': [
+            {'name': name, 'own_ms': ms(own)}
+            for name, own in sorted(packages.items(), key=lambda item: -item[1])[:top]
+        ],
+        'slowest_own': [
+            {'name': name, 'own_ms': ms(own)}
+            for name, own, _, _ in sorted(modules, key=lambda module: -module[1])[:top]
+        ],
+        'slowest_cumulative': [
+            {'name': name, 'cumulative_ms': ms(cumulative)}
+            for name, _, cumulative, depth in sorted(modules, key=lambda module: -module[2])
+            if depth <= 1
+        ][:top],
+    }
+
+
+def print_summary(result):
+    print(f'\nImport total: {result["import_ms"]:.1f} ms (máx. {result["import_ms_max"]:.1f} ms), '
+          f'{result["modules"]} módulos')
+    print('\nPacotes (tempo próprio):')
+    for item in result['packages']:
+        print(f'  {item["name"]:<40} {item["own_ms"]:8.2f} ms')
+    print('\nMódulos (tempo próprio):')
+    for item in result['slowest_own']:
+        print(f'  {item["name"]:<40} {item["own_ms"]:8.2f} ms')
+    print('\nMódulos (acumulado, imports diretos):')
+    for item in result['slowest_cumulative']:
+        print(f'  {item["name"]:<40} {item["cumulative_ms"]:8.2f} ms')
+
+
+def compare(current, baseline, threshold, min_ms):
+    """
+    Regressão quando o total passa de baseline x (1 + threshold) e a
+    diferença é maior que min_ms.
+
+    Returns:
+        Lista de mensagens de regressão
+    """
+    base = baseline.get('results')
+    if not base:
+        print('Baseline sem resultado; comparação ignorada.')
+        return []
+    if current['meta']['qt'] != baseline['meta'].get('qt', False):
+        print('Baseline medido com outro --qt; comparação ignorada.')
+        return []
+    result = current['results']
+    regressions = []
+    if (result['import_ms'] > base['import_ms'] * (1 + threshold)
+            and result['import_ms'] - base['import_ms'] > min_ms):
+        regressions.append(f'import total {base["import_ms"]:.1f} -> {result["import_ms"]:.1f} ms')
+        # Pista do que mudou: pacotes que entraram no ranking
+        new = sorted({item['name'] for item in result['packages']} - {item['name'] for item in base['packages']})
+        if new:
+            regressions.append(f'pacotes novos entre os mais caros: {", ".join(new)}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=7, help='Execuções medidas (padrão: 7)')
+    parser.add_argument('--top', type=int, default=15, help='Linhas de cada ranking (padrão: 15)')
+    parser.add_argument('--qt', action='store_true', help='Inclui os imports do PyQt6')
+    parser.add_argument('--output', help='Arquivo JSON de saída (padrão: benchmarks/results/)')
+    parser.add_argument('--baseline', help='Baseline para comparação (ex.: benchmarks/baseline_imports.json)')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help=f'Grava o resultado como baseline ({DEFAULT_BASELINE})')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Aumento relativo do tempo total tolerado (padrão: 0.2)')
+    parser.add_argument('--min-ms', type=float, default=20.0,
+                        help='Diferença mínima considerada regressão (padrão: 20 ms)')
+    args = parser.parse_args()
+
+    code = DESKTOP_ENTRY + (QT_IMPORTS if args.qt else '')
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+
+    # Aquecimento: grava os .pyc e carrega o cache de disco
+    run_entry(code, env)
+    runs = []
+    for index in range(args.repeat):
+        runs.append(run_entry(code, env))
+        print(f'execução {index + 1}/{args.repeat}: '
+              f'{sum(own for _, own, _, _ in runs[-1]) / 1000:8.1f} ms')
+
+    output = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'qt': args.qt,
+        },
+        'results': summarize(runs, args.top),
+    }
+    print_summary(output['results'])
+
+    if args.update_baseline:
+        path = DEFAULT_BASELINE
+    elif args.output:
+        path = args.output
+    else:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f'bench_imports_{datetime.now():%Y%m%d_%H%M%S}.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+    print(f'\nResultado gravado em {path}')
+
+    if args.baseline and not args.update_baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(output, baseline, args.threshold, args.min_ms)
+        if regressions:
+            print('\nRegressões em relação ao baseline:')
+            for message in regressions:
+                print(f'  - {message}')
+            sys.exit(1)
+        print('\nSem regressões em relação ao baseline.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark do renderer JSON da API (core/renderers.py).
+
+Gera uma base com o seed_marmitaria, busca pela API a lista de pedidos e
+cada relatório (os dados da resposta, antes de virar JSON) e mede só a
+renderização desses dados com o JSONRenderer do DRF e com o
+FastJSONRenderer (orjson), verificando que os dois geram o mesmo JSON.
+
+Uso (a partir de backend/):
+    python benchmarks/bench_renderers.py
+    python benchmarks/bench_renderers.py --orders 10000 --repeat 50
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import time
+from datetime import datetime
+
+from common import BACKEND_DIR, setup_django, test_database, timed
+
+os.environ.setdefault('DEBUG', 'False')
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+from rest_framework_simplejwt.tokens import RefreshToken  # noqa: E402
+
+from core import renderers  # noqa: E402
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+
+REPORTS = ['dashboard', 'sales', 'products', 'orders', 'financial', 'expenses',
+           'heatmap', 'baskets', 'forecast']
+
+
+def build_cases():
+    """(nome, caminho) dos endpoints medidos."""
+    cases = [('orders.list', '/api/orders/')]
+    cases += [(f'reports.{name}', f'/api/reports/{name}/') for name in REPORTS]
+    cases.append(('reports.batch', '/api/reports/batch/?reports=' + ','.join(REPORTS[:6])))
+    return cases
+
+
+def render_time(renderer, data, repeat):
+    """Mediana em ms de `repeat` renderizações."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        renderer.render(data)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def run(orders, repeat, seed):
+    results = {}
+    with test_database():
+        with contextlib.redirect_stdout(io.StringIO()):
+            call_command('create_groups', stdout=io.StringIO())
+        timed(f'seed ({orders} pedidos)', lambda: call_command(
+            'seed_marmitaria', orders=orders, seed=seed, stdout=io.StringIO(),
+        ))
+        client = APIClient()
+        admin = User.objects.filter(is_superuser=True).order_by('id').first()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(admin).access_token}')
+
+        stdlib, fast = JSONRenderer(), renderers.FastJSONRenderer()
+        for name, path in build_cases():
+            with contextlib.redirect_stdout(io.StringIO()):
+                response = client.get(path)
+            if response.status_code != 200:
+                print(f'  {name:<22} status {response.status_code}; ignorado')
+                continue
+            data = response.data
+            expected = stdlib.render(data)
+            if fast.render(data) != expected:
+                raise SystemExit(f'{name}: JSON diferente do JSONRenderer')
+            stdlib_ms = render_time(stdlib, data, repeat)
+            fast_ms = render_time(fast, data, repeat)
+            results[name] = {
+                'bytes': len(expected),
+                'stdlib_ms': round(stdlib_ms, 3),
+                'fast_ms': round(fast_ms, 3),
+                'speedup': round(stdlib_ms / fast_ms, 2) if fast_ms else None,
+            }
+            print(f'  {name:<22} {len(expected):9d} bytes  json {stdlib_ms:8.3f} ms  '
+                  f'rápido {fast_ms:8.3f} ms  {results[name]["speedup"]:5.1f}x')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--orders', type=int, default=10000, help='Pedidos na base (padrão: 10000)')
+    parser.add_argument('--repeat', type=int, default=20, help='Renderizações por caso (padrão: 20)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Arquivo JSON de saída (padrão: benchmarks/results/)')
+    args = parser.parse_args()
+
+    if renderers.orjson is None:
+        print('orjson não instalado: FastJSONRenderer usa o json padrão.')
+    settings.REPORT_CACHE_ENABLED = False
+
+    output = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'orjson': getattr(renderers.orjson, '__version__', None),
+            'platform': platform.platform(),
+            'orders': args.orders,
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'results': run(args.orders, args.repeat, args.seed),
+    }
+
+    path = args.output
+    if not path:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f'bench_renderers_{datetime.now():%Y%m%d_%H%M%S}.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+    print(f'\nResultado gravado em {path}')
+
+
+if __name__ == '__main__':
+    main()
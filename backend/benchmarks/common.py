@@ -0,0 +1,46 @@
+"""
+Utilitários compartilhados pelos benchmarks.
+
+Os benchmarks rodam fora do manage.py: configuram o Django, criam um banco
+de teste temporário (nunca tocam no db.sqlite3 real) e o removem no fim.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django():
+    """Configura o Django com as settings do projeto."""
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'marmitaria.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Cria um banco de teste com as migrações aplicadas e o remove no fim."""
+    from django.conf import settings
+    from django.test.utils import get_runner, setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    runner = get_runner(settings)(verbosity=0, interactive=False)
+    old_config = runner.setup_databases()
+    try:
+        yield
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+
+def timed(label, func):
+    """Executa func, imprime o tempo gasto e retorna (resultado, segundos)."""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f'{label:<32} {elapsed:8.2f}s')
+    return result, elapsed
@@ -3,3 +3,14 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        """
+        Método chamado quando o app está pronto.
+        Importa os signals para que sejam registrados e funcionem e monta
+        o manifesto dos estáticos, fora do caminho das requisições.
+        """
+        import core.signals  # noqa
+        from core.static import manifest
+
+        manifest.rebuild()
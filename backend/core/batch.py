@@ -0,0 +1,268 @@
+"""
+Lote de chamadas da API: POST /api/batch/ (BatchView em core/views.py).
+
+O fechamento de uma venda no CaixaPanel encadeia várias chamadas (atualizar
+o pedido, recarregá-lo, criar o pagamento, finalizar); cada uma repete, no
+servidor, a decodificação do JWT, a busca do usuário e as consultas de
+permissão, e, no cliente, uma ida e volta pela rede. O lote executa uma
+lista ordenada de operações nas próprias views da API, no mesmo processo e
+numa única requisição:
+
+    {
+        "atomic": true,
+        "operations": [
+            {"id": "pedido", "method": "POST", "path": "/orders/", "body": {"notes": ""}},
+            {"method": "POST", "path": "/orders/{{pedido.data.id}}/add_item/",
+             "body": {"product_id": 3, "quantity": 2}},
+            {"id": "pagamento", "method": "POST", "path": "/payments/",
+             "body": {"order": "{{pedido.data.id}}", "method": "pix"}},
+            {"method": "POST", "path": "/payments/{{pagamento.data.id}}/finalize/"},
+            {"method": "GET", "path": "/orders/{{pedido.data.id}}/", "params": {"view": "compact"}}
+        ]
+    }
+
+- path: rota da API, com ou sem o prefixo /api (o mesmo caminho usado pelo
+  cliente axios); params vão para a query string e body vai como JSON.
+- Referências {{operação.caminho}} em path, params e body: a operação pelo
+  `id` ou pela posição (0, 1, ...) e o caminho com '.' dentro do corpo da
+  resposta dela. Um valor que é só a referência mantém o tipo (número,
+  objeto); dentro de um texto vira texto. Uma operação que depende de outra
+  que falhou não é executada (status 424).
+- atomic: todas as operações numa transação só (core/transactions.py), que
+  é desfeita na primeira operação com status >= 400; as seguintes não são
+  executadas. Sem atomic, cada escrita tem sua própria transação, como nas
+  chamadas avulsas, e as operações independentes seguem depois de uma falha.
+
+A autenticação é a da requisição do lote: o usuário e o token são repassados
+às operações (o JWT é decodificado uma vez) e os grupos do usuário ficam em
+cache na instância (core.permissions.group_names). Leituras dentro do lote
+atômico veem as escritas das operações anteriores.
+
+Respostas em streaming (exportações CSV) não entram no lote.
+"""
+import json
+import logging
+import re
+from io import BytesIO
+from urllib.parse import unquote_to_bytes, urlencode, urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.urls import Resolver404, resolve
+from rest_framework import serializers, status
+from rest_framework.utils.encoders import JSONEncoder
+
+from .transactions import run_write_transaction
+
+logger = logging.getLogger('marmitaria.batch')
+
+METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+API_PREFIX = '/api/'
+
+# {{pedido.data.id}}, {{0.data.items.0.id}}
+REFERENCE = re.compile(r'\{\{\s*([\w-]+)((?:\.[\w-]+)*)\s*\}\}')
+
+# Entradas do META da requisição do lote que não valem para as operações:
+# corpo, rota, requisição condicional e a autenticação (repassada pronta)
+_SKIPPED_META = {
+    'REQUEST_METHOD', 'PATH_INFO', 'QUERY_STRING', 'CONTENT_TYPE', 'CONTENT_LENGTH',
+    'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE', 'HTTP_AUTHORIZATION', 'wsgi.input',
+}
+
+
+class OperationSerializer(serializers.Serializer):
+    id = serializers.RegexField(r'^[A-Za-z_][\w-]*$', max_length=64, required=False)
+    method = serializers.ChoiceField(choices=METHODS, default='GET')
+    path = serializers.CharField(max_length=2048)
+    params = serializers.DictField(required=False)
+    body = serializers.JSONField(required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    operations = OperationSerializer(many=True, allow_empty=False)
+    atomic = serializers.BooleanField(default=False)
+
+    def validate_operations(self, operations):
+        limit = settings.BATCH_MAX_OPERATIONS
+        if len(operations) > limit:
+            raise serializers.ValidationError(f'Máximo de {limit} operações por lote.')
+        ids = [operation['id'] for operation in operations if 'id' in operation]
+        duplicated = sorted({name for name in ids if ids.count(name) > 1})
+        if duplicated:
+            raise serializers.ValidationError(f'id repetido: {", ".join(duplicated)}')
+        return operations
+
+
+class OperationError(Exception):
+    """Operação que não chegou a ser executada (referência inválida, rota...)."""
+
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _Rollback(Exception):
+    """Desfaz o lote atômico, levando os resultados até a falha."""
+
+    def __init__(self, results):
+        super().__init__()
+        self.results = results
+
+
+def _lookup(match, results):
+    name, path = match.group(1), match.group(2).split('.')[1:]
+    result = results.get(name)
+    if result is None:
+        raise OperationError(f'Referência a uma operação inexistente ou posterior: {match.group(0)}')
+    if result['status'] >= 400:
+        raise OperationError(
+            f'A operação {name} falhou (status {result["status"]})',
+            status.HTTP_424_FAILED_DEPENDENCY,
+        )
+    value = result['body']
+    for key in path:
+        try:
+            value = value[int(key)] if isinstance(value, list) else value[key]
+        except (KeyError, IndexError, TypeError, ValueError):
+            raise OperationError(f'Referência inválida: {match.group(0)}') from None
+    return value
+
+
+def resolve_references(value, results):
+    """
+    Troca as referências {{operação.caminho}} de `value` (texto, dict, list)
+    pelos valores nos resultados já obtidos ({nome ou posição: resultado}).
+    """
+    if isinstance(value, str):
+        match = REFERENCE.fullmatch(value.strip())
+        if match:
+            return _lookup(match, results)
+        return REFERENCE.sub(lambda match: str(_lookup(match, results)), value)
+    if isinstance(value, dict):
+        return {key: resolve_references(item, results) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_references(item, results) for item in value]
+    return value
+
+
+def _api_path(path, params):
+    """(caminho com /api/, query string) de uma operação."""
+    parts = urlsplit(path.strip())
+    route = parts.path
+    if not route.startswith(API_PREFIX):
+        route = API_PREFIX + route.lstrip('/')
+    query = [parts.query] if parts.query else []
+    if params:
+        query.append(urlencode(params, doseq=True))
+    return route, '&'.join(query)
+
+
+class BatchRunner:
+    """Executa as operações validadas por BatchSerializer em nome de `request`."""
+
+    def __init__(self, request, operations, atomic=False):
+        self.request = request
+        self.operations = operations
+        self.atomic = atomic
+
+    def run(self):
+        """(resultados, desfeito): desfeito só no lote atômico com falha."""
+        if not self.atomic:
+            return self._execute(), False
+        try:
+            return run_write_transaction(self._execute_atomic, 'BatchView'), False
+        except _Rollback as rollback:
+            return rollback.results, True
+
+    def _execute_atomic(self):
+        # atomic() explícito: dentro de uma transação já aberta (testes),
+        # run_write_transaction não abre outra e a falha precisa de um savepoint
+        with transaction.atomic():
+            results = self._execute()
+            if any(result['status'] >= 400 for result in results):
+                raise _Rollback(results)
+        return results
+
+    def _execute(self):
+        results = []
+        by_name = {}
+        failed = None
+        for index, operation in enumerate(self.operations):
+            if failed is not None and self.atomic:
+                status_code, body = status.HTTP_424_FAILED_DEPENDENCY, {
+                    'success': False,
+                    'error': f'Não executada: a operação {failed} falhou e o lote foi desfeito.',
+                }
+            else:
+                status_code, body = self._run_operation(operation, by_name)
+            result = {'status': status_code, 'body': body}
+            if 'id' in operation:
+                result = {'id': operation['id'], **result}
+                by_name[operation['id']] = result
+            by_name[str(index)] = result
+            results.append(result)
+            if status_code >= 400 and failed is None:
+                failed = operation.get('id', index)
+        return results
+
+    def _run_operation(self, operation, results):
+        method = operation['method']
+        try:
+            path = resolve_references(operation['path'], results)
+            params = resolve_references(operation.get('params'), results)
+            body = resolve_references(operation['body'], results) if 'body' in operation else None
+            route, query = _api_path(path, params)
+            request, match = self._build_request(method, route, query, body)
+        except OperationError as exc:
+            return exc.status_code, {'success': False, 'error': str(exc)}
+
+        try:
+            response = match.func(request, *match.args, **match.kwargs)
+        except Exception:
+            logger.exception('Erro na operação %s %s do lote', method, route)
+            return status.HTTP_500_INTERNAL_SERVER_ERROR, {
+                'success': False, 'error': 'Erro interno ao executar a operação.',
+            }
+        if response.streaming:
+            return status.HTTP_400_BAD_REQUEST, {
+                'success': False, 'error': 'Respostas em streaming (exportações) não entram no lote.',
+            }
+        return response.status_code, self._response_body(response)
+
+    def _build_request(self, method, route, query, body):
+        try:
+            match = resolve(route)
+        except Resolver404:
+            raise OperationError(f'Rota não encontrada: {route}', status.HTTP_404_NOT_FOUND) from None
+        if match.url_name == 'batch':
+            raise OperationError('Um lote não pode conter outro lote.')
+
+        data = b'' if body is None else json.dumps(body, cls=JSONEncoder).encode()
+        environ = {key: value for key, value in self.request.META.items() if key not in _SKIPPED_META}
+        environ.update({
+            'REQUEST_METHOD': method,
+            # WSGI: caminho em bytes decodificado como latin-1 (o Django refaz o UTF-8)
+            'PATH_INFO': unquote_to_bytes(route).decode('iso-8859-1'),
+            'QUERY_STRING': query,
+            'CONTENT_LENGTH': str(len(data)),
+            'wsgi.input': BytesIO(data),
+        })
+        if body is not None:
+            environ['CONTENT_TYPE'] = 'application/json'
+        request = WSGIRequest(environ)
+        request.resolver_match = match
+        # Autenticação do lote: o DRF usa ForcedAuthentication com estes atributos
+        request._force_auth_user = self.request.user
+        request._force_auth_token = self.request.auth
+        return request, match
+
+    @staticmethod
+    def _response_body(response):
+        if hasattr(response, 'data'):
+            # Response do DRF: os dados, sem renderizar e reler o JSON
+            return response.data
+        content = response.content.decode(response.charset)
+        if response.get('Content-Type', '').startswith('application/json'):
+            return json.loads(content)
+        return content
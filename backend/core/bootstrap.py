@@ -0,0 +1,201 @@
+"""
+Inicialização rápida do aplicativo desktop.
+
+A cada abertura o desktop rodava `migrate`, `create_groups` e a verificação
+do admin antes de subir o servidor, mesmo sem nada a fazer. Agora a
+impressão digital do schema (migrações aplicadas no banco, segundo a
+tabela django_migrations, + APP_VERSION) fica gravada no próprio banco
+(core.AppState) depois de um migrate bem-sucedido e de uma preparação
+completa. Se todas as migrações do pacote já estão aplicadas e a
+impressão digital gravada é igual à atual, o banco já está pronto e a
+preparação se resume a duas consultas.
+
+Banco novo, migração nova (ou desfeita por fora), versão nova ou
+preparação que falhou: falta migração ou a impressão digital difere e
+tudo roda de novo.
+
+StartupTimer mede as fases da inicialização (imports, Django, banco,
+servidor, frontend) para mostrar para onde vai o tempo de abertura.
+"""
+import hashlib
+import json
+import logging
+import os
+import pkgutil
+import threading
+import time
+from contextlib import contextmanager
+from importlib import import_module
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.recorder import MigrationRecorder
+from django.utils import timezone
+
+logger = logging.getLogger('marmitaria.startup')
+
+FINGERPRINT_KEY = 'schema_fingerprint'
+
+
+def migration_names():
+    """(app, migração) de todos os apps, pela lista de módulos (sem importar as migrações)."""
+    names = []
+    for app_config in apps.get_app_configs():
+        module_name, _ = MigrationLoader.migrations_module(app_config.label)
+        if module_name is None:
+            continue
+        try:
+            module = import_module(module_name)
+        except ImportError:
+            continue
+        path = getattr(module, '__path__', None)
+        if path is None:
+            continue
+        names.extend(
+            (app_config.label, name)
+            for _, name, is_package in pkgutil.iter_modules(path)
+            if not is_package and name[0] not in '_~'
+        )
+    return sorted(names)
+
+
+def applied_migrations(using='default'):
+    """(app, migração) aplicadas no banco; vazio se django_migrations não existe."""
+    try:
+        return set(MigrationRecorder.Migration.objects.using(using).values_list('app', 'name'))
+    except DatabaseError:
+        # Banco novo
+        return set()
+
+
+def schema_fingerprint(applied):
+    """Hash das migrações aplicadas e da versão do aplicativo."""
+    digest = hashlib.sha256(settings.APP_VERSION.encode('utf-8'))
+    for app_label, name in sorted(applied):
+        digest.update(f'\n{app_label}.{name}'.encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+
+def stored_fingerprint(using='default'):
+    """Impressão digital gravada no banco, ou None (banco novo ou antigo)."""
+    from core.models import AppState
+
+    try:
+        return AppState.objects.using(using).filter(key=FINGERPRINT_KEY).values_list('value', flat=True).first()
+    except DatabaseError:
+        # Tabela ainda não criada
+        return None
+
+
+def prepare_database(timer=None, using='default'):
+    """
+    Deixa o banco pronto para servir; retorna True se precisou preparar.
+
+    Caminho rápido: todas as migrações do pacote aplicadas e impressão
+    digital igual à gravada. Caso contrário roda migrate, cria os grupos
+    e o admin padrão e grava a impressão digital das migrações aplicadas
+    depois do migrate, só se tudo deu certo (um migrate que falha levanta
+    a exceção; uma falha nos grupos ou no admin repete na próxima abertura).
+    """
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+
+    from core.models import AppState
+
+    timer = timer or StartupTimer()
+    with timer.phase('banco: verificação'):
+        applied = applied_migrations(using)
+        ready = applied.issuperset(migration_names()) and stored_fingerprint(using) == schema_fingerprint(applied)
+    if ready:
+        return False
+
+    with timer.phase('banco: migrate'):
+        call_command('migrate', '--noinput', database=using, verbosity=0)
+        applied = applied_migrations(using)
+
+    complete = applied.issuperset(migration_names())
+    if not complete:
+        logger.warning('Migrações não aplicadas: %s', sorted(set(migration_names()) - applied))
+    with timer.phase('banco: grupos e admin'):
+        try:
+            call_command('create_groups', verbosity=0)
+        except Exception as e:
+            complete = False
+            logger.warning('Aviso ao criar grupos: %s', e)
+        try:
+            if not User.objects.using(using).filter(username='admin').exists():
+                call_command('create_default_admin', verbosity=0)
+        except Exception as e:
+            complete = False
+            logger.warning('Aviso ao criar admin: %s', e)
+
+    if complete:
+        AppState.objects.using(using).update_or_create(
+            key=FINGERPRINT_KEY, defaults={'value': schema_fingerprint(applied)},
+        )
+    return True
+
+
+class StartupTimer:
+    """
+    Fases da inicialização: (nome, início, duração) em ms a partir de
+    `started` (time.perf_counter() no começo do processo).
+
+    As fases podem vir de threads diferentes (janela e servidor) e se
+    sobrepor; o relatório mostra o início de cada uma e o total até finish().
+    """
+
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self.phases = []
+        self.total_ms = None
+        self._lock = threading.Lock()
+
+    def record(self, name, start, end=None):
+        end = time.perf_counter() if end is None else end
+        with self._lock:
+            self.phases.append((name, (start - self.started) * 1000, (end - start) * 1000))
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start)
+
+    def finish(self):
+        """Encerra a medição; grava e retorna o relatório."""
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+        self._write()
+        return self.report()
+
+    def report(self):
+        total = self.total_ms if self.total_ms is not None else (time.perf_counter() - self.started) * 1000
+        width = max([len(name) for name, _, _ in self.phases] + [5])
+        lines = [f'Inicialização: {total:.0f} ms']
+        for name, start, duration in sorted(self.phases, key=lambda phase: phase[1]):
+            lines.append(f'  {name:<{width}}  +{start:>6.0f} ms  {duration:>6.0f} ms')
+        return '\n'.join(lines)
+
+    def _write(self):
+        path = getattr(settings, 'STARTUP_LOG_FILE', '')
+        if not path:
+            return
+        entry = {
+            'time': timezone.now().isoformat(),
+            'version': settings.APP_VERSION,
+            'total_ms': round(self.total_ms, 1),
+            'phases': [
+                {'name': name, 'start_ms': round(start, 1), 'duration_ms': round(duration, 1)}
+                for name, start, duration in self.phases
+            ],
+        }
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as handle:
+                handle.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        except OSError as e:
+            logger.warning('Não foi possível gravar %s: %s', path, e)
@@ -0,0 +1,121 @@
+"""
+Compressão das respostas da API e das exportações (brotli ou gzip).
+
+Relatórios e listas de pedidos com itens passam de dezenas de KB; num
+terminal no Wi-Fi fraco ou no celular do dono isso pesa mais que o custo de
+CPU de comprimir. O CompressionMiddleware (core/middleware.py) comprime:
+- respostas de tipo textual (JSON, CSV, HTML, texto...); imagens, zip, PDF
+  e outros formatos já comprimidos ficam como estão;
+- a partir de COMPRESSION_MIN_SIZE bytes; respostas em streaming
+  sempre, parte a parte, sem juntar o conteúdo;
+- com brotli (se o pacote estiver instalado e o cliente aceitar) ou gzip,
+  nos níveis COMPRESSION_BROTLI_QUALITY e COMPRESSION_GZIP_LEVEL.
+
+FileResponse (estáticos, downloads) não passa por aqui: os estáticos já
+têm variantes pré-comprimidas (core/static.py) e perderiam o sendfile.
+
+Bytes antes/depois e o tempo de CPU gasto comprimindo vão para as métricas
+(core/metrics.py, GET /api/metrics).
+"""
+import time
+import zlib
+
+from django.conf import settings
+
+from . import metrics
+from .static import accepts_encoding
+
+try:
+    import brotli
+except ImportError:  # opcional: só gzip
+    brotli = None
+
+# Tipos que valem a pena comprimir; os demais (imagens, zip, PDF, fontes
+# woff2, octet-stream) já são comprimidos ou binários
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'application/x-ndjson',
+    'image/svg+xml',
+)
+COMPRESSIBLE_SUFFIXES = ('+json', '+xml')
+
+
+def compressible(content_type):
+    media_type = (content_type or '').split(';', 1)[0].strip().lower()
+    return media_type.startswith(COMPRESSIBLE_TYPES) or media_type.endswith(COMPRESSIBLE_SUFFIXES)
+
+
+def choose_encoding(request):
+    """'br', 'gzip' ou None, pelo Accept-Encoding da requisição."""
+    if brotli is not None and accepts_encoding(request, 'br'):
+        return 'br'
+    if accepts_encoding(request, 'gzip'):
+        return 'gzip'
+    return None
+
+
+class Compressor:
+    """Compressor incremental: compress() de cada parte e finish() no fim."""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._brotli = brotli.Compressor(quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4))
+        else:
+            # wbits=31: formato gzip (cabeçalho e CRC)
+            self._zlib = zlib.compressobj(getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6), zlib.DEFLATED, 31)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+
+    def _run(self, function, *args):
+        start = time.thread_time()
+        data = function(*args)
+        self.seconds += time.thread_time() - start
+        self.bytes_out += len(data)
+        return data
+
+    def compress(self, data):
+        """Comprime uma parte; devolve o que o compressor já tem pronto."""
+        self.bytes_in += len(data)
+        if self.encoding == 'br':
+            return self._run(self._brotli.process, data)
+        return self._run(self._zlib.compress, data)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._run(self._brotli.finish)
+        return self._run(self._zlib.flush)
+
+    def record(self):
+        metrics.record_compression(self.encoding, self.bytes_in, self.bytes_out, self.seconds)
+
+
+def compress(data, encoding):
+    """Conteúdo inteiro comprimido (e registrado nas métricas)."""
+    compressor = Compressor(encoding)
+    compressed = compressor.compress(data) + compressor.finish()
+    compressor.record()
+    return compressed
+
+
+def compress_stream(chunks, encoding):
+    """
+    Partes comprimidas de uma resposta em streaming, sem juntar o
+    conteúdo: o compressor entrega um bloco sempre que acumula o bastante
+    (linhas de CSV uma a uma comprimiriam mal com flush a cada parte).
+    """
+    compressor = Compressor(encoding)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode(settings.DEFAULT_CHARSET)
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        compressor.record()
@@ -42,3 +42,20 @@ class ProductNotAvailableError(BusinessLogicError):
     default_detail = 'Produto não está disponível'
     default_code = 'product_not_available'
 
+
+
+class DatabaseBusyError(APIException):
+    """
+    Exceção quando o banco continua ocupado por outras escritas depois de
+    todas as tentativas (core/transactions.py).
+
+    Responde 503 com Retry-After: o cliente pode repetir a operação.
+    """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Banco de dados ocupado. Tente novamente.'
+    default_code = 'database_busy'
+
+    def __init__(self, detail=None, code=None, wait=1):
+        super().__init__(detail, code)
+        # DRF usa `wait` para o cabeçalho Retry-After
+        self.wait = wait
@@ -0,0 +1,147 @@
+"""
+Transporte em processo do aplicativo desktop.
+
+A WebView do desktop carrega o frontend pelo esquema marmitaria://app/ em
+vez de http://127.0.0.1:8000: cada requisição do esquema é entregue
+(app_desktop.py, QWebEngineUrlSchemeHandler) a WSGIDispatcher, que monta o
+environ WSGI e chama o handler do Django num pool de threads, sem socket,
+parsing de HTTP nem espera pela porta na inicialização.
+
+A resposta é repassada em partes, conforme o Django as produz (streaming
+das exportações CSV, FileResponse dos estáticos). A resposta de um esquema
+próprio não tem status HTTP (o Chromium sempre vê 200): o status real vai
+no cabeçalho X-Marmitaria-Status, lido pelo cliente da API do frontend.
+
+O servidor HTTP (core/server.py) continua disponível para terminais na rede
+(DESKTOP_HTTP_HOST) e como transporte da janela (DESKTOP_TRANSPORT='http').
+"""
+import io
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote_to_bytes, urlsplit
+
+from django.conf import settings
+
+logger = logging.getLogger('marmitaria.inprocess')
+
+SCHEME = 'marmitaria'
+HOST = 'app'
+URL = f'{SCHEME}://{HOST}/'
+
+STATUS_HEADER = 'X-Marmitaria-Status'
+
+# Cabeçalhos que não fazem sentido sem rede: sem compressão (a variante
+# .br/.gz dos estáticos não seria decodificada), sem controle de conexão e
+# sem requisição condicional (um 304 chegaria à página como 200 vazio)
+_SKIPPED_REQUEST_HEADERS = {
+    'accept-encoding', 'connection', 'keep-alive', 'host', 'if-none-match', 'if-modified-since',
+}
+_SKIPPED_RESPONSE_HEADERS = {'content-length', 'content-encoding', 'transfer-encoding', 'connection'}
+
+
+def build_environ(method, url, headers, body):
+    """environ WSGI de uma requisição do esquema."""
+    parts = urlsplit(url)
+    environ = {
+        'REQUEST_METHOD': method.upper(),
+        'SCRIPT_NAME': '',
+        # WSGI: caminho em bytes decodificado como latin-1 (o Django refaz o UTF-8)
+        'PATH_INFO': unquote_to_bytes(parts.path or '/').decode('iso-8859-1'),
+        'QUERY_STRING': parts.query,
+        'SERVER_NAME': parts.hostname or HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'HTTP_HOST': parts.hostname or HOST,
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(body or b''),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    if body:
+        environ['CONTENT_LENGTH'] = str(len(body))
+    for name, value in headers.items():
+        key = name.lower()
+        if key in _SKIPPED_REQUEST_HEADERS:
+            continue
+        if key == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif key != 'content-length':
+            environ['HTTP_' + key.upper().replace('-', '_')] = value
+    return environ
+
+
+class WSGIDispatcher:
+    """
+    Executa requisições no handler WSGI do Django num pool de threads.
+
+    A resposta sai por três callbacks, chamados na thread do pool:
+    - start(status, headers): antes da primeira parte do corpo (ou no fim,
+      se o corpo for vazio); headers inclui STATUS_HEADER;
+    - write(chunk): cada parte do corpo; retornar False cancela a resposta
+      (a WebView desistiu da requisição);
+    - finish(): sempre, no fim.
+    """
+
+    def __init__(self, application=None, workers=None):
+        if application is None:
+            from django.core.wsgi import get_wsgi_application
+
+            application = get_wsgi_application()
+        self.application = application
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers or settings.SERVER_THREADS, thread_name_prefix='marmitaria-inprocess',
+        )
+
+    def submit(self, method, url, headers, body, start, write, finish):
+        return self.executor.submit(self.dispatch, method, url, headers, body, start, write, finish)
+
+    def dispatch(self, method, url, headers, body, start, write, finish):
+        response = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            if exc_info and response.get('sent'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name, value) for name, value in response_headers
+                if name.lower() not in _SKIPPED_RESPONSE_HEADERS
+            ] + [(STATUS_HEADER, str(response['status']))]
+            return write
+
+        def send_headers():
+            if not response.get('sent'):
+                response['sent'] = True
+                start(response['status'], response['headers'])
+
+        try:
+            result = self.application(build_environ(method, url, headers, body), start_response)
+            try:
+                for chunk in result:
+                    if not chunk:
+                        continue
+                    send_headers()
+                    if write(chunk) is False:
+                        break
+                send_headers()
+            finally:
+                # Dispara request_finished (fecha a conexão do banco da thread)
+                close = getattr(result, 'close', None)
+                if close is not None:
+                    close()
+        except Exception:
+            logger.exception('Erro na requisição em processo %s %s', method, url)
+            if not response.get('sent'):
+                response['sent'] = True
+                start(500, [('Content-Type', 'text/plain; charset=utf-8'), (STATUS_HEADER, '500')])
+                write('Erro interno do servidor'.encode('utf-8'))
+        finally:
+            finish()
+
+    def shutdown(self, wait=True):
+        """Recusa novas requisições; com wait, espera as em andamento."""
+        self.executor.shutdown(wait=wait, cancel_futures=True)
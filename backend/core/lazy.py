@@ -0,0 +1,33 @@
+"""
+Views importadas só na primeira requisição.
+
+O URLconf é carregado na primeira requisição do processo (no aplicativo
+desktop, a do index.html que abre a janela). Com lazy_view, o módulo da
+view (e o que ele importa: motor de relatórios, simplejwt...) só é
+importado quando a rota é usada pela primeira vez.
+"""
+from importlib import import_module
+
+
+def lazy_view(module, name, **initkwargs):
+    """
+    View `module.name` carregada na primeira chamada.
+
+    Aceita views de função e classes com as_view() (initkwargs vão para o
+    as_view). Apenas para views do DRF, que já são isentas de CSRF (a
+    autenticação por sessão do DRF aplica o CSRF por conta própria).
+    """
+    resolved = None
+
+    def view(request, *args, **kwargs):
+        nonlocal resolved
+        if resolved is None:
+            target = getattr(import_module(module), name)
+            resolved = target.as_view(**initkwargs) if hasattr(target, 'as_view') else target
+        return resolved(request, *args, **kwargs)
+
+    view.__name__ = name
+    view.__qualname__ = name
+    view.__module__ = module
+    view.csrf_exempt = True
+    return view
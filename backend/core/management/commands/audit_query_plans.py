@@ -0,0 +1,129 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from core.query_plans import audit
+from core.slow_queries import normalize
+from core.testing import create_users, seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Audita os planos de execução das consultas dos relatórios e listagens '
+        'numa base gerada: aponta SCAN e TEMP B-TREE em tabelas grandes e sugere '
+        'índices compostos. Sai com erro se houver problemas (uso em CI)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--orders',
+            type=int,
+            default=2000,
+            help='Pedidos gerados na base de teste (padrão: 2000)',
+        )
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=1000,
+            help='Linhas a partir das quais uma tabela é considerada grande (padrão: 1000)',
+        )
+        parser.add_argument(
+            '--allow',
+            action='append',
+            default=[],
+            metavar='FINGERPRINT',
+            help='Fingerprint de consulta cujo plano é aceito (pode repetir)',
+        )
+        parser.add_argument(
+            '--format',
+            choices=('text', 'json'),
+            default='text',
+            help='Formato da saída (padrão: text)',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('A auditoria só interpreta o EXPLAIN QUERY PLAN do SQLite.')
+
+        # Base temporária: o banco real nunca é tocado
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(REPORT_CACHE_ENABLED=False):
+                audited, large_tables = self._audit(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        allowed = set(options['allow'])
+        problems = [query for query in audited if query.problems and query.fingerprint not in allowed]
+        if options['format'] == 'json':
+            self.stdout.write(json.dumps({
+                'large_tables': large_tables,
+                'queries': len(audited),
+                'problems': len(problems),
+                'findings': [{
+                    'fingerprint': query.fingerprint,
+                    'allowed': query.fingerprint in allowed,
+                    'sql': query.sql,
+                    'plan': query.plan,
+                    'sources': query.sources,
+                    'findings': [finding.as_dict() for finding in query.findings],
+                } for query in audited if query.findings],
+            }, ensure_ascii=False, indent=2))
+        else:
+            self._write_text(audited, problems, large_tables, allowed, options['verbosity'])
+
+        if problems:
+            raise CommandError(
+                f'{len(problems)} consulta(s) com SCAN, TEMP B-TREE ou busca parcial em tabelas grandes.'
+            )
+
+    def _audit(self, options):
+        admin, caixa = create_users()
+        seed(options['orders'])
+        return audit({'admin': admin, 'caixa': caixa}, options['min_rows'])
+
+    def _write_text(self, audited, problems, large_tables, allowed, verbosity):
+        self.stdout.write(
+            f'{len(audited)} consultas distintas; tabelas grandes: '
+            + (', '.join(f'{table} ({count})' for table, count in sorted(large_tables.items())) or 'nenhuma')
+        )
+        for query in problems:
+            self._write_query(query, self.style.WARNING)
+
+        # Leituras integrais sem filtro indexável e planos aceitos via --allow
+        others = [query for query in audited if query.findings and query not in problems]
+        if verbosity >= 2:
+            for query in others:
+                self._write_query(query, self.style.NOTICE)
+        elif others:
+            self.stdout.write(
+                f'\n{len(others)} consulta(s) leem tabelas grandes por inteiro sem filtro indexável '
+                'ou foram aceitas via --allow (detalhes com -v 2)'
+            )
+        if not problems:
+            self.stdout.write(self.style.SUCCESS('Nenhum índice faltando nas tabelas grandes.'))
+
+    def _write_query(self, query, style):
+        self.stdout.write('')
+        self.stdout.write(style(f'[{query.fingerprint}] {normalize(query.sql)[:300]}'))
+        for source in query.sources:
+            self.stdout.write(f'  origem: {source}')
+        self.stdout.write('  plano:')
+        for line in query.plan:
+            self.stdout.write(f'    {line}')
+        for finding in query.findings:
+            self.stdout.write(f'  {finding.kind}: {finding.detail}')
+            columns = ', '.join(finding.suggestion)
+            if finding.covered_by:
+                self.stdout.write(
+                    f'    o índice {finding.covered_by} já começa por ({columns}) e não foi usado: '
+                    'confira a seletividade ou funções aplicadas à coluna'
+                )
+            elif finding.suggestion:
+                self.stdout.write(f'    sugestão: CREATE INDEX ON {finding.table} ({columns})')
+            else:
+                self.stdout.write('    sem filtro indexável: a consulta precisa ler a tabela inteira')
@@ -0,0 +1,91 @@
+import gzip
+import os
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.static import COMPRESSIBLE, ENCODINGS, manifest, static_root
+
+try:
+    import brotli
+except ImportError:  # opcional: só gera as variantes .gz
+    brotli = None
+
+
+def _gzip(data):
+    # mtime=0: o mesmo arquivo gera sempre os mesmos bytes
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera as variantes pré-comprimidas (.br e .gz) dos arquivos estáticos '
+        'do frontend, servidas conforme o Accept-Encoding (core/static.py)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--root',
+            help='Diretório dos estáticos (padrão: STATIC_ROOT ou frontend/dist)',
+        )
+        parser.add_argument(
+            '--min-size',
+            type=int,
+            default=1024,
+            help='Tamanho mínimo em bytes para comprimir (padrão: 1024)',
+        )
+
+    def handle(self, *args, **options):
+        root = Path(options['root']) if options['root'] else static_root()
+        if not root.is_dir():
+            raise CommandError(f'Diretório de estáticos não encontrado: {root}')
+
+        compressors = {'gzip': _gzip}
+        if brotli is not None:
+            compressors['br'] = _brotli
+        else:
+            self.stdout.write(self.style.WARNING('Brotli não instalado: gerando apenas .gz'))
+
+        suffixes = {suffix for _, suffix in ENCODINGS}
+        written = skipped = 0
+        for directory, _, names in os.walk(root):
+            for name in sorted(names):
+                extension = os.path.splitext(name)[1].lower()
+                if extension in suffixes or extension not in COMPRESSIBLE:
+                    continue
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                if stat.st_size < options['min_size']:
+                    continue
+                data = None
+                for encoding, suffix in ENCODINGS:
+                    if encoding not in compressors:
+                        continue
+                    target = path + suffix
+                    if os.path.exists(target) and os.stat(target).st_mtime_ns >= stat.st_mtime_ns:
+                        skipped += 1
+                        continue
+                    if data is None:
+                        with open(path, 'rb') as handle:
+                            data = handle.read()
+                    compressed = compressors[encoding](data)
+                    if len(compressed) >= len(data):
+                        # Não compensa: sem variante, serve o original
+                        if os.path.exists(target):
+                            os.remove(target)
+                        continue
+                    with open(target, 'wb') as handle:
+                        handle.write(compressed)
+                    written += 1
+                    if options['verbosity'] >= 2:
+                        relative = Path(target).relative_to(root).as_posix()
+                        self.stdout.write(f'{relative}: {len(data)} -> {len(compressed)} bytes')
+
+        manifest.clear()
+        self.stdout.write(self.style.SUCCESS(
+            f'{written} variante(s) gerada(s), {skipped} já atualizada(s) em {root}'
+        ))
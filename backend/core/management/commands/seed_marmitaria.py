@@ -0,0 +1,357 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User, Group
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import DecimalField, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.models import Product, ProductCategory
+from expenses.models import Expense, ExpenseCategory
+from orders.models import Order, OrderItem, OrderStatus
+from payments.models import Payment, PaymentMethod, PaymentStatus
+
+
+# Cardápio usado quando os produtos ainda não existem: (nome, categoria, preço)
+CATALOG = [
+    ('Marmita de Frango Grelhado', ProductCategory.MARMITAS, '22.00'),
+    ('Marmita de Carne de Panela', ProductCategory.MARMITAS, '25.00'),
+    ('Marmita de Feijoada', ProductCategory.MARMITAS, '28.00'),
+    ('Marmita de Strogonoff', ProductCategory.MARMITAS, '24.00'),
+    ('Marmita de Peixe', ProductCategory.MARMITAS, '27.00'),
+    ('Marmita Vegetariana', ProductCategory.MARMITAS, '20.00'),
+    ('Marmita Fitness', ProductCategory.MARMITAS, '26.00'),
+    ('Refrigerante Lata', ProductCategory.BEBIDAS, '6.00'),
+    ('Suco Natural', ProductCategory.BEBIDAS, '8.00'),
+    ('Água Mineral', ProductCategory.BEBIDAS, '4.00'),
+    ('Pudim', ProductCategory.SOBREMESAS, '8.00'),
+    ('Mousse de Maracujá', ProductCategory.SOBREMESAS, '7.00'),
+    ('Brigadeiro', ProductCategory.SOBREMESAS, '3.50'),
+    ('Farofa Extra', ProductCategory.ACOMPANHAMENTOS, '5.00'),
+    ('Salada Extra', ProductCategory.ACOMPANHAMENTOS, '6.00'),
+]
+
+# Peso de cada hora do dia no volume de pedidos: pico no almoço e um
+# movimento menor no jantar
+HOUR_WEIGHTS = {
+    10: 3, 11: 14, 12: 28, 13: 20, 14: 7, 15: 2, 16: 1,
+    17: 2, 18: 6, 19: 9, 20: 6, 21: 2,
+}
+
+# Peso de cada dia da semana (0=segunda); domingo com pouco movimento
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.05, 1.05, 1.25, 1.1, 0.35]
+
+PAYMENT_METHOD_WEIGHTS = {
+    PaymentMethod.PIX: 40,
+    PaymentMethod.CASH: 18,
+    PaymentMethod.CREDIT_CARD: 20,
+    PaymentMethod.DEBIT_CARD: 17,
+    PaymentMethod.BANK_TRANSFER: 5,
+}
+
+DELIVERY_FEES = [Decimal('3.00'), Decimal('5.00'), Decimal('7.00')]
+
+# Faixas de valor das despesas por categoria (mínimo, máximo) e peso
+EXPENSE_RANGES = {
+    ExpenseCategory.INGREDIENTS: (80, 900, 45),
+    ExpenseCategory.UTILITIES: (60, 400, 8),
+    ExpenseCategory.RENT: (1500, 3500, 1),
+    ExpenseCategory.SALARY: (1200, 2500, 3),
+    ExpenseCategory.DELIVERY: (20, 150, 15),
+    ExpenseCategory.MARKETING: (50, 300, 4),
+    ExpenseCategory.MAINTENANCE: (50, 600, 4),
+    ExpenseCategory.SUPPLIES: (30, 250, 15),
+    ExpenseCategory.OTHER: (10, 200, 5),
+}
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Desliga auto_now/auto_now_add dos models durante o bloco, para que o
+    bulk_create grave as datas geradas em vez da hora atual.
+    """
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera dados sintéticos (produtos, pedidos, itens, pagamentos e despesas) '
+        'para testes de carga e de relatórios'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--orders',
+            type=int,
+            default=1000,
+            help='Número de pedidos a gerar (padrão: 1000)',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=90,
+            help='Período, em dias até hoje, em que os pedidos são distribuídos (padrão: 90)',
+        )
+        parser.add_argument(
+            '--expenses-per-day',
+            type=float,
+            default=2,
+            help='Média de despesas por dia (padrão: 2)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Pedidos por lote de inserção (padrão: 5000)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=None,
+            help='Semente do gerador aleatório, para gerar sempre os mesmos dados',
+        )
+
+    def handle(self, *args, **options):
+        orders = options['orders']
+        days = options['days']
+        batch_size = options['batch_size']
+        if orders < 0 or days < 1 or batch_size < 1:
+            raise CommandError('--orders deve ser >= 0; --days e --batch-size devem ser >= 1')
+
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.localtime()
+        self.start = (self.now - timedelta(days=days - 1)).replace(
+            hour=0, minute=0, second=0, microsecond=0,
+        )
+        self.days = days
+        started = time.perf_counter()
+
+        self.products = self._products()
+        self.customers = self._customers()
+
+        created = 0
+        next_id = (Order.objects.aggregate(max_id=Max('id'))['max_id'] or 0) + 1
+        with explicit_timestamps(Order, OrderItem, Payment, Expense):
+            while created < orders:
+                size = min(batch_size, orders - created)
+                self._create_batch(next_id, size)
+                next_id += size
+                created += size
+                self.stdout.write(f'  {created}/{orders} pedidos', ending='\r')
+                self.stdout.flush()
+            self.stdout.write('')
+            expenses = self._create_expenses(options['expenses_per_day'])
+        self._reset_sequences()
+
+        self.stdout.write('Recalculando consolidados dos relatórios...')
+        from reports.rollups import rebuild_daily_product_sales, rebuild_hourly_sales
+        rebuild_hourly_sales()
+        rebuild_daily_product_sales()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ {created} pedidos e {expenses} despesas gerados em '
+            f'{time.perf_counter() - started:.1f}s'
+        ))
+
+    def _products(self):
+        """Produtos disponíveis agrupados por categoria (cria o cardápio se faltar)."""
+        existing = set(Product.objects.values_list('name', flat=True))
+        Product.objects.bulk_create([
+            Product(name=name, category=category, price=Decimal(price))
+            for name, category, price in CATALOG
+            if name not in existing
+        ])
+        products = {}
+        for product_id, category, price in Product.objects.filter(is_available=True).values_list(
+            'id', 'category', 'price',
+        ):
+            products.setdefault(category, []).append((product_id, price))
+        if ProductCategory.MARMITAS not in products:
+            raise CommandError('Nenhuma marmita disponível para gerar pedidos.')
+        return products
+
+    def _customers(self):
+        """Usuários que registram os pedidos (caixas)."""
+        customers = list(User.objects.filter(groups__name='Caixa').values_list('id', flat=True))
+        if customers:
+            return customers
+        caixa_group = Group.objects.filter(name='Caixa').first()
+        for index in range(1, 4):
+            user, created = User.objects.get_or_create(username=f'caixa_seed_{index}')
+            if created:
+                user.set_unusable_password()
+                user.save(update_fields=['password'])
+            if caixa_group:
+                user.groups.add(caixa_group)
+            customers.append(user.id)
+        return customers
+
+    def _random_datetime(self):
+        """Data/hora local com pico no almoço e variação por dia da semana."""
+        rng = self.rng
+        while True:
+            day = self.start + timedelta(days=rng.randrange(self.days))
+            if rng.random() * max(WEEKDAY_WEIGHTS) <= WEEKDAY_WEIGHTS[day.weekday()]:
+                break
+        hour = rng.choices(list(HOUR_WEIGHTS), weights=list(HOUR_WEIGHTS.values()))[0]
+        moment = day.replace(hour=hour, minute=rng.randrange(60), second=rng.randrange(60))
+        # Pedidos de hoje não podem ficar no futuro
+        return min(moment, self.now - timedelta(minutes=rng.randrange(1, 30)))
+
+    def _pick(self, category):
+        return self.rng.choice(self.products[category])
+
+    def _items(self, order_id, created_at):
+        """Itens de um pedido: 1-2 marmitas e, às vezes, bebida/sobremesa/acompanhamento."""
+        rng = self.rng
+        chosen = {}
+        for _ in range(rng.choices([1, 2, 3], weights=[70, 25, 5])[0]):
+            product_id, price = self._pick(ProductCategory.MARMITAS)
+            chosen[product_id] = (price, chosen.get(product_id, (price, 0))[1] + 1)
+        for category, probability in (
+            (ProductCategory.BEBIDAS, 0.55),
+            (ProductCategory.SOBREMESAS, 0.25),
+            (ProductCategory.ACOMPANHAMENTOS, 0.15),
+        ):
+            if category in self.products and rng.random() < probability:
+                product_id, price = self._pick(category)
+                chosen[product_id] = (price, chosen.get(product_id, (price, 0))[1] + 1)
+        return [
+            OrderItem(
+                order_id=order_id, product_id=product_id, quantity=quantity,
+                price=price, created_at=created_at,
+            )
+            for product_id, (price, quantity) in chosen.items()
+        ]
+
+    def _create_batch(self, first_id, size):
+        rng = self.rng
+        methods = list(PAYMENT_METHOD_WEIGHTS)
+        method_weights = list(PAYMENT_METHOD_WEIGHTS.values())
+        recent = self.now - timedelta(hours=2)
+
+        orders, items, payments = [], [], []
+        for order_id in range(first_id, first_id + size):
+            created_at = self._random_datetime()
+            is_delivery = rng.random() < 0.4
+            is_open = created_at >= recent and rng.random() < 0.6
+            roll = rng.random()
+
+            if is_open:
+                status = rng.choice([OrderStatus.PENDING, OrderStatus.PREPARING, OrderStatus.READY])
+                payment_status = PaymentStatus.PENDING if roll < 0.3 else None
+            elif roll < 0.03:
+                status, payment_status = OrderStatus.CANCELLED, rng.choice(
+                    [None, PaymentStatus.FAILED, PaymentStatus.REFUNDED]
+                )
+            else:
+                status = OrderStatus.DELIVERED
+                payment_status = PaymentStatus.COMPLETED if roll < 0.98 else PaymentStatus.PENDING
+
+            orders.append(Order(
+                id=order_id,
+                customer_id=rng.choice(self.customers),
+                status=status,
+                is_open=is_open,
+                delivery_fee=rng.choice(DELIVERY_FEES) if is_delivery else Decimal('0.00'),
+                delivery_address='Endereço de entrega' if is_delivery else None,
+                created_at=created_at,
+                updated_at=created_at,
+            ))
+            items.extend(self._items(order_id, created_at))
+            if payment_status is not None:
+                paid_at = None
+                if payment_status == PaymentStatus.COMPLETED:
+                    paid_at = min(created_at + timedelta(minutes=rng.randint(1, 40)), self.now)
+                payments.append(Payment(
+                    order_id=order_id,
+                    method=rng.choices(methods, weights=method_weights)[0],
+                    status=payment_status,
+                    # Valor real calculado em SQL depois dos itens
+                    amount=Decimal('0.01'),
+                    paid_at=paid_at,
+                    created_at=created_at,
+                    updated_at=paid_at or created_at,
+                ))
+
+        last_id = first_id + size
+        with transaction.atomic():
+            # bulk_create não dispara signals nem save(): o total dos pedidos
+            # e o valor dos pagamentos são calculados em SQL a seguir
+            Order.objects.bulk_create(orders)
+            OrderItem.objects.bulk_create(items)
+            Payment.objects.bulk_create(payments)
+
+            item_totals = (
+                OrderItem.objects.filter(order_id=OuterRef('pk'))
+                .values('order_id')
+                .annotate(total=Sum(F('quantity') * F('price'), output_field=DecimalField()))
+                .values('total')
+            )
+            Order.objects.filter(pk__gte=first_id, pk__lt=last_id).update(
+                total=Coalesce(Subquery(item_totals), Value(Decimal('0.00'))),
+            )
+            order_amounts = Order.objects.filter(pk=OuterRef('order_id')).annotate(
+                amount=F('total') + F('delivery_fee'),
+            ).values('amount')
+            Payment.objects.filter(order_id__gte=first_id, order_id__lt=last_id).update(
+                amount=Subquery(order_amounts),
+            )
+
+    def _reset_sequences(self):
+        """
+        Os pedidos são gravados com id explícito (para ligar itens e
+        pagamentos sem reler o banco), o que não avança a sequência do
+        PostgreSQL: sem isso, o próximo Order.objects.create repetiria um id.
+        No SQLite não há o que fazer (a lista de comandos vem vazia).
+        """
+        statements = connection.ops.sequence_reset_sql(no_style(), [Order, OrderItem, Payment, Expense])
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def _create_expenses(self, per_day):
+        rng = self.rng
+        categories = list(EXPENSE_RANGES)
+        weights = [weight for _, _, weight in EXPENSE_RANGES.values()]
+        admin = User.objects.filter(is_superuser=True).order_by('id').first()
+
+        expenses = []
+        for offset in range(self.days):
+            day = self.start + timedelta(days=offset)
+            count = int(per_day) + (1 if rng.random() < per_day - int(per_day) else 0)
+            for _ in range(count):
+                category = rng.choices(categories, weights=weights)[0]
+                low, high, _ = EXPENSE_RANGES[category]
+                created_at = min(
+                    day.replace(hour=rng.randint(7, 18), minute=rng.randrange(60)),
+                    self.now,
+                )
+                expenses.append(Expense(
+                    user=admin,
+                    category=category,
+                    description=f'{category.label} - {created_at:%d/%m}',
+                    amount=Decimal(rng.randint(low * 100, high * 100)) / 100,
+                    created_at=created_at,
+                    updated_at=created_at,
+                ))
+        Expense.objects.bulk_create(expenses, batch_size=2000)
+        return len(expenses)
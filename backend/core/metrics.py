@@ -0,0 +1,206 @@
+"""
+Métricas por endpoint no formato de exposição do Prometheus.
+
+Para cada combinação (rota, método, status) são acumulados:
+- número de requisições;
+- histograma do tempo de resposta;
+- número de consultas ao banco e tempo gasto nelas.
+
+A coleta não usa lock no caminho da requisição: cada thread do servidor
+acumula num dicionário próprio, registrado uma única vez numa lista global.
+A exportação (GET /api/metrics) soma os dicionários de todas as threads;
+como cada um só é escrito pela própria thread, a leitura vê no máximo uma
+requisição "em andamento" com valores parciais, o que é aceitável para
+contadores monotônicos.
+
+O middleware (core.middleware.MetricsMiddleware) chama `record()`; a view
+(core.views.metrics_view) chama `render()`.
+
+As novas tentativas de escrita por lock do banco (core/transactions.py) são
+raras e ficam num contador único protegido por lock, por view. A compressão
+das respostas (core/compression.py) acumula, por codificação, respostas,
+bytes antes e depois e tempo de CPU, também sob lock (uma vez por resposta).
+"""
+import bisect
+import threading
+
+# Limites (segundos) dos buckets do histograma de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Posições do vetor acumulado por série
+_COUNT, _SECONDS, _QUERIES, _DB_SECONDS, _BUCKETS = 0, 1, 2, 3, 4
+
+_local = threading.local()
+_stores = []
+_stores_lock = threading.Lock()
+
+# {(view, desfecho): contagem}; desfecho 'retry' ou 'failure'
+_write_retries = {}
+_write_retries_lock = threading.Lock()
+
+# {codificação: [respostas, bytes antes, bytes depois, segundos de CPU]}
+_compression = {}
+_compression_lock = threading.Lock()
+
+
+def _thread_store():
+    """Dicionário de séries da thread atual (criado e registrado na 1ª vez)."""
+    try:
+        return _local.store
+    except AttributeError:
+        store = _local.store = {}
+        with _stores_lock:
+            _stores.append(store)
+        return store
+
+
+def record(route, method, status, seconds, queries, db_seconds):
+    """Acumula uma requisição na série (route, method, status) da thread atual."""
+    store = _thread_store()
+    key = (route, method, status)
+    series = store.get(key)
+    if series is None:
+        series = store[key] = [0, 0.0, 0, 0.0] + [0] * (len(LATENCY_BUCKETS) + 1)
+    series[_COUNT] += 1
+    series[_SECONDS] += seconds
+    series[_QUERIES] += queries
+    series[_DB_SECONDS] += db_seconds
+    # Bucket não cumulativo; acumulado na exportação (o último é +Inf)
+    series[_BUCKETS + bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+
+def _count_write(view, outcome):
+    with _write_retries_lock:
+        _write_retries[(view, outcome)] = _write_retries.get((view, outcome), 0) + 1
+
+
+def record_write_retry(view):
+    """Conta uma nova tentativa de escrita após lock do banco."""
+    _count_write(view, 'retry')
+
+
+def record_write_failure(view):
+    """Conta uma escrita abandonada depois de todas as tentativas."""
+    _count_write(view, 'failure')
+
+
+def write_retries():
+    """Cópia de {(view, desfecho): contagem}."""
+    with _write_retries_lock:
+        return dict(_write_retries)
+
+
+def record_compression(encoding, bytes_in, bytes_out, seconds):
+    """Acumula uma resposta comprimida."""
+    with _compression_lock:
+        totals = _compression.setdefault(encoding, [0, 0, 0, 0.0])
+        totals[0] += 1
+        totals[1] += bytes_in
+        totals[2] += bytes_out
+        totals[3] += seconds
+
+
+def compression():
+    """Cópia de {codificação: [respostas, bytes antes, bytes depois, segundos]}."""
+    with _compression_lock:
+        return {encoding: list(totals) for encoding, totals in _compression.items()}
+
+
+def snapshot():
+    """Soma as séries de todas as threads: {(route, method, status): vetor}."""
+    with _stores_lock:
+        stores = list(_stores)
+    totals = {}
+    for store in stores:
+        # dict.copy() é atômico sob o GIL, mesmo com a thread dona escrevendo
+        for key, series in store.copy().items():
+            total = totals.get(key)
+            if total is None:
+                totals[key] = list(series)
+            else:
+                for index, value in enumerate(series):
+                    total[index] += value
+    return totals
+
+
+def reset():
+    """Zera as métricas de todas as threads (usado nos testes)."""
+    with _stores_lock:
+        for store in _stores:
+            store.clear()
+    with _write_retries_lock:
+        _write_retries.clear()
+    with _compression_lock:
+        _compression.clear()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(key, **extra):
+    route, method, status = key
+    pairs = [('route', route), ('method', method), ('status', status), *extra.items()]
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """Texto no formato de exposição do Prometheus (versão 0.0.4)."""
+    totals = sorted(snapshot().items())
+    lines = []
+
+    def family(name, kind, help_text, position):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for key, series in totals:
+            lines.append(f'{name}{_labels(key)} {_number(series[position])}')
+
+    family('marmitaria_http_requests_total', 'counter',
+           'Requisições HTTP por rota, método e status.', _COUNT)
+
+    name = 'marmitaria_http_request_duration_seconds'
+    lines.append(f'# HELP {name} Tempo de resposta das requisições HTTP.')
+    lines.append(f'# TYPE {name} histogram')
+    for key, series in totals:
+        cumulative = 0
+        for index, bound in enumerate(LATENCY_BUCKETS + ('+Inf',)):
+            cumulative += series[_BUCKETS + index]
+            le = bound if bound == '+Inf' else _number(float(bound))
+            lines.append(f'{name}_bucket{_labels(key, le=le)} {cumulative}')
+        lines.append(f'{name}_sum{_labels(key)} {_number(series[_SECONDS])}')
+        lines.append(f'{name}_count{_labels(key)} {series[_COUNT]}')
+
+    family('marmitaria_db_queries_total', 'counter',
+           'Consultas ao banco executadas pelas requisições.', _QUERIES)
+    family('marmitaria_db_query_duration_seconds_total', 'counter',
+           'Tempo gasto em consultas ao banco pelas requisições.', _DB_SECONDS)
+
+    retries = sorted(write_retries().items())
+    for outcome, name, help_text in (
+        ('retry', 'marmitaria_db_write_retries_total',
+         'Novas tentativas de transações de escrita por banco ocupado.'),
+        ('failure', 'marmitaria_db_write_failures_total',
+         'Transações de escrita abandonadas (503) por banco ocupado.'),
+    ):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for (view, kind), count in retries:
+            if kind == outcome:
+                lines.append(f'{name}{{view="{_escape(view)}"}} {count}')
+
+    compressed = sorted(compression().items())
+    for position, name, help_text in (
+        (0, 'marmitaria_http_compressed_responses_total', 'Respostas comprimidas.'),
+        (1, 'marmitaria_http_compression_input_bytes_total', 'Bytes das respostas antes da compressão.'),
+        (2, 'marmitaria_http_compression_output_bytes_total', 'Bytes das respostas depois da compressão.'),
+        (3, 'marmitaria_http_compression_cpu_seconds_total', 'Tempo de CPU gasto comprimindo respostas.'),
+    ):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for encoding, totals in compressed:
+            lines.append(f'{name}{{encoding="{_escape(encoding)}"}} {_number(totals[position])}')
+    return '\n'.join(lines) + '\n'
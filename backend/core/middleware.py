@@ -1,10 +1,17 @@
 """
-Middleware customizado para tratamento de exceções e logging.
+Middleware customizado para tratamento de exceções, logging e métricas.
 """
 import logging
-from django.http import JsonResponse
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import FileResponse, JsonResponse
+from django.utils.cache import patch_vary_headers
 from rest_framework.views import exception_handler
 from rest_framework import status
+from . import compression, metrics, profiling, slow_queries
 
 logger = logging.getLogger(__name__)
 
@@ -56,3 +63,198 @@ def custom_exception_handler(exc, context):
     
     return response
 
+
+
+class _QueryTimer:
+    """execute_wrapper que conta as consultas e soma o tempo gasto nelas."""
+    
+    __slots__ = ('queries', 'seconds')
+    
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+    
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.seconds += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """
+    Coleta métricas por rota para o endpoint GET /api/metrics (core/metrics.py).
+    
+    A rota é o nome da URL resolvida (ex.: 'order-list', 'reports:sales_report') ou,
+    sem nome, o padrão da URL; requisições que não resolvem nenhuma URL
+    ficam como '<unresolved>'. Em respostas em streaming (exportações CSV)
+    a medição vai até o fim do envio, pois as consultas rodam durante ele.
+    
+    Deve ser o primeiro middleware, para medir toda a pilha.
+    Desligado com METRICS_ENABLED=False.
+    """
+    
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        timer = _QueryTimer()
+        start = time.perf_counter()
+        with self._wrap_connections(timer):
+            response = self.get_response(request)
+        if response.streaming:
+            response.streaming_content = self._stream(
+                response.streaming_content, request, response, timer, start
+            )
+        else:
+            self._record(request, response, timer, start)
+        return response
+    
+    @staticmethod
+    def _wrap_connections(timer):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+        return stack
+    
+    def _stream(self, content, request, response, timer, start):
+        try:
+            with self._wrap_connections(timer):
+                yield from content
+        finally:
+            self._record(request, response, timer, start)
+    
+    @staticmethod
+    def _record(request, response, timer, start):
+        match = request.resolver_match
+        if match is None:
+            route = '<unresolved>'
+        else:
+            route = match.view_name or match.route
+        metrics.record(
+            route, request.method, str(response.status_code),
+            time.perf_counter() - start, timer.queries, timer.seconds,
+        )
+
+
+class CompressionMiddleware:
+    """
+    Comprime as respostas com brotli ou gzip, conforme o Accept-Encoding
+    (core/compression.py): tipos textuais a partir de COMPRESSION_MIN_SIZE
+    bytes e respostas em streaming, parte a parte.
+    
+    Fica logo depois do MetricsMiddleware, para a compressão entrar no
+    tempo medido e valer para a resposta final das demais camadas.
+    Desligado com COMPRESSION_ENABLED=False.
+    """
+    
+    def __init__(self, get_response):
+        if not getattr(settings, 'COMPRESSION_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self._eligible(response):
+            return response
+        encoding = compression.choose_encoding(request)
+        if encoding is None:
+            return response
+        
+        if response.streaming:
+            response.streaming_content = compression.compress_stream(response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            if len(response.content) < getattr(settings, 'COMPRESSION_MIN_SIZE', 1024):
+                return response
+            compressed = compression.compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        
+        # Outra representação: o ETag do conteúdo original deixa de ser forte
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+    
+    @staticmethod
+    def _eligible(response):
+        if isinstance(response, FileResponse) or response.has_header('Content-Encoding'):
+            return False
+        if response.status_code < 200 or response.status_code in (204, 304):
+            return False
+        return compression.compressible(response.get('Content-Type'))
+
+
+class SlowQueryMiddleware:
+    """
+    Informa ao log de consultas lentas (core/slow_queries.py) a view de
+    origem das consultas da requisição: o nome da URL resolvida ou, antes da
+    resolução, o caminho.
+    
+    A view continua definida depois da resposta, para cobrir as consultas
+    feitas durante o envio de respostas em streaming (exportações CSV).
+    Desligado com SLOW_QUERY_ENABLED=False.
+    """
+    
+    def __init__(self, get_response):
+        if not getattr(settings, 'SLOW_QUERY_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        slow_queries.set_view(request.path)
+        return self.get_response(request)
+    
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        slow_queries.set_view(match.view_name or match.route)
+
+
+class ProfilingMiddleware:
+    """
+    Profiling sob demanda (core/profiling.py): requisições de admin com o
+    cabeçalho `X-Profile: 1` ou o parâmetro `?profile=1`.
+    
+    A autenticação JWT das views só roda dentro do DRF; aqui o token é
+    validado antes, e só quando o profiling é pedido. Pedidos de quem não é
+    admin seguem normalmente, sem profiling.
+    Desligado com PROFILING_ENABLED=False.
+    """
+    
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        if request.headers.get('X-Profile') != '1' and request.GET.get('profile') != '1':
+            return self.get_response(request)
+        user = self._admin_user(request)
+        if user is None:
+            return self.get_response(request)
+        return profiling.profile_request(request, self.get_response, user)
+    
+    @staticmethod
+    def _admin_user(request):
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+        from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
+        
+        try:
+            authenticated = JWTAuthentication().authenticate(request)
+        except (InvalidToken, AuthenticationFailed):
+            return None
+        if authenticated is None:
+            return None
+        user = authenticated[0]
+        if user.is_superuser or user.groups.filter(name='Admin').exists():
+            return user
+        return None
@@ -0,0 +1,25 @@
+# Generated manually
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_product_options_product_category'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppState',
+            fields=[
+                ('key', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Chave')),
+                ('value', models.CharField(max_length=128, verbose_name='Valor')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Estado do aplicativo',
+                'verbose_name_plural': 'Estados do aplicativo',
+            },
+        ),
+    ]
@@ -62,3 +62,33 @@ class Product(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class AppState(models.Model):
+    """
+    Estado interno do aplicativo, chave -> valor.
+
+    Guarda a impressão digital do schema usada na inicialização do
+    aplicativo desktop (core/bootstrap.py).
+    """
+
+    key = models.CharField(
+        max_length=50,
+        primary_key=True,
+        verbose_name='Chave'
+    )
+    value = models.CharField(
+        max_length=128,
+        verbose_name='Valor'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Atualizado em'
+    )
+
+    class Meta:
+        verbose_name = 'Estado do aplicativo'
+        verbose_name_plural = 'Estados do aplicativo'
+
+    def __str__(self):
+        return f'{self.key}={self.value}'
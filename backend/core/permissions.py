@@ -1,6 +1,22 @@
 from rest_framework import permissions
 
 
+def group_names(user):
+    """
+    Nomes dos grupos do usuário, consultados uma vez por instância.
+
+    A autenticação JWT carrega o usuário a cada requisição, então o cache
+    vale por requisição: as permissões e as views que perguntam "é admin?"
+    várias vezes fazem uma consulta só. Num lote (POST /api/batch/) o mesmo
+    usuário é repassado a todas as operações.
+    """
+    names = getattr(user, '_group_names', None)
+    if names is None:
+        names = frozenset(user.groups.values_list('name', flat=True))
+        user._group_names = names
+    return names
+
+
 class IsAdmin(permissions.BasePermission):
     """
     Permissão customizada para verificar se o usuário é admin.
@@ -20,8 +36,8 @@ class IsAdmin(permissions.BasePermission):
             return True
         
         # Verifica se pertence ao grupo Admin
-        is_in_admin_group = request.user.groups.filter(name='Admin').exists()
-        groups = list(request.user.groups.values_list('name', flat=True))
+        groups = sorted(group_names(request.user))
+        is_in_admin_group = 'Admin' in groups
         print(f"[DEBUG IsAdmin] Usuário: {request.user.username}, Grupos: {groups}, É Admin: {is_in_admin_group}")
         return is_in_admin_group
 
@@ -38,7 +54,7 @@ class IsCaixa(permissions.BasePermission):
             return False
         
         # Verifica se pertence ao grupo Caixa
-        return request.user.groups.filter(name='Caixa').exists()
+        return 'Caixa' in group_names(request.user)
 
 
 class IsAdminOrCaixa(permissions.BasePermission):
@@ -55,5 +71,5 @@ class IsAdminOrCaixa(permissions.BasePermission):
             return True
         
         # Verifica se pertence ao grupo Admin ou Caixa
-        return request.user.groups.filter(name__in=['Admin', 'Caixa']).exists()
+        return not group_names(request.user).isdisjoint({'Admin', 'Caixa'})
 
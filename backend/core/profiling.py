@@ -0,0 +1,200 @@
+"""
+Profiling sob demanda de requisições (apenas Admin).
+
+Uma requisição de admin com o cabeçalho `X-Profile: 1` (ou `?profile=1`)
+roda sob o cProfile e, ao mesmo tempo, sob um amostrador de pilhas (uma
+thread que lê a pilha da thread da requisição a cada
+PROFILING_SAMPLE_INTERVAL_MS via sys._current_frames). São gravados em
+PROFILING_DIR:
+- <id>.pstats: saída do cProfile (abrir com `python -m pstats` ou snakeviz);
+- <id>.collapsed: pilhas no formato "a;b;c contagem", entrada do
+  flamegraph.pl, speedscope ou inferno;
+- <id>.json: metadados (caminho, view, status, duração, usuário).
+
+O id volta no cabeçalho X-Profile-Id. Só os PROFILING_MAX_PROFILES perfis
+mais recentes são mantidos, para não encher o disco. Respostas em streaming
+são lidas por inteiro dentro do profiling, para medir a geração do conteúdo.
+
+Ver core.middleware.ProfilingMiddleware e GET /api/profiles/.
+"""
+import cProfile
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.utils import timezone
+
+PROFILE_ID = re.compile(r'^\d{8}T\d{9}-[0-9a-f]{8}$')
+FILE_KINDS = {'pstats': '.pstats', 'collapsed': '.collapsed'}
+
+# O cProfile não suporta dois perfis ativos ao mesmo tempo (no Python 3.12+
+# é global ao processo): requisições concorrentes rodam sem profiling
+_profiling_lock = threading.Lock()
+
+
+def profiles_dir():
+    return settings.PROFILING_DIR
+
+
+class StackSampler(threading.Thread):
+    """Amostra periodicamente a pilha de uma thread e conta as pilhas."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='profiling-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+@functools.lru_cache(maxsize=4096)
+def _frame_label(code):
+    filename = code.co_filename
+    for prefix in sorted(set(sys.path), key=len, reverse=True):
+        if prefix and filename.startswith(prefix + os.sep):
+            filename = filename[len(prefix) + 1:]
+            break
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'
+
+
+def collapse(frame):
+    """Pilha da raiz até o frame atual, no formato "a;b;c"."""
+    labels = []
+    while frame is not None:
+        # ';' separa os frames no formato collapsed
+        labels.append(_frame_label(frame.f_code).replace(';', ':'))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+def new_profile_id():
+    """Id ordenável por data (até milissegundos) + sufixo aleatório."""
+    now = timezone.localtime()
+    return f'{now:%Y%m%dT%H%M%S}{now.microsecond // 1000:03d}-{uuid.uuid4().hex[:8]}'
+
+
+def profile_request(request, get_response, user):
+    """
+    Executa get_response(request) sob profiling e grava os arquivos.
+
+    Returns:
+        Resposta da requisição, com o cabeçalho X-Profile-Id (ou
+        X-Profile-Skipped se outro profiling estiver em andamento)
+    """
+    if not _profiling_lock.acquire(blocking=False):
+        response = get_response(request)
+        response['X-Profile-Skipped'] = 'busy'
+        return response
+    try:
+        return _profile_request(request, get_response, user)
+    finally:
+        _profiling_lock.release()
+
+
+def _profile_request(request, get_response, user):
+    profile_id = new_profile_id()
+    sampler = StackSampler(
+        threading.get_ident(), getattr(settings, 'PROFILING_SAMPLE_INTERVAL_MS', 1) / 1000,
+    )
+    profiler = cProfile.Profile()
+
+    start = time.perf_counter()
+    sampler.start()
+    profiler.enable()
+    try:
+        response = get_response(request)
+        if response.streaming:
+            chunks = list(response.streaming_content)
+            response.streaming_content = chunks
+    finally:
+        profiler.disable()
+        sampler.stop()
+    duration_ms = (time.perf_counter() - start) * 1000
+
+    match = request.resolver_match
+    save_profile(profile_id, profiler, sampler.stacks, {
+        'id': profile_id,
+        'created_at': timezone.now().isoformat(),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'view': (match.view_name or match.route) if match else None,
+        'status': response.status_code,
+        'duration_ms': round(duration_ms, 3),
+        'user': user.username,
+        'samples': sum(sampler.stacks.values()),
+    })
+    response['X-Profile-Id'] = profile_id
+    return response
+
+
+def save_profile(profile_id, profiler, stacks, meta):
+    """Grava os arquivos do perfil e aplica o limite de retenção."""
+    directory = profiles_dir()
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, profile_id)
+    profiler.dump_stats(base + '.pstats')
+    with open(base + '.collapsed', 'w', encoding='utf-8') as f:
+        for stack, count in stacks.most_common():
+            f.write(f'{stack} {count}\n')
+    with open(base + '.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    enforce_retention()
+
+
+def list_profiles():
+    """Metadados dos perfis gravados, do mais recente para o mais antigo."""
+    directory = profiles_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        profile_id, extension = os.path.splitext(name)
+        if extension != '.json' or not PROFILE_ID.match(profile_id):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def enforce_retention():
+    """Remove os perfis mais antigos além de PROFILING_MAX_PROFILES."""
+    keep = getattr(settings, 'PROFILING_MAX_PROFILES', 20)
+    directory = profiles_dir()
+    profile_ids = sorted({
+        os.path.splitext(name)[0] for name in os.listdir(directory)
+        if PROFILE_ID.match(os.path.splitext(name)[0])
+    }, reverse=True)
+    for profile_id in profile_ids[keep:]:
+        for extension in ('.json', *FILE_KINDS.values()):
+            try:
+                os.remove(os.path.join(directory, profile_id + extension))
+            except FileNotFoundError:
+                pass
+
+
+def profile_file(profile_id, kind):
+    """Caminho do arquivo `kind` do perfil, ou None se inválido/inexistente."""
+    if not PROFILE_ID.match(profile_id) or kind not in FILE_KINDS:
+        return None
+    path = os.path.join(profiles_dir(), profile_id + FILE_KINDS[kind])
+    return path if os.path.isfile(path) else None
@@ -0,0 +1,365 @@
+"""
+Auditoria dos planos de execução das consultas (ver o comando
+audit_query_plans).
+
+O EXPLAIN QUERY PLAN do SQLite (core.slow_queries.explain) de cada consulta
+é analisado em busca de, nas tabelas grandes:
+- SCAN: a tabela é lida de ponta a ponta (com ou sem índice), em vez de uma
+  busca (SEARCH) por índice;
+- USE TEMP B-TREE depois de um SCAN: a tabela inteira é ordenada/agrupada
+  em memória, quando um índice na ordem certa entregaria as linhas prontas;
+- SEARCH numa subconsulta correlacionada (executada uma vez por linha da
+  consulta externa) usando um índice que cobre só parte das igualdades.
+
+Para cada problema é sugerido um índice composto: primeiro as colunas da
+tabela comparadas por igualdade com um valor (parâmetro, literal ou coluna
+da consulta externa, nas subconsultas), depois a primeira comparada por
+intervalo e, por fim, as do ORDER BY/GROUP BY. Comparações entre colunas de
+tabelas do mesmo nível são junções e não entram: não ajudam a tabela que
+conduz o laço.
+
+Um SCAN sem filtro indexável (agregação do período inteiro, por exemplo) é
+informado, mas não é um problema: nenhum índice evita ler a tabela toda. A
+sugestão é uma heurística; confira o plano com o índice criado.
+"""
+import contextlib
+import io
+import re
+from dataclasses import dataclass, field
+
+from django.db import connection
+from django.urls import reverse
+
+from .slow_queries import explain, fingerprint, normalize
+
+# FROM "tabela" [AS] alias / JOIN "tabela" [AS] alias
+_TABLE_ALIAS = re.compile(
+    r'\b(?:FROM|JOIN)\s+"(?P<table>\w+)"'
+    r'(?:\s+(?:AS\s+)?"?(?P<alias>(?!(?:ON|WHERE|INNER|LEFT|GROUP|ORDER|LIMIT|HAVING)\b)\w+)"?)?',
+    re.IGNORECASE,
+)
+_EQUALITY = re.compile(r'\s*(?:=|\bIN\b|\bIS\b)', re.IGNORECASE)
+_RANGE = re.compile(r'\s*(?:<=|>=|<|>|\bBETWEEN\b)', re.IGNORECASE)
+# Lado direito que é outra coluna do mesmo nível: junção, não filtro
+_COLUMN_OPERAND = re.compile(r'\s*(?:=|<=|>=|<|>)\s*"?\w+"?\."\w+"')
+_PLAN_TABLE = re.compile(r'^(SCAN|SEARCH) (?:TABLE )?(\w+)(?: AS (\w+))?(.*)$')
+_INDEX_COLUMNS = re.compile(r'\(([^()]*)\)\s*$')
+_TEMP_BTREE = re.compile(r'^USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT|RIGHT PART OF ORDER BY)')
+_SUBQUERY = re.compile(r'^(CORRELATED )?(?:SCALAR|LIST) SUBQUERY (\d+)$')
+_CLAUSE_END = re.compile(r'\b(?:LIMIT|HAVING|ORDER BY|WINDOW)\b', re.IGNORECASE)
+_LIMIT = re.compile(r'\bLIMIT\b', re.IGNORECASE)
+_WHERE = re.compile(r'\bWHERE\b(.*?)(?=\b(?:GROUP BY|ORDER BY|HAVING|LIMIT)\b|$)', re.IGNORECASE | re.DOTALL)
+# Coluna booleana usada sozinha como condição: WHERE "t"."ativo" AND ...
+_BARE_CONDITION = re.compile(r'\s*(?:\bAND\b|\bOR\b|\)|$)', re.IGNORECASE)
+
+
+@dataclass
+class Finding:
+    """Problema (ou leitura integral informativa) no plano de uma consulta."""
+
+    kind: str                      # 'scan', 'temp_btree' ou 'partial_search'
+    table: str
+    detail: str                    # linha(s) do plano
+    suggestion: tuple = ()         # colunas do índice sugerido
+    covered_by: str = ''           # índice existente com o mesmo prefixo
+
+    @property
+    def actionable(self):
+        """Há um índice a criar (e não um existente que já o cubra)."""
+        return bool(self.suggestion) and not self.covered_by
+
+    def as_dict(self):
+        return {
+            'kind': self.kind,
+            'table': self.table,
+            'detail': self.detail,
+            'suggested_index': list(self.suggestion),
+            'covered_by': self.covered_by or None,
+            'actionable': self.actionable,
+        }
+
+
+@dataclass
+class AuditedQuery:
+    """Consulta única (por fingerprint) e as requisições que a emitiram."""
+
+    fingerprint: str
+    sql: str
+    plan: list
+    sources: list = field(default_factory=list)
+    findings: list = field(default_factory=list)
+
+    @property
+    def problems(self):
+        return [finding for finding in self.findings if finding.actionable]
+
+
+def split_subqueries(sql):
+    """
+    Separa as subconsultas `(SELECT ...)` do SQL.
+
+    Returns:
+        Tupla (externa, subconsultas): o SQL sem as subconsultas e a lista
+        delas, na ordem em que aparecem (a numeração do EXPLAIN), cada uma
+        também sem as subconsultas aninhadas
+    """
+    starts = [match.start() for match in re.finditer(r'\(\s*SELECT\b', sql, re.IGNORECASE)]
+    spans = []
+    for start in starts:
+        depth = 0
+        for position in range(start, len(sql)):
+            if sql[position] == '(':
+                depth += 1
+            elif sql[position] == ')':
+                depth -= 1
+                if depth == 0:
+                    spans.append((start, position + 1))
+                    break
+
+    def strip(start, end):
+        text, cursor = [], start
+        for inner_start, inner_end in spans:
+            if start < inner_start and inner_end <= end and inner_start >= cursor:
+                text.append(sql[cursor:inner_start])
+                text.append('(?)')
+                cursor = inner_end
+        text.append(sql[cursor:end])
+        return ''.join(text)
+
+    outer = strip(-1, len(sql)) if spans else sql
+    return outer, [strip(start, end)[1:-1] for start, end in spans]
+
+
+def table_aliases(sql):
+    """{alias ou nome: tabela} das tabelas citadas em FROM/JOIN."""
+    aliases = {}
+    for match in _TABLE_ALIAS.finditer(sql):
+        table = match.group('table')
+        aliases[table] = table
+        if match.group('alias'):
+            aliases[match.group('alias')] = table
+    return aliases
+
+
+def _column_pattern(names):
+    alternatives = '|'.join(re.escape(name) for name in sorted(names, key=len, reverse=True))
+    return re.compile(rf'(?<![\w"])"?(?:{alternatives})"?\."(?P<column>\w+)"')
+
+
+def filter_columns(sql, names):
+    """
+    Colunas da tabela (pelos nomes/aliases `names`) filtradas no SQL.
+
+    Returns:
+        Tupla (igualdade, intervalo), listas sem repetições
+    """
+    equality, ranges = [], []
+    for match in _column_pattern(names).finditer(sql):
+        rest = sql[match.end():]
+        if _COLUMN_OPERAND.match(rest):
+            continue
+        column = match.group('column')
+        if _EQUALITY.match(rest) and column not in equality:
+            equality.append(column)
+        elif _RANGE.match(rest) and column not in ranges:
+            ranges.append(column)
+    for where in _WHERE.finditer(sql):
+        for match in _column_pattern(names).finditer(where.group(1)):
+            rest = where.group(1)[match.end():]
+            if _BARE_CONDITION.match(rest) and match.group('column') not in equality:
+                equality.append(match.group('column'))
+    return equality, [column for column in ranges if column not in equality]
+
+
+def ordering_columns(sql, names):
+    """Colunas da tabela em GROUP BY/ORDER BY, na ordem em que aparecem."""
+    columns = []
+    for clause in re.finditer(r'\b(?:GROUP|ORDER) BY\b', sql, re.IGNORECASE):
+        text = sql[clause.end():]
+        end = _CLAUSE_END.search(text)
+        for match in _column_pattern(names).finditer(text[:end.start()] if end else text):
+            if match.group('column') not in columns:
+                columns.append(match.group('column'))
+    return columns
+
+
+def suggest_index(sql, names, ordering=False):
+    """Colunas do índice composto sugerido (vazio se não há o que indexar)."""
+    equality, ranges = filter_columns(sql, names)
+    columns = equality + ranges[:1]
+    if ordering:
+        columns += [column for column in ordering_columns(sql, names) if column not in columns]
+    return tuple(columns)
+
+
+def covering_index(suggestion, indexes):
+    """Nome do índice existente que começa pelas colunas sugeridas (ou '')."""
+    for name, columns in indexes.items():
+        if suggestion and tuple(columns[:len(suggestion)]) == suggestion:
+            return name
+    return ''
+
+
+def analyze(sql, plan, large_tables, indexes):
+    """
+    Problemas do plano envolvendo tabelas grandes.
+
+    Args:
+        sql: SQL executado
+        plan: linhas do EXPLAIN QUERY PLAN, indentadas pela profundidade
+        large_tables: nomes das tabelas consideradas grandes
+        indexes: {tabela: {índice: [colunas]}} dos índices existentes
+    """
+    aliases = table_aliases(sql)
+    outer, subqueries = split_subqueries(sql)
+    findings = []
+    # Pilha de (profundidade, SQL do nível, correlacionada?) dos cabeçalhos de subconsulta
+    levels = []
+    # Primeiro SCAN de tabela grande de cada nível, para associar o TEMP B-TREE
+    scans = {}
+    paginated = []
+
+    for line in plan or []:
+        depth = (len(line) - len(line.lstrip(' '))) // 2
+        detail = line.strip()
+        while levels and levels[-1][0] >= depth:
+            levels.pop()
+        scope_sql, correlated = (levels[-1][1], levels[-1][2]) if levels else (outer, False)
+        scope = (depth, scope_sql)
+
+        match = _SUBQUERY.match(detail)
+        if match:
+            number = int(match.group(2))
+            text = subqueries[number - 1] if number <= len(subqueries) else sql
+            levels.append((depth, text, bool(match.group(1))))
+            continue
+
+        match = _PLAN_TABLE.match(detail)
+        if match:
+            operation, name, alias, rest = match.groups()
+            table = aliases.get(name, name)
+            if table not in large_tables:
+                continue
+            names = {alias or name}
+            if operation == 'SCAN' and 'COVERING INDEX' not in rest:
+                finding = Finding('scan', table, detail, suggest_index(scope_sql, names))
+                findings.append(finding)
+                scans.setdefault(scope, (finding, names))
+                # Percorrer um índice na ordem do ORDER BY com LIMIT para
+                # nas primeiras linhas (listagens paginadas): não é leitura integral
+                if 'USING INDEX' in rest and _LIMIT.search(scope_sql):
+                    paginated.append(finding)
+            elif operation == 'SEARCH' and correlated:
+                used = _INDEX_COLUMNS.search(rest)
+                used = used.group(1).count('=') if used else 0
+                equality, _ = filter_columns(scope_sql, names)
+                if len(equality) > used:
+                    findings.append(Finding('partial_search', table, detail, tuple(equality)))
+            continue
+
+        match = _TEMP_BTREE.match(detail)
+        # Ordenar o resultado de uma busca por índice é barato; só importa
+        # quando a tabela grande inteira foi lida (SCAN)
+        if match and scope in scans:
+            finding, names = scans[scope]
+            finding.detail += f' + {detail}'
+            finding.kind = 'temp_btree' if finding.kind == 'scan' else finding.kind
+            finding.suggestion = suggest_index(scope_sql, names, ordering=True)
+
+    findings = [
+        finding for finding in findings if not (finding in paginated and finding.kind == 'scan')
+    ]
+    for finding in findings:
+        finding.covered_by = covering_index(finding.suggestion, indexes.get(finding.table, {}))
+    return findings
+
+
+def endpoints():
+    """(papel, caminho) auditados: relatórios, exportações e listagens da API."""
+    from marmitaria.urls import router
+    from reports.urls import urlpatterns as report_urls
+
+    paths = [('admin', f'/api/reports/{pattern.pattern}') for pattern in report_urls]
+    for _, _, basename in router.registry:
+        path = reverse(f'{basename}-list')
+        # O caixa vê outro recorte (pedidos em aberto), com outras consultas
+        paths += [('admin', path), ('caixa', path)]
+    paths += [
+        ('admin', reverse('order-list') + '?payment_status=completed'),
+        ('admin', reverse('product-list') + '?is_available=true'),
+    ]
+    return paths
+
+
+class QueryCollector:
+    """execute_wrapper que guarda as consultas emitidas durante a requisição."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many:
+            self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def table_stats(min_rows):
+    """
+    Tabelas grandes do banco atual e os índices delas.
+
+    Returns:
+        Tupla ({tabela: linhas}, {tabela: {índice: [colunas]}})
+    """
+    with connection.cursor() as cursor:
+        large_tables = {}
+        for table in connection.introspection.table_names(cursor):
+            cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+            count = cursor.fetchone()[0]
+            if count >= min_rows:
+                large_tables[table] = count
+        indexes = {
+            table: {
+                name: constraint['columns']
+                for name, constraint in connection.introspection.get_constraints(cursor, table).items()
+                if constraint['index'] or constraint['primary_key'] or constraint['unique']
+            }
+            for table in large_tables
+        }
+    return large_tables, indexes
+
+
+def audit(users, min_rows):
+    """
+    Faz GET em cada endpoint e analisa o plano de cada consulta distinta.
+
+    Args:
+        users: {'admin': usuário, 'caixa': usuário}
+        min_rows: linhas a partir das quais uma tabela é grande
+
+    Returns:
+        Tupla ([AuditedQuery], {tabela grande: linhas})
+    """
+    from rest_framework.test import APIClient
+
+    large_tables, indexes = table_stats(min_rows)
+    audited = {}
+    for role, path in endpoints():
+        collector = QueryCollector()
+        client = APIClient()
+        client.force_authenticate(users[role])
+        # As views ainda imprimem mensagens de debug
+        with contextlib.redirect_stdout(io.StringIO()), connection.execute_wrapper(collector):
+            response = client.get(path)
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+        source = f'{role} GET {path}'
+        for sql, params in collector.queries:
+            fp = fingerprint(normalize(sql))
+            query = audited.get(fp)
+            if query is None:
+                plan = explain(connection, sql, params) if re.match(r'\s*(SELECT|WITH)\b', sql, re.I) else None
+                query = audited[fp] = AuditedQuery(fp, sql, plan or [])
+                query.findings = analyze(sql, query.plan, set(large_tables), indexes)
+            if source not in query.sources:
+                query.sources.append(source)
+    return list(audited.values()), large_tables
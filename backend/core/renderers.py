@@ -0,0 +1,102 @@
+"""
+Renderer JSON padrão da API.
+
+Os payloads de pedidos e relatórios têm muitos Decimal e datas; o
+JSONRenderer do DRF passa tudo pelo json da biblioteca padrão, chamando o
+encoder Python a cada valor que o json não conhece. Com o orjson instalado,
+FastJSONRenderer serializa em C direto para bytes (dict, list, str,
+números, datas, UUID) e só recorre ao encoder do DRF para o resto
+(Decimal, strings traduzíveis, QuerySet). A saída é a do JSONRenderer:
+- Decimal vira número (float), como no encoder do DRF;
+- datas em ISO 8601 com 'Z' para UTC, como no encoder do DRF;
+- chaves int, float, bool e None viram string, como no json;
+- U+2028 e U+2029 saem escapados (\\u2028, \\u2029), como no DRF.
+
+Os floats só saem iguais entre 1e-4 e 1e16 (e o zero): fora dessa faixa o
+json usa expoente com sinal e dois dígitos (1e+16, 1e-05), o orjson não
+(1e16, 0.00001), e NaN/infinito viram null no orjson, onde o DRF levanta
+ValueError (STRICT_JSON) ou escreve NaN/Infinity. Um float fora da faixa,
+nos valores ou vindo de um Decimal, faz a resposta ser gerada pelo
+JSONRenderer do DRF. A exceção são floats usados como chave de dict.
+
+Sem o orjson, com indentação pedida no Accept (application/json;
+indent=4), com UNICODE_JSON ou COMPACT_JSON desligados, fica o
+JSONRenderer do DRF.
+"""
+from collections import OrderedDict
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+try:
+    import orjson
+except ImportError:  # opcional: sem ele, o JSONRenderer do DRF
+    orjson = None
+
+if orjson is not None:
+    OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+_encoder = JSONEncoder()
+
+_CONTAINERS = {dict, OrderedDict, ReturnDict, list, tuple, ReturnList}
+_SCALARS = {str, int, bool, type(None), Decimal}
+
+
+def _same_float(value):
+    """Se o orjson escreve o float `value` como o json padrão (False para NaN)."""
+    return value == 0.0 or 1e-4 <= abs(value) < 1e16
+
+
+def _default(value):
+    """Tipos que o orjson não conhece, pelo encoder do DRF."""
+    result = _encoder.default(value)
+    if type(result) is float and not _same_float(result):
+        # Decimal fora da faixa: o JSONEncodeError leva ao JSONRenderer
+        raise ValueError(result)
+    return result
+
+
+def _has_float_mismatch(data):
+    """
+    Se há em `data` algum float que o orjson escreveria diferente.
+
+    Percorre só os containers, sem recursão, e testa os floats pelo valor:
+    roda em toda resposta e precisa custar bem menos que o json padrão.
+    """
+    stack = [[data]]
+    push = stack.append
+    for value in stack:
+        for item in (value.values() if isinstance(value, dict) else value):
+            kind = type(item)
+            if kind is float:
+                # _same_float, em linha
+                if not (item == 0.0 or 1e-4 <= abs(item) < 1e16):
+                    return True
+            elif kind in _CONTAINERS or (kind not in _SCALARS and isinstance(item, (dict, list, tuple))):
+                push(item)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer com orjson quando disponível."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if _has_float_mismatch(data):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(data, default=_default, option=OPTIONS)
+        except orjson.JSONEncodeError:
+            # Inteiros acima de 64 bits, chaves que o orjson recusa, Decimal
+            # fora da faixa: o json da biblioteca padrão decide (e levanta o
+            # erro, se for o caso)
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80' in content:
+            # Como no DRF: JSON que também é JavaScript válido
+            content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return content
@@ -66,7 +66,8 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'date_joined', 'last_login']
     
     def get_groups(self, obj):
-        return list(obj.groups.values_list('name', flat=True))
+        # groups.all() aproveita o prefetch_related('groups') da listagem
+        return [group.name for group in obj.groups.all()]
     
     def get_is_admin(self, obj):
         return obj.is_superuser or 'Admin' in self.get_groups(obj)
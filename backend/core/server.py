@@ -0,0 +1,186 @@
+"""
+Servidor HTTP usado por run_server.py e pelo aplicativo desktop.
+
+Com SERVER_MODE='production' (padrão), a aplicação WSGI do Django roda num
+servidor de produção em vez do runserver (servidor de desenvolvimento):
+- gunicorn (Linux/macOS, só em run_server.py): SERVER_WORKERS processos com
+  SERVER_THREADS threads cada. SIGINT/SIGTERM encerram de forma graciosa:
+  as requisições em andamento terminam (até SERVER_SHUTDOWN_TIMEOUT s);
+- waitress (Windows e aplicativo desktop, que roda o servidor numa thread
+  do processo da janela): um processo com SERVER_THREADS threads.
+
+SERVER_BACKEND força um deles ('gunicorn', 'waitress' ou 'runserver'); com
+'auto' a escolha é pela plataforma e pelo que estiver instalado, caindo no
+runserver se nenhum estiver. SERVER_MODE='development' usa o runserver.
+
+Com vários processos, métricas, log de consultas lentas e cache de
+relatórios ficam por processo.
+"""
+import importlib.util
+import signal
+import sys
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+BACKENDS = ('gunicorn', 'waitress', 'runserver')
+
+
+def choose_backend(embedded=False):
+    """
+    Servidor a usar.
+
+    embedded: o servidor roda numa thread (aplicativo desktop); o gunicorn
+    precisa do processo principal (fork e sinais) e não pode ser usado.
+    """
+    if getattr(settings, 'SERVER_MODE', 'production') != 'production':
+        return 'runserver'
+    backend = getattr(settings, 'SERVER_BACKEND', 'auto')
+    if backend != 'auto':
+        if backend not in BACKENDS:
+            raise ImproperlyConfigured(
+                f"SERVER_BACKEND inválido: {backend!r} (use 'auto', {', '.join(map(repr, BACKENDS))})"
+            )
+        if embedded and backend == 'gunicorn':
+            raise ImproperlyConfigured('O aplicativo desktop não roda com gunicorn; use waitress.')
+        return backend
+    candidates = ['waitress'] if embedded or sys.platform == 'win32' else ['gunicorn', 'waitress']
+    for name in candidates:
+        if importlib.util.find_spec(name) is not None:
+            return name
+    return 'runserver'
+
+
+class Server:
+    """
+    Servidor HTTP da aplicação.
+
+    run() bloqueia até Ctrl+C, SIGTERM ou stop() (chamado de outra thread).
+    Quando a porta passa a aceitar conexões, `ready` é marcado e on_ready
+    (opcional) é chamado, sem precisar testar a porta de fora.
+    """
+
+    def __init__(self, host, port, embedded=False, on_ready=None):
+        self.host = host
+        self.port = port
+        self.embedded = embedded
+        self.backend = choose_backend(embedded)
+        self.ready = threading.Event()
+        self._on_ready = on_ready
+        self._waitress = None
+
+    def describe(self):
+        """Resumo para a mensagem de início, ex.: 'waitress, 8 threads'."""
+        threads = settings.SERVER_THREADS
+        if self.backend == 'gunicorn':
+            return f'gunicorn, {settings.SERVER_WORKERS} processo(s) x {threads} threads'
+        if self.backend == 'waitress':
+            return f'waitress, {threads} threads'
+        return 'runserver (desenvolvimento)'
+
+    def run(self):
+        getattr(self, f'_run_{self.backend}')()
+
+    def _listening(self):
+        if self.ready.is_set():
+            return
+        self.ready.set()
+        if self._on_ready is not None:
+            self._on_ready()
+
+    def stop(self):
+        """
+        Para de aceitar conexões e espera as requisições em andamento.
+
+        Só o waitress roda em thread; o gunicorn para por sinal e o runserver
+        termina junto com o processo. Conexões keep-alive ociosas ficam com a
+        thread do servidor, que termina junto com o processo.
+        """
+        server = self._waitress
+        if server is None:
+            return
+        self._waitress = None
+        from waitress import wasyncore
+
+        closed = threading.Event()
+
+        def close_listener():
+            wasyncore.dispatcher.close(server)
+            closed.set()
+
+        # O socket de escuta pertence ao loop do waitress: fechar nessa thread
+        server.trigger.pull_trigger(close_listener)
+        closed.wait(settings.SERVER_SHUTDOWN_TIMEOUT)
+        server.task_dispatcher.shutdown(cancel_pending=False, timeout=settings.SERVER_SHUTDOWN_TIMEOUT)
+        # Sem o trigger, o loop termina (e run() retorna) quando as conexões
+        # abertas fecharem
+        server.trigger.pull_trigger(server.trigger.close)
+
+    def _run_waitress(self):
+        from django.core.wsgi import get_wsgi_application
+        from waitress import create_server
+
+        self._waitress = create_server(
+            get_wsgi_application(),
+            host=self.host,
+            port=self.port,
+            threads=settings.SERVER_THREADS,
+            ident='Marmitaria',
+        )
+        # create_server já faz bind e listen
+        self._listening()
+        if threading.current_thread() is threading.main_thread():
+            # O waitress encerra de forma graciosa em SystemExit/KeyboardInterrupt
+            signal.signal(signal.SIGTERM, _exit)
+        self._waitress.run()
+
+    def _run_gunicorn(self):
+        from django.core.wsgi import get_wsgi_application
+        from django.db import connections
+        from gunicorn.app.base import BaseApplication
+
+        class Application(BaseApplication):
+            def __init__(self, options):
+                self.options = options
+                super().__init__()
+
+            def load_config(self):
+                for name, value in self.options.items():
+                    self.cfg.set(name, value)
+
+            def load(self):
+                return get_wsgi_application()
+
+        # Os processos são criados por fork: não herdar conexões abertas
+        connections.close_all()
+        Application({
+            'bind': f'{self.host}:{self.port}',
+            'workers': settings.SERVER_WORKERS,
+            'worker_class': 'gthread',
+            'threads': settings.SERVER_THREADS,
+            'keepalive': settings.SERVER_KEEPALIVE,
+            'graceful_timeout': settings.SERVER_SHUTDOWN_TIMEOUT,
+            'preload_app': True,
+            'proc_name': 'marmitaria',
+            'when_ready': lambda arbiter: self._listening(),
+        }).run()
+
+    def _run_runserver(self):
+        from django.core.management import call_command, get_commands, load_command_class
+
+        # runserver do staticfiles (se instalado) ou do Django
+        command = load_command_class(get_commands()['runserver'], 'runserver')
+        on_bind = command.on_bind
+
+        def bound(server_port):
+            on_bind(server_port)
+            self._listening()
+
+        command.on_bind = bound
+        call_command(command, f'{self.host}:{self.port}', use_reloader=False,
+                     verbosity=0 if self.embedded else 1)
+
+
+def _exit(signum, frame):
+    sys.exit(0)
@@ -0,0 +1,25 @@
+"""
+Signals para o app core.
+
+Configura cada conexão com o banco assim que ela é aberta: perfil do
+SQLite (core/sqlite.py) e log de consultas lentas (core/slow_queries.py).
+"""
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from . import sqlite
+from .slow_queries import install
+
+
+@receiver(connection_created)
+def configurar_sqlite(sender, connection, **kwargs):
+    """Aplica os pragmas do perfil do SQLite (WAL, cache, busy_timeout...)."""
+    sqlite.configure(connection)
+
+
+@receiver(connection_created)
+def instalar_log_consultas_lentas(sender, connection, **kwargs):
+    """Adiciona o execute_wrapper do log de consultas lentas à conexão."""
+    if getattr(settings, 'SLOW_QUERY_ENABLED', True):
+        install(connection)
@@ -0,0 +1,229 @@
+"""
+Log de consultas lentas com o plano de execução.
+
+Um execute_wrapper instalado em toda conexão (core/signals.py) mede cada
+consulta. As que passam de SLOW_QUERY_THRESHOLD_MS são registradas com:
+- a view de origem (nome da URL resolvida, definido pelo
+  core.middleware.SlowQueryMiddleware);
+- a duração;
+- a impressão digital (fingerprint) do SQL normalizado, sem literais, que
+  agrupa as execuções da mesma consulta com parâmetros diferentes;
+- o plano de execução (EXPLAIN QUERY PLAN no SQLite), obtido uma vez por
+  fingerprint.
+
+Os registros vão para um buffer circular em memória (os mais recentes,
+SLOW_QUERY_BUFFER_SIZE) e para um arquivo com rotação
+(SLOW_QUERY_LOG_FILE, uma linha JSON por consulta). O agregado por
+fingerprint (execuções, tempo total e máximo) mostra as consultas que mais
+se repetem. Ver GET /api/slow-queries/ (apenas Admin).
+
+Os parâmetros das consultas não são guardados: podem conter dados pessoais.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger('marmitaria.slow_queries')
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACES = re.compile(r'\s+')
+_EXPLAINABLE = re.compile(r'\s*(SELECT|WITH|INSERT|UPDATE|DELETE)\b', re.IGNORECASE)
+
+_context = threading.local()
+
+
+def normalize(sql):
+    """SQL sem literais nem parâmetros; listas IN (…) viram IN (...)."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode('utf-8')).hexdigest()[:12]
+
+
+def set_view(view):
+    """Define a view de origem das próximas consultas da thread atual."""
+    _context.view = view
+
+
+def current_view():
+    return getattr(_context, 'view', None) or '<fora de requisição>'
+
+
+class SlowQueryLog:
+    """Buffer circular dos registros recentes e agregado por fingerprint."""
+
+    def __init__(self, size):
+        self._lock = threading.Lock()
+        self.recent = deque(maxlen=size)
+        self.by_fingerprint = {}
+
+    def add(self, record):
+        with self._lock:
+            self.recent.append(record)
+            stats = self.by_fingerprint.get(record['fingerprint'])
+            if stats is None:
+                stats = self.by_fingerprint[record['fingerprint']] = {
+                    'fingerprint': record['fingerprint'],
+                    'sql': record['normalized_sql'],
+                    'plan': record['plan'],
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'views': [],
+                }
+            stats['count'] += 1
+            stats['total_ms'] = round(stats['total_ms'] + record['duration_ms'], 3)
+            stats['max_ms'] = max(stats['max_ms'], record['duration_ms'])
+            stats['last_seen'] = record['time']
+            if record['view'] not in stats['views']:
+                stats['views'].append(record['view'])
+
+    def plan_for(self, fp):
+        """Plano já obtido para o fingerprint (None se ainda não)."""
+        stats = self.by_fingerprint.get(fp)
+        return stats['plan'] if stats else None
+
+    def snapshot(self):
+        """Registros recentes (mais novo primeiro) e agregado por tempo total."""
+        with self._lock:
+            recent = list(reversed(self.recent))
+            aggregated = sorted(
+                (dict(stats, views=list(stats['views'])) for stats in self.by_fingerprint.values()),
+                key=lambda stats: stats['total_ms'],
+                reverse=True,
+            )
+        return {'recent': recent, 'by_fingerprint': aggregated}
+
+    def clear(self):
+        with self._lock:
+            self.recent.clear()
+            self.by_fingerprint.clear()
+
+
+slow_query_log = SlowQueryLog(getattr(settings, 'SLOW_QUERY_BUFFER_SIZE', 200))
+
+
+_handler = None
+
+
+def _file_logger():
+    """
+    Logger do arquivo com rotação, configurado na primeira consulta lenta
+    (e de novo se SLOW_QUERY_LOG_FILE mudar).
+
+    Se o projeto configurar um handler para 'marmitaria.slow_queries' via
+    LOGGING, ele é usado no lugar.
+    """
+    global _handler
+    path = getattr(settings, 'SLOW_QUERY_LOG_FILE', '')
+    current = _handler.baseFilename if _handler else None
+    if path and current != os.path.abspath(path) and (_handler or not logger.handlers):
+        if _handler:
+            logger.removeHandler(_handler)
+            _handler.close()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        _handler = RotatingFileHandler(
+            path, maxBytes=5 * 1024 * 1024, backupCount=3, encoding='utf-8', delay=True,
+        )
+        _handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(_handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+def explain(connection, sql, params):
+    """
+    Plano de execução da consulta, uma linha por nó.
+
+    Usa um cursor separado: o da consulta original ainda tem resultados a
+    ler. Retorna None em bancos sem suporte ou se o EXPLAIN falhar.
+    """
+    if connection.vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    elif connection.vendor == 'postgresql':
+        prefix = 'EXPLAIN '
+    else:
+        return None
+    _context.explaining = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+    except Exception:
+        return None
+    finally:
+        _context.explaining = False
+    if connection.vendor != 'sqlite':
+        return [row[0] for row in rows]
+    # (id, parent, notused, detail): indenta pela profundidade na árvore
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node_id] + detail)
+    return lines
+
+
+class SlowQueryWrapper:
+    """execute_wrapper que registra as consultas acima do limite."""
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        succeeded = False
+        try:
+            result = execute(sql, params, many, context)
+            succeeded = True
+            return result
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 200)
+            if duration_ms >= threshold and not getattr(_context, 'explaining', False):
+                # Após um erro a transação pode estar abortada: sem EXPLAIN
+                can_explain = succeeded and not many and _EXPLAINABLE.match(sql)
+                self.record(context['connection'], sql, params, can_explain, duration_ms)
+
+    @staticmethod
+    def record(connection, sql, params, can_explain, duration_ms):
+        normalized = normalize(sql)
+        fp = fingerprint(normalized)
+        plan = slow_query_log.plan_for(fp)
+        if plan is None and can_explain:
+            plan = explain(connection, sql, params)
+        record = {
+            'time': timezone.now().isoformat(),
+            'view': current_view(),
+            'duration_ms': round(duration_ms, 3),
+            'fingerprint': fp,
+            'sql': sql,
+            'normalized_sql': normalized,
+            'plan': plan,
+        }
+        slow_query_log.add(record)
+        _file_logger().info(json.dumps(record, ensure_ascii=False))
+
+
+slow_query_wrapper = SlowQueryWrapper()
+
+
+def install(connection):
+    """Instala o wrapper na conexão (uma vez por conexão)."""
+    if slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_wrapper)
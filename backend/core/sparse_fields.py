@@ -0,0 +1,158 @@
+"""
+Campos esparsos nas leituras da API: ?fields=, ?expand= e ?view=.
+
+- fields: campos da resposta, separados por vírgula; campos de serializers
+  aninhados com ponto (fields=id,total,items.product,items.quantity).
+  `items` sozinho traz todos os campos do item.
+- expand: relações que vêm como objeto aninhado; as demais relações
+  expansíveis do serializer (Meta.expandable_fields) vêm só com o id.
+  Sem o parâmetro, todas vêm aninhadas (a resposta de sempre);
+  expand= vazio deixa todas como id.
+- view: conjunto pronto de fields/expand definido na ViewSet
+  (view=compact); fields e expand explícitos têm precedência.
+
+A ViewSet (SparseFieldsMixin) lê os parâmetros e os passa no contexto do
+serializer (SparseFieldsSerializerMixin), que remove os campos não pedidos
+e troca as relações não expandidas pela chave primária. get_queryset usa
+is_requested/is_expanded para não carregar (select_related,
+prefetch_related) o que não vai na resposta.
+
+Só vale para GET/HEAD: numa escrita, tirar campos do serializer faria os
+dados enviados serem ignorados.
+"""
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_fields(value):
+    """
+    'id,items.product,items.quantity' -> {'id': None, 'items': {'product': None, 'quantity': None}}
+
+    None numa folha = todos os campos do serializer aninhado.
+    """
+    tree = {}
+    for path in value.split(','):
+        names = [name.strip() for name in path.split('.')]
+        if not all(names):
+            continue
+        node = tree
+        for index, name in enumerate(names):
+            last = index == len(names) - 1
+            if name in node and node[name] is None:
+                # Já pedido por inteiro
+                break
+            if last:
+                node[name] = None
+            else:
+                node = node.setdefault(name, {})
+    return tree
+
+
+def parse_expand(value):
+    """'items.product, customer' -> {'items.product', 'customer'}"""
+    return {path.strip() for path in value.split(',') if path.strip()}
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Serializer que respeita context['fields'] (árvore de parse_fields) e
+    context['expand'] (caminhos de parse_expand), também quando aninhado:
+    o caminho de cada serializer é montado pelos field_name dos pais.
+
+    Meta.expandable_fields: campos aninhados que, sem expand, viram
+    PrimaryKeyRelatedField (o id vem da coluna, sem consulta).
+    """
+
+    def _sparse_path(self):
+        names = []
+        node = self
+        while node.parent is not None:
+            # O filho de um ListSerializer (many=True) não tem nome
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        return names[::-1]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        path = self._sparse_path()
+        prefix = ''.join(f'{name}.' for name in path)
+
+        expand = self.context.get('expand')
+        if expand is not None:
+            for name in getattr(self.Meta, 'expandable_fields', ()):
+                if name in fields and prefix + name not in expand:
+                    nested = fields[name]
+                    fields[name] = serializers.PrimaryKeyRelatedField(
+                        read_only=True,
+                        many=isinstance(nested, serializers.ListSerializer),
+                        source=nested.source,
+                    )
+
+        tree = self.context.get('fields')
+        for name in path:
+            if tree is None:
+                break
+            tree = tree.get(name)
+        if tree is not None:
+            unknown = sorted(set(tree) - set(fields))
+            if unknown:
+                raise ValidationError({'fields': [f'Campo(s) inválido(s): {", ".join(prefix + name for name in unknown)}']})
+            fields = {name: field for name, field in fields.items() if name in tree}
+        return fields
+
+
+class SparseFieldsMixin:
+    """
+    ViewSet com ?fields=, ?expand= e ?view= nas leituras.
+
+    field_views: {nome da visão: {'fields': '...', 'expand': '...'}}.
+    """
+    field_views = {}
+
+    def sparse_fields(self):
+        """(árvore de fields, conjunto de expand), None quando não pedidos."""
+        if hasattr(self, '_sparse_fields'):
+            return self._sparse_fields
+        fields = expand = None
+        request = getattr(self, 'request', None)
+        if request is not None and request.method in SAFE_METHODS:
+            params = request.query_params
+            preset = {}
+            view = params.get('view')
+            if view:
+                if view not in self.field_views:
+                    raise ValidationError({'view': [
+                        f'Visão inválida: {view}. Opções: {", ".join(sorted(self.field_views))}'
+                    ]})
+                preset = self.field_views[view]
+            value = params.get('fields', preset.get('fields'))
+            if value:
+                fields = parse_fields(value)
+            value = params.get('expand', preset.get('expand'))
+            if value is not None:
+                expand = parse_expand(value)
+        self._sparse_fields = (fields, expand)
+        return self._sparse_fields
+
+    def is_requested(self, path):
+        """Se o campo (caminho com '.') vai na resposta."""
+        tree = self.sparse_fields()[0]
+        for name in path.split('.'):
+            if tree is None:
+                return True
+            if name not in tree:
+                return False
+            tree = tree[name]
+        return True
+
+    def is_expanded(self, path):
+        """Se a relação vem como objeto aninhado (e não só o id)."""
+        expand = self.sparse_fields()[1]
+        return expand is None or path in expand
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'], context['expand'] = self.sparse_fields()
+        return context
@@ -0,0 +1,53 @@
+"""
+Perfil de produção do SQLite, aplicado a cada conexão aberta (core/signals.py).
+
+Com SQLITE_PROFILE='production' (padrão):
+- journal_mode=WAL: leitores não bloqueiam o escritor nem o escritor bloqueia
+  os leitores; só escritas concorrentes disputam o lock;
+- synchronous=NORMAL: no WAL, fsync só nos checkpoints. Uma queda de energia
+  pode perder as últimas transações, mas não corrompe o banco;
+- cache_size: cache de páginas por conexão (SQLITE_CACHE_SIZE_KB);
+- mmap_size: leituras via memória mapeada (SQLITE_MMAP_SIZE, em bytes);
+- temp_store=MEMORY: ordenações e tabelas temporárias em memória;
+- busy_timeout: espera pelo lock antes de falhar com "database is locked"
+  (SQLITE_BUSY_TIMEOUT_MS).
+
+Com SQLITE_PROFILE='default' as conexões ficam com o padrão do SQLite
+(journal de rollback), útil para comparar (benchmarks/bench_concurrency.py).
+O modo WAL é gravado no arquivo do banco e permanece depois de desligado o
+perfil, até um `PRAGMA journal_mode=DELETE`.
+"""
+from django.conf import settings
+
+
+def pragmas():
+    """Lista de (pragma, valor) do perfil configurado."""
+    if getattr(settings, 'SQLITE_PROFILE', 'production') != 'production':
+        return []
+    return [
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        # Valor negativo: tamanho em KiB, não em páginas
+        ('cache_size', -getattr(settings, 'SQLITE_CACHE_SIZE_KB', 65536)),
+        ('mmap_size', getattr(settings, 'SQLITE_MMAP_SIZE', 268435456)),
+        ('temp_store', 'MEMORY'),
+        ('busy_timeout', getattr(settings, 'SQLITE_BUSY_TIMEOUT_MS', 5000)),
+    ]
+
+
+def apply_pragmas(dbapi_connection):
+    """
+    Aplica os pragmas numa conexão sqlite3.
+
+    Usa a conexão do driver diretamente: os pragmas não passam pelos
+    execute_wrappers (log de consultas lentas, métricas) nem pelo log de
+    consultas do DEBUG.
+    """
+    for name, value in pragmas():
+        dbapi_connection.execute(f'PRAGMA {name} = {value}').fetchall()
+
+
+def configure(connection):
+    """Aplica o perfil numa conexão do Django, se for SQLite."""
+    if connection.vendor == 'sqlite':
+        apply_pragmas(connection.connection)
@@ -0,0 +1,245 @@
+"""
+Arquivos estáticos do frontend (build do Vite) servidos pelo Django.
+
+Na inicialização (CoreConfig.ready) é montado um manifesto do diretório de estáticos
+(STATIC_ROOT ou, em desenvolvimento sem collectstatic, frontend/dist):
+caminho -> arquivo, tamanho, data, ETag, tipo e variantes pré-comprimidas
+(arquivo.br / arquivo.gz, geradas por `manage.py compress_static`). Cada
+requisição é então um lookup no dicionário, sem acesso ao disco além da
+abertura do arquivo.
+
+A resposta é um FileResponse: o servidor (waitress, gunicorn) envia o
+arquivo com o file_wrapper do WSGI (sendfile quando disponível), sem ler o
+conteúdo inteiro em memória. A variante br/gzip é escolhida pelo
+Accept-Encoding.
+
+Cache:
+- assets/ com hash no nome (index-BAv9M_gR.js): o conteúdo nunca muda
+  para o mesmo nome, então `max-age` de um ano e `immutable`;
+- demais arquivos: `no-cache`, revalidados pelo ETag/Last-Modified (304).
+
+Em DEBUG, um arquivo fora do manifesto faz o manifesto ser refeito (novo
+build do frontend com o servidor rodando), no máximo uma vez a cada
+REBUILD_INTERVAL segundos: uma sequência de 404 não vira uma varredura do
+diretório por requisição.
+"""
+import mimetypes
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+# Extensões das variantes pré-comprimidas, na ordem de preferência
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Arquivos que valem a pena comprimir (compress_static)
+COMPRESSIBLE = ('.js', '.mjs', '.css', '.html', '.svg', '.json', '.map', '.txt', '.xml', '.webmanifest')
+
+# Tipos fixos: no Windows o mimetypes lê o registro, que pode mapear .js
+# para text/plain (e o navegador recusa o módulo)
+CONTENT_TYPES = {
+    '.js': 'text/javascript',
+    '.mjs': 'text/javascript',
+    '.css': 'text/css',
+    '.html': 'text/html',
+    '.svg': 'image/svg+xml',
+    '.json': 'application/json',
+    '.map': 'application/json',
+    '.webmanifest': 'application/manifest+json',
+    '.wasm': 'application/wasm',
+    '.woff2': 'font/woff2',
+    '.woff': 'font/woff',
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.ico': 'image/x-icon',
+}
+
+# Nome gerado pelo Vite: <nome>-<hash de 8+ caracteres>.<ext>
+HASHED_NAME = re.compile(r'^assets/(?:.+/)?[^/]+-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$')
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+# Intervalo mínimo entre duas reconstruções do manifesto por arquivo
+# ausente (só em DEBUG)
+REBUILD_INTERVAL = 2.0
+
+
+def static_root():
+    """Diretório servido: STATIC_ROOT ou o primeiro de STATICFILES_DIRS."""
+    root = Path(settings.STATIC_ROOT)
+    if not root.exists() and settings.STATICFILES_DIRS:
+        root = Path(settings.STATICFILES_DIRS[0])
+    return root
+
+
+def content_type(name):
+    suffix = os.path.splitext(name)[1].lower()
+    return CONTENT_TYPES.get(suffix) or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+
+def _etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+@dataclass(frozen=True)
+class Variant:
+    path: str
+    size: int
+    etag: str
+
+
+@dataclass(frozen=True)
+class StaticFile:
+    path: str
+    size: int
+    mtime: float
+    etag: str
+    content_type: str
+    immutable: bool
+    # Content-Encoding -> variante pré-comprimida
+    variants: Dict[str, Variant] = field(default_factory=dict)
+
+
+def build_manifest(root):
+    """{caminho relativo com '/': StaticFile} dos arquivos de `root`."""
+    suffixes = {suffix for _, suffix in ENCODINGS}
+    manifest = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if os.path.splitext(name)[1] in suffixes:
+                continue
+            path = os.path.join(directory, name)
+            stat = os.stat(path)
+            relative = Path(path).relative_to(root).as_posix()
+            variants = {}
+            for encoding, suffix in ENCODINGS:
+                try:
+                    variant = os.stat(path + suffix)
+                except FileNotFoundError:
+                    continue
+                # Variante de um build anterior: ignorar
+                if variant.st_mtime_ns >= stat.st_mtime_ns:
+                    variants[encoding] = Variant(
+                        path + suffix, variant.st_size, f'{_etag(stat)[:-1]}-{encoding}"',
+                    )
+            manifest[relative] = StaticFile(
+                path=path,
+                size=stat.st_size,
+                mtime=stat.st_mtime,
+                etag=_etag(stat),
+                content_type=content_type(name),
+                immutable=bool(HASHED_NAME.match(relative)),
+                variants=variants,
+            )
+    return manifest
+
+
+class Manifest:
+    """Manifesto do diretório de estáticos, montado uma vez por processo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._root = None
+        self._files = {}
+        self._built = None
+
+    def get(self, relative):
+        if self._root is None:
+            self.rebuild()
+        entry = self._files.get(relative)
+        if entry is None and settings.DEBUG and time.monotonic() - self._built >= REBUILD_INTERVAL:
+            self.rebuild()
+            entry = self._files.get(relative)
+        return entry
+
+    def rebuild(self, root=None):
+        root = root or static_root()
+        files = build_manifest(root) if root.is_dir() else {}
+        with self._lock:
+            self._root, self._files, self._built = root, files, time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._root, self._files, self._built = None, {}, None
+
+
+manifest = Manifest()
+
+
+@receiver(setting_changed)
+def _static_setting_changed(setting, **kwargs):
+    # Outro diretório (override_settings nos testes): remontar no próximo uso
+    if setting in ('STATIC_ROOT', 'STATICFILES_DIRS'):
+        manifest.clear()
+
+
+def accepts_encoding(request, encoding):
+    """Se o Accept-Encoding aceita `encoding` (q > 0)."""
+    for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        name, _, params = part.partition(';')
+        if name.strip().lower() != encoding:
+            continue
+        params = params.strip().replace(' ', '')
+        if not params.startswith('q='):
+            return True
+        try:
+            return float(params[2:]) > 0
+        except ValueError:
+            return False
+    return False
+
+
+def serve_static(request, path):
+    """View de /static/<path>."""
+    entry = manifest.get(path)
+    if entry is None:
+        raise Http404('Arquivo não encontrado')
+
+    encoding, variant = None, None
+    for name, _ in ENCODINGS:
+        if name in entry.variants and accepts_encoding(request, name):
+            encoding, variant = name, entry.variants[name]
+            break
+    etag = variant.etag if variant else entry.etag
+
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(entry.mtime),
+        'Cache-Control': IMMUTABLE if entry.immutable else REVALIDATE,
+    }
+    if entry.variants:
+        headers['Vary'] = 'Accept-Encoding'
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if (if_none_match and etag in [tag.strip() for tag in if_none_match.split(',')]) or (
+        not if_none_match and not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), entry.mtime)
+    ):
+        response = HttpResponseNotModified()
+    else:
+        try:
+            handle = open(variant.path if variant else entry.path, 'rb')
+        except FileNotFoundError:
+            # Arquivo removido depois do manifesto (novo build)
+            manifest.clear()
+            raise Http404('Arquivo não encontrado')
+        response = FileResponse(handle, content_type=entry.content_type)
+        # O FileResponse tira o nome do arquivo aberto; um asset não precisa
+        # de Content-Disposition
+        del response['Content-Disposition']
+        if encoding:
+            response['Content-Encoding'] = encoding
+    for name, value in headers.items():
+        response[name] = value
+    return response
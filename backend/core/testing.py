@@ -0,0 +1,126 @@
+"""
+Utilitários para os testes de desempenho da API (ver tests.py de cada app).
+
+Os testes limitam, por endpoint:
+- o número de consultas ao banco (assertMaxQueries), com um limite fixo que
+  não pode depender do tamanho do resultado (assertConstantQueries pega
+  consultas N+1 em serializers como OrderSerializer e UserSerializer);
+- o tempo de resposta sob uma base representativa (assertFasterThan).
+
+As requisições passam pela pilha completa: middlewares, autenticação JWT,
+permissões, paginação e serializers.
+"""
+import contextlib
+import io
+import os
+import statistics
+import time
+
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
+from django.db import connection
+from django.http import FileResponse
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Multiplica os limites de tempo (ex.: PERF_LATENCY_FACTOR=3 em máquinas lentas)
+LATENCY_FACTOR = float(os.environ.get('PERF_LATENCY_FACTOR', '1'))
+
+
+def create_users():
+    """
+    Cria os grupos e os usuários usados nos testes.
+
+    Returns:
+        Tupla (admin, caixa): superusuário e usuário do grupo Caixa
+    """
+    Group.objects.get_or_create(name='Admin')
+    caixa_group, _ = Group.objects.get_or_create(name='Caixa')
+    # Sem senha: a autenticação é por token e o hash deixaria os testes lentos
+    admin = User.objects.create_user('admin_teste', is_staff=True, is_superuser=True)
+    caixa = User.objects.create_user('caixa_teste')
+    caixa.groups.add(caixa_group)
+    return admin, caixa
+
+
+def seed(orders, days=30, seed=1):
+    """Gera uma base sintética com o comando seed_marmitaria."""
+    call_command(
+        'seed_marmitaria', orders=orders, days=days, seed=seed,
+        expenses_per_day=1, stdout=io.StringIO(),
+    )
+
+
+class ApiPerformanceMixin:
+    """Mixin para TestCase com requisições autenticadas e limites de desempenho."""
+
+    def request(self, user, method, path, data=None, headers=None):
+        """
+        Faz uma requisição autenticada por JWT como `user`.
+
+        Respostas em streaming (exportações CSV) são lidas por inteiro, pois
+        as consultas só rodam durante a leitura.
+        """
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        # As views ainda imprimem mensagens de debug; não poluir a saída dos testes
+        with contextlib.redirect_stdout(io.StringIO()):
+            response = getattr(client, method)(path, data, format='json', headers=headers)
+            # Downloads (FileResponse) ficam com o arquivo aberto, para o teste ler
+            if getattr(response, 'streaming', False) and not isinstance(response, FileResponse):
+                response.content = b''.join(response.streaming_content)
+        return response
+
+    def count_queries(self, user, method, path, data=None, status=200):
+        """Retorna (resposta, consultas executadas) de uma requisição."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.request(user, method, path, data)
+        self.assertEqual(
+            response.status_code, status,
+            f'{method.upper()} {path}: status {response.status_code}',
+        )
+        return response, queries
+
+    def assertMaxQueries(self, limit, user, method, path, data=None, status=200):
+        """Falha se a requisição fizer mais que `limit` consultas."""
+        response, queries = self.count_queries(user, method, path, data, status)
+        if len(queries) > limit:
+            executed = '\n'.join(
+                f'{number}. {query["sql"]}' for number, query in enumerate(queries, start=1)
+            )
+            self.fail(
+                f'{method.upper()} {path}: {len(queries)} consultas (limite: {limit})\n{executed}'
+            )
+        return response
+
+    def assertConstantQueries(self, user, path, grow):
+        """
+        Falha se o número de consultas de um GET mudar depois de `grow()`
+        aumentar o resultado (sinal de consulta por linha, N+1).
+        """
+        _, before = self.count_queries(user, 'get', path)
+        grow()
+        _, after = self.count_queries(user, 'get', path)
+        self.assertEqual(
+            len(after), len(before),
+            f'GET {path}: {len(before)} consultas antes, {len(after)} depois de aumentar o resultado',
+        )
+
+    def assertFasterThan(self, limit_ms, user, method, path, data=None, repeat=3):
+        """
+        Falha se a mediana de `repeat` execuções (após um aquecimento)
+        passar de `limit_ms` x PERF_LATENCY_FACTOR.
+        """
+        self.request(user, method, path, data)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            self.request(user, method, path, data)
+            timings.append((time.perf_counter() - start) * 1000)
+        elapsed = statistics.median(timings)
+        limit = limit_ms * LATENCY_FACTOR
+        self.assertLessEqual(
+            elapsed, limit,
+            f'{method.upper()} {path}: {elapsed:.0f} ms (limite: {limit:.0f} ms)',
+        )
@@ -1,3 +1,1174 @@
-from django.test import TestCase
+import contextlib
+import gzip
+import importlib.util
+import io
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.signals import request_finished, request_started
+from django.db import OperationalError, close_old_connections, connection, transaction
+from django.db.migrations.recorder import MigrationRecorder
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from . import bootstrap, compression, inprocess, metrics, profiling, renderers, server, sqlite, static, transactions
+from .query_plans import analyze, audit
+from .slow_queries import normalize, slow_query_log
+from .models import Product
+from .testing import ApiPerformanceMixin, create_users, seed
+
+# Hash rápido: o padrão (PBKDF2) levaria centenas de ms por usuário criado
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+class ProductApiPerformanceTests(ApiPerformanceMixin, TestCase):
+    """Limites de consultas dos endpoints de produtos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.caixa = create_users()
+        seed(50)
+        cls.product = Product.objects.order_by('id').first()
+
+    def test_list(self):
+        self.assertMaxQueries(3, self.admin, 'get', '/api/products/')
+        self.assertMaxQueries(5, self.caixa, 'get', '/api/products/')
+
+    def test_retrieve(self):
+        self.assertMaxQueries(2, self.admin, 'get', f'/api/products/{self.product.id}/')
+
+    def test_create_update_delete(self):
+        response = self.assertMaxQueries(2, self.admin, 'post', '/api/products/', {
+            'name': 'Marmita Teste', 'category': self.product.category, 'price': '19.90',
+        }, status=201)
+        product_id = response.data['data']['id']
+        self.assertMaxQueries(3, self.admin, 'patch', f'/api/products/{product_id}/', {
+            'price': '21.90',
+        })
+        self.assertMaxQueries(5, self.admin, 'delete', f'/api/products/{product_id}/')
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class UserApiPerformanceTests(ApiPerformanceMixin, TestCase):
+    """Limites de consultas dos endpoints de usuários."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.caixa = create_users()
+
+    def _add_users(self, count=15):
+        caixa_group = Group.objects.get(name='Caixa')
+        admin_group = Group.objects.get(name='Admin')
+        for index in range(count):
+            user = User.objects.create_user(f'usuario_{index}')
+            user.groups.add(caixa_group if index % 2 else admin_group)
+
+    def test_list(self):
+        self.assertMaxQueries(4, self.admin, 'get', '/api/users/')
+
+    def test_list_does_not_query_per_user(self):
+        # UserSerializer lê os grupos de cada usuário (groups, is_admin, is_caixa)
+        self.assertConstantQueries(self.admin, '/api/users/', self._add_users)
+
+    def test_retrieve(self):
+        self.assertMaxQueries(3, self.admin, 'get', f'/api/users/{self.caixa.id}/')
+
+    def test_user_info(self):
+        self.assertMaxQueries(2, self.admin, 'get', '/api/user/')
+        self.assertMaxQueries(2, self.caixa, 'get', '/api/user/')
+
+    def test_create_update_delete(self):
+        response = self.assertMaxQueries(7, self.admin, 'post', '/api/users/', {
+            'username': 'novo_caixa', 'password': 'senha123', 'password_confirm': 'senha123',
+        }, status=201)
+        user_id = response.data['data']['id']
+        self.assertMaxQueries(7, self.admin, 'patch', f'/api/users/{user_id}/', {
+            'first_name': 'Novo', 'groups': ['Caixa'],
+        })
+        self.assertMaxQueries(9, self.admin, 'delete', f'/api/users/{user_id}/')
+
+    def test_register(self):
+        self.assertMaxQueries(8, self.caixa, 'post', '/api/register/', {
+            'username': 'registrado', 'email': 'registrado@example.com',
+            'password': 'senha123', 'password_confirm': 'senha123',
+        }, status=201)
+
+
+class MetricsTests(ApiPerformanceMixin, TestCase):
+    """Métricas por endpoint (GET /api/metrics)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.caixa = create_users()
+        seed(20)
+
+    def setUp(self):
+        metrics.reset()
+
+    def _series(self, text, name, **labels):
+        """Valor da série `name` cujos labels contêm `labels`."""
+        for line in text.splitlines():
+            if line.startswith(name + '{') and all(
+                f'{label}="{value}"' in line for label, value in labels.items()
+            ):
+                return float(line.rsplit(' ', 1)[1])
+        return None
+
+    def test_records_requests_per_route(self):
+        self.request(self.caixa, 'get', '/api/products/')
+        self.request(self.caixa, 'get', '/api/products/')
+        self.request(self.caixa, 'get', '/api/reports/sales/')
+        text = self.request(self.admin, 'get', '/api/metrics').content.decode()
+
+        route = {'route': 'product-list', 'method': 'GET', 'status': '200'}
+        self.assertEqual(self._series(text, 'marmitaria_http_requests_total', **route), 2)
+        self.assertEqual(self._series(
+            text, 'marmitaria_http_request_duration_seconds_bucket', le='+Inf', **route,
+        ), 2)
+        self.assertGreaterEqual(self._series(text, 'marmitaria_db_queries_total', **route), 2)
+        self.assertEqual(self._series(
+            text, 'marmitaria_http_requests_total', route='reports:sales_report', status='403',
+        ), 1)
+
+    def test_streaming_response_counts_queries_while_streaming(self):
+        self.request(self.admin, 'get', '/api/reports/orders/export_csv/')
+        self.assertGreaterEqual(self._series(
+            metrics.render(), 'marmitaria_db_queries_total', route='reports:export_orders_csv',
+        ), 2)
+
+    def test_requires_admin(self):
+        response = self.request(self.caixa, 'get', '/api/metrics')
+        self.assertEqual(response.status_code, 403)
+        response = self.request(self.admin, 'get', '/api/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+
+class SlowQueryLogTests(ApiPerformanceMixin, TestCase):
+    """Log de consultas lentas (GET /api/slow-queries/)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.caixa = create_users()
+        seed(20)
+
+    def setUp(self):
+        slow_query_log.clear()
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.log_dir.cleanup)
+        self.log_file = os.path.join(self.log_dir.name, 'slow_queries.log')
+
+    def test_normalize(self):
+        self.assertEqual(
+            normalize("SELECT * FROM t WHERE a = 'x''y' AND b IN (%s, %s,%s) AND c > 10"),
+            'SELECT * FROM t WHERE a = ? AND b IN (...) AND c > ?',
+        )
+
+    def test_records_view_plan_and_fingerprint(self):
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_LOG_FILE=self.log_file):
+            self.request(self.admin, 'get', '/api/reports/orders/export_csv/')
+            self.request(self.admin, 'get', '/api/reports/orders/export_csv/')
+
+        snapshot = slow_query_log.snapshot()
+        report_queries = [
+            stats for stats in snapshot['by_fingerprint']
+            if 'reports:export_orders_csv' in stats['views'] and 'orders_order' in stats['sql']
+        ]
+        self.assertTrue(report_queries)
+        # Mesma consulta nas duas requisições: um fingerprint, duas execuções
+        self.assertEqual(report_queries[0]['count'], 2)
+        self.assertTrue(report_queries[0]['plan'])
+
+        with open(self.log_file, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), len(snapshot['recent']))
+        self.assertIn('plan', records[0])
+
+    def test_below_threshold_is_not_recorded(self):
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=60_000, SLOW_QUERY_LOG_FILE=self.log_file):
+            self.request(self.admin, 'get', '/api/reports/sales/')
+        self.assertEqual(slow_query_log.snapshot()['recent'], [])
+
+    def test_endpoint(self):
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_LOG_FILE=self.log_file):
+            self.request(self.admin, 'get', '/api/products/')
+        self.assertEqual(self.request(self.caixa, 'get', '/api/slow-queries/').status_code, 403)
+        response = self.request(self.admin, 'get', '/api/slow-queries/')
+        self.assertTrue(response.data['data']['recent'])
+        self.request(self.admin, 'delete', '/api/slow-queries/')
+        self.assertEqual(slow_query_log.snapshot()['recent'], [])
+
+
+class ProfilingTests(ApiPerformanceMixin, TestCase):
+    """Profiling sob demanda (X-Profile: 1) e GET /api/profiles/."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.caixa = create_users()
+        seed(20)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(PROFILING_DIR=directory.name, PROFILING_MAX_PROFILES=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_admin_request_is_profiled(self):
+        response = self.request(self.admin, 'get', '/api/reports/sales/', headers={'X-Profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        profile_id = response['X-Profile-Id']
+        self.assertIsNotNone(profiling.profile_file(profile_id, 'pstats'))
+        with open(profiling.profile_file(profile_id, 'collapsed'), encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit() for line in lines))
+
+        [meta] = profiling.list_profiles()
+        self.assertEqual(meta['view'], 'reports:sales_report')
+        self.assertEqual(meta['user'], self.admin.username)
+
+    def test_streaming_response_and_query_flag(self):
+        response = self.request(self.admin, 'get', '/api/reports/orders/export_csv/?profile=1')
+        self.assertIn('X-Profile-Id', response)
+        self.assertTrue(response.content)
+
+    def test_non_admin_is_not_profiled(self):
+        response = self.request(self.caixa, 'get', '/api/products/', headers={'X-Profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(profiling.list_profiles(), [])
+
+    def test_retention(self):
+        ids = [
+            self.request(self.admin, 'get', '/api/products/?profile=1')['X-Profile-Id']
+            for _ in range(3)
+        ]
+        self.assertEqual([meta['id'] for meta in profiling.list_profiles()], ids[:0:-1])
+        self.assertIsNone(profiling.profile_file(ids[0], 'pstats'))
+
+    def test_endpoints(self):
+        profile_id = self.request(self.admin, 'get', '/api/products/?profile=1')['X-Profile-Id']
+        self.assertEqual(self.request(self.caixa, 'get', '/api/profiles/').status_code, 403)
+        response = self.request(self.admin, 'get', '/api/profiles/')
+        self.assertEqual(response.data['data']['profiles'][0]['id'], profile_id)
+
+        response = self.request(self.admin, 'get', f'/api/profiles/{profile_id}/collapsed/')
+        # Sem response.close(): getvalue() lê o arquivo até o fim e o cliente
+        # de testes o fecha; um close() a mais dispararia request_finished,
+        # que no PostgreSQL fecharia a conexão (em transação) do TestCase
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertTrue(response.getvalue())
+        self.assertEqual(self.request(self.admin, 'get', f'/api/profiles/{profile_id}/x/').status_code, 404)
+        self.assertEqual(self.request(self.admin, 'get', '/api/profiles/../collapsed/').status_code, 404)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN do SQLite')
+class QueryPlanAuditTests(TestCase):
+    """Análise do EXPLAIN QUERY PLAN (core/query_plans.py, audit_query_plans)."""
+
+    LARGE = {'orders_order', 'orders_orderitem', 'payments_payment'}
+
+    def test_scan_with_sort_suggests_filter_and_order_columns(self):
+        sql = (
+            'SELECT "payments_payment"."id" FROM "payments_payment" '
+            'WHERE "payments_payment"."status" IN (%s) ORDER BY "payments_payment"."created_at" DESC'
+        )
+        plan = ['SCAN payments_payment', 'USE TEMP B-TREE FOR ORDER BY']
+        [finding] = analyze(sql, plan, self.LARGE, {})
+        self.assertEqual(finding.kind, 'temp_btree')
+        self.assertEqual(finding.suggestion, ('status', 'created_at'))
+        self.assertTrue(finding.actionable)
+
+        indexes = {'payments_payment': {'payment_status_created_idx': ['status', 'created_at']}}
+        [finding] = analyze(sql, plan, self.LARGE, indexes)
+        self.assertEqual(finding.covered_by, 'payment_status_created_idx')
+        self.assertFalse(finding.actionable)
+
+    def test_join_columns_are_not_suggested(self):
+        # Agregação do período inteiro: leitura integral, sem índice a sugerir
+        sql = (
+            'SELECT COUNT("orders_order"."id") FROM "orders_order" '
+            'LEFT OUTER JOIN "payments_payment" ON ("orders_order"."id" = "payments_payment"."order_id") '
+            'GROUP BY "orders_order"."status"'
+        )
+        plan = [
+            'SCAN orders_order',
+            'SEARCH payments_payment USING INDEX sqlite_autoindex_payments_payment_1 (order_id=?) LEFT-JOIN',
+        ]
+        [finding] = analyze(sql, plan, self.LARGE, {})
+        self.assertEqual(finding.suggestion, ())
+        self.assertFalse(finding.actionable)
+
+    def test_partial_index_in_correlated_subquery(self):
+        sql = (
+            'SELECT SUM((SELECT COUNT(U0."id") FROM "orders_orderitem" U0 '
+            'WHERE (U0."order_id" = ("orders_orderitem"."order_id") '
+            'AND U0."product_id" = ("orders_orderitem"."product_id")))) '
+            'FROM "orders_orderitem" WHERE "orders_orderitem"."order_id" = %s'
+        )
+        plan = [
+            'SEARCH orders_orderitem USING INDEX orders_orderitem_order_id_fe61a34d (order_id=?)',
+            'CORRELATED SCALAR SUBQUERY 1',
+            '  SEARCH U0 USING INDEX orders_orderitem_product_id_afe4254a (product_id=?)',
+        ]
+        [finding] = analyze(sql, plan, self.LARGE, {})
+        self.assertEqual(finding.kind, 'partial_search')
+        self.assertEqual(finding.suggestion, ('order_id', 'product_id'))
+
+    def test_paginated_index_scan_is_not_reported(self):
+        sql = (
+            'SELECT "orders_order"."id" FROM "orders_order" '
+            'ORDER BY "orders_order"."created_at" DESC LIMIT 20'
+        )
+        self.assertEqual(analyze(sql, ['SCAN orders_order USING INDEX order_created_idx'], self.LARGE, {}), [])
+
+    def test_endpoints_have_no_missing_indexes(self):
+        admin, caixa = create_users()
+        seed(300)
+        audited, large_tables = audit({'admin': admin, 'caixa': caixa}, min_rows=300)
+        self.assertIn('orders_orderitem', large_tables)
+        problems = {query.fingerprint: query.sql for query in audited if query.problems}
+        self.assertEqual(problems, {})
+
+
+@skipUnless(connection.vendor == 'sqlite', 'perfil do SQLite')
+class SQLiteProfileTests(TestCase):
+    """Perfil de produção do SQLite (core/sqlite.py)."""
+
+    def _pragma(self, dbapi_connection, name):
+        return dbapi_connection.execute(f'PRAGMA {name}').fetchone()[0]
+
+    def test_production_profile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            dbapi_connection = sqlite3.connect(os.path.join(directory, 'teste.sqlite3'))
+            try:
+                with override_settings(SQLITE_PROFILE='production', SQLITE_BUSY_TIMEOUT_MS=1234):
+                    sqlite.apply_pragmas(dbapi_connection)
+                self.assertEqual(self._pragma(dbapi_connection, 'journal_mode'), 'wal')
+                self.assertEqual(self._pragma(dbapi_connection, 'synchronous'), 1)  # NORMAL
+                self.assertEqual(self._pragma(dbapi_connection, 'temp_store'), 2)  # MEMORY
+                self.assertEqual(self._pragma(dbapi_connection, 'busy_timeout'), 1234)
+                self.assertEqual(self._pragma(dbapi_connection, 'cache_size'), -65536)
+            finally:
+                dbapi_connection.close()
+
+    def test_default_profile_keeps_sqlite_defaults(self):
+        with override_settings(SQLITE_PROFILE='default'):
+            self.assertEqual(sqlite.pragmas(), [])
+
+    def test_applied_to_django_connections(self):
+        from django.db import connection
+
+        connection.ensure_connection()
+        self.assertEqual(self._pragma(connection.connection, 'busy_timeout'), 5000)
+
+
+@override_settings(WRITE_RETRY_BACKOFF_MS=0)
+class WriteTransactionTests(ApiPerformanceMixin, TransactionTestCase):
+    """
+    Transações de escrita com BEGIN IMMEDIATE e novas tentativas
+    (core/transactions.py). TransactionTestCase: sem a transação externa do
+    TestCase, as views abrem a própria.
+    """
+
+    def setUp(self):
+        metrics.reset()
+        self.admin, self.caixa = create_users()
+
+    @skipUnless(connection.vendor == 'sqlite', 'BEGIN IMMEDIATE é do SQLite')
+    def test_immediate_transaction_begins_immediate(self):
+        statements = []
+
+        def capture(execute, sql, params, many, context):
+            statements.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            with transactions.immediate_transaction():
+                Product.objects.exists()
+            # Transações comuns continuam DEFERRED
+            with transaction.atomic():
+                Product.objects.exists()
+        begins = [sql for sql in statements if sql.startswith('BEGIN')]
+        self.assertEqual(begins, ['BEGIN IMMEDIATE', 'BEGIN'])
+
+    def test_retries_lock_errors(self):
+        calls = []
+
+        def write():
+            calls.append(1)
+            if len(calls) < 3:
+                raise OperationalError('database is locked')
+            return 'ok'
+
+        self.assertEqual(transactions.run_write_transaction(write, 'teste'), 'ok')
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(metrics.write_retries(), {('teste', 'retry'): 2})
+        self.assertIn('marmitaria_db_write_retries_total{view="teste"} 2', metrics.render())
+
+    def test_other_errors_are_not_retried(self):
+        write = mock.Mock(side_effect=OperationalError('no such table: x'))
+        with self.assertRaises(OperationalError):
+            transactions.run_write_transaction(write, 'teste')
+        self.assertEqual(write.call_count, 1)
+        self.assertEqual(metrics.write_retries(), {})
+
+    @override_settings(WRITE_RETRY_ATTEMPTS=3)
+    def test_gives_up_with_503(self):
+        with mock.patch(
+            'expenses.views.ExpenseViewSet.create',
+            side_effect=OperationalError('database is locked'),
+        ) as create:
+            response = self.request(self.caixa, 'post', '/api/expenses/', {})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(create.call_count, 3)
+        self.assertEqual(metrics.write_retries(), {
+            ('ExpenseViewSet.create', 'retry'): 2,
+            ('ExpenseViewSet.create', 'failure'): 1,
+        })
+
+    @skipUnless(connection.vendor == 'sqlite', 'BEGIN IMMEDIATE é do SQLite')
+    def test_write_endpoint_runs_in_immediate_transaction(self):
+        statements = []
+
+        def capture(execute, sql, params, many, context):
+            statements.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            response = self.request(self.caixa, 'post', '/api/orders/', {'notes': 'teste'})
+            self.assertEqual(response.status_code, 201)
+            response = self.request(self.caixa, 'get', '/api/orders/')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual([sql for sql in statements if sql.startswith('BEGIN')], ['BEGIN IMMEDIATE'])
+
+
+class ServerBackendTests(TestCase):
+    """Escolha do servidor HTTP de run_server.py e do desktop (core/server.py)."""
+
+    def _choose(self, installed, platform='linux', embedded=False):
+        with mock.patch.object(server.importlib.util, 'find_spec', lambda name: name in installed or None), \
+                mock.patch.object(server.sys, 'platform', platform):
+            return server.choose_backend(embedded)
+
+    def test_auto(self):
+        self.assertEqual(self._choose({'gunicorn', 'waitress'}), 'gunicorn')
+        self.assertEqual(self._choose({'gunicorn', 'waitress'}, platform='win32'), 'waitress')
+        # O desktop roda o servidor numa thread: gunicorn não serve
+        self.assertEqual(self._choose({'gunicorn', 'waitress'}, embedded=True), 'waitress')
+        self.assertEqual(self._choose({'gunicorn'}, embedded=True), 'runserver')
+        self.assertEqual(self._choose(set()), 'runserver')
+
+    def test_configured(self):
+        with override_settings(SERVER_MODE='development'):
+            self.assertEqual(self._choose({'gunicorn', 'waitress'}), 'runserver')
+        with override_settings(SERVER_BACKEND='waitress'):
+            self.assertEqual(self._choose({'gunicorn', 'waitress'}), 'waitress')
+        with override_settings(SERVER_BACKEND='gunicorn'), self.assertRaises(ImproperlyConfigured):
+            self._choose({'gunicorn'}, embedded=True)
+        with override_settings(SERVER_BACKEND='uwsgi'), self.assertRaises(ImproperlyConfigured):
+            self._choose(set())
+
+    @skipUnless(importlib.util.find_spec('waitress'), 'waitress não instalado')
+    def test_ready_event(self):
+        # O desktop espera o evento em vez de testar a porta
+        ready = threading.Event()
+        with override_settings(SERVER_BACKEND='waitress', SERVER_SHUTDOWN_TIMEOUT=2):
+            instance = server.Server('127.0.0.1', 0, embedded=True, on_ready=ready.set)
+            thread = threading.Thread(target=instance.run, daemon=True)
+            thread.start()
+            self.assertTrue(ready.wait(5))
+            self.assertTrue(instance.ready.is_set())
+            port = instance._waitress.effective_port
+            socket.create_connection(('127.0.0.1', port), timeout=2).close()
+            instance.stop()
+            thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+
+
+class StaticFilesTests(TestCase):
+    """Estáticos do frontend: manifesto, variantes e cache (core/static.py)."""
+
+    JS = 'assets/index-BAv9M_gR.js'
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, 'assets'))
+        self._write(self.JS, b'console.log("marmitaria");\n' * 100)
+        self._write('favicon.svg', b'<svg xmlns="http://www.w3.org/2000/svg"/>')
+        override = override_settings(STATIC_ROOT=self.root, STATICFILES_DIRS=[], DEBUG=False)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.root)
+        self.addCleanup(static.manifest.clear)
+        static.manifest.clear()
+
+    def _write(self, name, data):
+        with open(os.path.join(self.root, name), 'wb') as handle:
+            handle.write(data)
+
+    def _get(self, path, **headers):
+        response = self.client.get(f'/static/{path}', **headers)
+        if response.status_code == 200:
+            response.body = b''.join(response.streaming_content)
+        return response
+
+    def test_cache_headers(self):
+        response = self._get(self.JS)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/javascript')
+        self.assertEqual(response['Cache-Control'], static.IMMUTABLE)
+        self.assertEqual(response.body, b'console.log("marmitaria");\n' * 100)
+        # Sem hash no nome: revalidado a cada uso
+        response = self._get('favicon.svg')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+        self.assertNotIn('Content-Disposition', response)
+
+    def test_debug_rebuild_rate_limited(self):
+        with override_settings(DEBUG=True), \
+                mock.patch.object(static, 'build_manifest', wraps=static.build_manifest) as build:
+            self.assertEqual(self._get('favicon.svg').status_code, 200)
+            for _ in range(3):
+                self.assertEqual(self._get('assets/nao-existe.js').status_code, 404)
+            self.assertEqual(build.call_count, 1)
+            # Novo build com o servidor rodando: aparece depois do intervalo
+            self._write('novo.txt', b'novo')
+            later = static.time.monotonic() + static.REBUILD_INTERVAL
+            with mock.patch.object(static.time, 'monotonic', return_value=later):
+                self.assertEqual(self._get('novo.txt').status_code, 200)
+            self.assertEqual(build.call_count, 2)
+
+    def test_not_modified(self):
+        response = self._get('favicon.svg')
+        etag, modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(self._get('favicon.svg', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self._get('favicon.svg', HTTP_IF_MODIFIED_SINCE=modified).status_code, 304)
+        self.assertEqual(self._get('favicon.svg', HTTP_IF_NONE_MATCH='"outro"').status_code, 200)
+
+    def test_precompressed_variants(self):
+        call_command('compress_static', stdout=io.StringIO())
+        self.assertTrue(os.path.exists(os.path.join(self.root, self.JS + '.gz')))
+        # Pequeno demais para compensar
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'favicon.svg.gz')))
+
+        plain = self._get(self.JS)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response = self._get(self.JS, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/javascript')
+        self.assertEqual(gzip.decompress(response.body), plain.body)
+        self.assertNotEqual(response['ETag'], plain['ETag'])
+        self.assertNotIn('Content-Encoding', self._get(self.JS, HTTP_ACCEPT_ENCODING='gzip;q=0'))
+
+        # Variantes já atualizadas não são refeitas
+        output = io.StringIO()
+        call_command('compress_static', stdout=output)
+        self.assertIn('0 variante(s) gerada(s)', output.getvalue())
+
+    def test_stale_variant_ignored(self):
+        call_command('compress_static', stdout=io.StringIO())
+        # Novo build sobrescreve o arquivo sem refazer as variantes
+        stat = os.stat(os.path.join(self.root, self.JS + '.gz'))
+        self._write(self.JS, b'console.log("novo");\n' * 100)
+        os.utime(os.path.join(self.root, self.JS), ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        response = self._get(self.JS, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response.body, b'console.log("novo");\n' * 100)
+
+    def test_not_found(self):
+        for path in ('assets/nao-existe.js', '../settings.py', 'assets/../../settings.py', 'assets'):
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(f'/static/{path}').status_code, 404)
+
+
+class DesktopBootstrapTests(TestCase):
+    """Caminho rápido da inicialização do desktop (core/bootstrap.py)."""
+
+    def test_fast_path(self):
+        self.assertIsNone(bootstrap.stored_fingerprint())
+        self.assertTrue(bootstrap.prepare_database())
+        applied = bootstrap.applied_migrations()
+        self.assertEqual(bootstrap.stored_fingerprint(), bootstrap.schema_fingerprint(applied))
+        self.assertTrue(Group.objects.filter(name='Caixa').exists())
+        self.assertTrue(User.objects.filter(username='admin').exists())
+        # Schema atual: migrações aplicadas e impressão digital
+        with self.assertNumQueries(2):
+            self.assertFalse(bootstrap.prepare_database())
+
+    def test_fingerprint(self):
+        names = bootstrap.migration_names()
+        self.assertIn(('core', '0003_appstate'), names)
+        self.assertIn(('orders', '0004_order_indexes'), names)
+        applied = bootstrap.applied_migrations()
+        self.assertTrue(applied.issuperset(names))
+        fingerprint = bootstrap.schema_fingerprint(applied)
+        self.assertNotEqual(bootstrap.schema_fingerprint(applied - {('orders', '0004_order_indexes')}), fingerprint)
+        with override_settings(APP_VERSION='99.0.0'):
+            self.assertNotEqual(bootstrap.schema_fingerprint(applied), fingerprint)
+
+    def test_unapplied_migration_prepares_again(self):
+        bootstrap.prepare_database()
+        # Migração desfeita por fora: o migrate roda e a impressão digital é refeita
+        MigrationRecorder.Migration.objects.filter(app='orders', name='0004_order_indexes').delete()
+        with mock.patch('django.core.management.commands.migrate.Command.handle', return_value=None) as migrate, \
+                self.assertLogs('marmitaria.startup', 'WARNING'):
+            self.assertTrue(bootstrap.prepare_database())
+        migrate.assert_called_once()
+        # Continua faltando a migração: a próxima abertura prepara de novo
+        with mock.patch('django.core.management.commands.migrate.Command.handle', return_value=None) as migrate, \
+                self.assertLogs('marmitaria.startup', 'WARNING'):
+            self.assertTrue(bootstrap.prepare_database())
+        migrate.assert_called_once()
+
+    def test_new_version_prepares_again(self):
+        bootstrap.prepare_database()
+        with override_settings(APP_VERSION='99.0.0'):
+            self.assertTrue(bootstrap.prepare_database())
+            self.assertFalse(bootstrap.prepare_database())
+
+    def test_failed_migrate_not_recorded(self):
+        with mock.patch('django.core.management.commands.migrate.Command.handle', side_effect=RuntimeError('falhou')), \
+                self.assertRaises(RuntimeError):
+            bootstrap.prepare_database()
+        self.assertIsNone(bootstrap.stored_fingerprint())
+
+    def test_failed_bootstrap_not_recorded(self):
+        with mock.patch('core.management.commands.create_groups.Command.handle', side_effect=RuntimeError('falhou')), \
+                self.assertLogs('marmitaria.startup', 'WARNING'):
+            self.assertTrue(bootstrap.prepare_database())
+        # Repete na próxima abertura
+        self.assertIsNone(bootstrap.stored_fingerprint())
+
+    def test_startup_report(self):
+        log_file = os.path.join(tempfile.mkdtemp(), 'startup.log')
+        self.addCleanup(shutil.rmtree, os.path.dirname(log_file))
+        timer = bootstrap.StartupTimer()
+        with timer.phase('banco'):
+            pass
+        timer.record('servidor', timer.started)
+        with override_settings(STARTUP_LOG_FILE=log_file):
+            report = timer.finish()
+        self.assertIn('Inicialização:', report)
+        self.assertIn('servidor', report)
+        with open(log_file, encoding='utf-8') as handle:
+            entry = json.loads(handle.readline())
+        self.assertEqual([phase['name'] for phase in entry['phases']], ['banco', 'servidor'])
+        self.assertGreaterEqual(entry['total_ms'], 0)
+
+
+class DesktopImportTests(TestCase):
+    """
+    O que a inicialização do desktop importa antes da primeira página
+    (django.setup, WSGI e URLconf); o tempo total é medido por
+    benchmarks/bench_imports.py.
+    """
+
+    ENTRY = (
+        'import django, sys\n'
+        'django.setup()\n'
+        'from django.core.wsgi import get_wsgi_application\n'
+        'from django.urls import get_resolver\n'
+        'get_wsgi_application()\n'
+        'get_resolver().url_patterns\n'
+        'print("\\n".join(sorted(sys.modules)))\n'
+    )
+
+    def _modules(self, **environ):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='marmitaria.settings', **environ)
+        completed = subprocess.run(
+            [sys.executable, '-c', self.ENTRY], cwd=str(settings.BASE_DIR), env=env,
+            capture_output=True, text=True, timeout=60,
+        )
+        self.assertEqual(completed.returncode, 0, completed.stderr[-2000:])
+        return set(completed.stdout.split())
+
+    def test_lazy_modules(self):
+        modules = self._modules(ADMIN_ENABLED='False')
+        # Carregados no primeiro uso (core/lazy.py)
+        for name in ('reports.views', 'reports.engine', 'reports.definitions', 'rest_framework_simplejwt.views'):
+            self.assertNotIn(name, modules)
+        # Sem o admin, os admin.py dos apps não são importados
+        self.assertNotIn('core.admin', modules)
+        self.assertIn('reports.urls', modules)
+
+    def test_admin_enabled(self):
+        self.assertIn('core.admin', self._modules(ADMIN_ENABLED='True'))
+
+
+class InProcessTransportTests(TestCase):
+    """Requisições da WebView do desktop entregues direto ao Django (core/inprocess.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, _ = create_users()
+
+    def setUp(self):
+        self.dispatcher = inprocess.WSGIDispatcher(workers=2)
+        self.addCleanup(self.dispatcher.shutdown)
+
+    def _headers(self):
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        return {'Authorization': f'Bearer {RefreshToken.for_user(self.admin).access_token}'}
+
+    def _dispatch(self, method, path, headers=None, body=b'', dispatcher=None, cancel_after=None):
+        """Executa na thread do teste (vê os dados da transação do TestCase)."""
+        response = {'chunks': [], 'finished': False}
+
+        def start(status, response_headers):
+            response['status'], response['headers'] = status, dict(response_headers)
+
+        def write(chunk):
+            response['chunks'].append(chunk)
+            return cancel_after is None or len(response['chunks']) < cancel_after
+
+        def finish():
+            response['finished'] = True
+
+        # Como no cliente de testes do Django: sem close_old_connections, que
+        # fecharia a conexão (em transação) do TestCase no PostgreSQL
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                (dispatcher or self.dispatcher).dispatch(
+                    method, inprocess.URL.rstrip('/') + path, headers or {}, body, start, write, finish,
+                )
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+        self.assertTrue(response['finished'])
+        return response
+
+    def test_environ(self):
+        environ = inprocess.build_environ(
+            'post', 'marmitaria://app/api/produtos%20a%C3%A7%C3%A3o/?page=2',
+            {'Content-Type': 'application/json', 'Accept-Encoding': 'br', 'If-None-Match': '"x"', 'X-Profile': '1'},
+            b'{}',
+        )
+        self.assertEqual(environ['REQUEST_METHOD'], 'POST')
+        self.assertEqual(environ['PATH_INFO'].encode('iso-8859-1').decode('utf-8'), '/api/produtos ação/')
+        self.assertEqual(environ['QUERY_STRING'], 'page=2')
+        self.assertEqual(environ['HTTP_HOST'], 'app')
+        self.assertEqual(environ['CONTENT_TYPE'], 'application/json')
+        self.assertEqual(environ['CONTENT_LENGTH'], '2')
+        self.assertEqual(environ['HTTP_X_PROFILE'], '1')
+        self.assertNotIn('HTTP_ACCEPT_ENCODING', environ)
+        self.assertNotIn('HTTP_IF_NONE_MATCH', environ)
+
+    def test_get_and_post(self):
+        response = self._dispatch('GET', '/api/user/', self._headers())
+        self.assertEqual(response['status'], 200)
+        self.assertEqual(response['headers'][inprocess.STATUS_HEADER], '200')
+        self.assertIn('application/json', response['headers']['Content-Type'])
+        self.assertNotIn('Content-Length', response['headers'])
+        self.assertEqual(json.loads(b''.join(response['chunks']))['data']['username'], 'admin_teste')
+
+        body = json.dumps({'name': 'Marmita Em Processo', 'price': '18.50'}).encode()
+        response = self._dispatch(
+            'POST', '/api/products/', dict(self._headers(), **{'Content-Type': 'application/json'}), body,
+        )
+        self.assertEqual(response['status'], 201)
+        self.assertTrue(Product.objects.filter(name='Marmita Em Processo').exists())
+
+    def test_error_status(self):
+        response = self._dispatch('GET', '/api/user/')
+        self.assertEqual(response['status'], 401)
+        self.assertEqual(response['headers'][inprocess.STATUS_HEADER], '401')
+
+    def test_streaming_and_cancel(self):
+        closed = []
+
+        class Result:
+            def __iter__(self):
+                return iter([b'a;b\n', b'', b'1;2\n', b'3;4\n'])
+
+            def close(self):
+                closed.append(True)
+
+        def application(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/csv'), ('Content-Length', '12')])
+            return Result()
+
+        dispatcher = inprocess.WSGIDispatcher(application, workers=1)
+        self.addCleanup(dispatcher.shutdown)
+        response = self._dispatch('GET', '/export.csv', dispatcher=dispatcher)
+        self.assertEqual(response['chunks'], [b'a;b\n', b'1;2\n', b'3;4\n'])
+        self.assertEqual(closed, [True])
+
+        # A WebView desistiu: para de gerar e fecha a resposta
+        response = self._dispatch('GET', '/export.csv', dispatcher=dispatcher, cancel_after=1)
+        self.assertEqual(response['chunks'], [b'a;b\n'])
+        self.assertEqual(closed, [True, True])
+
+    def test_application_error(self):
+        def application(environ, start_response):
+            raise RuntimeError('falhou')
+
+        dispatcher = inprocess.WSGIDispatcher(application, workers=1)
+        self.addCleanup(dispatcher.shutdown)
+        with self.assertLogs('marmitaria.inprocess', 'ERROR'):
+            response = self._dispatch('GET', '/api/user/', dispatcher=dispatcher)
+        self.assertEqual(response['status'], 500)
+        self.assertEqual(response['headers'][inprocess.STATUS_HEADER], '500')
+
+    def test_submit(self):
+        done = threading.Event()
+        response = {}
+
+        def start(status, headers):
+            response['status'] = status
+            response['thread'] = threading.current_thread().name
+
+        self.dispatcher.submit(
+            'GET', inprocess.URL + 'api/metrics', {}, b'', start, lambda chunk: True, done.set,
+        ).result(timeout=10)
+        self.assertTrue(done.is_set())
+        self.assertTrue(response['thread'].startswith('marmitaria-inprocess'))
+        self.assertIn(response['status'], (200, 401, 403))
+
+
+class FastJSONRendererTests(ApiPerformanceMixin, TestCase):
+    """Renderer JSON da API (core/renderers.py): mesma saída do JSONRenderer do DRF."""
+
+    def _data(self):
+        from django.utils.translation import gettext_lazy
+        from rest_framework.utils.serializer_helpers import ReturnList
+
+        return {
+            'total': Decimal('1234.50'),
+            'created_at': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+            'local': datetime(2024, 5, 1, 9, 30, tzinfo=timezone(timedelta(hours=-3))),
+            'day': date(2024, 5, 1),
+            'hour': time(11, 45),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'label': gettext_lazy('Pedido'),
+            'name': 'Feijoada à moda da casa',
+            'by_hour': {11: 3, 12: 7},
+            'items': ReturnList([{'price': Decimal('18.90'), 'quantity': 2}], serializer=None),
+            'empty': None,
+        }
+
+    def test_same_output(self):
+        from rest_framework.renderers import JSONRenderer
+
+        expected = JSONRenderer().render(self._data())
+        self.assertEqual(renderers.FastJSONRenderer().render(self._data()), expected)
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(renderers.FastJSONRenderer().render(self._data()), expected)
+
+    @skipUnless(renderers.orjson is not None, 'orjson não instalado')
+    def test_orjson(self):
+        with mock.patch.object(renderers.orjson, 'dumps', wraps=renderers.orjson.dumps) as dumps:
+            renderers.FastJSONRenderer().render({'total': Decimal('10.00')})
+        dumps.assert_called_once()
+
+    def test_fallbacks(self):
+        renderer = renderers.FastJSONRenderer()
+        # Fora do alcance do orjson: o json padrão
+        self.assertEqual(renderer.render({'big': 2 ** 70}), b'{"big":1180591620717411303424}')
+        # Indentação pedida no Accept
+        self.assertIn(b'\n    "total"', renderer.render({'total': 1}, 'application/json; indent=4'))
+        self.assertEqual(renderer.render(None), b'')
+
+    def test_same_output_edge_cases(self):
+        from rest_framework.renderers import JSONRenderer
+
+        data = {
+            'separators': 'linha\u2028parágrafo\u2029fim',
+            'floats': [1e16, -1.5e16, 1e22, 1.23e-7, 1e-05, 0.0001, 1e15, 10.5],
+            'decimal': Decimal('1E+20'),
+            'text': 'lote 1e5 e 0.00001',
+            'keys': {1.5: 'chave'},
+        }
+        expected = JSONRenderer().render(data)
+        self.assertIn(b'\\u2028', expected)
+        self.assertIn(b'1e+16', expected)
+        self.assertEqual(renderers.FastJSONRenderer().render(data), expected)
+        # Sem floats fora da faixa: orjson, com U+2028 escapado
+        data = {'nome': 'linha\u2028fim', 'total': Decimal('18.90'), 'lift': 1.25}
+        with mock.patch.object(renderers.JSONRenderer, 'render') as fallback:
+            content = renderers.FastJSONRenderer().render(data)
+        fallback.assert_not_called()
+        self.assertEqual(content, JSONRenderer().render(data))
+        self.assertEqual(
+            renderers.FastJSONRenderer().render({'nome': 'Suco – “natural” '}),
+            JSONRenderer().render({'nome': 'Suco – “natural” '}),
+        )
+
+    def test_non_finite(self):
+        renderer = renderers.FastJSONRenderer()
+        # STRICT_JSON (padrão do DRF): NaN e infinito são erro, não null
+        for value in (float('nan'), float('inf'), -float('inf'), Decimal('NaN'), Decimal('Infinity')):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                renderer.render({'items': [{'lift': value, 'vazio': None}]})
+        renderer.strict = False
+        self.assertEqual(renderer.render({'lift': float('nan'), 'max': float('inf')}),
+                         b'{"lift":NaN,"max":Infinity}')
+        self.assertEqual(renderer.render({'vazio': None, 'total': 1.5}), b'{"vazio":null,"total":1.5}')
+
+    def test_settings_fallback(self):
+        from rest_framework.renderers import JSONRenderer
+
+        data = {'name': 'Feijoada à moda da casa', 'total': Decimal('10.50')}
+        for attribute, value in (('ensure_ascii', True), ('compact', False)):
+            with self.subTest(attribute=attribute):
+                expected, renderer = JSONRenderer(), renderers.FastJSONRenderer()
+                setattr(expected, attribute, value)
+                setattr(renderer, attribute, value)
+                self.assertEqual(renderer.render(data), expected.render(data))
+
+    def test_default_renderer(self):
+        admin, _ = create_users()
+        response = self.request(admin, 'get', '/api/user/')
+        self.assertIsInstance(response.accepted_renderer, renderers.FastJSONRenderer)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content)['data']['username'], 'admin_teste')
+
+
+class CompressionTests(ApiPerformanceMixin, TestCase):
+    """Compressão das respostas da API (core/compression.py, CompressionMiddleware)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.caixa = create_users()
+        seed(40)
+
+    def setUp(self):
+        metrics.reset()
+
+    def _middleware(self, response, accept='gzip'):
+        from .middleware import CompressionMiddleware
+
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_gzip(self):
+        plain = self.request(self.admin, 'get', '/api/orders/')
+        response = self.request(self.admin, 'get', '/api/orders/', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(json.loads(gzip.decompress(response.content)), json.loads(plain.content))
+
+        text = metrics.render()
+        self.assertIn('marmitaria_http_compressed_responses_total{encoding="gzip"} 1', text)
+        self.assertIn(f'marmitaria_http_compression_input_bytes_total{{encoding="gzip"}} {len(plain.content)}', text)
+        self.assertIn(f'marmitaria_http_compression_output_bytes_total{{encoding="gzip"}} {len(response.content)}', text)
+
+    @skipUnless(compression.brotli is not None, 'brotli não instalado')
+    def test_brotli(self):
+        plain = self.request(self.admin, 'get', '/api/reports/heatmap/')
+        response = self.request(self.admin, 'get', '/api/reports/heatmap/', headers={'Accept-Encoding': 'gzip, br'})
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(compression.brotli.decompress(response.content), plain.content)
+        # br recusado (q=0): gzip
+        response = self.request(
+            self.admin, 'get', '/api/reports/heatmap/', headers={'Accept-Encoding': 'gzip, br;q=0'},
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_skipped(self):
+        # Sem Accept-Encoding, abaixo do tamanho mínimo
+        self.assertFalse(self.request(self.admin, 'get', '/api/orders/').has_header('Content-Encoding'))
+        response = self.request(self.admin, 'get', '/api/user/', headers={'Accept-Encoding': 'gzip'})
+        self.assertFalse(response.has_header('Content-Encoding'))
+        # Formato já comprimido
+        from django.http import HttpResponse
+
+        response = self._middleware(HttpResponse(b'\x89PNG' * 1000, content_type='image/png'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        with override_settings(COMPRESSION_MIN_SIZE=10 ** 6):
+            response = self._middleware(HttpResponse(b'a' * 5000, content_type='text/csv'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming(self):
+        from django.http import StreamingHttpResponse
+
+        rows = [f'{number};Marmita {number};19.90\n'.encode() for number in range(2000)]
+        response = self._middleware(StreamingHttpResponse(iter(rows), content_type='text/csv'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), b''.join(rows))
+        self.assertIn(f'marmitaria_http_compression_output_bytes_total{{encoding="gzip"}} {len(body)}', metrics.render())
+
+    def test_level(self):
+        from django.http import HttpResponse
+
+        content = json.dumps([{'id': number, 'total': f'{number}.90'} for number in range(500)]).encode()
+        with override_settings(COMPRESSION_GZIP_LEVEL=1), \
+                mock.patch.object(compression.zlib, 'compressobj', wraps=compression.zlib.compressobj) as compressobj:
+            response = self._middleware(HttpResponse(content, content_type='application/json'))
+        self.assertEqual(compressobj.call_args.args[0], 1)
+        self.assertEqual(gzip.decompress(response.content), content)
+
+
+class BatchTests(ApiPerformanceMixin, TestCase):
+    """Lote de chamadas da API (core/batch.py, POST /api/batch/)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.caixa = create_users()
+        seed(10)
+        cls.product = Product.objects.filter(is_available=True).order_by('id').first()
+
+    def checkout(self, atomic=False, product_id=None):
+        return {
+            'atomic': atomic,
+            'operations': [
+                {'id': 'pedido', 'method': 'POST', 'path': '/orders/', 'body': {'notes': 'Lote'}},
+                {'method': 'POST', 'path': '/orders/{{pedido.data.id}}/add_item/',
+                 'body': {'product_id': product_id or self.product.id, 'quantity': 2}},
+                {'id': 'pagamento', 'method': 'POST', 'path': '/api/payments/',
+                 'body': {'order': '{{pedido.data.id}}', 'method': 'pix'}},
+                {'method': 'POST', 'path': '/payments/{{pagamento.data.id}}/finalize/'},
+                {'method': 'GET', 'path': '/orders/{{ pedido.data.id }}/', 'params': {'view': 'compact'}},
+            ],
+        }
+
+    def test_checkout(self):
+        from orders.models import Order
+
+        # As chamadas avulsas do fechamento: autenticação e permissões em cada uma
+        separate = 0
+        with CaptureQueriesContext(connection) as captured:
+            order_id = self.request(self.caixa, 'post', '/api/orders/', {'notes': 'Avulso'}).json()['data']['id']
+        separate += len(captured)
+        calls = [
+            ('post', f'/api/orders/{order_id}/add_item/', {'product_id': self.product.id, 'quantity': 2}),
+            ('post', '/api/payments/', {'order': order_id, 'method': 'pix'}),
+        ]
+        for method, path, body in calls:
+            with CaptureQueriesContext(connection) as captured:
+                payment = self.request(self.caixa, method, path, body).json()['data']
+            separate += len(captured)
+        for method, path in (('post', f'/api/payments/{payment["id"]}/finalize/'),
+                             ('get', f'/api/orders/{order_id}/?view=compact')):
+            with CaptureQueriesContext(connection) as captured:
+                self.assertLess(self.request(self.caixa, method, path).status_code, 400)
+            separate += len(captured)
+
+        response, queries = self.count_queries(self.caixa, 'post', '/api/batch/', self.checkout(atomic=True))
+        # Um JWT, uma busca do usuário e uma consulta de grupos no lote todo
+        self.assertLessEqual(len(queries), separate - 6)
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertFalse(data['rolled_back'])
+        self.assertEqual([result['status'] for result in data['results']], [201, 201, 201, 200, 200])
+        self.assertEqual(data['results'][0]['id'], 'pedido')
+        order = data['results'][4]['body']
+        self.assertEqual(order['id'], data['results'][0]['body']['data']['id'])
+        self.assertEqual(order['payment_status'], 'completed')
+        self.assertEqual(Decimal(order['total']), self.product.price * 2)
+        self.assertEqual(len(order['items']), 1)
+        self.assertTrue(Order.objects.get(pk=order['id']).is_paid())
+
+    def test_atomic_rollback(self):
+        from orders.models import Order
+
+        before = Order.objects.count()
+        response = self.request(self.caixa, 'post', '/api/batch/', self.checkout(atomic=True, product_id=999999))
+        self.assertEqual(response.status_code, 400)
+        data = response.json()
+        self.assertTrue(data['rolled_back'])
+        self.assertFalse(data['success'])
+        self.assertIn('não', data['error'])
+        self.assertEqual([result['status'] for result in data['results']], [201, 400, 424, 424, 424])
+        self.assertEqual(Order.objects.count(), before)
+
+    def test_dependencies(self):
+        from orders.models import Order
+
+        before = Order.objects.count()
+        response = self.request(self.caixa, 'post', '/api/batch/', self.checkout(product_id=999999))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertFalse(data['success'])
+        self.assertFalse(data['rolled_back'])
+        # Sem atomic: o pedido fica; o pagamento de um pedido sem itens é
+        # recusado e a finalização, que depende dele, não é executada
+        self.assertEqual([result['status'] for result in data['results']], [201, 400, 400, 424, 200])
+        self.assertIn('pagamento falhou', data['results'][3]['body']['error'])
+        self.assertEqual(Order.objects.count(), before + 1)
+
+        response = self.request(self.caixa, 'post', '/api/batch/', {'operations': [
+            {'id': 'item', 'method': 'POST', 'path': '/orders/999999/add_item/',
+             'body': {'product_id': self.product.id, 'quantity': 1}},
+            {'path': '/orders/{{item.data.order}}/'},
+            {'path': '/products/', 'params': {'page_size': 1}},
+        ]})
+        self.assertEqual([result['status'] for result in response.json()['results']], [404, 424, 200])
+
+    def test_permissions(self):
+        # Cada operação passa pelas permissões da sua view
+        response = self.request(self.caixa, 'post', '/api/batch/', {'operations': [
+            {'path': '/users/'}, {'path': '/user/'},
+        ]})
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results], [403, 200])
+        self.assertEqual(results[1]['body']['data']['username'], self.caixa.username)
+        self.assertEqual(self.request(self.admin, 'post', '/api/batch/', {'operations': [
+            {'path': '/users/'},
+        ]}).json()['results'][0]['status'], 200)
+        self.assertEqual(APIClient().post('/api/batch/', {'operations': [{'path': '/users/'}]},
+                                          format='json').status_code, 401)
+
+    def test_invalid(self):
+        def statuses(operations):
+            response = self.request(self.admin, 'post', '/api/batch/', {'operations': operations})
+            return [result['status'] for result in response.json()['results']]
+
+        self.assertEqual(statuses([
+            {'method': 'POST', 'path': '/batch/', 'body': {'operations': [{'path': '/user/'}]}},
+            {'path': '/nao-existe/'},
+            {'path': '/orders/{{5.data.id}}/'},
+            {'path': '/user/'},
+            {'path': '/orders/{{3.data.nao_existe}}/'},
+        ]), [400, 404, 400, 200, 400])
+        # Respostas que não são do DRF: o texto
+        response = self.request(self.admin, 'post', '/api/batch/', {'operations': [{'path': '/api/metrics'}]})
+        self.assertIn('marmitaria_http_requests_total', response.json()['results'][0]['body'])
+
+        for body in ({'operations': []}, {'operations': [{'method': 'TRACE', 'path': '/user/'}]},
+                     {'operations': [{'id': 'a', 'path': '/user/'}, {'id': 'a', 'path': '/user/'}]}):
+            with self.subTest(body=body):
+                self.assertEqual(self.request(self.admin, 'post', '/api/batch/', body).status_code, 400)
+        with override_settings(BATCH_MAX_OPERATIONS=2):
+            response = self.request(self.admin, 'post', '/api/batch/', {'operations': [{'path': '/user/'}] * 3})
+        self.assertEqual(response.status_code, 400)
+
+    def test_references(self):
+        from .batch import OperationError, resolve_references
+
+        results = {'0': {'status': 200, 'body': {'data': {'id': 7, 'items': [{'id': 3}]}}}}
+        self.assertEqual(resolve_references('{{0.data.id}}', results), 7)
+        self.assertEqual(resolve_references({'ids': ['{{0.data.items.0.id}}']}, results), {'ids': [3]})
+        self.assertEqual(resolve_references('/orders/{{0.data.id}}/?x={{0.data.items.0.id}}', results),
+                         '/orders/7/?x=3')
+        self.assertEqual(resolve_references('{{0.data}}', results), {'id': 7, 'items': [{'id': 3}]})
+        with self.assertRaises(OperationError):
+            resolve_references('{{1.data.id}}', results)
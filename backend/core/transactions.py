@@ -0,0 +1,141 @@
+"""
+Transações de escrita curtas com BEGIN IMMEDIATE e novas tentativas.
+
+O SQLite aceita um escritor por vez. Numa transação comum (BEGIN DEFERRED)
+o lock de escrita só é pedido na primeira escrita: se outra conexão já
+escreveu nesse meio tempo, a transação não consegue "subir" de leitura
+para escrita e falha na hora com "database is locked", sem respeitar o
+busy_timeout. Com BEGIN IMMEDIATE o lock é pedido logo no início, onde o
+busy_timeout funciona, e a transação inteira roda sem disputa.
+
+`write_transaction` executa a view numa dessas transações e, se o lock não
+vier dentro do busy_timeout, tenta de novo com espera exponencial com
+jitter (WRITE_RETRY_ATTEMPTS tentativas, base WRITE_RETRY_BACKOFF_MS,
+limite WRITE_RETRY_MAX_BACKOFF_MS).
+Esgotadas as tentativas, responde 503 com Retry-After em vez de um erro
+500. As novas tentativas e desistências vão para as métricas
+(marmitaria_db_write_retries_total e marmitaria_db_write_failures_total).
+
+Com o lock obtido no BEGIN, os erros de lock só aparecem no BEGIN ou no
+COMMIT, fora do código da view: os `except Exception` das views não os
+transformam em 500, e a nova tentativa refaz a transação inteira.
+
+Em outros bancos a transação é uma transaction.atomic() comum; no
+PostgreSQL, deadlocks e falhas de serialização também são repetidos.
+"""
+import contextlib
+import functools
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+
+from . import metrics
+from .exceptions import DatabaseBusyError
+
+# Erros transitórios de concorrência: lock não obtido no SQLite
+# (SQLITE_BUSY / SQLITE_LOCKED), deadlock e falha de serialização no PostgreSQL
+LOCK_MESSAGES = (
+    'database is locked', 'database table is locked', 'database is busy',
+    'deadlock detected', 'could not serialize access',
+)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def is_lock_error(exc):
+    return isinstance(exc, OperationalError) and any(
+        message in str(exc).lower() for message in LOCK_MESSAGES
+    )
+
+
+@contextlib.contextmanager
+def immediate_transaction(using=None):
+    """
+    transaction.atomic() que, no SQLite, começa com BEGIN IMMEDIATE.
+
+    O modo da transação é um atributo da conexão (OPTIONS['transaction_mode']);
+    aqui ele é trocado só durante o BEGIN, para que as outras transações
+    (como a leitura consistente dos relatórios) continuem DEFERRED e não
+    bloqueiem os caixas.
+    """
+    connection = transaction.get_connection(using)
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+    # Abrir a conexão antes: connect() redefine o transaction_mode
+    connection.ensure_connection()
+    previous = connection.transaction_mode
+    with contextlib.ExitStack() as stack:
+        connection.transaction_mode = 'IMMEDIATE'
+        try:
+            stack.enter_context(transaction.atomic(using=using))
+        finally:
+            connection.transaction_mode = previous
+        yield
+
+
+def backoff_seconds(attempt):
+    """Espera antes da tentativa `attempt` + 1: exponencial com jitter total."""
+    base = getattr(settings, 'WRITE_RETRY_BACKOFF_MS', 25)
+    cap = getattr(settings, 'WRITE_RETRY_MAX_BACKOFF_MS', 1000)
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1))) / 1000
+
+
+def run_write_transaction(func, name, using=None):
+    """
+    Executa func() numa transação imediata, com novas tentativas em caso de lock.
+
+    Dentro de uma transação já aberta (testes, chamadas aninhadas) func roda
+    direto: a transação externa decide, e repetir só parte dela não faz
+    sentido.
+    """
+    if transaction.get_connection(using).in_atomic_block:
+        return func()
+    attempts = max(1, getattr(settings, 'WRITE_RETRY_ATTEMPTS', 5))
+    for attempt in range(1, attempts + 1):
+        try:
+            with immediate_transaction(using):
+                return func()
+        except OperationalError as exc:
+            if not is_lock_error(exc):
+                raise
+            if attempt == attempts:
+                metrics.record_write_failure(name)
+                raise DatabaseBusyError() from exc
+            metrics.record_write_retry(name)
+            time.sleep(backoff_seconds(attempt))
+
+
+def write_transaction(func):
+    """Decorator para views de escrita (funções ou métodos)."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return run_write_transaction(lambda: func(*args, **kwargs), func.__qualname__)
+    return wrapper
+
+
+class WriteTransactionMixin:
+    """
+    Mixin para APIView/ViewSet: POST, PUT, PATCH e DELETE rodam em
+    run_write_transaction.
+
+    A autenticação e as permissões (initial) rodam antes, fora da transação;
+    só o método da ação fica dentro dela.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        method = request.method.lower()
+        handler = getattr(self, method, None)
+        if request.method not in SAFE_METHODS and handler is not None:
+            name = f'{type(self).__name__}.{getattr(self, "action", None) or method}'
+
+            @functools.wraps(handler)
+            def transactional(*handler_args, **handler_kwargs):
+                return run_write_transaction(lambda: handler(*handler_args, **handler_kwargs), name)
+
+            # A instância da view é criada por requisição
+            setattr(self, method, transactional)
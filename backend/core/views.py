@@ -4,6 +4,11 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.views import APIView
 from django.db import IntegrityError
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from . import metrics, profiling
+from .batch import BatchRunner, BatchSerializer
+from .slow_queries import slow_query_log
 from .models import Product
 from .serializers import (
     ProductSerializer, 
@@ -12,7 +17,7 @@ from .serializers import (
     UserCreateSerializer,
     UserUpdateSerializer
 )
-from .permissions import IsAdmin, IsAdminOrCaixa
+from .permissions import IsAdmin, IsAdminOrCaixa, group_names
 from django.contrib.auth.models import User
 from .utils import (
     success_response,
@@ -73,6 +78,148 @@ class UserInfoView(APIView):
         )
 
 
+class MetricsView(APIView):
+    """
+    View com as métricas por endpoint no formato do Prometheus.
+    
+    Endpoint: GET /api/metrics
+    
+    Apenas Admin. Para o Prometheus, configurar o scrape com
+    `authorization: {credentials: <token JWT de um admin>}`.
+    Ver core/metrics.py e core.middleware.MetricsMiddleware.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def get(self, request):
+        return HttpResponse(
+            metrics.render(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
+
+
+class SlowQueriesView(APIView):
+    """
+    View do log de consultas lentas.
+    
+    Endpoints:
+    - GET /api/slow-queries/ - Consultas recentes acima do limite e agregado
+      por fingerprint (ordenado pelo tempo total)
+    - DELETE /api/slow-queries/ - Limpa o log em memória
+    
+    Apenas Admin. Ver core/slow_queries.py.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def get(self, request):
+        return success_response(
+            data={
+                'threshold_ms': settings.SLOW_QUERY_THRESHOLD_MS,
+                'log_file': settings.SLOW_QUERY_LOG_FILE or None,
+                **slow_query_log.snapshot(),
+            }
+        )
+    
+    def delete(self, request):
+        slow_query_log.clear()
+        return success_response(message='Log de consultas lentas limpo.')
+
+
+class ProfilesView(APIView):
+    """
+    Perfis gerados pelo profiling sob demanda.
+    
+    Endpoints:
+    - GET /api/profiles/ - Metadados dos perfis, do mais recente ao mais antigo
+    
+    Apenas Admin. Ver core/profiling.py.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def get(self, request):
+        return success_response(
+            data={
+                'max_profiles': settings.PROFILING_MAX_PROFILES,
+                'profiles': profiling.list_profiles(),
+            }
+        )
+
+
+class ProfileFileView(APIView):
+    """
+    Download de um arquivo do perfil.
+    
+    Endpoints:
+    - GET /api/profiles/{id}/pstats/ - Saída do cProfile
+    - GET /api/profiles/{id}/collapsed/ - Pilhas amostradas (flamegraph)
+    
+    Apenas Admin.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def get(self, request, profile_id, kind):
+        path = profiling.profile_file(profile_id, kind)
+        if path is None:
+            return not_found_response('Perfil', profile_id)
+        return FileResponse(
+            open(path, 'rb'),
+            as_attachment=True,
+            filename=f'{profile_id}{profiling.FILE_KINDS[kind]}',
+            content_type='application/octet-stream' if kind == 'pstats' else 'text/plain; charset=utf-8',
+        )
+
+
+class BatchView(APIView):
+    """
+    Várias chamadas da API numa única requisição (ver core/batch.py).
+    
+    Endpoint: POST /api/batch/
+    
+    Body esperado:
+    {
+        "atomic": true,  # opcional: tudo ou nada
+        "operations": [
+            {"id": "pedido", "method": "POST", "path": "/orders/", "body": {...}},
+            {"method": "GET", "path": "/orders/{{pedido.data.id}}/"}
+        ]
+    }
+    
+    Retorna:
+    - results: uma entrada por operação, na ordem, com status, body (o
+      corpo da resposta da operação) e id, se informado
+    - success: se todas as operações tiveram status < 400
+    - rolled_back: se o lote atômico foi desfeito
+    
+    Status 200; num lote atômico desfeito, o status da operação que falhou
+    (com a mensagem dela em `error`). Cada operação verifica as permissões
+    da sua própria view.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return validation_error_response(
+                errors=serializer.errors,
+                message='Lote de operações inválido'
+            )
+        
+        results, rolled_back = BatchRunner(request, **serializer.validated_data).run()
+        failed = [result for result in results if result['status'] >= 400]
+        data = {
+            'success': not failed,
+            'atomic': serializer.validated_data['atomic'],
+            'rolled_back': rolled_back,
+            'results': results,
+        }
+        if not rolled_back:
+            return Response(data)
+        
+        body = failed[0]['body']
+        error = isinstance(body, dict) and (body.get('error') or body.get('detail'))
+        data['error'] = error or f'Operação {failed[0].get("id", results.index(failed[0]))} falhou'
+        return Response(data, status=failed[0]['status'])
+
+
 class UserRegistrationView(APIView):
     """
     View para registro de novos usuários.
@@ -168,7 +315,7 @@ class ProductViewSet(viewsets.ModelViewSet):
             QuerySet de produtos ordenados por nome
         """
         # Admin vê todos os produtos
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='Admin').exists():
+        if self.request.user.is_superuser or 'Admin' in group_names(self.request.user):
             return Product.objects.all().order_by('name')
         # Caixa vê apenas produtos disponíveis
         return Product.objects.filter(is_available=True).order_by('name')
@@ -264,7 +411,7 @@ class UserViewSet(viewsets.ModelViewSet):
     Permissões:
     - Apenas Admin pode acessar todos os endpoints
     """
-    queryset = User.objects.all().order_by('username')
+    queryset = User.objects.prefetch_related('groups').order_by('username')
     permission_classes = [IsAuthenticated, IsAdmin]
     
     def get_serializer_class(self):
@@ -16,6 +16,9 @@ if exist "%FRONTEND_DIR%" (
   if exist "%STATIC_DIR%" rmdir /s /q "%STATIC_DIR%"
   mkdir "%STATIC_DIR%"
   xcopy "%FRONTEND_DIR%\dist\*" "%STATIC_DIR%" /E /I /Y
+
+  echo [INFO] Pre-comprimindo arquivos estaticos (.br/.gz)...
+  python "%SCRIPT_DIR%manage.py" compress_static --root "%STATIC_DIR%"
 ) else (
   echo [WARN] Diretorio do frontend nao encontrado: %FRONTEND_DIR%
 )
@@ -17,6 +17,9 @@ if [ -d "${FRONTEND_DIR}" ]; then
   rm -rf "${STATIC_DIR}"
   mkdir -p "${STATIC_DIR}"
   cp -R "${FRONTEND_DIR}/dist/." "${STATIC_DIR}/"
+
+  echo "[INFO] Pré-comprimindo arquivos estáticos (.br/.gz)..."
+  python "${SCRIPT_DIR}/manage.py" compress_static --root "${STATIC_DIR}"
 else
   echo "[WARN] Diretório do frontend não encontrado: ${FRONTEND_DIR}"
 fi
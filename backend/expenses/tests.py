@@ -1,4 +1,32 @@
 from django.test import TestCase
 
-# Create your tests here.
+from core.testing import ApiPerformanceMixin, create_users, seed
+from .models import Expense
 
+
+class ExpenseApiPerformanceTests(ApiPerformanceMixin, TestCase):
+    """Limites de consultas dos endpoints de despesas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.caixa = create_users()
+        seed(50)
+
+    def test_list(self):
+        # ExpenseSerializer expõe user_username: o usuário vem na mesma consulta
+        self.assertMaxQueries(3, self.admin, 'get', '/api/expenses/')
+        self.assertMaxQueries(4, self.caixa, 'get', '/api/expenses/')
+
+    def test_retrieve(self):
+        expense = Expense.objects.order_by('id').first()
+        self.assertMaxQueries(2, self.admin, 'get', f'/api/expenses/{expense.id}/')
+
+    def test_create_update_delete(self):
+        response = self.assertMaxQueries(3, self.caixa, 'post', '/api/expenses/', {
+            'category': 'ingredients', 'description': 'Compra de ingredientes', 'amount': '150.00',
+        }, status=201)
+        expense_id = response.data['data']['id']
+        self.assertMaxQueries(4, self.caixa, 'patch', f'/api/expenses/{expense_id}/', {
+            'amount': '160.00',
+        })
+        self.assertMaxQueries(4, self.caixa, 'delete', f'/api/expenses/{expense_id}/')
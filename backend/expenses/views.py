@@ -10,6 +10,7 @@ from .serializers import (
     CreateExpenseSerializer
 )
 from core.permissions import IsAdminOrCaixa
+from core.transactions import WriteTransactionMixin
 from core.utils import (
     success_response,
     error_response,
@@ -18,7 +19,7 @@ from core.utils import (
 )
 
 
-class ExpenseViewSet(viewsets.ModelViewSet):
+class ExpenseViewSet(WriteTransactionMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciar despesas/saídas.
     
@@ -41,7 +42,7 @@ class ExpenseViewSet(viewsets.ModelViewSet):
         - Admin: vê todas as despesas
         - Caixa: vê todas as despesas
         """
-        return Expense.objects.all()
+        return Expense.objects.select_related('user')
     
     def get_serializer_class(self):
         """Retorna o serializer apropriado para cada ação"""
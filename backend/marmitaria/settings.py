@@ -6,6 +6,8 @@ Para produção, configure as variáveis de ambiente conforme backend/env.exampl
 """
 
 from pathlib import Path
+from corsheaders.defaults import default_headers
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -35,8 +37,11 @@ ALLOWED_HOSTS = [host.strip() for host in ALLOWED_HOSTS_STR.split(',')] if ALLOW
 
 # Application definition
 
+# Django admin (/admin/). O aplicativo desktop desliga por padrão
+# (app_desktop.py): o admin e os admin.py dos apps pesam na inicialização
+ADMIN_ENABLED = os.environ.get('ADMIN_ENABLED', 'True').lower() in ('true', '1', 'yes')
+
 INSTALLED_APPS = [
-    'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -53,8 +58,16 @@ INSTALLED_APPS = [
     'expenses',
     'reports',
 ]
+if ADMIN_ENABLED:
+    INSTALLED_APPS.insert(0, 'django.contrib.admin')
 
 MIDDLEWARE = [
+    # Primeiro, para medir toda a pilha (ver METRICS_ENABLED)
+    'core.middleware.MetricsMiddleware',
+    # Compressão das respostas (ver COMPRESSION_ENABLED)
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.SlowQueryMiddleware',
+    'core.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -104,12 +117,64 @@ if os.environ.get('DB_PATH'):
 else:
     DB_PATH = BASE_DIR / 'db.sqlite3'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': DB_PATH,
+# Banco: 'sqlite' (padrão; app desktop e servidor único) ou 'postgresql'
+# (vários processos do servidor compartilhando o mesmo banco). O PostgreSQL
+# usa psycopg 3 com pool de conexões (pip install -r requirements-postgres.txt)
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'marmitaria'),
+            'USER': os.environ.get('POSTGRES_USER', 'marmitaria'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            # O pool (psycopg_pool) substitui as conexões persistentes:
+            # cada processo mantém de DB_POOL_MIN_SIZE a DB_POOL_MAX_SIZE
+            # conexões e espera até DB_POOL_TIMEOUT segundos por uma livre
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+                    'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+                    'timeout': int(os.environ.get('DB_POOL_TIMEOUT', '10')),
+                },
+            },
+        }
     }
-}
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': DB_PATH,
+            # Conexões persistentes: cada thread do servidor reaproveita a sua
+            # por até DB_CONN_MAX_AGE segundos (0 = reabrir a cada requisição),
+            # testando-a antes de reusar
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '600')),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"DB_ENGINE inválido: {DB_ENGINE!r} (use 'sqlite' ou 'postgresql')")
+
+# Perfil do SQLite aplicado a cada conexão (core/sqlite.py): 'production'
+# liga WAL, synchronous=NORMAL, cache, mmap, temp_store e busy_timeout;
+# 'default' mantém o padrão do SQLite
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'production')
+SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', '65536'))
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+
+# Escritas de pedidos, pagamentos e despesas (core/transactions.py): rodam em
+# BEGIN IMMEDIATE e, se o lock não vier dentro do busy_timeout, são tentadas
+# de novo até WRITE_RETRY_ATTEMPTS vezes, com espera exponencial com jitter
+# (base WRITE_RETRY_BACKOFF_MS, limite WRITE_RETRY_MAX_BACKOFF_MS). Depois
+# disso a API responde 503 com Retry-After
+WRITE_RETRY_ATTEMPTS = int(os.environ.get('WRITE_RETRY_ATTEMPTS', '5'))
+WRITE_RETRY_BACKOFF_MS = int(os.environ.get('WRITE_RETRY_BACKOFF_MS', '25'))
+WRITE_RETRY_MAX_BACKOFF_MS = int(os.environ.get('WRITE_RETRY_MAX_BACKOFF_MS', '1000'))
 
 
 # Password validation
@@ -193,6 +258,10 @@ CORS_ALLOWED_ORIGINS = [origin.strip() for origin in CORS_ORIGINS_STR.split(',')
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Cabeçalho que pede profiling da requisição e id do perfil gerado
+CORS_ALLOW_HEADERS = (*default_headers, 'x-profile')
+CORS_EXPOSE_HEADERS = ['X-Profile-Id']
+
 # REST Framework configuration
 # Configurações do Django REST Framework
 REST_FRAMEWORK = {
@@ -206,7 +275,7 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
     'EXCEPTION_HANDLER': 'core.middleware.custom_exception_handler',
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'core.renderers.FastJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -214,3 +283,83 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.MultiPartParser',
     ],
 }
+
+# Métricas por endpoint (core/metrics.py), expostas em GET /api/metrics
+# no formato do Prometheus (apenas Admin)
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() in ('true', '1', 'yes')
+
+# Log de consultas lentas (core/slow_queries.py), com EXPLAIN QUERY PLAN,
+# exposto em GET /api/slow-queries/ (apenas Admin) e gravado em arquivo com
+# rotação (vazio = sem arquivo)
+SLOW_QUERY_ENABLED = os.environ.get('SLOW_QUERY_ENABLED', 'True').lower() in ('true', '1', 'yes')
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '200'))
+SLOW_QUERY_BUFFER_SIZE = int(os.environ.get('SLOW_QUERY_BUFFER_SIZE', '200'))
+SLOW_QUERY_LOG_FILE = os.environ.get(
+    'SLOW_QUERY_LOG_FILE', str(Path(DB_PATH).parent / 'logs' / 'slow_queries.log')
+)
+
+# Profiling sob demanda (core/profiling.py): requisições de admin com
+# `X-Profile: 1` ou `?profile=1`; perfis em GET /api/profiles/
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'True').lower() in ('true', '1', 'yes')
+PROFILING_DIR = os.environ.get('PROFILING_DIR', str(Path(DB_PATH).parent / 'profiles'))
+PROFILING_MAX_PROFILES = int(os.environ.get('PROFILING_MAX_PROFILES', '20'))
+PROFILING_SAMPLE_INTERVAL_MS = float(os.environ.get('PROFILING_SAMPLE_INTERVAL_MS', '1'))
+
+# Servidor HTTP de run_server.py e do aplicativo desktop (core/server.py):
+# SERVER_MODE='production' usa gunicorn (Linux/macOS) ou waitress (Windows e
+# desktop) com SERVER_WORKERS processos de SERVER_THREADS threads;
+# 'development' usa o runserver. SERVER_BACKEND força o servidor ('auto',
+# 'gunicorn', 'waitress' ou 'runserver')
+SERVER_MODE = os.environ.get('SERVER_MODE', 'production')
+SERVER_BACKEND = os.environ.get('SERVER_BACKEND', 'auto')
+SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', str(min(4, os.cpu_count() or 1))))
+SERVER_THREADS = int(os.environ.get('SERVER_THREADS', '8'))
+SERVER_KEEPALIVE = int(os.environ.get('SERVER_KEEPALIVE', '5'))
+SERVER_SHUTDOWN_TIMEOUT = int(os.environ.get('SERVER_SHUTDOWN_TIMEOUT', '10'))
+
+# Transporte da janela do aplicativo desktop: 'inprocess' entrega as
+# requisições da WebView direto ao Django (core/inprocess.py, esquema
+# marmitaria://), sem socket; 'http' usa o servidor em 127.0.0.1:8000.
+# O executável é validado no build com `Marmitaria --smoke-test`
+DESKTOP_TRANSPORT = os.environ.get('DESKTOP_TRANSPORT', 'inprocess')
+# Endereço do servidor HTTP do desktop na porta 8000 (ex.: 0.0.0.0 para
+# terminais na rede). Vazio: nenhum servidor no modo 'inprocess' e
+# 127.0.0.1 no modo 'http'
+DESKTOP_HTTP_HOST = os.environ.get('DESKTOP_HTTP_HOST', '')
+
+# Compressão das respostas (core/compression.py): brotli (se instalado) ou
+# gzip conforme o Accept-Encoding, para respostas textuais (JSON, CSV) a
+# partir de COMPRESSION_MIN_SIZE bytes e todas as respostas em streaming.
+# Níveis: gzip de 1 a 9, brotli de 0 a 11 (mais alto = menor e mais lento)
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'True').lower() in ('true', '1', 'yes')
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '4'))
+
+# Lote de chamadas da API (core/batch.py, POST /api/batch/): máximo de
+# operações por requisição
+BATCH_MAX_OPERATIONS = int(os.environ.get('BATCH_MAX_OPERATIONS', '20'))
+
+# Versão do aplicativo (a mesma do frontend/package.json). Entra na
+# impressão digital do schema (core/bootstrap.py): uma versão nova refaz
+# migrate e a criação de grupos/admin na próxima inicialização do desktop
+APP_VERSION = '1.0.0'
+
+# Tempos das fases da inicialização do aplicativo desktop, uma linha JSON
+# por inicialização (vazio = sem arquivo)
+STARTUP_LOG_FILE = os.environ.get(
+    'STARTUP_LOG_FILE', str(Path(DB_PATH).parent / 'logs' / 'startup.log')
+)
+
+# Cache de relatórios (reports/cache.py)
+# Resultados de períodos em aberto expiram após REPORT_CACHE_TTL segundos ou
+# assim que houver escrita nas tabelas do relatório. Períodos fechados
+# (terminando antes de hoje) ficam em cache por REPORT_CACHE_CLOSED_TTL.
+REPORT_CACHE_ENABLED = os.environ.get('REPORT_CACHE_ENABLED', 'True').lower() in ('true', '1', 'yes')
+REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_MB', '16')) * 1024 * 1024
+REPORT_CACHE_TTL = int(os.environ.get('REPORT_CACHE_TTL_SECONDS', '300'))
+REPORT_CACHE_CLOSED_TTL = int(os.environ.get('REPORT_CACHE_CLOSED_TTL_SECONDS', str(7 * 24 * 3600)))
+
+# No PostgreSQL, seções de um relatório com agrupamentos diferentes são
+# calculadas numa consulta com GROUPING SETS e FILTER (reports/engine.py)
+REPORT_GROUPING_SETS = os.environ.get('REPORT_GROUPING_SETS', 'True').lower() in ('true', '1', 'yes')
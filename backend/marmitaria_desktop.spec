@@ -36,16 +36,25 @@ a = Analysis(
         'django.contrib.staticfiles',
         'rest_framework',
         'rest_framework_simplejwt',
+        # Importados no primeiro uso (core/lazy.py): invisíveis à análise
+        'rest_framework_simplejwt.views',
         'corsheaders',
         'core',
         'core.management',
         'core.management.commands',
         'core.management.commands.create_groups',
         'core.management.commands.create_default_admin',
+        'core.server',
+        'core.bootstrap',
+        'core.inprocess',
+        'core.lazy',
+        'core.renderers',
+        'waitress',
         'orders',
         'payments',
         'expenses',
         'reports',
+        'reports.views',
         'PIL',
         'PIL._tkinter_finder',
         'PyQt6',
@@ -53,6 +62,7 @@ a = Analysis(
         'PyQt6.QtGui',
         'PyQt6.QtWidgets',
         'PyQt6.QtWebEngineWidgets',
+        'PyQt6.QtWebEngineCore',
     ],
     hookspath=[],
     hooksconfig={},
@@ -2,6 +2,7 @@ from django.db import models
 from django.core.validators import MinValueValidator
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from decimal import Decimal
 from core.models import Product
 
@@ -72,6 +73,12 @@ class Order(models.Model):
         verbose_name = 'Pedido'
         verbose_name_plural = 'Pedidos'
         ordering = ['-created_at']
+        # Listagens paginadas pela data, do admin e do caixa (só em aberto).
+        # Ver o comando audit_query_plans.
+        indexes = [
+            models.Index(fields=['created_at'], name='order_created_idx'),
+            models.Index(fields=['is_open', 'created_at'], name='order_open_created_idx'),
+        ]
 
     def __str__(self):
         return f'Pedido #{self.id} - {self.customer.username}'
@@ -150,7 +157,9 @@ class Order(models.Model):
         
         # Atualiza diretamente no banco usando update() para evitar validações
         # Isso permite recalcular mesmo pedidos pagos (mantém consistência)
-        Order.objects.filter(pk=self.pk).update(total=total)
+        # update() não aplica auto_now, então updated_at é definido manualmente
+        # (usado pela marca d'água do cache de relatórios)
+        Order.objects.filter(pk=self.pk).update(total=total, updated_at=timezone.now())
         
         # Atualiza o valor na instância atual para manter sincronização
         self.total = total
@@ -192,6 +201,11 @@ class OrderItem(models.Model):
         verbose_name = 'Item do Pedido'
         verbose_name_plural = 'Itens do Pedido'
         ordering = ['created_at']
+        indexes = [
+            # Subconsultas por (pedido, produto) do relatório de produtos
+            models.Index(fields=['order', 'product'], name='orderitem_order_product_idx'),
+            models.Index(fields=['created_at'], name='orderitem_created_idx'),
+        ]
 
     def __str__(self):
         return f'{self.product.name} x{self.quantity} - Pedido #{self.order.id}'
@@ -219,6 +233,13 @@ class OrderItem(models.Model):
         Isso garante que o total do pedido esteja sempre sincronizado
         com a soma dos itens, mesmo se houver alterações manuais.
         """
+        # Pedido pago: itens novos mudariam a venda depois de contabilizada
+        # nos consolidados (reports/rollups.py)
+        if not self.pk and self.order.is_paid():
+            raise ValidationError(
+                'Não é possível adicionar itens a um pedido com pagamento completo.'
+            )
+
         # Verifica se o pedido associado está pago antes de permitir alteração
         if self.pk and self.order.is_paid():
             # Se já existe (está sendo editado) e o pedido está pago, bloqueia
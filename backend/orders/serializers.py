@@ -2,10 +2,11 @@ from rest_framework import serializers
 from .models import Order, OrderItem, OrderStatus
 from core.models import Product
 from core.serializers import ProductSerializer
+from core.sparse_fields import SparseFieldsSerializerMixin
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
-    """Serializer para o model OrderItem"""
+class OrderItemSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
+    """Serializer para o model OrderItem (campos esparsos: core/sparse_fields.py)"""
     
     product = ProductSerializer(read_only=True)
     product_id = serializers.PrimaryKeyRelatedField(
@@ -19,10 +20,12 @@ class OrderItemSerializer(serializers.ModelSerializer):
         model = OrderItem
         fields = ['id', 'order', 'product', 'product_id', 'quantity', 'price', 'subtotal', 'created_at']
         read_only_fields = ['id', 'order', 'subtotal', 'created_at']
+        # Sem ?expand=product, só o id do produto
+        expandable_fields = ['product']
 
 
-class OrderSerializer(serializers.ModelSerializer):
-    """Serializer para o model Order"""
+class OrderSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
+    """Serializer para o model Order (campos esparsos: core/sparse_fields.py)"""
     
     items = OrderItemSerializer(many=True, read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
@@ -10,9 +10,10 @@ dos métodos save() e delete() nos models, garantindo que o recálculo
 aconteça mesmo em operações em lote ou através do admin.
 """
 
+from django.db.models import QuerySet
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import OrderItem
+from .models import Order, OrderItem
 
 
 @receiver(post_save, sender=OrderItem)
@@ -53,12 +54,21 @@ def recalcular_total_apos_delete(sender, instance, **kwargs):
     Parâmetros:
         sender: A classe do model que enviou o signal (OrderItem)
         instance: A instância do OrderItem que foi deletada
-        **kwargs: Argumentos adicionais do signal
+        **kwargs: Argumentos adicionais do signal (origin: instância ou
+            queryset que originou a exclusão)
     
     Nota: A instância ainda existe na memória quando este signal é disparado,
     mas já foi removida do banco de dados. Por isso, ainda podemos acessar
     instance.order para recalcular o total.
     """
+    # Na exclusão do próprio pedido (cascata), não há total a recalcular:
+    # evita três consultas por item removido
+    origin = kwargs.get('origin')
+    if isinstance(origin, Order) or (
+        isinstance(origin, QuerySet) and origin.model is Order
+    ):
+        return
+    
     # Recalcula o total do pedido associado
     # Remove o item deletado do cálculo automaticamente
     instance.order.recalcular_total()
@@ -1,3 +1,208 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from core.models import Product
+from core.testing import ApiPerformanceMixin, create_users, seed
+from .models import Order, OrderItem
+
+
+class OrderApiPerformanceTests(ApiPerformanceMixin, TestCase):
+    """
+    Limites de consultas dos endpoints de pedidos e itens.
+
+    A base gerada tem pedidos suficientes para encher a primeira página da
+    listagem do admin; o caixa só vê pedidos em aberto, criados nos testes.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.caixa = create_users()
+        seed(200)
+        cls.products = list(Product.objects.filter(is_available=True).order_by('id'))
+
+    def _open_orders(self, count, items=3):
+        """Cria pedidos em aberto, sem pagamento, com `items` itens cada."""
+        orders = []
+        for number in range(count):
+            order = Order.objects.create(customer=self.caixa, notes=f'Pedido {number}')
+            for index in range(items):
+                OrderItem.objects.create(
+                    order=order,
+                    product=self.products[(number + index) % len(self.products)],
+                    quantity=index + 1,
+                    price=self.products[(number + index) % len(self.products)].price,
+                )
+            orders.append(order)
+        return orders
+
+    def test_list(self):
+        self.assertMaxQueries(5, self.admin, 'get', '/api/orders/')
+        self.assertMaxQueries(5, self.admin, 'get', '/api/orders/?payment_status=completed')
+
+    def test_list_does_not_query_per_order(self):
+        # OrderSerializer lê cliente, pagamento, itens e produto de cada pedido
+        self._open_orders(1, items=1)
+        self.assertConstantQueries(self.caixa, '/api/orders/', lambda: self._open_orders(10))
+
+    def test_retrieve(self):
+        order = self._open_orders(1)[0]
+        self.assertMaxQueries(4, self.admin, 'get', f'/api/orders/{order.id}/')
+        self.assertMaxQueries(6, self.caixa, 'get', f'/api/orders/{order.id}/')
+
+    def test_create(self):
+        data = {'notes': 'Sem cebola', 'delivery_address': 'Rua Exemplo, 123'}
+        # Primeiro pedido: cria o cliente padrão num savepoint (+2 consultas)
+        self.assertMaxQueries(9, self.caixa, 'post', '/api/orders/', data, status=201)
+        self.assertMaxQueries(7, self.caixa, 'post', '/api/orders/', data, status=201)
+
+    def test_add_item(self):
+        order = self._open_orders(1)[0]
+        self.assertMaxQueries(12, self.caixa, 'post', f'/api/orders/{order.id}/add_item/', {
+            'product_id': self.products[0].id, 'quantity': 2,
+        }, status=201)
+        order.refresh_from_db()
+        self.assertEqual(order.total, sum(item.subtotal for item in order.items.all()))
+
+    def test_update(self):
+        order = self._open_orders(1)[0]
+        self.assertMaxQueries(10, self.caixa, 'patch', f'/api/orders/{order.id}/', {
+            'notes': 'Sem pimenta',
+        })
+
+    def test_destroy(self):
+        order = self._open_orders(1)[0]
+        self.assertMaxQueries(7, self.admin, 'delete', f'/api/orders/{order.id}/')
+
+    def test_bulk_delete_does_not_query_per_order(self):
+        few = [order.id for order in self._open_orders(2)]
+        _, before = self.count_queries(
+            self.admin, 'post', '/api/orders/bulk_delete/', {'order_ids': few},
+        )
+        many = [order.id for order in self._open_orders(12)]
+        _, after = self.count_queries(
+            self.admin, 'post', '/api/orders/bulk_delete/', {'order_ids': many},
+        )
+        self.assertEqual(len(after), len(before))
+
+    def test_order_items(self):
+        self._open_orders(3)
+        self.assertMaxQueries(3, self.admin, 'get', '/api/order-items/')
+        self.assertMaxQueries(5, self.caixa, 'get', '/api/order-items/')
+        item = OrderItem.objects.filter(order__is_open=True).first()
+        self.assertMaxQueries(12, self.caixa, 'delete', f'/api/order-items/{item.id}/')
+
+
+class OrderApiLatencyTests(ApiPerformanceMixin, TestCase):
+    """Tempo de resposta dos endpoints do caixa com uma base representativa."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.caixa = create_users()
+        # Cerca de 65 pedidos por dia durante um mês
+        seed(2000)
+        cls.order = Order.objects.create(customer=cls.caixa)
+        product = Product.objects.filter(is_available=True).first()
+        OrderItem.objects.create(order=cls.order, product=product, quantity=1, price=product.price)
+
+    def test_list(self):
+        self.assertFasterThan(150, self.admin, 'get', '/api/orders/')
+        self.assertFasterThan(150, self.caixa, 'get', '/api/orders/')
+
+    def test_retrieve(self):
+        self.assertFasterThan(50, self.caixa, 'get', f'/api/orders/{self.order.id}/')
+
+
+class OrderSparseFieldsTests(ApiPerformanceMixin, TestCase):
+    """?fields=, ?expand= e ?view=compact nas leituras de pedidos e itens (core/sparse_fields.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.caixa = create_users()
+        seed(60)
+
+    def _results(self, path):
+        response = self.request(self.admin, 'get', path)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data['results']
+
+    def test_compact(self):
+        full = self._results('/api/orders/')
+        compact = self._results('/api/orders/?view=compact')
+        self.assertEqual([order['id'] for order in compact], [order['id'] for order in full])
+        self.assertEqual(set(compact[0]), {
+            'id', 'status', 'is_open', 'total', 'delivery_fee', 'notes', 'created_at', 'payment_status', 'items',
+        })
+        item = next(order['items'][0] for order in compact if order['items'])
+        self.assertEqual(set(item), {'id', 'product', 'quantity', 'price', 'subtotal'})
+        self.assertIsInstance(item['product'], int)
+        # Sem produto, cliente nem pagamento carregados
+        _, full_queries = self.count_queries(self.admin, 'get', '/api/orders/')
+        _, compact_queries = self.count_queries(self.admin, 'get', '/api/orders/?view=compact')
+        self.assertLess(len(compact_queries), len(full_queries))
+        self.assertFalse(any('core_product' in query['sql'] for query in compact_queries))
+
+    def test_fields_and_expand(self):
+        orders = self._results('/api/orders/?fields=id,total')
+        self.assertEqual(set(orders[0]), {'id', 'total'})
+        _, queries = self.count_queries(self.admin, 'get', '/api/orders/?fields=id,total')
+        self.assertFalse(any('orders_orderitem' in query['sql'] for query in queries))
+
+        orders = self._results('/api/orders/?view=compact&expand=items.product')
+        item = next(order['items'][0] for order in orders if order['items'])
+        self.assertIn('name', item['product'])
+
+        orders = self._results('/api/orders/?fields=id,items.product&expand=')
+        item = next(order['items'][0] for order in orders if order['items'])
+        self.assertEqual(set(item), {'product'})
+        self.assertIsInstance(item['product'], int)
+
+    def test_invalid(self):
+        for path in ('/api/orders/?fields=id,nope', '/api/orders/?fields=items.nope', '/api/orders/?view=nope'):
+            self.assertEqual(self.request(self.admin, 'get', path).status_code, 400, path)
+
+    def test_writes_ignore_fields(self):
+        order = Order.objects.create(customer=self.caixa)
+        response = self.request(self.caixa, 'patch', f'/api/orders/{order.id}/?fields=id', {'notes': 'Sem pimenta'})
+        self.assertEqual(response.status_code, 200)
+        order.refresh_from_db()
+        self.assertEqual(order.notes, 'Sem pimenta')
+        self.assertIn('notes', response.data['data'])
+
+    def test_order_items(self):
+        items = self._results('/api/order-items/?view=compact')
+        self.assertEqual(set(items[0]), {'id', 'order', 'product', 'quantity', 'price', 'subtotal'})
+        self.assertIsInstance(items[0]['product'], int)
+        _, queries = self.count_queries(self.admin, 'get', '/api/order-items/?view=compact')
+        self.assertFalse(any('core_product' in query['sql'] for query in queries))
+        self.assertIn('name', self._results('/api/order-items/?fields=id,product')[0]['product'])
+
+
+class DefaultCustomerTests(ApiPerformanceMixin, TestCase):
+    """Cliente padrão dos pedidos criado por dois caixas ao mesmo tempo."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.caixa = create_users()
+
+    def test_concurrent_create(self):
+        # Outro caixa já criou o cliente padrão depois da busca desta
+        # requisição: create_user levanta IntegrityError dentro da transação
+        # de escrita da view
+        existing = User.objects.create_user('cliente_padrao')
+        get = User.objects.get
+        calls = []
+
+        def stale_get(*args, **kwargs):
+            if kwargs == {'username': 'cliente_padrao'}:
+                calls.append(kwargs)
+                if len(calls) == 1:
+                    raise User.DoesNotExist
+            return get(*args, **kwargs)
+
+        with mock.patch.object(User.objects, 'get', side_effect=stale_get):
+            response = self.request(self.caixa, 'post', '/api/orders/', {'notes': ''})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(Order.objects.get().customer, existing)
@@ -4,7 +4,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from .models import Order, OrderItem
 from .serializers import (
     OrderSerializer,
@@ -13,7 +13,9 @@ from .serializers import (
     OrderItemSerializer
 )
 from core.models import Product
-from core.permissions import IsAdminOrCaixa
+from core.permissions import IsAdminOrCaixa, group_names
+from core.sparse_fields import SparseFieldsMixin
+from core.transactions import WriteTransactionMixin, write_transaction
 from core.utils import (
     success_response,
     error_response,
@@ -23,8 +25,11 @@ from core.utils import (
 )
 from core.exceptions import OrderAlreadyPaidError, OrderClosedError, ProductNotAvailableError
 
+# Campos de OrderSerializer lidos do pagamento do pedido
+PAYMENT_FIELDS = ('payment_method', 'payment_method_display', 'payment_status', 'payment_status_display')
 
-class OrderViewSet(viewsets.ModelViewSet):
+
+class OrderViewSet(SparseFieldsMixin, WriteTransactionMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciar pedidos.
     
@@ -35,21 +40,35 @@ class OrderViewSet(viewsets.ModelViewSet):
     - POST /api/orders/{id}/add_item/ - Adicionar item ao pedido
     - PATCH /api/orders/{id}/ - Atualizar pedido
     
+    Leituras aceitam ?fields=, ?expand=items.product e ?view=compact
+    (core/sparse_fields.py), ex.: GET /api/orders/?view=compact
+    
     Permissões:
     - Admin: pode ver e editar todos os pedidos (abertos e fechados)
     - Caixa: pode ver e editar apenas pedidos em aberto
     """
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated, IsAdminOrCaixa]
+    # Cozinha e telas de resumo: itens com o id do produto, sem os campos
+    # de exibição nem as datas
+    field_views = {
+        'compact': {
+            'fields': (
+                'id,status,is_open,total,delivery_fee,notes,created_at,payment_status,'
+                'items.id,items.product,items.quantity,items.price,items.subtotal'
+            ),
+            'expand': '',
+        },
+    }
     
     def _is_admin(self):
         """Verifica se o usuário é admin"""
         user = self.request.user
-        return user.is_superuser or user.groups.filter(name='Admin').exists()
+        return user.is_superuser or 'Admin' in group_names(user)
     
     def _is_caixa(self):
         """Verifica se o usuário é caixa"""
-        return self.request.user.groups.filter(name='Caixa').exists()
+        return 'Caixa' in group_names(self.request.user)
     
     def _can_edit_order(self, order):
         """
@@ -73,7 +92,21 @@ class OrderViewSet(viewsets.ModelViewSet):
         from django.contrib.auth.models import User
         from payments.models import PaymentStatus
         
-        queryset = Order.objects.all()
+        # Carrega cliente e pagamento junto com os pedidos, para a serialização
+        # não fazer uma consulta por pedido; só o que vai na resposta
+        related = []
+        if self.is_requested('customer_username'):
+            related.append('customer')
+        if any(self.is_requested(name) for name in PAYMENT_FIELDS):
+            related.append('payment')
+        queryset = Order.objects.select_related(*related) if related else Order.objects.all()
+        # Itens (com produto) só nas leituras: nas escritas o cache do
+        # prefetch ficaria desatualizado para recalcular_total()
+        if self.action in ('list', 'retrieve') and self.is_requested('items'):
+            if self.is_requested('items.product') and self.is_expanded('items.product'):
+                queryset = queryset.prefetch_related('items__product')
+            else:
+                queryset = queryset.prefetch_related('items')
         
         # Filtro por status de pagamento
         payment_status = self.request.query_params.get('payment_status', None)
@@ -96,7 +129,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         
         if self.request.user.is_authenticated:
             # Admin vê todos os pedidos (abertos e fechados)
-            if self.request.user.is_superuser or self.request.user.groups.filter(name='Admin').exists():
+            if self.request.user.is_superuser or 'Admin' in group_names(self.request.user):
                 return queryset
             # Caixa vê apenas pedidos em aberto
             return queryset.filter(is_open=True)
@@ -133,12 +166,19 @@ class OrderViewSet(viewsets.ModelViewSet):
             customer = User.objects.get(username='cliente_padrao')
         except User.DoesNotExist:
             # Se não existir, criar cliente padrão
-            customer = User.objects.create_user(
-                username='cliente_padrao',
-                email='cliente@marmitaria.com',
-                first_name='Cliente',
-                last_name='Padrão'
-            )
+            try:
+                # Savepoint: a view roda na transação de escrita, que ficaria
+                # inutilizável depois do IntegrityError
+                with transaction.atomic():
+                    customer = User.objects.create_user(
+                        username='cliente_padrao',
+                        email='cliente@marmitaria.com',
+                        first_name='Cliente',
+                        last_name='Padrão'
+                    )
+            except IntegrityError:
+                # Outro caixa criou o cliente padrão ao mesmo tempo
+                customer = User.objects.get(username='cliente_padrao')
         
         # Criar pedido com o cliente padrão
         order = serializer.save(customer=customer)
@@ -340,7 +380,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         
         # Se delete_all, busca todos os pedidos (com filtros opcionais)
         if delete_all:
-            queryset = Order.objects.all()
+            queryset = Order.objects.select_related('payment')
             
             # Aplica filtros
             if only_open:
@@ -357,7 +397,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         else:
             # Busca pedidos pelos IDs fornecidos
             try:
-                queryset = Order.objects.filter(pk__in=order_ids)
+                queryset = Order.objects.select_related('payment').filter(pk__in=order_ids)
                 
                 # Aplica filtros opcionais
                 if only_open:
@@ -405,14 +445,18 @@ class OrderViewSet(viewsets.ModelViewSet):
             )
 
 
-class OrderItemViewSet(viewsets.ModelViewSet):
+class OrderItemViewSet(SparseFieldsMixin, WriteTransactionMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciar itens do pedido.
     
-    Permite deletar itens do pedido.
+    Permite deletar itens do pedido. Leituras aceitam ?fields=,
+    ?expand=product e ?view=compact (core/sparse_fields.py).
     """
     serializer_class = OrderItemSerializer
     permission_classes = [IsAuthenticated, IsAdminOrCaixa]
+    field_views = {
+        'compact': {'fields': 'id,order,product,quantity,price,subtotal', 'expand': ''},
+    }
     
     def get_queryset(self):
         """
@@ -421,10 +465,12 @@ class OrderItemViewSet(viewsets.ModelViewSet):
         - Caixa: vê apenas itens de pedidos em aberto
         """
         queryset = OrderItem.objects.all()
+        if self.is_requested('product') and self.is_expanded('product'):
+            queryset = queryset.select_related('product')
         
         if self.request.user.is_authenticated:
             # Admin vê todos os itens
-            if self.request.user.is_superuser or self.request.user.groups.filter(name='Admin').exists():
+            if self.request.user.is_superuser or 'Admin' in group_names(self.request.user):
                 return queryset
             # Caixa vê apenas itens de pedidos em aberto
             return queryset.filter(order__is_open=True)
@@ -442,7 +488,7 @@ class OrderItemViewSet(viewsets.ModelViewSet):
         
         # Valida se o usuário pode editar este pedido
         # Para OrderItemViewSet, precisamos verificar se é admin ou se o pedido está aberto
-        is_admin = request.user.is_superuser or request.user.groups.filter(name='Admin').exists()
+        is_admin = request.user.is_superuser or 'Admin' in group_names(request.user)
         if not is_admin and not order.is_open:
             return permission_denied_response(
                 'Apenas pedidos em aberto podem ser editados pelo Caixa. Pedidos fechados só podem ser visualizados pelo Admin.'
@@ -468,6 +514,7 @@ class OrderItemViewSet(viewsets.ModelViewSet):
 # View alternativa para bulk_delete (caso a ação do ViewSet não funcione)
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@write_transaction
 def bulk_delete_orders(request):
     """
     View alternativa para deletar múltiplos pedidos.
@@ -483,7 +530,7 @@ def bulk_delete_orders(request):
         )
     
     # Verifica se é admin
-    is_admin = request.user.is_superuser or request.user.groups.filter(name='Admin').exists()
+    is_admin = request.user.is_superuser or 'Admin' in group_names(request.user)
     if not is_admin:
         return Response(
             {'error': 'Apenas administradores podem deletar pedidos em massa.'},
@@ -504,7 +551,7 @@ def bulk_delete_orders(request):
     
     # Se delete_all, busca todos os pedidos (com filtros opcionais)
     if delete_all:
-        queryset = Order.objects.all()
+        queryset = Order.objects.select_related('payment')
         
         # Aplica filtros
         if only_open:
@@ -518,7 +565,7 @@ def bulk_delete_orders(request):
     else:
         # Busca pedidos pelos IDs fornecidos
         try:
-            queryset = Order.objects.filter(pk__in=order_ids)
+            queryset = Order.objects.select_related('payment').filter(pk__in=order_ids)
             
             # Aplica filtros opcionais
             if only_open:
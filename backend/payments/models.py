@@ -78,6 +78,12 @@ class Payment(models.Model):
         verbose_name = 'Pagamento'
         verbose_name_plural = 'Pagamentos'
         ordering = ['-created_at']
+        # Listagem pela data e exportação de vendas (filtrada pelo status).
+        # Ver o comando audit_query_plans.
+        indexes = [
+            models.Index(fields=['created_at'], name='payment_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='payment_status_created_idx'),
+        ]
 
     def __str__(self):
         return f'Pagamento #{self.id} - Pedido #{self.order.id} - {self.get_method_display()}'
@@ -87,9 +93,9 @@ class Payment(models.Model):
         from django.utils import timezone
         self.status = PaymentStatus.COMPLETED
         self.paid_at = timezone.now()
-        self.save(update_fields=['status', 'paid_at'])
+        self.save(update_fields=['status', 'paid_at', 'updated_at'])
 
     def mark_as_failed(self):
         """Marca o pagamento como falhou"""
         self.status = PaymentStatus.FAILED
-        self.save(update_fields=['status'])
+        self.save(update_fields=['status', 'updated_at'])
@@ -11,7 +11,7 @@ class PaymentSerializer(serializers.ModelSerializer):
     
     method_display = serializers.CharField(source='get_method_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
-    order_id = serializers.IntegerField(source='order.id', read_only=True)
+    order_id = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Payment
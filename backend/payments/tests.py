@@ -1,3 +1,38 @@
 from django.test import TestCase
 
-# Create your tests here.
+from core.models import Product
+from core.testing import ApiPerformanceMixin, create_users, seed
+from orders.models import Order, OrderItem
+from .models import Payment
+
+
+class PaymentApiPerformanceTests(ApiPerformanceMixin, TestCase):
+    """Limites de consultas dos endpoints de pagamentos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.caixa = create_users()
+        seed(200)
+        cls.product = Product.objects.filter(is_available=True).order_by('id').first()
+
+    def _open_order(self):
+        order = Order.objects.create(customer=self.caixa)
+        OrderItem.objects.create(order=order, product=self.product, quantity=2, price=self.product.price)
+        return order
+
+    def test_list(self):
+        # PaymentSerializer expõe order_id: não pode carregar o pedido de cada pagamento
+        self.assertMaxQueries(3, self.admin, 'get', '/api/payments/')
+        self.assertMaxQueries(4, self.caixa, 'get', '/api/payments/')
+
+    def test_retrieve(self):
+        payment = Payment.objects.order_by('id').first()
+        self.assertMaxQueries(2, self.admin, 'get', f'/api/payments/{payment.id}/')
+
+    def test_create_and_finalize(self):
+        order = self._open_order()
+        response = self.assertMaxQueries(8, self.caixa, 'post', '/api/payments/', {
+            'order': order.id, 'method': 'pix',
+        }, status=201)
+        payment_id = response.data['data']['id']
+        self.assertMaxQueries(15, self.caixa, 'post', f'/api/payments/{payment_id}/finalize/')
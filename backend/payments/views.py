@@ -11,6 +11,7 @@ from .serializers import (
 )
 from orders.models import Order
 from core.permissions import IsAdminOrCaixa
+from core.transactions import WriteTransactionMixin
 from core.utils import (
     success_response,
     error_response,
@@ -19,7 +20,7 @@ from core.utils import (
 )
 
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(WriteTransactionMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciar pagamentos.
     
@@ -6,3 +6,9 @@ class ReportsConfig(AppConfig):
     name = 'reports'
     verbose_name = 'Relatórios'
 
+    def ready(self):
+        """
+        Método chamado quando o app está pronto.
+        Importa os signals para que sejam registrados e funcionem.
+        """
+        import reports.signals  # noqa
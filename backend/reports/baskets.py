@@ -0,0 +1,99 @@
+"""
+Análise de cesta (produtos comprados juntos).
+
+Em vez de um self-join de OrderItem por pedido (que gera k² linhas por
+pedido no banco e explode em históricos grandes), os itens dos pedidos
+pagos são lidos uma única vez, em blocos e ordenados por pedido. Cada
+pedido vira um conjunto de produtos e apenas os pares que de fato ocorrem
+são contados num dicionário esparso.
+
+Métricas de um par (A, B), com N = número de pedidos:
+- support: pedidos com A e B / N
+- confidence A→B: pedidos com A e B / pedidos com A
+- lift: support(A, B) / (support(A) * support(B)); acima de 1 indica que
+  os produtos saem juntos mais do que o acaso explicaria
+"""
+import heapq
+from collections import Counter
+from dataclasses import dataclass
+from itertools import combinations, groupby
+from operator import itemgetter
+
+
+@dataclass
+class BasketCounts:
+    """Contagens de uma passada pelos pedidos."""
+    baskets: int
+    items: Counter
+    pairs: Counter
+
+    def support(self, count):
+        return count / self.baskets if self.baskets else 0.0
+
+    def lift(self, pair, count):
+        count_a, count_b = self.items[pair[0]], self.items[pair[1]]
+        return (count * self.baskets) / (count_a * count_b) if count_a and count_b else 0.0
+
+    def pair_metrics(self, pair, count):
+        """Support, confidence (nos dois sentidos) e lift de um par."""
+        a, b = pair
+        count_a, count_b = self.items[a], self.items[b]
+        return {
+            'count': count,
+            'support': self.support(count),
+            'confidence_a_b': count / count_a if count_a else 0.0,
+            'confidence_b_a': count / count_b if count_b else 0.0,
+            'lift': self.lift(pair, count),
+        }
+
+
+def count_baskets(rows):
+    """
+    Conta produtos e pares de produtos por pedido.
+
+    Args:
+        rows: Iterável de (order_id, product_id) ORDENADO por order_id, como
+            o iterador de uma Listing com tuples=True. Produtos repetidos no
+            mesmo pedido contam uma vez.
+
+    Returns:
+        BasketCounts com o número de pedidos e os contadores esparsos
+    """
+    items = Counter()
+    pairs = Counter()
+    baskets = 0
+    for _, basket_rows in groupby(rows, key=itemgetter(0)):
+        products = sorted({product_id for _, product_id in basket_rows})
+        baskets += 1
+        items.update(products)
+        if len(products) > 1:
+            pairs.update(combinations(products, 2))
+    return BasketCounts(baskets, items, pairs)
+
+
+def top_pairs(counts, limit, keep=None, min_count=1):
+    """
+    Retorna os pares mais frequentes com suas métricas.
+
+    Args:
+        counts: BasketCounts
+        limit: Número máximo de pares
+        keep: Função (product_a, product_b) -> bool para filtrar pares
+        min_count: Número mínimo de pedidos com o par
+
+    Returns:
+        Lista de ((product_a, product_b), métricas) ordenada por contagem
+        e lift, decrescentes
+    """
+    def sort_key(item):
+        pair, count = item
+        return (-count, -counts.lift(pair, count), pair)
+
+    candidates = (
+        (pair, count) for pair, count in counts.pairs.items()
+        if count >= min_count and (keep is None or keep(*pair))
+    )
+    return [
+        (pair, counts.pair_metrics(pair, count))
+        for pair, count in heapq.nsmallest(limit, candidates, key=sort_key)
+    ]
@@ -0,0 +1,270 @@
+"""
+Cache de resultados dos relatórios.
+
+Os relatórios são reexecutados sempre que o admin troca de aba ou altera
+um filtro e volta ao anterior. Este módulo guarda o resultado já calculado
+de cada relatório, indexado pelos parâmetros normalizados da consulta.
+
+Invalidação:
+- Períodos que terminam antes de hoje são considerados imutáveis e ficam
+  em cache por muito tempo (REPORT_CACHE_CLOSED_TTL).
+- Períodos em aberto (sem data final ou terminando hoje/no futuro) incluem
+  na chave uma "marca d'água" calculada a partir da última escrita nas
+  tabelas das quais o relatório depende. Qualquer escrita nova gera uma
+  chave nova, e a entrada antiga simplesmente deixa de ser usada.
+
+A remoção de entradas é LRU, limitada pelo tamanho aproximado em bytes
+(REPORT_CACHE_MAX_BYTES).
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+
+# Colunas usadas para calcular a marca d'água de cada tabela.
+# Count detecta exclusões; Max das datas detecta inserções e alterações.
+WATERMARK_SOURCES = {
+    'payments': ('payments.Payment', ('updated_at', 'paid_at')),
+    'orders': ('orders.Order', ('updated_at',)),
+    'items': ('orders.OrderItem', ('created_at',)),
+    'expenses': ('expenses.Expense', ('updated_at',)),
+    'products': ('core.Product', ('updated_at',)),
+}
+
+
+class LRUCache:
+    """
+    Cache LRU em memória limitado pelo tamanho aproximado das entradas.
+
+    O tamanho de cada valor é estimado pelo tamanho do pickle, o que é
+    suficiente para impedir que o cache cresça sem limite.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Retorna o valor em cache ou None se ausente/expirado."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl):
+        """Armazena um valor, removendo as entradas menos usadas se necessário."""
+        try:
+            size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, size, time.monotonic() + ttl)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._data:
+                oldest_key = next(iter(self._data))
+                self._remove(oldest_key)
+
+    def clear(self):
+        """Remove todas as entradas."""
+        with self._lock:
+            self._data.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Retorna estatísticas de uso do cache."""
+        with self._lock:
+            return {
+                'entries': len(self._data),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self.current_bytes -= size
+
+    def __len__(self):
+        return len(self._data)
+
+
+report_cache = LRUCache(getattr(settings, 'REPORT_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+
+
+def compute_watermark(depends_on, memo=None):
+    """
+    Calcula a marca d'água das tabelas informadas.
+
+    Args:
+        depends_on: Nomes das fontes (chaves de WATERMARK_SOURCES)
+        memo: Dict opcional para reaproveitar a marca de cada tabela entre
+            vários relatórios da mesma requisição (ex.: endpoint batch)
+
+    Returns:
+        Tupla ordenada e hasheável que muda sempre que alguma das tabelas
+        recebe uma escrita (inserção, alteração ou exclusão).
+    """
+    from django.apps import apps
+
+    if memo is None:
+        memo = {}
+    parts = []
+    for name in sorted(depends_on):
+        if name not in memo:
+            model_label, date_fields = WATERMARK_SOURCES[name]
+            model = apps.get_model(model_label)
+            aggregates = {'count': Count('pk')}
+            for field in date_fields:
+                aggregates[f'max_{field}'] = Max(field)
+            values = model.objects.aggregate(**aggregates)
+            memo[name] = (name,) + tuple(
+                values[key].isoformat() if hasattr(values[key], 'isoformat') else values[key]
+                for key in sorted(values)
+            )
+        parts.append(memo[name])
+    return tuple(parts)
+
+
+def normalize_params(query_params, ignore=()):
+    """
+    Normaliza os parâmetros da consulta para uso como chave do cache.
+
+    Remove parâmetros vazios e ignorados, e ordena chaves e valores para que
+    a mesma consulta gere sempre a mesma chave.
+    """
+    normalized = []
+    for key in sorted(query_params.keys()):
+        if key in ignore:
+            continue
+        values = sorted(v.strip() for v in query_params.getlist(key) if v.strip())
+        if values:
+            normalized.append((key, tuple(values)))
+    return tuple(normalized)
+
+
+def is_closed_range(query_params):
+    """
+    Verifica se o período termina antes de hoje (horário local).
+
+    Esses períodos não recebem mais escritas no fluxo normal do caixa,
+    então podem ficar em cache sem depender da marca d'água.
+    """
+    end_date = query_params.get('end_date')
+    if not end_date:
+        return False
+    try:
+        end = datetime.strptime(end_date, '%Y-%m-%d').date()
+    except ValueError:
+        return False
+    return end < timezone.localdate()
+
+
+def seconds_until_tomorrow():
+    """Segundos até a próxima meia-noite no horário local."""
+    now = timezone.localtime()
+    tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(int((tomorrow - now).total_seconds()), 1)
+
+
+def cache_key(name, depends_on, query_params, ignore=('refresh',), watermarks=None,
+              per_day=False):
+    """
+    Monta a chave e o TTL da entrada de um relatório.
+
+    Returns:
+        Tupla (key, ttl)
+    """
+    params = normalize_params(query_params, ignore=ignore)
+    if per_day:
+        return (name, params, 'day', timezone.localdate().isoformat()), seconds_until_tomorrow()
+    if is_closed_range(query_params):
+        return (name, params, 'closed'), getattr(settings, 'REPORT_CACHE_CLOSED_TTL', 7 * 24 * 3600)
+    key = (name, params, compute_watermark(depends_on, watermarks))
+    return key, getattr(settings, 'REPORT_CACHE_TTL', 300)
+
+
+def is_refresh(query_params):
+    """Verifica se a requisição pediu para ignorar o cache (?refresh=true)."""
+    return query_params.get('refresh', '').lower() == 'true'
+
+
+def cached_report(name, depends_on, per_day=False):
+    """
+    Decorator que adiciona cache de resultado a uma view de relatório.
+
+    Deve ser aplicado abaixo de @api_view/@permission_classes, para que a
+    autenticação e as permissões continuem sendo verificadas em todas as
+    requisições. Apenas respostas 200 são armazenadas.
+
+    O cabeçalho X-Report-Cache indica 'hit' ou 'miss'. O parâmetro
+    ?refresh=true ignora o cache e recalcula o relatório.
+
+    Args:
+        name: Nome do relatório (faz parte da chave)
+        depends_on: Tabelas das quais o relatório depende
+            ('payments', 'orders', 'items', 'expenses', 'products')
+        per_day: Para relatórios que só leem dias já encerrados (ex.:
+            previsão de demanda): a chave é a data local e a entrada vale
+            até a meia-noite, sem consultar a marca d'água
+
+    Example:
+        @api_view(['GET'])
+        @permission_classes([IsAuthenticated, IsAdmin])
+        @cached_report('sales', depends_on=('payments',))
+        def sales_report(request):
+            ...
+    """
+    depends_on = tuple(depends_on)
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not getattr(settings, 'REPORT_CACHE_ENABLED', True):
+                return view_func(request, *args, **kwargs)
+
+            key, ttl = cache_key(name, depends_on, request.query_params, per_day=per_day)
+
+            if not is_refresh(request.query_params):
+                cached = report_cache.get(key)
+                if cached is not None:
+                    response = Response(cached)
+                    response['X-Report-Cache'] = 'hit'
+                    return response
+
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                report_cache.set(key, response.data, ttl)
+            response['X-Report-Cache'] = 'miss'
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,784 @@
+"""
+Definições dos relatórios.
+
+Cada relatório declara as seções que precisa (ver reports/engine.py) e uma
+função que monta o JSON a partir do resultado do motor. Os CSVs usam as
+mesmas seções (ou listagens com os mesmos filtros), de modo que JSON e CSV
+de um relatório sempre refletem os mesmos dados.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from django.utils import timezone
+
+from expenses.models import ExpenseCategory
+from orders.models import OrderStatus
+from payments.models import PaymentMethod, PaymentStatus
+
+from .models import Weekday
+
+from .baskets import count_baskets, top_pairs
+from .engine import Listing, ReportFilters, Section
+
+
+COMPLETED = (('status', (PaymentStatus.COMPLETED,)),)
+PAYMENT_COMPLETED = (('payment_status', (PaymentStatus.COMPLETED,)),)
+GROUP_BY_DIMENSIONS = {'day': 'day', 'month': 'month', 'year': 'year'}
+
+
+@dataclass(frozen=True)
+class ReportDefinition:
+    """
+    Relatório em JSON.
+
+    Attributes:
+        name: Nome do relatório (usado no cache e no endpoint batch)
+        depends_on: Tabelas lidas (marca d'água do cache)
+        sections: filtros -> {nome: Section}
+        build: (dados, filtros) -> dict da resposta
+    """
+    name: str
+    depends_on: Tuple[str, ...]
+    sections: Callable[[ReportFilters], Dict]
+    build: Callable[[Dict, ReportFilters], Dict]
+
+
+@dataclass(frozen=True)
+class CsvExport:
+    """
+    Exportação CSV de um relatório.
+
+    Attributes:
+        filename: Prefixo do nome do arquivo
+        header: Cabeçalho do CSV
+        sections: filtros -> {nome: Section | Listing}
+        rows: (dados, filtros) -> linhas do CSV
+    """
+    filename: str
+    header: List[str]
+    sections: Callable[[ReportFilters], Dict]
+    rows: Callable[[Dict, ReportFilters], Iterable[list]]
+
+
+def _period(filters):
+    return {
+        'start_date': filters.start_date,
+        'end_date': filters.end_date,
+    }
+
+
+def _decimal_br(value):
+    """Formata valores monetários com vírgula decimal (padrão do Excel pt-BR)."""
+    return str(value).replace('.', ',')
+
+
+def _datetime_br(value):
+    return value.strftime('%d/%m/%Y %H:%M:%S') if value else ''
+
+
+# ---------------------------------------------------------------------------
+# Seções compartilhadas
+# ---------------------------------------------------------------------------
+
+def _expense_sections(params=()):
+    return {
+        'expenses_summary': Section('expenses', measures=('amount', 'count'), params=params),
+        'expenses_by_category': Section(
+            'expenses', ('category',), ('amount', 'count'),
+            order_by=('-amount',), params=params,
+        ),
+    }
+
+
+def _expenses_by_category(rows):
+    return [
+        {
+            'category': item['category'],
+            'category_display': ExpenseCategory(item['category']).label,
+            'total': float(item['amount']),
+            'count': item['count'],
+        }
+        for item in rows
+    ]
+
+
+def _by_method(rows):
+    return [
+        {
+            'method': item['method'],
+            'method_display': PaymentMethod(item['method']).label,
+            'total': float(item['amount']),
+            'count': item['count'],
+        }
+        for item in rows
+    ]
+
+
+def _products_section(filters, default_limit):
+    return Section(
+        'items',
+        ('product_id', 'product_name', 'product_category', 'product_price'),
+        ('quantity', 'revenue', 'order_count', 'delivery_share'),
+        where=PAYMENT_COMPLETED,
+        order_by=('-quantity',),
+        limit=filters.get_int('limit', default_limit),
+        params=('category',),
+    )
+
+
+def _revenue_with_delivery(item):
+    """Receita do produto somada à parte das taxas de entrega dos seus pedidos."""
+    return item['revenue'] + Decimal(str(item['delivery_share']))
+
+
+# ---------------------------------------------------------------------------
+# Dashboard
+# ---------------------------------------------------------------------------
+
+def dashboard_sections(filters):
+    return {
+        'orders_by_open': Section('orders', ('is_open',), ('count',), period=False),
+        'orders_by_status': Section('orders', ('status',), ('count',), period=False),
+        'paid': Section(
+            'orders', ('paid_recently',), ('payment_amount', 'total', 'delivery_fee'),
+            where=PAYMENT_COMPLETED, period=False,
+        ),
+        'pending': Section(
+            'orders', measures=('count',),
+            where=(('payment_status', (None, PaymentStatus.PENDING)),), period=False,
+        ),
+        'expenses': Section('expenses', ('recent',), ('amount',), period=False),
+        'top_products': Section(
+            'items', ('product_id', 'product_name'), ('quantity', 'revenue'),
+            order_by=('-quantity',), limit=5, period=False,
+        ),
+    }
+
+
+def dashboard_build(data, filters):
+    def pick(rows, dimension, value, measure, zero=Decimal('0.00')):
+        for row in rows:
+            if row[dimension] == value:
+                return row[measure]
+        return zero
+
+    by_open = data['orders_by_open']
+    open_orders = pick(by_open, 'is_open', True, 'count', 0)
+    closed_orders = pick(by_open, 'is_open', False, 'count', 0)
+
+    paid = data['paid']
+    recent_revenue = pick(paid, 'paid_recently', True, 'payment_amount')
+    recent_products_revenue = pick(paid, 'paid_recently', True, 'total')
+    recent_delivery_fees = pick(paid, 'paid_recently', True, 'delivery_fee')
+    total_revenue = recent_revenue + pick(paid, 'paid_recently', False, 'payment_amount')
+    total_products_revenue = (
+        recent_products_revenue + pick(paid, 'paid_recently', False, 'total')
+    )
+    total_delivery_fees = (
+        recent_delivery_fees + pick(paid, 'paid_recently', False, 'delivery_fee')
+    )
+
+    expenses = data['expenses']
+    recent_expenses = pick(expenses, 'recent', True, 'amount')
+    total_expenses = recent_expenses + pick(expenses, 'recent', False, 'amount')
+
+    return {
+        'summary': {
+            'total_orders': open_orders + closed_orders,
+            'open_orders': open_orders,
+            'closed_orders': closed_orders,
+            'total_revenue': float(total_revenue),
+            'total_products_revenue': float(total_products_revenue),
+            'total_delivery_fees': float(total_delivery_fees),
+            'recent_revenue': float(recent_revenue),
+            'recent_products_revenue': float(recent_products_revenue),
+            'recent_delivery_fees': float(recent_delivery_fees),
+            'total_expenses': float(total_expenses),
+            'recent_expenses': float(recent_expenses),
+            'profit': float(total_revenue - total_expenses),
+            'recent_profit': float(recent_revenue - recent_expenses),
+            'pending_payments': data['pending']['count'],
+        },
+        'top_products': [
+            {
+                'id': item['product_id'],
+                'name': item['product_name'],
+                'total_quantity': item['quantity'],
+                'total_revenue': float(item['revenue']),
+            }
+            for item in data['top_products']
+        ],
+        'orders_by_status': [
+            {'status': item['status'], 'count': item['count']}
+            for item in data['orders_by_status']
+        ],
+        'period': {
+            'start': filters.recent_since.isoformat(),
+            'end': filters.now.isoformat(),
+        },
+    }
+
+
+# ---------------------------------------------------------------------------
+# Vendas
+# ---------------------------------------------------------------------------
+
+def _group_by(filters):
+    group_by = filters.params.get('group_by', 'day')
+    return group_by if group_by in GROUP_BY_DIMENSIONS else 'day'
+
+
+def sales_sections(filters):
+    params = ('payment_method',)
+    return {
+        'sales_summary': Section(
+            'payments', measures=('amount', 'count'), where=COMPLETED, params=params,
+        ),
+        'sales_by_period': Section(
+            'payments', (GROUP_BY_DIMENSIONS[_group_by(filters)],), ('amount', 'count'),
+            where=COMPLETED, params=params,
+        ),
+        'sales_by_method': Section(
+            'payments', ('method',), ('amount', 'count'),
+            where=COMPLETED, order_by=('-amount',), params=params,
+        ),
+    }
+
+
+def sales_build(data, filters):
+    dimension = GROUP_BY_DIMENSIONS[_group_by(filters)]
+    summary = data['sales_summary']
+    return {
+        'period': {
+            **_period(filters),
+            'group_by': filters.params.get('group_by', 'day'),
+        },
+        'summary': {
+            'total_sales': float(summary['amount']),
+            'total_orders': summary['count'],
+        },
+        'sales_by_period': [
+            {
+                'period': item[dimension].isoformat() if item[dimension] else None,
+                'total': float(item['amount']),
+                'count': item['count'],
+            }
+            for item in data['sales_by_period']
+        ],
+        'sales_by_method': _by_method(data['sales_by_method']),
+    }
+
+
+def sales_csv_sections(filters):
+    return {
+        'payments': Listing(
+            'payments',
+            ('paid_at', 'order_id', 'method', 'amount', 'status'),
+            where=COMPLETED, order_by=('-created_at',), params=('payment_method',),
+        ),
+    }
+
+
+def sales_csv_rows(data, filters):
+    for payment in data['payments']:
+        yield [
+            _datetime_br(payment['paid_at']),
+            payment['order_id'],
+            PaymentMethod(payment['method']).label,
+            _decimal_br(payment['amount']),
+            PaymentStatus(payment['status']).label,
+        ]
+
+
+# ---------------------------------------------------------------------------
+# Produtos
+# ---------------------------------------------------------------------------
+
+def products_sections(filters):
+    return {'products': _products_section(filters, default_limit=10)}
+
+
+def products_build(data, filters):
+    products_list = [
+        {
+            'id': item['product_id'],
+            'name': item['product_name'],
+            'category': item['product_category'],
+            'current_price': float(item['product_price']),
+            'total_quantity': item['quantity'],
+            'total_revenue': float(_revenue_with_delivery(item)),
+            'order_count': item['order_count'],
+        }
+        for item in data['products']
+    ]
+    return {
+        'period': _period(filters),
+        'summary': {
+            'total_products_sold': sum(item['total_quantity'] for item in products_list),
+            'total_revenue': sum(item['total_revenue'] for item in products_list),
+            'products_count': len(products_list),
+        },
+        'products': products_list,
+    }
+
+
+def products_csv_sections(filters):
+    return {'products': _products_section(filters, default_limit=100)}
+
+
+def products_csv_rows(data, filters):
+    for item in data['products']:
+        yield [
+            item['product_name'],
+            item['product_category'],
+            item['quantity'],
+            item['order_count'],
+            _decimal_br(_revenue_with_delivery(item).quantize(Decimal('0.01'))),
+            _decimal_br(item['product_price']),
+        ]
+
+
+# ---------------------------------------------------------------------------
+# Pedidos
+# ---------------------------------------------------------------------------
+
+def orders_sections(filters):
+    params = ('status', 'is_open')
+    return {
+        'orders_by_open': Section('orders', ('is_open',), ('count', 'total'), params=params),
+        'orders_by_status': Section('orders', ('status',), ('count',), params=params),
+        'orders_by_payment': Section('orders', ('payment_status',), ('count',), params=params),
+    }
+
+
+def orders_build(data, filters):
+    by_open = {item['is_open']: item for item in data['orders_by_open']}
+    by_payment = {item['payment_status']: item['count'] for item in data['orders_by_payment']}
+
+    total_orders = sum(item['count'] for item in by_open.values())
+    total_value = sum((item['total'] for item in by_open.values()), Decimal('0.00'))
+    avg_order_value = total_value / total_orders if total_orders > 0 else Decimal('0.00')
+    without_payment = (None, PaymentStatus.PENDING, PaymentStatus.PROCESSING)
+
+    return {
+        'period': _period(filters),
+        'summary': {
+            'total_orders': total_orders,
+            'open_orders': by_open.get(True, {}).get('count', 0),
+            'closed_orders': by_open.get(False, {}).get('count', 0),
+            'orders_with_payment': by_payment.get(PaymentStatus.COMPLETED, 0),
+            'orders_without_payment': sum(by_payment.get(s, 0) for s in without_payment),
+            'total_value': float(total_value),
+            'avg_order_value': float(avg_order_value),
+        },
+        'orders_by_status': [
+            {'status': item['status'], 'count': item['count']}
+            for item in data['orders_by_status']
+        ],
+    }
+
+
+def orders_csv_sections(filters):
+    return {
+        'orders': Listing(
+            'orders',
+            (
+                'id', 'customer__username', 'status', 'is_open', 'total',
+                'created_at', 'updated_at', 'payment__id', 'payment__status',
+            ),
+            order_by=('-created_at',), params=('status', 'is_open'),
+        ),
+    }
+
+
+def orders_csv_rows(data, filters):
+    for order in data['orders']:
+        has_payment = order['payment__id'] is not None
+        yield [
+            order['id'],
+            order['customer__username'],
+            OrderStatus(order['status']).label,
+            'Sim' if order['is_open'] else 'Não',
+            _decimal_br(order['total']),
+            _datetime_br(order['created_at']),
+            _datetime_br(order['updated_at']),
+            'Sim' if has_payment else 'Não',
+            PaymentStatus(order['payment__status']).label if has_payment else 'Sem pagamento',
+        ]
+
+
+# ---------------------------------------------------------------------------
+# Financeiro
+# ---------------------------------------------------------------------------
+
+def financial_sections(filters):
+    return {
+        'payments_summary': Section('payments', measures=('count',), date_field='created_at'),
+        'payments_by_status': Section(
+            'payments', ('status',), ('amount', 'count', 'products_total', 'delivery_fee'),
+            date_field='created_at',
+        ),
+        'revenue_by_method': Section(
+            'payments', ('method',), ('amount', 'count'),
+            where=COMPLETED, order_by=('-amount',), date_field='created_at',
+        ),
+        **_expense_sections(),
+    }
+
+
+def financial_build(data, filters):
+    by_status = {item['status']: item for item in data['payments_by_status']}
+    completed = by_status.get(PaymentStatus.COMPLETED, {})
+    pending = by_status.get(PaymentStatus.PENDING, {})
+    failed = by_status.get(PaymentStatus.FAILED, {})
+
+    total_revenue = completed.get('amount', Decimal('0.00'))
+    total_expenses = data['expenses_summary']['amount']
+
+    return {
+        'period': _period(filters),
+        'summary': {
+            'total_revenue': float(total_revenue),
+            'products_revenue': float(completed.get('products_total', Decimal('0.00'))),
+            'delivery_fees': float(completed.get('delivery_fee', Decimal('0.00'))),
+            'pending_revenue': float(pending.get('amount', Decimal('0.00'))),
+            'total_expenses': float(total_expenses),
+            'net_profit': float(total_revenue - total_expenses),
+            'total_payments': data['payments_summary']['count'],
+            'completed_payments': completed.get('count', 0),
+            'pending_payments': pending.get('count', 0),
+            'failed_payments': failed.get('count', 0),
+        },
+        'revenue_by_method': _by_method(data['revenue_by_method']),
+        'payments_by_status': [
+            {
+                'status': item['status'],
+                'status_display': PaymentStatus(item['status']).label,
+                'total': float(item['amount']),
+                'count': item['count'],
+            }
+            for item in data['payments_by_status']
+        ],
+        'expenses_by_category': _expenses_by_category(data['expenses_by_category']),
+    }
+
+
+def financial_csv_sections(filters):
+    return {
+        'payments': Listing(
+            'payments',
+            (
+                'id', 'order_id', 'method', 'amount', 'status',
+                'created_at', 'paid_at', 'transaction_id',
+            ),
+            order_by=('-created_at',), date_field='created_at',
+        ),
+    }
+
+
+def financial_csv_rows(data, filters):
+    for payment in data['payments']:
+        yield [
+            payment['id'],
+            payment['order_id'],
+            PaymentMethod(payment['method']).label,
+            _decimal_br(payment['amount']),
+            PaymentStatus(payment['status']).label,
+            _datetime_br(payment['created_at']),
+            _datetime_br(payment['paid_at']),
+            payment['transaction_id'] or '',
+        ]
+
+
+# ---------------------------------------------------------------------------
+# Despesas
+# ---------------------------------------------------------------------------
+
+def expenses_sections(filters):
+    return _expense_sections(params=('category',))
+
+
+def expenses_build(data, filters):
+    summary = data['expenses_summary']
+    total_expenses = summary['amount']
+    total_count = summary['count']
+    avg_expense = total_expenses / total_count if total_count > 0 else Decimal('0.00')
+    return {
+        'period': _period(filters),
+        'summary': {
+            'total_expenses': float(total_expenses),
+            'total_count': total_count,
+            'avg_expense': float(avg_expense),
+        },
+        'expenses_by_category': _expenses_by_category(data['expenses_by_category']),
+    }
+
+
+def expenses_csv_sections(filters):
+    return {
+        'expenses': Listing(
+            'expenses',
+            ('created_at', 'category', 'description', 'amount', 'user__username', 'notes'),
+            order_by=('-created_at',), params=('category',),
+        ),
+    }
+
+
+def expenses_csv_rows(data, filters):
+    for expense in data['expenses']:
+        yield [
+            _datetime_br(expense['created_at']),
+            ExpenseCategory(expense['category']).label,
+            expense['description'],
+            _decimal_br(expense['amount']),
+            expense['user__username'] or 'N/A',
+            expense['notes'] or '',
+        ]
+
+
+# ---------------------------------------------------------------------------
+# Mapa de calor (hora x dia da semana)
+# ---------------------------------------------------------------------------
+
+def heatmap_sections(filters):
+    params = ('payment_method',)
+    return {
+        'heatmap_summary': Section('hourly', measures=('orders', 'revenue'), params=params),
+        'heatmap_cells': Section(
+            'hourly', ('weekday', 'hour'), ('orders', 'revenue'), params=params,
+        ),
+        'heatmap_by_weekday': Section(
+            'hourly', ('weekday',), ('orders', 'revenue'), params=params,
+        ),
+        'heatmap_by_hour': Section('hourly', ('hour',), ('orders', 'revenue'), params=params),
+    }
+
+
+def _heatmap_cell(item):
+    orders = item['orders']
+    revenue = item['revenue']
+    cell = {}
+    if 'weekday' in item:
+        cell['weekday'] = item['weekday']
+        cell['weekday_display'] = Weekday(item['weekday']).label
+    if 'hour' in item:
+        cell['hour'] = item['hour']
+    cell.update({
+        'orders': orders,
+        'revenue': float(revenue),
+        'avg_ticket': float(revenue / orders) if orders > 0 else 0.0,
+    })
+    return cell
+
+
+def _heatmap_rows(rows):
+    # Células zeradas sobram no consolidado após estornos e são omitidas
+    return [_heatmap_cell(item) for item in rows if item['orders'] != 0]
+
+
+def heatmap_build(data, filters):
+    summary = data['heatmap_summary']
+    cells = _heatmap_rows(data['heatmap_cells'])
+    return {
+        'period': {
+            **_period(filters),
+            'timezone': str(timezone.get_current_timezone()),
+        },
+        'summary': {
+            'total_orders': summary['orders'],
+            'total_revenue': float(summary['revenue']),
+            'peak': max(cells, key=lambda cell: cell['orders']) if cells else None,
+        },
+        'cells': cells,
+        'by_weekday': _heatmap_rows(data['heatmap_by_weekday']),
+        'by_hour': _heatmap_rows(data['heatmap_by_hour']),
+    }
+
+
+def heatmap_csv_sections(filters):
+    return {'cells': heatmap_sections(filters)['heatmap_cells']}
+
+
+def heatmap_csv_rows(data, filters):
+    for item in data['cells']:
+        if item['orders'] == 0:
+            continue
+        orders = item['orders']
+        revenue = item['revenue']
+        yield [
+            Weekday(item['weekday']).label,
+            f"{item['hour']:02d}:00",
+            orders,
+            _decimal_br(revenue),
+            _decimal_br((revenue / orders).quantize(Decimal('0.01')) if orders > 0 else '0.00'),
+        ]
+
+
+# ---------------------------------------------------------------------------
+# Cestas (produtos comprados juntos)
+# ---------------------------------------------------------------------------
+
+def _basket_sections(filters, default_limit):
+    # Valida os parâmetros numéricos antes de qualquer consulta
+    filters.get_int('limit', default_limit)
+    filters.get_int('min_count', 1)
+    return {
+        'baskets': Listing(
+            'items', ('order_id', 'product_id'),
+            where=PAYMENT_COMPLETED, order_by=('order_id',), tuples=True,
+        ),
+        'basket_products': Section(
+            'items', ('product_id', 'product_name', 'product_category'), ('quantity',),
+            where=PAYMENT_COMPLETED,
+        ),
+    }
+
+
+def _basket_pairs(data, filters, default_limit):
+    """
+    Conta os pares e retorna (contagens, produtos por id, top pares).
+
+    O filtro de categoria mantém os pares em que pelo menos um dos produtos
+    é da categoria (ex.: category=marmitas -> o que sai junto com marmitas).
+    As métricas continuam relativas a todos os pedidos pagos do período.
+    """
+    counts = count_baskets(data['baskets'])
+    products = {item['product_id']: item for item in data['basket_products']}
+    category = filters.params.get('category')
+
+    def in_category(a, b):
+        return category in (products[a]['product_category'], products[b]['product_category'])
+
+    pairs = top_pairs(
+        counts,
+        limit=filters.get_int('limit', default_limit),
+        keep=in_category if category else None,
+        min_count=filters.get_int('min_count', 1),
+    )
+    return counts, products, pairs
+
+
+def _basket_product(item):
+    return {
+        'id': item['product_id'],
+        'name': item['product_name'],
+        'category': item['product_category'],
+    }
+
+
+def baskets_sections(filters):
+    return _basket_sections(filters, default_limit=10)
+
+
+def baskets_build(data, filters):
+    counts, products, pairs = _basket_pairs(data, filters, default_limit=10)
+    return {
+        'period': _period(filters),
+        'summary': {
+            'total_orders': counts.baskets,
+            'products_count': len(counts.items),
+            'distinct_pairs': len(counts.pairs),
+        },
+        'pairs': [
+            {
+                'product_a': _basket_product(products[a]),
+                'product_b': _basket_product(products[b]),
+                **metrics,
+            }
+            for (a, b), metrics in pairs
+        ],
+    }
+
+
+def baskets_csv_sections(filters):
+    return _basket_sections(filters, default_limit=100)
+
+
+def baskets_csv_rows(data, filters):
+    _, products, pairs = _basket_pairs(data, filters, default_limit=100)
+    for (a, b), metrics in pairs:
+        yield [
+            products[a]['product_name'],
+            products[a]['product_category'],
+            products[b]['product_name'],
+            products[b]['product_category'],
+            metrics['count'],
+            _decimal_br(round(metrics['support'], 4)),
+            _decimal_br(round(metrics['confidence_a_b'], 4)),
+            _decimal_br(round(metrics['confidence_b_a'], 4)),
+            _decimal_br(round(metrics['lift'], 2)),
+        ]
+
+
+REPORTS = {
+    'dashboard': ReportDefinition(
+        'dashboard', ('orders', 'items', 'payments', 'expenses', 'products'),
+        dashboard_sections, dashboard_build,
+    ),
+    'sales': ReportDefinition('sales', ('payments',), sales_sections, sales_build),
+    'products': ReportDefinition(
+        'products', ('items', 'orders', 'payments', 'products'),
+        products_sections, products_build,
+    ),
+    'orders': ReportDefinition('orders', ('orders', 'payments'), orders_sections, orders_build),
+    'financial': ReportDefinition(
+        'financial', ('payments', 'orders', 'expenses'),
+        financial_sections, financial_build,
+    ),
+    'expenses': ReportDefinition('expenses', ('expenses',), expenses_sections, expenses_build),
+    'heatmap': ReportDefinition('heatmap', ('payments',), heatmap_sections, heatmap_build),
+    'baskets': ReportDefinition(
+        'baskets', ('items', 'payments', 'products'), baskets_sections, baskets_build,
+    ),
+}
+
+EXPORTS = {
+    'sales': CsvExport(
+        'relatorio_vendas',
+        ['Data', 'Pedido ID', 'Método de Pagamento', 'Valor', 'Status'],
+        sales_csv_sections, sales_csv_rows,
+    ),
+    'products': CsvExport(
+        'relatorio_produtos',
+        [
+            'Produto', 'Categoria', 'Quantidade Vendida', 'Número de Pedidos',
+            'Receita Total (com taxa de entrega)', 'Preço Atual',
+        ],
+        products_csv_sections, products_csv_rows,
+    ),
+    'orders': CsvExport(
+        'relatorio_pedidos',
+        [
+            'ID', 'Cliente', 'Status', 'Aberto', 'Total', 'Data Criação',
+            'Data Atualização', 'Tem Pagamento', 'Status Pagamento',
+        ],
+        orders_csv_sections, orders_csv_rows,
+    ),
+    'financial': CsvExport(
+        'relatorio_financeiro',
+        [
+            'ID Pagamento', 'Pedido ID', 'Método de Pagamento', 'Valor', 'Status',
+            'Data Criação', 'Data Pagamento', 'ID Transação',
+        ],
+        financial_csv_sections, financial_csv_rows,
+    ),
+    'expenses': CsvExport(
+        'relatorio_despesas',
+        ['Data', 'Categoria', 'Descrição', 'Valor', 'Usuário', 'Observações'],
+        expenses_csv_sections, expenses_csv_rows,
+    ),
+    'heatmap': CsvExport(
+        'relatorio_mapa_calor',
+        ['Dia da Semana', 'Hora', 'Pedidos', 'Receita', 'Ticket Médio'],
+        heatmap_csv_sections, heatmap_csv_rows,
+    ),
+    'baskets': CsvExport(
+        'relatorio_cestas',
+        [
+            'Produto A', 'Categoria A', 'Produto B', 'Categoria B', 'Pedidos Juntos',
+            'Suporte', 'Confiança A→B', 'Confiança B→A', 'Lift',
+        ],
+        baskets_csv_sections, baskets_csv_rows,
+    ),
+}
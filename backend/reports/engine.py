@@ -0,0 +1,799 @@
+"""
+Motor de relatórios.
+
+Centraliza o que antes cada view de relatório (e sua versão CSV) fazia por
+conta própria: leitura dos filtros da query string, filtro de período,
+agrupamentos e agregações.
+
+Cada relatório declara as seções que precisa (Section): a fonte de dados,
+as dimensões de agrupamento e as medidas. O planejador junta as seções que
+usam a mesma fonte com os mesmos filtros em UMA consulta agrupada pela união
+das dimensões (o "grão") e depois consolida cada seção em Python a partir
+dessas linhas. Assim, acrescentar uma métrica ou uma seção a um relatório
+não acrescenta consultas ao banco.
+
+Seções com limite (top N) ou com medidas não aditivas (contagem distinta)
+não podem ser derivadas de um grão mais fino e ganham consulta própria.
+Listagens (Listing) são usadas pelos CSVs linha a linha e compartilham os
+mesmos filtros.
+
+No PostgreSQL, um grupo de seções com agrupamentos diferentes vira uma
+consulta com GROUPING SETS: o banco devolve cada seção já agregada no seu
+próprio grão (um conjunto por seção), em vez das linhas do grão comum para
+consolidar em Python. Os filtros por dimensão comuns a todas as seções vão
+para o WHERE e os demais para agregações com FILTER (WHERE ...), sem entrar
+no agrupamento. As dimensões de data (TruncDate/TruncMonth/TruncYear) já
+usam date_trunc no fuso local no PostgreSQL. REPORT_GROUPING_SETS=False
+desliga esse caminho.
+"""
+import copy
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from functools import cached_property
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from django.apps import apps
+from django.conf import settings
+from django.db import NotSupportedError, connections
+from django.db.models import (
+    Case, Count, DecimalField, ExpressionWrapper, F, FloatField, Func, IntegerField, OuterRef, Q,
+    Subquery, Sum, Value, When, expressions,
+)
+from django.db.models.functions import Cast, TruncDate, TruncMonth, TruncYear
+from django.utils import timezone
+
+
+DATE_FORMAT_ERROR = 'Formato de data inválido. Use YYYY-MM-DD.'
+
+# Janela usada pelas métricas "recentes" do dashboard
+RECENT_DAYS = 30
+
+
+class ReportFilterError(ValueError):
+    """Parâmetro de relatório inválido (vira resposta 400 nas views)."""
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ReportFilterError(DATE_FORMAT_ERROR)
+
+
+def _parse_bool(value):
+    return value.lower() == 'true'
+
+
+@dataclass
+class ReportFilters:
+    """
+    Filtros comuns a todos os relatórios, lidos uma única vez da query string.
+
+    O período é convertido para datetimes "aware" no fuso local: início
+    inclusivo e fim exclusivo (meia-noite do dia seguinte à data final).
+    As datas só são validadas quando start/end são lidos: relatórios que não
+    filtram por período (dashboard) ignoram datas inválidas, como antes.
+    """
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    params: Dict[str, str] = field(default_factory=dict)
+    now: datetime = field(default_factory=timezone.now)
+
+    @classmethod
+    def from_query_params(cls, query_params):
+        """Cria os filtros a partir de request.query_params."""
+        params = {
+            key: query_params.get(key)
+            for key in query_params.keys()
+            if query_params.get(key) not in (None, '')
+        }
+        return cls(
+            start_date=query_params.get('start_date') or None,
+            end_date=query_params.get('end_date') or None,
+            params=params,
+        )
+
+    @cached_property
+    def start(self):
+        """
+        Início do período (inclusivo) ou None.
+
+        Raises:
+            ReportFilterError: se start_date não estiver no formato YYYY-MM-DD
+        """
+        if not self.start_date:
+            return None
+        return timezone.make_aware(
+            datetime.combine(_parse_date(self.start_date), time.min), timezone.get_current_timezone(),
+        )
+
+    @cached_property
+    def end(self):
+        """
+        Fim do período (exclusivo: meia-noite após end_date) ou None.
+
+        Raises:
+            ReportFilterError: se end_date não estiver no formato YYYY-MM-DD
+        """
+        if not self.end_date:
+            return None
+        end_day = _parse_date(self.end_date) + timedelta(days=1)
+        return timezone.make_aware(datetime.combine(end_day, time.min), timezone.get_current_timezone())
+
+    @property
+    def recent_since(self):
+        """Início da janela de RECENT_DAYS dias usada pelo dashboard."""
+        return self.now - timedelta(days=RECENT_DAYS)
+
+    def get_int(self, name, default, maximum=None):
+        """Lê um parâmetro inteiro positivo (até `maximum`, se informado)."""
+        value = self.params.get(name)
+        if value is None:
+            return default
+        try:
+            number = int(value)
+        except ValueError:
+            raise ReportFilterError(f'Parâmetro "{name}" deve ser um número inteiro.')
+        if number < 1:
+            raise ReportFilterError(f'Parâmetro "{name}" deve ser maior que zero.')
+        if maximum is not None and number > maximum:
+            raise ReportFilterError(f'Parâmetro "{name}" deve ser no máximo {maximum}.')
+        return number
+
+    def date_q(self, date_field):
+        """Retorna o Q do período aplicado ao campo de data informado."""
+        q = Q()
+        if self.start is not None:
+            q &= Q(**{f'{date_field}__gte': self.start})
+        if self.end is not None:
+            q &= Q(**{f'{date_field}__lt': self.end})
+        return q
+
+
+# Expressões podem ser um caminho de campo ou uma função que recebe os
+# filtros (para dimensões que dependem de "agora", por exemplo).
+Expression = Union[str, Callable[[ReportFilters], Any]]
+
+
+def _resolve(expression, filters):
+    if callable(expression):
+        return expression(filters)
+    return F(expression)
+
+
+@dataclass(frozen=True)
+class Measure:
+    """
+    Medida agregável de uma fonte.
+
+    kind:
+        'sum' e 'count' são aditivas (podem ser somadas a partir de um grão
+        mais fino); 'count_distinct' não é.
+    """
+    expression: Expression
+    kind: str = 'sum'
+    zero: Any = Decimal('0.00')
+
+    @property
+    def additive(self):
+        return self.kind != 'count_distinct'
+
+    def aggregate(self, filters, where=None):
+        """Agregação da medida; `where` (Q) vira FILTER (WHERE ...) no SQL."""
+        if self.kind == 'count':
+            return Count(_resolve(self.expression, filters), filter=where)
+        if self.kind == 'count_distinct':
+            return Count(_resolve(self.expression, filters), distinct=True, filter=where)
+        return Sum(_resolve(self.expression, filters), filter=where)
+
+
+@dataclass(frozen=True)
+class Source:
+    """
+    Fonte de dados dos relatórios (um model e o que pode ser agregado dele).
+
+    Attributes:
+        model: Label do model ('app.Model')
+        date_field: Campo usado pelo filtro de período
+        dimensions: Nome -> expressão usada no agrupamento
+        measures: Nome -> Measure
+        params: Parâmetro da query string -> (lookup, conversor)
+    """
+    model: str
+    date_field: str
+    dimensions: Dict[str, Expression]
+    measures: Dict[str, Measure]
+    params: Dict[str, Tuple[str, Callable[[str], Any]]] = field(default_factory=dict)
+
+    def queryset(self, filters, spec):
+        """Queryset base da fonte com o período e os parâmetros da seção/listagem."""
+        queryset = apps.get_model(self.model).objects.all()
+        if spec.period:
+            queryset = queryset.filter(filters.date_q(spec.date_field or self.date_field))
+        for name in spec.params:
+            value = filters.params.get(name)
+            if value is None:
+                continue
+            lookup, convert = self.params[name]
+            queryset = queryset.filter(**{lookup: convert(value)})
+        return queryset.order_by()
+
+    def filter_where(self, queryset, filters, where):
+        """Aplica no SQL os filtros sobre dimensões."""
+        for dim, values in where:
+            expression = self.dimensions[dim]
+            if callable(expression):
+                queryset = queryset.annotate(**{f'_where_{dim}': expression(filters)})
+                expression = f'_where_{dim}'
+            queryset = queryset.filter(_in_q(expression, values))
+        return queryset
+
+
+def _in_q(expression, values):
+    """Q de `expression IN values`, com None virando IS NULL."""
+    lookup = Q(**{f'{expression}__in': [v for v in values if v is not None]})
+    if None in values:
+        lookup |= Q(**{f'{expression}__isnull': True})
+    return lookup
+
+
+@dataclass(frozen=True)
+class Section:
+    """
+    Pedido declarativo de dados agregados.
+
+    Attributes:
+        source: Nome da fonte (chave de SOURCES)
+        dimensions: Dimensões de agrupamento (vazio = totais, retorna um dict)
+        measures: Medidas a calcular
+        where: Filtros sobre dimensões, ex.: (('status', ('completed',)),)
+        order_by: Ordenação do resultado, ex.: ('-total',)
+        limit: Limita o número de linhas (força consulta própria)
+        date_field: Sobrescreve o campo de data da fonte
+        params: Parâmetros da query string aplicados como filtro
+        period: Se False, ignora o filtro de período (ex.: dashboard)
+    """
+    source: str
+    dimensions: Tuple[str, ...] = ()
+    measures: Tuple[str, ...] = ()
+    where: Tuple[Tuple[str, Tuple[Any, ...]], ...] = ()
+    order_by: Tuple[str, ...] = ()
+    limit: Optional[int] = None
+    date_field: Optional[str] = None
+    params: Tuple[str, ...] = ()
+    period: bool = True
+
+    def scope(self, sources, filters):
+        """
+        Chave das seções que compartilham a mesma base filtrada.
+
+        Usa os valores efetivamente aplicados, para que seções de relatórios
+        diferentes sem filtros extras caiam na mesma consulta. Sem período
+        informado, o campo de data não filtra nada e também é ignorado.
+        """
+        date_field = None
+        if self.period and (filters.start is not None or filters.end is not None):
+            date_field = self.date_field or sources[self.source].date_field
+        applied = tuple(sorted(
+            (name, filters.params[name]) for name in self.params if name in filters.params
+        ))
+        return (self.source, date_field, applied)
+
+    def needs_own_query(self, sources):
+        source = sources[self.source]
+        return self.limit is not None or not all(
+            source.measures[name].additive for name in self.measures
+        )
+
+
+@dataclass(frozen=True)
+class Listing:
+    """
+    Listagem linha a linha (CSVs), com os mesmos filtros das seções.
+
+    Com tuples=True as linhas são tuplas na ordem de fields, mais leves que
+    dicts para listagens grandes processadas em Python (ex.: cestas).
+    """
+    source: str
+    fields: Tuple[str, ...]
+    where: Tuple[Tuple[str, Tuple[Any, ...]], ...] = ()
+    order_by: Tuple[str, ...] = ()
+    date_field: Optional[str] = None
+    params: Tuple[str, ...] = ()
+    period: bool = True
+    tuples: bool = False
+
+
+def _delivery_share(filters):
+    """
+    Parte da taxa de entrega atribuída a cada linha de item.
+
+    A taxa do pedido é dividida igualmente entre os produtos distintos do
+    pedido; se o mesmo produto aparece em mais de uma linha, a parte dele é
+    dividida entre essas linhas, de modo que a soma por produto fique correta.
+    """
+    OrderItem = apps.get_model('orders.OrderItem')
+    products_in_order = OrderItem.objects.filter(
+        order=OuterRef('order')
+    ).order_by().values('order').annotate(
+        n=Count('product', distinct=True)
+    ).values('n')
+    rows_of_product = OrderItem.objects.filter(
+        order=OuterRef('order'), product=OuterRef('product')
+    ).order_by().values('order').annotate(n=Count('id')).values('n')
+    return Case(
+        When(
+            order__delivery_fee__gt=0,
+            then=Cast('order__delivery_fee', FloatField()) / (
+                Cast(Subquery(products_in_order), FloatField())
+                * Cast(Subquery(rows_of_product), FloatField())
+            ),
+        ),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def _paid_recently(filters):
+    return Case(
+        When(payment__paid_at__gte=filters.recent_since, then=Value(True)),
+        default=Value(False),
+    )
+
+
+def _created_recently(filters):
+    return Case(
+        When(created_at__gte=filters.recent_since, then=Value(True)),
+        default=Value(False),
+    )
+
+
+SOURCES = {
+    'payments': Source(
+        model='payments.Payment',
+        date_field='paid_at',
+        dimensions={
+            'method': 'method',
+            'status': 'status',
+            'day': lambda f: TruncDate('paid_at'),
+            'month': lambda f: TruncMonth('paid_at'),
+            'year': lambda f: TruncYear('paid_at'),
+        },
+        measures={
+            'amount': Measure('amount'),
+            'count': Measure('id', kind='count', zero=0),
+            'products_total': Measure('order__total'),
+            'delivery_fee': Measure('order__delivery_fee'),
+        },
+        params={'payment_method': ('method', str)},
+    ),
+    'orders': Source(
+        model='orders.Order',
+        date_field='created_at',
+        dimensions={
+            'status': 'status',
+            'is_open': 'is_open',
+            'payment_status': 'payment__status',
+            'paid_recently': _paid_recently,
+        },
+        measures={
+            'count': Measure('id', kind='count', zero=0),
+            'total': Measure('total'),
+            'delivery_fee': Measure('delivery_fee'),
+            'payment_amount': Measure('payment__amount'),
+        },
+        params={'status': ('status', str), 'is_open': ('is_open', _parse_bool)},
+    ),
+    'items': Source(
+        model='orders.OrderItem',
+        date_field='order__payment__paid_at',
+        dimensions={
+            'product_id': 'product_id',
+            'product_name': 'product__name',
+            'product_category': 'product__category',
+            'product_price': 'product__price',
+            'payment_status': 'order__payment__status',
+        },
+        measures={
+            'quantity': Measure('quantity', zero=0),
+            'revenue': Measure(
+                lambda f: ExpressionWrapper(F('quantity') * F('price'), output_field=DecimalField()),
+            ),
+            'delivery_share': Measure(_delivery_share, zero=0.0),
+            'order_count': Measure('order', kind='count_distinct', zero=0),
+        },
+        params={'category': ('product__category', str)},
+    ),
+    'expenses': Source(
+        model='expenses.Expense',
+        date_field='created_at',
+        dimensions={
+            'category': 'category',
+            'recent': _created_recently,
+        },
+        measures={
+            'amount': Measure('amount'),
+            'count': Measure('id', kind='count', zero=0),
+        },
+        params={'category': ('category', str)},
+    ),
+    # Consolidado por hora local (reports.HourlySales); o custo da consulta
+    # depende do número de células (dias x horas), não do número de pedidos
+    'hourly': Source(
+        model='reports.HourlySales',
+        date_field='date',
+        dimensions={
+            'date': 'date',
+            'hour': 'hour',
+            'weekday': 'weekday',
+            'method': 'method',
+        },
+        measures={
+            'orders': Measure('orders', zero=0),
+            'revenue': Measure('revenue'),
+        },
+        params={'payment_method': ('method', str)},
+    ),
+}
+
+
+class Grouping(Func):
+    """
+    GROUPING(dim1, dim2, ...) do PostgreSQL: bit 1 para cada dimensão que não
+    faz parte do conjunto de agrupamento da linha (o primeiro argumento é o
+    bit mais significativo).
+    """
+    function = 'GROUPING'
+    output_field = IntegerField()
+    # Avaliado por grupo, como uma agregação: fora do GROUP BY
+    contains_aggregate = True
+
+    def get_group_by_cols(self):
+        return []
+
+
+class GroupingDimension(Func):
+    """
+    Dimensão de uma consulta com GROUPING SETS: a expressão no SELECT, sem
+    entrar no GROUP BY comum (o agrupamento vem só de GroupingSets).
+    """
+    template = '%(expressions)s'
+
+    def get_group_by_cols(self):
+        return []
+
+    def get_db_converters(self, connection):
+        # As conversões da expressão (ex.: fuso do TruncDate), não as do Func
+        return self.get_source_expressions()[0].get_db_converters(connection)
+
+
+class GroupingSets(expressions.Expression):
+    """
+    GROUPING SETS ((dim1, dim2), (dim3), ()) do PostgreSQL, como único
+    elemento do GROUP BY (ver group_by_grouping_sets).
+
+    sets: conjuntos de expressões já resolvidas na consulta.
+    """
+    output_field = IntegerField()
+
+    def __init__(self, sets):
+        super().__init__()
+        self.sets = tuple(tuple(members) for members in sets)
+
+    def get_group_by_cols(self):
+        return [self]
+
+    def as_sql(self, compiler, connection):
+        elements, params = [], []
+        for members in self.sets:
+            compiled = [compiler.compile(member) for member in members]
+            elements.append('(' + ', '.join(sql for sql, _ in compiled) + ')')
+            for _, expression_params in compiled:
+                params.extend(expression_params)
+        return f'GROUPING SETS ({", ".join(elements)})', params
+
+
+def group_by_grouping_sets(queryset, sets):
+    """
+    O queryset values().annotate() agrupado por GROUPING SETS.
+
+    As dimensões precisam estar anotadas com GroupingDimension; sets são
+    conjuntos de aliases dessas anotações.
+
+    Raises:
+        NotSupportedError: se o GROUP BY compilado pelo Django não for só o
+            GROUPING SETS (o agrupamento daria outro resultado)
+    """
+    queryset = queryset.all()
+    query = queryset.query
+    grouping = GroupingSets([[query.annotations[alias] for alias in aliases] for aliases in sets])
+    query.group_by = (grouping,)
+    compiler = query.get_compiler(queryset.db)
+    sql, _ = compiler.as_sql()
+    clause, _ = compiler.compile(grouping)
+    if not sql.endswith(f' GROUP BY {clause}'):
+        raise NotSupportedError(f'GROUP BY inesperado na consulta com GROUPING SETS: {sql}')
+    return queryset
+
+
+def _sort(rows, order_by):
+    for key in reversed(order_by):
+        name = key.lstrip('-')
+        rows.sort(
+            key=lambda row: (row[name] is None, row[name] if row[name] is not None else 0),
+            reverse=key.startswith('-'),
+        )
+    return rows
+
+
+class ReportEngine:
+    """
+    Executa um conjunto de seções com o menor número de consultas possível.
+
+    Example:
+        engine = ReportEngine(ReportFilters.from_query_params(request.query_params))
+        data = engine.run({
+            'summary': Section('expenses', measures=('amount', 'count')),
+            'by_category': Section('expenses', ('category',), ('amount', 'count')),
+        })
+        # Uma única consulta agrupada por categoria atende às duas seções.
+    """
+
+    def __init__(self, filters, sources=None):
+        self.filters = filters
+        self.sources = sources or SOURCES
+        self.query_count = 0
+
+    def run(self, sections):
+        """
+        Executa as seções e retorna um dict nome -> resultado.
+
+        Seções sem dimensões retornam um dict com as medidas; as demais
+        retornam uma lista de dicts. Listagens retornam um iterador.
+        """
+        results = {}
+        merged = {}
+        own = {}
+
+        for name, section in sections.items():
+            if isinstance(section, Listing):
+                results[name] = self._listing(section)
+            elif section.needs_own_query(self.sources):
+                # Seções idênticas (ex.: o mesmo top de produtos pedido por
+                # dois relatórios num lote) compartilham a mesma consulta
+                key = (section, section.scope(self.sources, self.filters))
+                if key in own:
+                    results[name] = copy.deepcopy(own[key])
+                else:
+                    results[name] = own[key] = self._own_query(section)
+            else:
+                merged.setdefault(section.scope(self.sources, self.filters), []).append((name, section))
+
+        for group in merged.values():
+            if self._use_grouping_sets(group):
+                results.update(self._grouping_sets_query(group))
+                continue
+            rows = self._grain_query([section for _, section in group])
+            for name, section in group:
+                results[name] = self._collapse(rows, section)
+
+        return results
+
+    def _aggregates(self, source, measures):
+        # Aliases com prefixo evitam conflito com campos do model
+        # (ex.: a medida 'total' de orders e o campo Order.total)
+        return {
+            f'_m_{name}': source.measures[name].aggregate(self.filters)
+            for name in measures
+        }
+
+    def _dimensions(self, source, dimensions):
+        return {
+            f'_dim_{name}': _resolve(source.dimensions[name], self.filters)
+            for name in dimensions
+        }
+
+    @staticmethod
+    def _unprefix(row):
+        return {key.split('_', 2)[2]: value for key, value in row.items()}
+
+    def _grouped(self, source, queryset, dimensions, measures, order_by=(), limit=None):
+        annotations = self._dimensions(source, dimensions)
+        queryset = queryset.annotate(**annotations).values(*annotations)
+        queryset = queryset.annotate(**self._aggregates(source, measures))
+        if order_by:
+            queryset = queryset.order_by(*(
+                f'-_m_{key[1:]}' if key.startswith('-') else f'_m_{key}'
+                for key in order_by
+            ), *annotations)
+        if limit is not None:
+            queryset = queryset[:limit]
+        return [self._unprefix(row) for row in queryset]
+
+    def _aggregate(self, source, queryset, measures):
+        row = self._unprefix(queryset.aggregate(**self._aggregates(source, measures)))
+        return {
+            m: row[m] if row[m] is not None else source.measures[m].zero
+            for m in measures
+        }
+
+    def _grain_query(self, sections):
+        """Uma consulta no grão que atende a todas as seções do grupo."""
+        first = sections[0]
+        source = self.sources[first.source]
+        dimensions = []
+        measures = []
+        for section in sections:
+            for name in section.dimensions + tuple(dim for dim, _ in section.where):
+                if name not in dimensions:
+                    dimensions.append(name)
+            for name in section.measures:
+                if name not in measures:
+                    measures.append(name)
+
+        queryset = source.queryset(self.filters, first)
+        self.query_count += 1
+        if not dimensions:
+            return [self._aggregate(source, queryset, measures)]
+        return self._grouped(source, queryset, dimensions, measures)
+
+    def _collapse(self, rows, section, where=None, suffix=''):
+        """
+        Consolida as linhas do grão nas dimensões da seção.
+
+        where: filtros a aplicar nas linhas (padrão: os da seção)
+        suffix: sufixo das colunas das medidas (agregações com FILTER)
+        """
+        source = self.sources[section.source]
+        if where is None:
+            where = section.where
+        groups = {}
+        for row in rows:
+            if not all(row[dim] in values for dim, values in where):
+                continue
+            key = tuple(row[dim] for dim in section.dimensions)
+            accumulator = groups.get(key)
+            if accumulator is None:
+                accumulator = dict(zip(section.dimensions, key))
+                accumulator.update({m: source.measures[m].zero for m in section.measures})
+                groups[key] = accumulator
+            for measure in section.measures:
+                value = row[f'{measure}{suffix}']
+                if value is not None:
+                    accumulator[measure] += value
+
+        if not section.dimensions:
+            return groups.get((), {m: source.measures[m].zero for m in section.measures})
+        return _sort(list(groups.values()), section.order_by or section.dimensions)
+
+    def _use_grouping_sets(self, group):
+        source = self.sources[group[0][1].source]
+        connection = connections[apps.get_model(source.model).objects.db]
+        if not getattr(settings, 'REPORT_GROUPING_SETS', True) or connection.vendor != 'postgresql':
+            return False
+        # Com parâmetros no servidor ($1, $2...), as dimensões repetidas no
+        # GROUPING deixam de ser iguais às do SELECT
+        if connection.settings_dict.get('OPTIONS', {}).get('server_side_binding'):
+            return False
+        plans = [self._grouping_plan(section) for _, section in group]
+        return len({dimensions for dimensions, _, _ in plans}) > 1 or any(
+            filtered for _, filtered, _ in plans
+        )
+
+    def _grouping_plan(self, section):
+        """
+        (conjunto de agrupamento, filtros em FILTER, filtros em Python) da seção.
+
+        Filtros sobre dimensões calculadas (Case/When) continuam no
+        agrupamento e são aplicados na consolidação.
+        """
+        source = self.sources[section.source]
+        dimensions = list(section.dimensions)
+        filtered, residual = [], []
+        for dim, values in section.where:
+            if callable(source.dimensions[dim]):
+                residual.append((dim, values))
+                if dim not in dimensions:
+                    dimensions.append(dim)
+            else:
+                filtered.append((dim, tuple(values)))
+        return tuple(dimensions), tuple(filtered), tuple(residual)
+
+    def _grouping_sets_query(self, group):
+        """Uma consulta com GROUPING SETS para o grupo (só PostgreSQL): {nome: resultado}."""
+        source = self.sources[group[0][1].source]
+        plans = {name: self._grouping_plan(section) for name, section in group}
+
+        # Filtros presentes em todas as seções vão para o WHERE
+        common = set.intersection(*(set(filtered) for _, filtered, _ in plans.values()))
+        queryset = source.filter_where(
+            source.queryset(self.filters, group[0][1]), self.filters, sorted(common, key=repr),
+        )
+
+        dimensions, aggregates, suffixes = [], {}, {}
+        for name, section in group:
+            section_dimensions, filtered, _ = plans[name]
+            for dim in section_dimensions:
+                if dim not in dimensions:
+                    dimensions.append(dim)
+            filtered = tuple(item for item in filtered if item not in common)
+            suffix = suffixes.setdefault(filtered, f'__w{len(suffixes)}' if filtered else '')
+            where = None
+            for dim, values in filtered:
+                lookup = _in_q(source.dimensions[dim], values)
+                where = lookup if where is None else where & lookup
+            for measure in section.measures:
+                aggregates.setdefault(
+                    f'_m_{measure}{suffix}', source.measures[measure].aggregate(self.filters, where),
+                )
+
+        self.query_count += 1
+        if not dimensions:
+            # Só totais: um único SELECT sem GROUP BY atende a todas as seções
+            rows = {0: [self._unprefix(queryset.aggregate(**aggregates))]}
+        else:
+            annotations = {
+                alias: GroupingDimension(expression)
+                for alias, expression in self._dimensions(source, dimensions).items()
+            }
+            queryset = queryset.order_by().annotate(**annotations).values(*annotations).annotate(
+                **aggregates, _grouping_id=Grouping(*self._dimensions(source, dimensions).values()),
+            )
+            sets = dict.fromkeys(
+                tuple(f'_dim_{dim}' for dim in section_dimensions)
+                for section_dimensions, _, _ in plans.values()
+            )
+            rows = self._grouping_sets_rows(group_by_grouping_sets(queryset, sets))
+
+        results = {}
+        for name, section in group:
+            section_dimensions, filtered, residual = plans[name]
+            filtered = tuple(item for item in filtered if item not in common)
+            mask = sum(
+                1 << (len(dimensions) - 1 - index)
+                for index, dim in enumerate(dimensions) if dim not in section_dimensions
+            )
+            results[name] = self._collapse(
+                rows.get(mask, []), section, where=residual, suffix=suffixes[filtered],
+            )
+        return results
+
+    def _grouping_sets_rows(self, queryset):
+        """Executa o queryset com GROUPING SETS: {máscara do GROUPING: linhas}."""
+        rows = {}
+        for row in queryset:
+            rows.setdefault(row.pop('_grouping_id'), []).append(self._unprefix(row))
+        return rows
+
+    def _own_query(self, section):
+        """Consulta isolada, com filtros, ordenação e limite aplicados no SQL."""
+        source = self.sources[section.source]
+        queryset = source.queryset(self.filters, section)
+        queryset = source.filter_where(queryset, self.filters, section.where)
+
+        self.query_count += 1
+        if not section.dimensions:
+            return self._aggregate(source, queryset, section.measures)
+
+        rows = self._grouped(
+            source, queryset, section.dimensions, section.measures,
+            order_by=section.order_by, limit=section.limit,
+        )
+        for row in rows:
+            for measure in section.measures:
+                if row[measure] is None:
+                    row[measure] = source.measures[measure].zero
+        return rows
+
+    def _listing(self, listing):
+        source = self.sources[listing.source]
+        queryset = source.queryset(self.filters, listing)
+        queryset = source.filter_where(queryset, self.filters, listing.where)
+        self.query_count += 1
+        queryset = queryset.order_by(*listing.order_by)
+        if listing.tuples:
+            queryset = queryset.values_list(*listing.fields)
+        else:
+            queryset = queryset.values(*listing.fields)
+        return queryset.iterator(chunk_size=2000)
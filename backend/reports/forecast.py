@@ -0,0 +1,173 @@
+"""
+Previsão de demanda por produto e dia da semana.
+
+Usa a série diária já consolidada em DailyProductSales (uma consulta para
+todo o histórico) e calcula tudo em memória, sobre a série inteira de cada
+produto, sem consultas por dia:
+
+1. Sazonalidade semanal: média do dia da semana / média geral do produto
+   (índice 0 para dias em que o produto não vende, ex.: loja fechada).
+2. Série dessazonalizada suavizada por média móvel exponencial (EWMA),
+   que dá mais peso às semanas recentes.
+3. Previsão para um dia = nível EWMA x índice do dia da semana.
+
+O histórico termina ontem: o dia corrente ainda está incompleto, e assim a
+previsão não muda ao longo do dia (o endpoint é cacheado por dia).
+"""
+import math
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import DailyProductSales, Weekday
+
+HISTORY_DAYS = 56
+MAX_HISTORY_DAYS = 365
+HORIZON_DAYS = 7
+MAX_HORIZON_DAYS = 28
+EWMA_SPAN = 14
+
+
+def load_series(start, end, category=None):
+    """
+    Carrega a série diária de quantidades por produto em [start, end).
+
+    Returns:
+        Tupla (produtos por id, séries por id). Cada série é uma lista densa
+        com uma posição por dia do período (dias sem venda = 0).
+    """
+    days = (end - start).days
+    queryset = DailyProductSales.objects.filter(date__gte=start, date__lt=end)
+    if category:
+        queryset = queryset.filter(product__category=category)
+
+    products = {}
+    series = {}
+    for product_id, name, product_category, date, quantity in queryset.values_list(
+        'product_id', 'product__name', 'product__category', 'date', 'quantity',
+    ).iterator(chunk_size=2000):
+        if product_id not in series:
+            products[product_id] = {'id': product_id, 'name': name, 'category': product_category}
+            series[product_id] = [0] * days
+        series[product_id][(date - start).days] += quantity
+    return products, series
+
+
+def _mean(values):
+    return sum(values) / len(values) if values else 0.0
+
+
+def seasonal_indices(values, start):
+    """Índice multiplicativo de cada dia da semana (0=segunda) para a série."""
+    overall = _mean(values)
+    by_weekday = [[] for _ in range(7)]
+    first_weekday = start.weekday()
+    for offset, value in enumerate(values):
+        by_weekday[(first_weekday + offset) % 7].append(value)
+    if overall == 0:
+        return [1.0] * 7
+    # Dias da semana sem observação no histórico ficam neutros
+    return [_mean(observed) / overall if observed else 1.0 for observed in by_weekday]
+
+
+def ewma(values, span=EWMA_SPAN):
+    """Média móvel exponencial; retorna o último nível."""
+    if not values:
+        return 0.0
+    alpha = 2 / (span + 1)
+    level = values[0]
+    for value in values[1:]:
+        level = alpha * value + (1 - alpha) * level
+    return level
+
+
+def forecast_product(values, start, horizon):
+    """
+    Calcula a previsão de um produto.
+
+    Args:
+        values: Série diária densa terminando ontem
+        start: Data da primeira posição da série
+        horizon: Lista de datas a prever
+
+    Returns:
+        Dict com médias recentes, índices sazonais e previsão por data
+    """
+    season = seasonal_indices(values, start)
+    first_weekday = start.weekday()
+    deseasonalized = []
+    for offset, value in enumerate(values):
+        index = season[(first_weekday + offset) % 7]
+        # Dias com índice 0 (produto não vende nesse dia) não informam o nível
+        if index > 0:
+            deseasonalized.append(value / index)
+    level = ewma(deseasonalized)
+
+    forecast = []
+    for date in horizon:
+        expected = level * season[date.weekday()]
+        forecast.append({
+            'date': date.isoformat(),
+            'weekday': date.weekday(),
+            'expected_quantity': round(expected, 2),
+            'suggested_prep': math.ceil(round(expected, 2)),
+        })
+    return {
+        'recent': {
+            'rolling_7': round(_mean(values[-7:]), 2),
+            'rolling_28': round(_mean(values[-28:]), 2),
+            'ewma': round(level, 2),
+        },
+        'seasonality': [round(index, 3) for index in season],
+        'forecast': forecast,
+    }
+
+
+def build_forecast(filters):
+    """
+    Monta a resposta do endpoint de previsão.
+
+    Query Parameters usados (via ReportFilters):
+    - history: Dias de histórico (padrão: 56, máximo: 365)
+    - days: Dias a prever a partir de hoje (padrão: 7, máximo: 28)
+
+    Valores acima do máximo levantam ReportFilterError.
+    - category: Filtrar por categoria de produto
+    """
+    history = filters.get_int('history', HISTORY_DAYS, maximum=MAX_HISTORY_DAYS)
+    days = filters.get_int('days', HORIZON_DAYS, maximum=MAX_HORIZON_DAYS)
+    today = timezone.localdate()
+    start = today - timedelta(days=history)
+    horizon = [today + timedelta(days=offset) for offset in range(days)]
+
+    products, series = load_series(start, today, filters.params.get('category'))
+
+    results = []
+    for product_id, values in series.items():
+        results.append({**products[product_id], **forecast_product(values, start, horizon)})
+    results.sort(key=lambda item: (
+        -sum(day['expected_quantity'] for day in item['forecast']), item['name'],
+    ))
+
+    return {
+        'generated_for': today.isoformat(),
+        'history': {
+            'start_date': start.isoformat(),
+            'end_date': (today - timedelta(days=1)).isoformat(),
+            'days': history,
+        },
+        'parameters': {'ewma_span': EWMA_SPAN},
+        'days': [
+            {
+                'date': date.isoformat(),
+                'weekday': date.weekday(),
+                'weekday_display': Weekday(date.weekday()).label,
+                'expected_quantity': round(sum(
+                    item['forecast'][offset]['expected_quantity'] for item in results
+                ), 2),
+                'suggested_prep': sum(item['forecast'][offset]['suggested_prep'] for item in results),
+            }
+            for offset, date in enumerate(horizon)
+        ],
+        'products': results,
+    }
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from reports.rollups import rebuild_daily_product_sales, rebuild_hourly_sales
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os consolidados de vendas (por hora e diário por produto) a partir dos pagamentos'
+
+    def handle(self, *args, **options):
+        cells = rebuild_hourly_sales()
+        self.stdout.write(self.style.SUCCESS(f'Vendas por hora recalculadas ({cells} células)'))
+        cells = rebuild_daily_product_sales()
+        self.stdout.write(self.style.SUCCESS(f'Vendas diárias por produto recalculadas ({cells} células)'))
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:51
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def preencher_consolidado(apps, schema_editor):
+    """Preenche o consolidado com os pagamentos já existentes."""
+    from reports.rollups import rebuild_hourly_sales
+    rebuild_hourly_sales(apps)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HourlySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Data')),
+                ('hour', models.PositiveSmallIntegerField(verbose_name='Hora')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Segunda-feira'), (1, 'Terça-feira'), (2, 'Quarta-feira'), (3, 'Quinta-feira'), (4, 'Sexta-feira'), (5, 'Sábado'), (6, 'Domingo')], verbose_name='Dia da Semana')),
+                ('method', models.CharField(choices=[('cash', 'Dinheiro'), ('credit_card', 'Cartão de Crédito'), ('debit_card', 'Cartão de Débito'), ('pix', 'PIX'), ('bank_transfer', 'Transferência Bancária')], max_length=20, verbose_name='Forma de Pagamento')),
+                ('orders', models.IntegerField(default=0, verbose_name='Pedidos')),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Receita')),
+            ],
+            options={
+                'verbose_name': 'Venda por Hora',
+                'verbose_name_plural': 'Vendas por Hora',
+                'constraints': [models.UniqueConstraint(fields=('date', 'hour', 'method'), name='reports_hourlysales_unique_cell')],
+            },
+        ),
+        migrations.RunPython(preencher_consolidado, migrations.RunPython.noop),
+    ]
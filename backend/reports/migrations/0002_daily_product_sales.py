@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:59
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def preencher_consolidado(apps, schema_editor):
+    """Preenche o consolidado com os itens de pedidos já pagos."""
+    from reports.rollups import rebuild_daily_product_sales
+    rebuild_daily_product_sales(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_product_options_product_category'),
+        ('orders', '0003_order_delivery_fee'),
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Data')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Segunda-feira'), (1, 'Terça-feira'), (2, 'Quarta-feira'), (3, 'Quinta-feira'), (4, 'Sexta-feira'), (5, 'Sábado'), (6, 'Domingo')], verbose_name='Dia da Semana')),
+                ('quantity', models.IntegerField(default=0, verbose_name='Quantidade')),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Receita')),
+                ('orders', models.IntegerField(default=0, verbose_name='Pedidos')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='core.product', verbose_name='Produto')),
+            ],
+            options={
+                'verbose_name': 'Venda Diária por Produto',
+                'verbose_name_plural': 'Vendas Diárias por Produto',
+                'constraints': [models.UniqueConstraint(fields=('date', 'product'), name='reports_dailyproductsales_unique_cell')],
+            },
+        ),
+        migrations.RunPython(preencher_consolidado, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,116 @@
+from django.db import models
+from decimal import Decimal
+from payments.models import PaymentMethod
+
+
+class Weekday(models.IntegerChoices):
+    """Dias da semana (mesma numeração de date.weekday())"""
+    MONDAY = 0, 'Segunda-feira'
+    TUESDAY = 1, 'Terça-feira'
+    WEDNESDAY = 2, 'Quarta-feira'
+    THURSDAY = 3, 'Quinta-feira'
+    FRIDAY = 4, 'Sexta-feira'
+    SATURDAY = 5, 'Sábado'
+    SUNDAY = 6, 'Domingo'
+
+
+class HourlySales(models.Model):
+    """
+    Consolidado de vendas por hora (horário local) e forma de pagamento.
+
+    Mantido incrementalmente pelos signals de Payment (reports/signals.py):
+    cada pagamento concluído soma 1 pedido e o seu valor na célula da hora
+    em que foi pago. Relatórios por hora/dia da semana leem estas células em
+    vez de percorrer a tabela de pagamentos.
+    """
+
+    date = models.DateField(
+        verbose_name='Data'
+    )
+    hour = models.PositiveSmallIntegerField(
+        verbose_name='Hora'
+    )
+    weekday = models.PositiveSmallIntegerField(
+        choices=Weekday.choices,
+        verbose_name='Dia da Semana'
+    )
+    method = models.CharField(
+        max_length=20,
+        choices=PaymentMethod.choices,
+        verbose_name='Forma de Pagamento'
+    )
+    orders = models.IntegerField(
+        default=0,
+        verbose_name='Pedidos'
+    )
+    revenue = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Receita'
+    )
+
+    class Meta:
+        verbose_name = 'Venda por Hora'
+        verbose_name_plural = 'Vendas por Hora'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'hour', 'method'],
+                name='reports_hourlysales_unique_cell',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.date} {self.hour:02d}h - {self.get_method_display()}'
+
+
+class DailyProductSales(models.Model):
+    """
+    Consolidado diário de vendas por produto (data local do pagamento).
+
+    Mantido pelos mesmos signals de Payment que o HourlySales: quando um
+    pagamento é concluído, os itens do pedido somam quantidade, receita e
+    1 pedido na célula (data, produto). É a série usada pela previsão de
+    demanda (reports/forecast.py).
+    """
+
+    date = models.DateField(
+        verbose_name='Data'
+    )
+    product = models.ForeignKey(
+        'core.Product',
+        on_delete=models.CASCADE,
+        related_name='daily_sales',
+        verbose_name='Produto'
+    )
+    weekday = models.PositiveSmallIntegerField(
+        choices=Weekday.choices,
+        verbose_name='Dia da Semana'
+    )
+    quantity = models.IntegerField(
+        default=0,
+        verbose_name='Quantidade'
+    )
+    revenue = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Receita'
+    )
+    orders = models.IntegerField(
+        default=0,
+        verbose_name='Pedidos'
+    )
+
+    class Meta:
+        verbose_name = 'Venda Diária por Produto'
+        verbose_name_plural = 'Vendas Diárias por Produto'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'product'],
+                name='reports_dailyproductsales_unique_cell',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.date} - {self.product_id} x{self.quantity}'
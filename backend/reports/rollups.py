@@ -0,0 +1,181 @@
+"""
+Manutenção dos consolidados de vendas (HourlySales e DailyProductSales).
+
+Cada pagamento concluído contribui com:
+- (1 pedido, valor) para a célula (data local, hora local, forma de
+  pagamento) de HourlySales;
+- (quantidade, receita, 1 pedido) de cada produto do pedido para a célula
+  (data local, produto) de DailyProductSales.
+
+Os signals de Payment aplicam a diferença entre a contribuição antiga e a
+nova a cada gravação, então os consolidados acompanham conclusões,
+estornos, alterações de valor e exclusões sem recalcular nada além das
+células afetadas. Itens de pedidos pagos não podem ser criados, alterados
+nem removidos (ver OrderItem.save e OrderItem.delete), por isso a contribuição por produto é lida no momento em que
+o pagamento muda.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from payments.models import PaymentStatus
+
+
+def payment_cell(status, paid_at, method):
+    """
+    Retorna a célula (data, hora, forma) de um pagamento, ou None se ele não
+    conta como venda (não concluído ou sem data de pagamento).
+    """
+    if status != PaymentStatus.COMPLETED or paid_at is None:
+        return None
+    local = timezone.localtime(paid_at)
+    return local.date(), local.hour, method
+
+
+def payment_contribution(payment):
+    """
+    Contribuição de um pagamento (instância ou dict de values()).
+
+    Returns:
+        Dict {'hourly': (célula, valor), 'products': ((data, produto), (qtd, receita)), ...}
+        ou None se o pagamento não conta como venda
+    """
+    if isinstance(payment, dict):
+        cell = payment_cell(payment['status'], payment['paid_at'], payment['method'])
+        amount = payment['amount']
+        order_id = payment['order_id']
+    else:
+        cell = payment_cell(payment.status, payment.paid_at, payment.method)
+        amount = payment.amount
+        order_id = payment.order_id
+    if cell is None:
+        return None
+
+    OrderItem = global_apps.get_model('orders', 'OrderItem')
+    products = defaultdict(lambda: [0, Decimal('0.00')])
+    for product_id, quantity, price in OrderItem.objects.filter(order_id=order_id).values_list(
+        'product_id', 'quantity', 'price',
+    ):
+        products[product_id][0] += quantity
+        products[product_id][1] += quantity * price
+
+    date = cell[0]
+    return {
+        'hourly': (cell, Decimal(amount)),
+        'products': tuple(sorted(
+            ((date, product_id), (quantity, revenue))
+            for product_id, (quantity, revenue) in products.items()
+        )),
+    }
+
+
+def _increment(model, lookup, weekday, sign, **deltas):
+    cell, _ = model.objects.get_or_create(**lookup, defaults={'weekday': weekday})
+    model.objects.filter(pk=cell.pk).update(**{
+        field: F(field) + sign * delta for field, delta in deltas.items()
+    })
+
+
+def apply_contribution(contribution, sign):
+    """Soma (sign=1) ou subtrai (sign=-1) a contribuição das suas células."""
+    if contribution is None:
+        return
+    HourlySales = global_apps.get_model('reports', 'HourlySales')
+    DailyProductSales = global_apps.get_model('reports', 'DailyProductSales')
+
+    (date, hour, method), amount = contribution['hourly']
+    _increment(
+        HourlySales, {'date': date, 'hour': hour, 'method': method}, date.weekday(), sign,
+        orders=1, revenue=amount,
+    )
+    for (date, product_id), (quantity, revenue) in contribution['products']:
+        _increment(
+            DailyProductSales, {'date': date, 'product_id': product_id}, date.weekday(), sign,
+            quantity=quantity, revenue=revenue, orders=1,
+        )
+
+
+def replace_contribution(previous, current):
+    """Troca a contribuição antiga de um pagamento pela nova, se mudou."""
+    if previous == current:
+        return
+    with transaction.atomic():
+        apply_contribution(previous, -1)
+        apply_contribution(current, 1)
+
+
+def rebuild_hourly_sales(apps=global_apps):
+    """
+    Recalcula o consolidado por hora a partir da tabela de pagamentos.
+
+    Recebe o registro de apps para funcionar também com os models
+    históricos das migrações.
+
+    Returns:
+        Número de células gravadas
+    """
+    Payment = apps.get_model('payments', 'Payment')
+    HourlySales = apps.get_model('reports', 'HourlySales')
+
+    cells = defaultdict(lambda: [0, Decimal('0.00')])
+    payments = Payment.objects.filter(
+        status=PaymentStatus.COMPLETED, paid_at__isnull=False,
+    ).values_list('paid_at', 'method', 'amount')
+    for paid_at, method, amount in payments.iterator(chunk_size=2000):
+        cell = cells[payment_cell(PaymentStatus.COMPLETED, paid_at, method)]
+        cell[0] += 1
+        cell[1] += amount
+
+    with transaction.atomic():
+        HourlySales.objects.all().delete()
+        HourlySales.objects.bulk_create(
+            [
+                HourlySales(
+                    date=date, hour=hour, weekday=date.weekday(), method=method,
+                    orders=orders, revenue=revenue,
+                )
+                for (date, hour, method), (orders, revenue) in cells.items()
+            ],
+            batch_size=500,
+        )
+    return len(cells)
+
+
+def rebuild_daily_product_sales(apps=global_apps):
+    """
+    Recalcula o consolidado diário por produto a partir dos itens pagos.
+
+    Returns:
+        Número de células gravadas
+    """
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    DailyProductSales = apps.get_model('reports', 'DailyProductSales')
+
+    cells = defaultdict(lambda: [0, Decimal('0.00'), set()])
+    items = OrderItem.objects.filter(
+        order__payment__status=PaymentStatus.COMPLETED,
+        order__payment__paid_at__isnull=False,
+    ).values_list('order__payment__paid_at', 'order_id', 'product_id', 'quantity', 'price')
+    for paid_at, order_id, product_id, quantity, price in items.iterator(chunk_size=2000):
+        cell = cells[(timezone.localtime(paid_at).date(), product_id)]
+        cell[0] += quantity
+        cell[1] += quantity * price
+        cell[2].add(order_id)
+
+    with transaction.atomic():
+        DailyProductSales.objects.all().delete()
+        DailyProductSales.objects.bulk_create(
+            [
+                DailyProductSales(
+                    date=date, product_id=product_id, weekday=date.weekday(),
+                    quantity=quantity, revenue=revenue, orders=len(orders),
+                )
+                for (date, product_id), (quantity, revenue, orders) in cells.items()
+            ],
+            batch_size=500,
+        )
+    return len(cells)
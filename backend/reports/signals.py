@@ -0,0 +1,59 @@
+"""
+Signals para o app reports.
+
+Mantêm os consolidados de vendas (HourlySales e DailyProductSales)
+atualizados a cada gravação ou exclusão de Payment. Ver reports/rollups.py.
+"""
+
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from payments.models import Payment
+from .rollups import payment_contribution, replace_contribution
+
+# Campos de Payment que afetam os consolidados
+ROLLUP_FIELDS = {'status', 'paid_at', 'method', 'amount'}
+
+
+@receiver(pre_save, sender=Payment)
+def guardar_contribuicao_anterior(sender, instance, update_fields=None, **kwargs):
+    """
+    Guarda a contribuição do pagamento como está no banco, antes da gravação.
+
+    Gravações com update_fields que não tocam nos campos relevantes
+    (ex.: só observações) não alteram os consolidados e não consultam o banco.
+    """
+    if update_fields is not None and not ROLLUP_FIELDS.intersection(update_fields):
+        instance._rollup_skip = True
+        return
+    instance._rollup_skip = False
+    previous = None
+    if instance.pk:
+        previous = Payment.objects.filter(pk=instance.pk).values(
+            'order_id', *ROLLUP_FIELDS,
+        ).first()
+    instance._rollup_previous = payment_contribution(previous) if previous else None
+
+
+@receiver(post_save, sender=Payment)
+def atualizar_consolidados_apos_save(sender, instance, **kwargs):
+    """Aplica aos consolidados a diferença entre a contribuição antiga e a nova."""
+    if getattr(instance, '_rollup_skip', True):
+        return
+    replace_contribution(instance._rollup_previous, payment_contribution(instance))
+
+
+@receiver(pre_delete, sender=Payment)
+def guardar_contribuicao_antes_delete(sender, instance, **kwargs):
+    """
+    Guarda a contribuição antes da exclusão.
+
+    Na exclusão em cascata de um pedido, os itens podem ser removidos antes
+    do pagamento; o pre_delete roda antes de qualquer remoção.
+    """
+    instance._rollup_previous = payment_contribution(instance)
+
+
+@receiver(post_delete, sender=Payment)
+def atualizar_consolidados_apos_delete(sender, instance, **kwargs):
+    """Remove dos consolidados a contribuição de um pagamento excluído."""
+    replace_contribution(getattr(instance, '_rollup_previous', None), None)
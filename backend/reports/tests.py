@@ -1,4 +1,690 @@
-from django.test import TestCase
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import groupby
+from pathlib import Path
+from unittest import mock
+from zoneinfo import ZoneInfo
 
-# Testes podem ser adicionados aqui no futuro
+from django.core.exceptions import ValidationError
+from django.db import NotSupportedError, connection
+from django.db.models import F, Sum
+from django.http import QueryDict
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
 
+from core.models import Product
+from core.testing import ApiPerformanceMixin, create_users, seed
+from expenses.models import Expense
+from orders.models import Order, OrderItem
+from payments.models import Payment, PaymentMethod, PaymentStatus
+from .baskets import count_baskets, top_pairs
+from .cache import cache_key, compute_watermark, report_cache
+from .engine import GroupingDimension, ReportEngine, ReportFilters, group_by_grouping_sets
+from .forecast import build_forecast, ewma, forecast_product, seasonal_indices
+from .models import DailyProductSales, HourlySales
+from .rollups import rebuild_daily_product_sales, rebuild_hourly_sales
+
+# Limite de consultas por endpoint (inclui a do usuário na autenticação JWT).
+# Os relatórios agregam no banco: o número de consultas não pode depender
+# do volume de pedidos.
+REPORT_QUERIES = {
+    '/api/reports/dashboard/': 4,
+    '/api/reports/sales/': 2,
+    '/api/reports/products/': 2,
+    '/api/reports/orders/': 2,
+    '/api/reports/financial/': 3,
+    '/api/reports/expenses/': 2,
+    '/api/reports/heatmap/': 2,
+    '/api/reports/baskets/': 3,
+    '/api/reports/forecast/': 2,
+    '/api/reports/batch/?reports=dashboard,sales,products,orders,financial,expenses': 8,
+    '/api/reports/sales/export_csv/': 2,
+    '/api/reports/products/export_csv/': 2,
+    '/api/reports/orders/export_csv/': 2,
+    '/api/reports/financial/export_csv/': 2,
+    '/api/reports/expenses/export_csv/': 2,
+    '/api/reports/heatmap/export_csv/': 2,
+    '/api/reports/baskets/export_csv/': 3,
+}
+
+# Tempo máximo (ms) com uma base de 2000 pedidos em 30 dias
+REPORT_LATENCY_MS = {
+    '/api/reports/dashboard/': 150,
+    '/api/reports/sales/': 250,
+    '/api/reports/products/': 600,
+    '/api/reports/orders/': 150,
+    '/api/reports/financial/': 150,
+    '/api/reports/expenses/': 100,
+    '/api/reports/heatmap/': 100,
+    '/api/reports/baskets/': 250,
+    '/api/reports/forecast/': 100,
+    '/api/reports/batch/?reports=dashboard,sales,products,orders,financial,expenses': 800,
+    '/api/reports/sales/export_csv/': 300,
+    '/api/reports/products/export_csv/': 600,
+    '/api/reports/orders/export_csv/': 400,
+    '/api/reports/financial/export_csv/': 400,
+    '/api/reports/expenses/export_csv/': 100,
+    '/api/reports/heatmap/export_csv/': 100,
+    '/api/reports/baskets/export_csv/': 250,
+}
+
+
+def without_period(data):
+    """Dados de um relatório sem o período do dashboard, que traz o "agora" de cada requisição."""
+    return {key: value for key, value in data.items() if key != 'period'}
+
+
+@override_settings(REPORT_CACHE_ENABLED=False)
+class ReportQueryTests(ApiPerformanceMixin, TestCase):
+    """Limites de consultas dos relatórios e exportações CSV."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.caixa = create_users()
+        seed(100)
+
+    def test_max_queries(self):
+        for path, limit in REPORT_QUERIES.items():
+            with self.subTest(path=path):
+                self.assertMaxQueries(limit, self.admin, 'get', path)
+
+    def test_queries_do_not_grow_with_data(self):
+        before = {path: len(self.count_queries(self.admin, 'get', path)[1]) for path in REPORT_QUERIES}
+        seed(400, seed=2)
+        after = {path: len(self.count_queries(self.admin, 'get', path)[1]) for path in REPORT_QUERIES}
+        self.assertEqual(after, before)
+
+    def test_requires_admin(self):
+        self.assertMaxQueries(3, self.caixa, 'get', '/api/reports/sales/', status=403)
+
+
+class ReportCacheQueryTests(ApiPerformanceMixin, TestCase):
+    """Uma resposta em cache só consulta as marcas d'água."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.caixa = create_users()
+        seed(100)
+
+    def setUp(self):
+        report_cache.clear()
+
+    def test_cache_hit(self):
+        response = self.request(self.admin, 'get', '/api/reports/sales/')
+        self.assertEqual(response['X-Report-Cache'], 'miss')
+        response = self.assertMaxQueries(2, self.admin, 'get', '/api/reports/sales/')
+        self.assertEqual(response['X-Report-Cache'], 'hit')
+
+    def test_per_day_cache_hit(self):
+        # A previsão é cacheada por dia, sem marca d'água
+        self.request(self.admin, 'get', '/api/reports/forecast/')
+        self.assertMaxQueries(1, self.admin, 'get', '/api/reports/forecast/')
+
+
+@override_settings(REPORT_CACHE_TTL=300, REPORT_CACHE_CLOSED_TTL=86400)
+class ReportCacheInvalidationTests(ApiPerformanceMixin, TestCase):
+    """Marca d'água e TTL do cache de relatórios (reports/cache.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.caixa = create_users()
+        seed(60)
+
+    def setUp(self):
+        report_cache.clear()
+
+    def assertInvalidates(self, path, depends_on, write):
+        """`write` muda a marca d'água e a próxima requisição é um miss."""
+        self.assertEqual(self.request(self.admin, 'get', path)['X-Report-Cache'], 'miss')
+        self.assertEqual(self.request(self.admin, 'get', path)['X-Report-Cache'], 'hit')
+        before = compute_watermark(depends_on)
+        write()
+        self.assertNotEqual(compute_watermark(depends_on), before)
+        self.assertEqual(self.request(self.admin, 'get', path)['X-Report-Cache'], 'miss')
+
+    def test_new_payment(self):
+        def write():
+            order = Order.objects.create(customer=self.caixa)
+            Payment.objects.create(order=order, method='pix', amount=Decimal('25.00'))
+
+        self.assertInvalidates('/api/reports/sales/', ('payments',), write)
+
+    def test_refunded_payment(self):
+        def write():
+            payment = Payment.objects.filter(status=PaymentStatus.COMPLETED).first()
+            payment.status = PaymentStatus.REFUNDED
+            payment.save()
+
+        self.assertInvalidates('/api/reports/sales/', ('payments',), write)
+
+    def test_edited_expense(self):
+        def write():
+            expense = Expense.objects.first()
+            expense.amount += Decimal('1.00')
+            expense.save()
+
+        self.assertInvalidates('/api/reports/expenses/', ('expenses',), write)
+
+    def test_deleted_order(self):
+        self.assertInvalidates(
+            '/api/reports/orders/', ('orders', 'payments'), lambda: Order.objects.first().delete(),
+        )
+
+    def test_ttl(self):
+        today = timezone.localdate()
+        closed = QueryDict(f'start_date={today - timedelta(days=7)}&end_date={today - timedelta(days=1)}')
+        key, ttl = cache_key('sales', ('payments',), closed)
+        self.assertEqual(ttl, 86400)
+        self.assertEqual(key[-1], 'closed')
+
+        for query in ('', f'end_date={today}', f'end_date={today + timedelta(days=1)}'):
+            with self.subTest(query=query):
+                key, ttl = cache_key('sales', ('payments',), QueryDict(query))
+                self.assertEqual(ttl, 300)
+                self.assertEqual(key[-1], compute_watermark(('payments',)))
+
+        # Pela view: o TTL usado ao gravar a entrada
+        with mock.patch.object(report_cache, 'set', wraps=report_cache.set) as cache_set:
+            self.request(self.admin, 'get', f'/api/reports/sales/?{closed.urlencode()}')
+            self.request(self.admin, 'get', '/api/reports/sales/')
+        self.assertEqual([call.args[2] for call in cache_set.call_args_list], [86400, 300])
+
+
+@override_settings(REPORT_CACHE_ENABLED=False)
+class ReportLatencyTests(ApiPerformanceMixin, TestCase):
+    """Tempo de resposta dos relatórios com uma base representativa."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.caixa = create_users()
+        # Cerca de 65 pedidos por dia durante um mês
+        seed(2000)
+
+    def test_latency(self):
+        for path, limit_ms in REPORT_LATENCY_MS.items():
+            with self.subTest(path=path):
+                self.assertFasterThan(limit_ms, self.admin, 'get', path)
+
+
+@override_settings(REPORT_CACHE_ENABLED=False)
+class ReportGroupingSetsTests(ApiPerformanceMixin, TestCase):
+    """
+    Caminho do PostgreSQL com GROUPING SETS e FILTER (reports/engine.py).
+
+    No SQLite os dois lados usam o grão comum; rodando a suíte no PostgreSQL
+    (DB_ENGINE=postgresql, como no workflow de testes) cada relatório precisa
+    de fato passar por GROUPING SETS e dar o mesmo resultado do grão comum.
+    """
+
+    PATHS = (
+        '/api/reports/dashboard/',
+        '/api/reports/sales/',
+        '/api/reports/sales/?group_by=month&payment_method=pix',
+        '/api/reports/orders/',
+        '/api/reports/financial/',
+        '/api/reports/expenses/',
+        '/api/reports/heatmap/',
+        '/api/reports/sales/?start_date=2020-01-01&end_date=2099-12-31&group_by=week',
+        '/api/reports/orders/?status=delivered&is_open=false',
+        '/api/reports/heatmap/?payment_method=cash',
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.caixa = create_users()
+        seed(200)
+
+    def test_group_by_grouping_sets(self):
+        queryset = Payment.objects.annotate(
+            _dim_method=GroupingDimension(F('method')), _dim_status=GroupingDimension(F('status')),
+        ).values('_dim_method', '_dim_status').annotate(total=Sum('amount'))
+        sets = [('_dim_method', '_dim_status'), ('_dim_status',), ()]
+        sql = str(group_by_grouping_sets(queryset, sets).query)
+        self.assertTrue(sql.endswith(
+            ' GROUP BY GROUPING SETS (("payments_payment"."method", "payments_payment"."status"), '
+            '("payments_payment"."status"), ())'
+        ), sql)
+        # Dimensão sem GroupingDimension: o Django a põe no GROUP BY e o
+        # agrupamento mudaria; a consulta falha em vez de dar outro resultado
+        with self.assertRaises(NotSupportedError):
+            group_by_grouping_sets(Payment.objects.values('method').annotate(total=Sum('amount')), [()])
+
+    def test_same_result_as_grain_query(self):
+        for path in self.PATHS:
+            with self.subTest(path=path):
+                used = []
+                rows = ReportEngine._grouping_sets_rows
+
+                def spy(engine, *args):
+                    used.append(True)
+                    return rows(engine, *args)
+
+                with override_settings(REPORT_GROUPING_SETS=True), \
+                        mock.patch.object(ReportEngine, '_grouping_sets_rows', spy):
+                    grouped = self.request(self.admin, 'get', path)
+                with override_settings(REPORT_GROUPING_SETS=False):
+                    grain = self.request(self.admin, 'get', path)
+                self.assertEqual(grouped.status_code, 200)
+                # A consulta com GROUPING SETS foi executada no PostgreSQL
+                self.assertEqual(bool(used), connection.vendor == 'postgresql')
+                self.assertEqual(without_period(grouped.data), without_period(grain.data))
+
+
+@override_settings(REPORT_CACHE_ENABLED=False)
+class ReportDateFilterTests(ApiPerformanceMixin, TestCase):
+    """
+    Datas inválidas: recusadas (400) pelos relatórios filtrados por período e
+    ignoradas pelo dashboard, que não tem período, como nas views anteriores
+    ao motor.
+    """
+
+    INVALID = ('start_date=abc', 'end_date=2024-13-01', 'start_date=2024-01-01&end_date=31/01/2024')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.caixa = create_users()
+        seed(30)
+
+    def test_dashboard_ignores_dates(self):
+        expected = without_period(self.request(self.admin, 'get', '/api/reports/dashboard/').data)
+        for query in self.INVALID:
+            with self.subTest(query=query):
+                response = self.request(self.admin, 'get', f'/api/reports/dashboard/?{query}')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(without_period(response.data), expected)
+                response = self.request(self.admin, 'get', f'/api/reports/batch/?reports=dashboard&{query}')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(without_period(response.data['dashboard']), expected)
+
+    def test_period_reports_reject_dates(self):
+        paths = (
+            '/api/reports/sales/?',
+            '/api/reports/orders/?',
+            '/api/reports/sales/export_csv/?',
+            '/api/reports/batch/?reports=dashboard,sales&',
+        )
+        for query in self.INVALID:
+            for path in paths:
+                with self.subTest(path=path, query=query):
+                    response = self.request(self.admin, 'get', path + query)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.data, {'error': 'Formato de data inválido. Use YYYY-MM-DD.'})
+
+
+@override_settings(REPORT_CACHE_ENABLED=False)
+class PreEngineOutputTests(ApiPerformanceMixin, TransactionTestCase):
+    """
+    Relatórios e exportações com a mesma saída das views anteriores ao motor
+    (reports/engine.py).
+
+    testdata/pre_engine_reports.json tem a resposta de cada caminho de PATHS
+    gerada pelas views antigas sobre esta mesma base: seed fixo, relógio em
+    NOW e ids a partir de 1 (reset_sequences). Diferenças aceitas:
+    - o período do dashboard, que traz o "agora" da requisição;
+    - floats no último dígito (a taxa de entrega rateada por produto é
+      somada no banco);
+    - a receita com taxa da exportação de produtos, arredondada em centavos
+      (antes saía a divisão do Decimal com todas as casas).
+    """
+
+    reset_sequences = True
+    NOW = datetime(2025, 3, 14, 15, 0, tzinfo=ZoneInfo('America/Sao_Paulo'))
+    PERIOD = 'start_date=2025-02-20&end_date=2025-03-10'
+    PATHS = (
+        'dashboard/',
+        f'sales/?{PERIOD}',
+        f'sales/?{PERIOD}&group_by=week',
+        f'sales/?{PERIOD}&group_by=month&payment_method=pix',
+        f'products/?{PERIOD}',
+        f'products/?{PERIOD}&limit=3&category=marmitas',
+        f'orders/?{PERIOD}',
+        f'orders/?{PERIOD}&status=delivered&is_open=false',
+        f'financial/?{PERIOD}',
+        f'expenses/?{PERIOD}',
+        f'expenses/?{PERIOD}&category=ingredients',
+        f'sales/export_csv/?{PERIOD}',
+        f'sales/export_csv/?{PERIOD}&payment_method=cash',
+        f'products/export_csv/?{PERIOD}',
+        f'orders/export_csv/?{PERIOD}',
+        f'financial/export_csv/?{PERIOD}',
+        f'expenses/export_csv/?{PERIOD}',
+    )
+
+    def setUp(self):
+        self.admin, self.caixa = create_users()
+        with mock.patch('django.utils.timezone.now', return_value=self.NOW):
+            seed(80, days=30, seed=7)
+        with open(Path(__file__).resolve().parent / 'testdata' / 'pre_engine_reports.json', encoding='utf-8') as f:
+            self.expected = json.load(f)
+
+    def test_same_output(self):
+        self.assertEqual(sorted(self.expected), sorted(self.PATHS))
+        for path in self.PATHS:
+            with self.subTest(path=path):
+                response = self.request(self.admin, 'get', '/api/reports/' + path)
+                self.assertEqual(response.status_code, 200)
+                if 'export_csv' in path:
+                    self.assertEqual(response.content.decode(), self._csv(path, self.expected[path]))
+                else:
+                    data = without_period(json.loads(response.content))
+                    expected = without_period(self.expected[path])
+                    self.assertEqual(self._round(data), self._round(expected))
+
+    @classmethod
+    def _round(cls, value):
+        if isinstance(value, float):
+            return round(value, 6)
+        if isinstance(value, dict):
+            return {key: cls._round(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [cls._round(item) for item in value]
+        return value
+
+    @staticmethod
+    def _csv(path, content):
+        if not path.startswith('products/'):
+            return content
+        # Receita com taxa (5ª coluna) em centavos, como no motor
+        lines = content.split('\r\n')
+        for index, line in enumerate(lines[1:], start=1):
+            columns = line.split(';')
+            if len(columns) > 4:
+                revenue = Decimal(columns[4].replace(',', '.')).quantize(Decimal('0.01'))
+                columns[4] = str(revenue).replace('.', ',')
+                lines[index] = ';'.join(columns)
+        return '\r\n'.join(lines)
+
+
+class RollupConsistencyTests(TestCase):
+    """
+    Os consolidados mantidos pelos signals (reports/signals.py) ficam iguais
+    aos recalculados do zero por rebuild_* em cada passo do ciclo de vida de
+    um pagamento.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.caixa = create_users()
+        seed(40)
+        cls.products = list(Product.objects.order_by('id')[:3])
+
+    @staticmethod
+    def _snapshot():
+        # Células zeradas ficam na tabela no incremental e somem no rebuild
+        hourly = {
+            (row.date, row.hour, row.method): (row.weekday, row.orders, row.revenue)
+            for row in HourlySales.objects.all()
+            if row.orders or row.revenue
+        }
+        products = {
+            (row.date, row.product_id): (row.weekday, row.quantity, row.revenue, row.orders)
+            for row in DailyProductSales.objects.all()
+            if row.quantity or row.revenue or row.orders
+        }
+        return hourly, products
+
+    def assertMatchesRebuild(self, step):
+        incremental = self._snapshot()
+        rebuild_hourly_sales()
+        rebuild_daily_product_sales()
+        rebuilt = self._snapshot()
+        self.assertEqual(incremental[0], rebuilt[0], f'HourlySales após: {step}')
+        self.assertEqual(incremental[1], rebuilt[1], f'DailyProductSales após: {step}')
+
+    def _order(self):
+        order = Order.objects.create(customer=self.caixa)
+        for quantity, product in enumerate(self.products, start=1):
+            OrderItem.objects.create(order=order, product=product, quantity=quantity, price=product.price)
+        order.refresh_from_db()
+        return order
+
+    def test_incremental_matches_rebuild(self):
+        order = self._order()
+        payment = Payment.objects.create(order=order, method=PaymentMethod.CASH, amount=order.total)
+        self.assertMatchesRebuild('pagamento pendente')
+
+        payment.mark_as_completed()
+        self.assertMatchesRebuild('conclusão')
+        self.assertTrue(HourlySales.objects.filter(method=PaymentMethod.CASH, orders__gt=0).exists())
+
+        payment.method = PaymentMethod.PIX
+        payment.save()
+        self.assertMatchesRebuild('troca da forma de pagamento')
+
+        payment.status = PaymentStatus.REFUNDED
+        payment.save()
+        self.assertMatchesRebuild('estorno')
+
+        payment.mark_as_completed()
+        self.assertMatchesRebuild('nova conclusão')
+
+        # Itens de pedido pago não entram nem saem depois da venda contabilizada
+        with self.assertRaises(ValidationError):
+            OrderItem.objects.create(order=order, product=self.products[0], quantity=1, price=self.products[0].price)
+        with self.assertRaises(ValidationError):
+            order.items.first().delete()
+        self.assertMatchesRebuild('item em pedido pago')
+
+        # Exclusão em cascata: pedido -> itens e pagamento
+        order.delete()
+        self.assertMatchesRebuild('exclusão do pedido')
+
+        paid = Order.objects.filter(payment__status=PaymentStatus.COMPLETED).first()
+        paid.delete()
+        self.assertMatchesRebuild('exclusão de um pedido do seed')
+
+
+class BasketTests(ApiPerformanceMixin, TestCase):
+    """
+    Análise de cesta (reports/baskets.py) com pedidos montados à mão.
+
+    Pedidos pagos (produtos 1 a 4):
+        {1, 2, 3}, {1, 2}, {1, 3}, {2, 4}, {1} (com o produto repetido)
+    N = 5; pedidos com cada produto: 1 -> 4, 2 -> 3, 3 -> 2, 4 -> 1.
+
+        par     pedidos  support  conf a->b  conf b->a  lift
+        (1, 2)     2       0.4      2/4        2/3      2*5/(4*3) = 0.833
+        (1, 3)     2       0.4      2/4        2/2      2*5/(4*2) = 1.25
+        (2, 3)     1       0.2      1/3        1/2      1*5/(3*2) = 0.833
+        (2, 4)     1       0.2      1/3        1/1      1*5/(3*1) = 1.667
+    """
+
+    ROWS = [
+        (10, 1), (10, 2), (10, 3),
+        (11, 2), (11, 1),
+        (12, 1), (12, 3),
+        (13, 4), (13, 2),
+        (14, 1), (14, 1),
+    ]
+    EXPECTED = {
+        (1, 2): {'count': 2, 'support': 0.4, 'confidence_a_b': 0.5, 'confidence_b_a': 2 / 3, 'lift': 10 / 12},
+        (1, 3): {'count': 2, 'support': 0.4, 'confidence_a_b': 0.5, 'confidence_b_a': 1.0, 'lift': 1.25},
+        (2, 3): {'count': 1, 'support': 0.2, 'confidence_a_b': 1 / 3, 'confidence_b_a': 0.5, 'lift': 5 / 6},
+        (2, 4): {'count': 1, 'support': 0.2, 'confidence_a_b': 1 / 3, 'confidence_b_a': 1.0, 'lift': 5 / 3},
+    }
+    # Contagem decrescente, depois lift decrescente
+    RANKING = [(1, 3), (1, 2), (2, 4), (2, 3)]
+
+    def assertMetrics(self, pairs):
+        for pair, metrics in pairs:
+            with self.subTest(pair=pair):
+                self.assertEqual(metrics['count'], self.EXPECTED[pair]['count'])
+                for name in ('support', 'confidence_a_b', 'confidence_b_a', 'lift'):
+                    self.assertAlmostEqual(metrics[name], self.EXPECTED[pair][name], msg=name)
+
+    def test_count_baskets(self):
+        counts = count_baskets(self.ROWS)
+        self.assertEqual(counts.baskets, 5)
+        self.assertEqual(counts.items, {1: 4, 2: 3, 3: 2, 4: 1})
+        self.assertEqual(counts.pairs, {(1, 2): 2, (1, 3): 2, (2, 3): 1, (2, 4): 1})
+
+        empty = count_baskets([])
+        self.assertEqual((empty.baskets, empty.support(0), top_pairs(empty, 10)), (0, 0.0, []))
+
+    def test_top_pairs(self):
+        counts = count_baskets(self.ROWS)
+        pairs = top_pairs(counts, limit=10)
+        self.assertEqual([pair for pair, _ in pairs], self.RANKING)
+        self.assertMetrics(pairs)
+
+        self.assertEqual([pair for pair, _ in top_pairs(counts, limit=3)], self.RANKING[:3])
+        self.assertEqual([pair for pair, _ in top_pairs(counts, limit=10, min_count=2)], [(1, 3), (1, 2)])
+        self.assertEqual(top_pairs(counts, limit=10, min_count=3), [])
+        keep = top_pairs(counts, limit=10, keep=lambda a, b: 4 in (a, b))
+        self.assertEqual([pair for pair, _ in keep], [(2, 4)])
+
+    def test_tie_order(self):
+        # Mesma contagem e mesmo lift: desempata pelo par, e o par sai com
+        # os ids em ordem mesmo que os itens venham fora de ordem
+        counts = count_baskets([(1, 8), (1, 7), (2, 6), (2, 5), (3, 9), (3, 3)])
+        self.assertEqual([pair for pair, _ in top_pairs(counts, limit=10)], [(3, 9), (5, 6), (7, 8)])
+        self.assertEqual([pair for pair, _ in top_pairs(counts, limit=2)], [(3, 9), (5, 6)])
+
+    def test_report(self):
+        admin, caixa = create_users()
+        categories = ['marmitas', 'bebidas', 'sobremesas', 'bebidas']
+        products = {
+            number: Product.objects.create(
+                name=f'Produto {number}', category=category, price=Decimal('10.00'),
+            )
+            for number, category in enumerate(categories, start=1)
+        }
+        for _, rows in groupby(self.ROWS, key=lambda row: row[0]):
+            order = Order.objects.create(customer=caixa)
+            for _, number in rows:
+                OrderItem.objects.create(order=order, product=products[number], quantity=1, price=Decimal('10.00'))
+            order.refresh_from_db()
+            Payment.objects.create(order=order, method=PaymentMethod.PIX, amount=order.total).mark_as_completed()
+        # Pedido não pago: fica fora da análise
+        pending = Order.objects.create(customer=caixa)
+        OrderItem.objects.create(order=pending, product=products[4], quantity=1, price=Decimal('10.00'))
+        OrderItem.objects.create(order=pending, product=products[1], quantity=1, price=Decimal('10.00'))
+
+        number_of = {product.id: number for number, product in products.items()}
+
+        def pairs(query=''):
+            response = self.request(admin, 'get', f'/api/reports/baskets/{query}')
+            self.assertEqual(response.status_code, 200)
+            return response.data, [
+                ((number_of[pair['product_a']['id']], number_of[pair['product_b']['id']]), pair)
+                for pair in response.data['pairs']
+            ]
+
+        with override_settings(REPORT_CACHE_ENABLED=False):
+            data, result = pairs()
+            self.assertEqual(data['summary'], {'total_orders': 5, 'products_count': 4, 'distinct_pairs': 4})
+            self.assertEqual([pair for pair, _ in result], self.RANKING)
+            self.assertMetrics(result)
+            # Pares com pelo menos um produto da categoria; métricas sobre todos os pedidos
+            _, result = pairs('?category=bebidas')
+            self.assertEqual([pair for pair, _ in result], [(1, 2), (2, 4), (2, 3)])
+            self.assertMetrics(result)
+            _, result = pairs('?category=sobremesas&min_count=2')
+            self.assertEqual([pair for pair, _ in result], [(1, 3)])
+            _, result = pairs('?limit=1')
+            self.assertEqual([pair for pair, _ in result], [(1, 3)])
+
+
+class ForecastTests(ApiPerformanceMixin, TestCase):
+    """Previsão de demanda (reports/forecast.py)."""
+
+    MONDAY = date(2024, 1, 1)
+
+    def test_flat_series(self):
+        values = [5] * 56
+        self.assertEqual(seasonal_indices(values, self.MONDAY), [1.0] * 7)
+        self.assertAlmostEqual(ewma(values), 5)
+
+        result = forecast_product(values, self.MONDAY, [self.MONDAY + timedelta(days=56 + n) for n in range(7)])
+        self.assertEqual(result['recent'], {'rolling_7': 5, 'rolling_28': 5, 'ewma': 5})
+        self.assertEqual([day['expected_quantity'] for day in result['forecast']], [5] * 7)
+        self.assertEqual([day['suggested_prep'] for day in result['forecast']], [5] * 7)
+
+    def test_ewma(self):
+        self.assertEqual(ewma([]), 0.0)
+        # span=3 -> alpha=0.5
+        self.assertEqual(ewma([0, 10], span=3), 5)
+        self.assertEqual(ewma([0, 10, 10], span=3), 7.5)
+
+    def test_weekday_seasonality(self):
+        # Segunda a sexta 10, sábado 20, domingo fechado: média 70/7 = 10
+        week = [10, 10, 10, 10, 10, 20, 0]
+        values = week * 8
+        self.assertEqual(seasonal_indices(values, self.MONDAY), [1.0, 1.0, 1.0, 1.0, 1.0, 2.0, 0.0])
+        # Começando numa quarta, os índices continuam presos ao dia da semana
+        wednesday = self.MONDAY + timedelta(days=2)
+        self.assertEqual(seasonal_indices(values[2:] + values[:2], wednesday), seasonal_indices(values, self.MONDAY))
+
+        horizon = [self.MONDAY + timedelta(days=56 + n) for n in range(7)]
+        result = forecast_product(values, self.MONDAY, horizon)
+        # Domingos (índice 0) não entram no nível: 10 em todo o resto
+        self.assertEqual(result['recent']['ewma'], 10)
+        self.assertEqual(result['seasonality'], [1.0, 1.0, 1.0, 1.0, 1.0, 2.0, 0.0])
+        self.assertEqual([day['weekday'] for day in result['forecast']], list(range(7)))
+        self.assertEqual([day['expected_quantity'] for day in result['forecast']], week)
+
+    def test_zero_history(self):
+        values = [0] * 56
+        self.assertEqual(seasonal_indices(values, self.MONDAY), [1.0] * 7)
+        result = forecast_product(values, self.MONDAY, [self.MONDAY + timedelta(days=56)])
+        self.assertEqual(result['forecast'][0]['expected_quantity'], 0)
+        self.assertEqual(result['forecast'][0]['suggested_prep'], 0)
+        self.assertEqual(forecast_product([], self.MONDAY, [self.MONDAY])['forecast'][0]['expected_quantity'], 0)
+
+    def _daily_sales(self, product, quantities, end):
+        """Uma linha de DailyProductSales por dia, terminando em `end` (exclusive)."""
+        start = end - timedelta(days=len(quantities))
+        DailyProductSales.objects.bulk_create([
+            DailyProductSales(
+                date=start + timedelta(days=offset), product=product,
+                weekday=(start + timedelta(days=offset)).weekday(),
+                quantity=quantity, revenue=Decimal(quantity) * product.price, orders=quantity,
+            )
+            for offset, quantity in enumerate(quantities)
+        ])
+
+    def test_build_forecast(self):
+        today = timezone.localdate()
+        flat = Product.objects.create(name='Marmita', category='marmitas', price=Decimal('20.00'))
+        zeroed = Product.objects.create(name='Suco', category='bebidas', price=Decimal('8.00'))
+        old = Product.objects.create(name='Pudim', category='sobremesas', price=Decimal('9.00'))
+        Product.objects.create(name='Sem vendas', category='outros', price=Decimal('1.00'))
+        self._daily_sales(flat, [4] * 56, today)
+        # Células zeradas (venda estornada) e vendas fora do histórico
+        self._daily_sales(zeroed, [0] * 10, today)
+        self._daily_sales(old, [3] * 10, today - timedelta(days=60))
+
+        def build(query=''):
+            return build_forecast(ReportFilters.from_query_params(QueryDict(query)))
+
+        result = build()
+        self.assertEqual([product['name'] for product in result['products']], ['Marmita', 'Suco'])
+        marmita, suco = result['products']
+        self.assertEqual([day['expected_quantity'] for day in marmita['forecast']], [4] * 7)
+        self.assertEqual([day['expected_quantity'] for day in suco['forecast']], [0] * 7)
+        self.assertEqual(suco['seasonality'], [1.0] * 7)
+        self.assertEqual([day['suggested_prep'] for day in result['days']], [4] * 7)
+        self.assertEqual(result['history'], {
+            'start_date': (today - timedelta(days=56)).isoformat(),
+            'end_date': (today - timedelta(days=1)).isoformat(),
+            'days': 56,
+        })
+
+        # Histórico maior alcança o produto antigo
+        self.assertIn('Pudim', [product['name'] for product in build('history=90')['products']])
+        longest = build('history=365&days=28')
+        self.assertEqual(longest['history']['days'], 365)
+        self.assertEqual(longest['history']['start_date'], (today - timedelta(days=365)).isoformat())
+        self.assertEqual(len(longest['days']), 28)
+        self.assertEqual([product['name'] for product in build('category=bebidas')['products']], ['Suco'])
+
+    @override_settings(REPORT_CACHE_ENABLED=False)
+    def test_parameters(self):
+        admin, _ = create_users()
+        self.assertEqual(self.request(admin, 'get', '/api/reports/forecast/?days=28').status_code, 200)
+        for query in ('days=29', 'days=0', 'days=abc', 'history=0', 'history=366'):
+            with self.subTest(query=query):
+                response = self.request(admin, 'get', f'/api/reports/forecast/?{query}')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.data)
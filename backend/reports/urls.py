@@ -1,19 +1,31 @@
 from django.urls import path
-from . import views
+
+from core.lazy import lazy_view
 
 app_name = 'reports'
 
+
+def report_view(name):
+    # reports.views (motor, definições, cache) é importado no primeiro uso
+    return lazy_view('reports.views', name)
+
+
 urlpatterns = [
-    path('dashboard/', views.dashboard_summary, name='dashboard_summary'),
-    path('sales/', views.sales_report, name='sales_report'),
-    path('sales/export_csv/', views.export_sales_csv, name='export_sales_csv'),
-    path('products/', views.products_report, name='products_report'),
-    path('products/export_csv/', views.export_products_csv, name='export_products_csv'),
-    path('orders/', views.orders_report, name='orders_report'),
-    path('orders/export_csv/', views.export_orders_csv, name='export_orders_csv'),
-    path('financial/', views.financial_report, name='financial_report'),
-    path('financial/export_csv/', views.export_financial_csv, name='export_financial_csv'),
-    path('expenses/', views.expenses_report, name='expenses_report'),
-    path('expenses/export_csv/', views.export_expenses_csv, name='export_expenses_csv'),
+    path('batch/', report_view('batch_report'), name='batch_report'),
+    path('dashboard/', report_view('dashboard_summary'), name='dashboard_summary'),
+    path('sales/', report_view('sales_report'), name='sales_report'),
+    path('sales/export_csv/', report_view('export_sales_csv'), name='export_sales_csv'),
+    path('products/', report_view('products_report'), name='products_report'),
+    path('products/export_csv/', report_view('export_products_csv'), name='export_products_csv'),
+    path('orders/', report_view('orders_report'), name='orders_report'),
+    path('orders/export_csv/', report_view('export_orders_csv'), name='export_orders_csv'),
+    path('financial/', report_view('financial_report'), name='financial_report'),
+    path('financial/export_csv/', report_view('export_financial_csv'), name='export_financial_csv'),
+    path('expenses/', report_view('expenses_report'), name='expenses_report'),
+    path('expenses/export_csv/', report_view('export_expenses_csv'), name='export_expenses_csv'),
+    path('heatmap/', report_view('heatmap_report'), name='heatmap_report'),
+    path('heatmap/export_csv/', report_view('export_heatmap_csv'), name='export_heatmap_csv'),
+    path('baskets/', report_view('baskets_report'), name='baskets_report'),
+    path('baskets/export_csv/', report_view('export_baskets_csv'), name='export_baskets_csv'),
+    path('forecast/', report_view('forecast_report'), name='forecast_report'),
 ]
-
@@ -2,23 +2,144 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Count, Q, F, DecimalField
-from django.db.models.functions import TruncDate, TruncMonth, TruncYear
-from django.utils import timezone
+from django.conf import settings
+from django.db import transaction
 from django.http import HttpResponse
-from datetime import datetime, timedelta
-from decimal import Decimal
+from datetime import datetime
 import csv
-import io
-from orders.models import Order, OrderItem, OrderStatus
-from payments.models import Payment, PaymentStatus, PaymentMethod
-from expenses.models import Expense, ExpenseCategory
-from core.models import Product
 from core.permissions import IsAdmin
+from .cache import cached_report, cache_key, is_refresh, report_cache
+from .definitions import REPORTS, EXPORTS
+from .engine import ReportEngine, ReportFilters, ReportFilterError
+from .forecast import build_forecast
+
+
+def run_report(definition, query_params):
+    """
+    Executa um relatório pelo motor e retorna o dict da resposta.
+
+    Raises:
+        ReportFilterError: se algum parâmetro for inválido
+    """
+    filters = ReportFilters.from_query_params(query_params)
+    data = ReportEngine(filters).run(definition.sections(filters))
+    return definition.build(data, filters)
+
+
+def report_response(name, request):
+    """Resposta JSON de um relatório (400 para parâmetros inválidos)."""
+    try:
+        return Response(run_report(REPORTS[name], request.query_params))
+    except ReportFilterError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def parse_report_names(query_params):
+    """
+    Lê a lista de relatórios do parâmetro ?reports= (separados por vírgula).
+
+    Mantém a ordem pedida e ignora repetições.
+
+    Raises:
+        ReportFilterError: se a lista estiver vazia ou tiver nomes desconhecidos
+    """
+    names = []
+    for value in query_params.getlist('reports'):
+        for name in value.split(','):
+            name = name.strip()
+            if name and name not in names:
+                names.append(name)
+    if not names:
+        raise ReportFilterError(
+            f'Informe os relatórios em ?reports=. Disponíveis: {", ".join(REPORTS)}'
+        )
+    unknown = [name for name in names if name not in REPORTS]
+    if unknown:
+        raise ReportFilterError(f'Relatório(s) desconhecido(s): {", ".join(unknown)}')
+    return names
+
+
+def run_batch(names, query_params):
+    """
+    Executa vários relatórios sobre a mesma base filtrada.
+
+    Todas as seções dos relatórios vão para um único ReportEngine, então
+    seções de relatórios diferentes com a mesma base (ex.: totais de
+    pagamentos completos, despesas por categoria) são calculadas uma vez só.
+    Relatórios já presentes no cache (mesma chave das views individuais)
+    não são recalculados.
+
+    Returns:
+        Tupla (dict nome -> dados do relatório, dict nome -> 'hit'/'miss')
+    """
+    filters = ReportFilters.from_query_params(query_params)
+    use_cache = getattr(settings, 'REPORT_CACHE_ENABLED', True)
+    refresh = is_refresh(query_params)
+    watermarks = {}
+    results = {}
+    cache_status = {}
+    keys = {}
+
+    with transaction.atomic():
+        pending = []
+        for name in names:
+            if use_cache:
+                keys[name] = cache_key(
+                    name, REPORTS[name].depends_on, query_params,
+                    ignore=('refresh', 'reports'), watermarks=watermarks,
+                )
+                cached = None if refresh else report_cache.get(keys[name][0])
+                if cached is not None:
+                    results[name] = cached
+                    cache_status[name] = 'hit'
+                    continue
+            pending.append(name)
+
+        sections = {}
+        for name in pending:
+            for key, section in REPORTS[name].sections(filters).items():
+                sections[(name, key)] = section
+        data = ReportEngine(filters).run(sections) if sections else {}
+
+        for name in pending:
+            report_data = {
+                key: value for (report, key), value in data.items() if report == name
+            }
+            results[name] = REPORTS[name].build(report_data, filters)
+            cache_status[name] = 'miss'
+            if use_cache:
+                key, ttl = keys[name]
+                report_cache.set(key, results[name], ttl)
+
+    return {name: results[name] for name in names}, cache_status
+
+
+def csv_response(name, request):
+    """Resposta CSV de um relatório (400 para parâmetros inválidos)."""
+    export = EXPORTS[name]
+    try:
+        filters = ReportFilters.from_query_params(request.query_params)
+        data = ReportEngine(filters).run(export.sections(filters))
+    except ReportFilterError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = HttpResponse(content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = (
+        f'attachment; filename="{export.filename}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
+    )
+
+    # Adicionar BOM para UTF-8 (Excel)
+    response.write('\ufeff')
+
+    writer = csv.writer(response, delimiter=';')
+    writer.writerow(export.header)
+    writer.writerows(export.rows(data, filters))
+    return response
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdmin])
+@cached_report('dashboard', depends_on=REPORTS['dashboard'].depends_on)
 def dashboard_summary(request):
     """
     Retorna um resumo geral do dashboard para o admin.
@@ -34,115 +155,12 @@ def dashboard_summary(request):
     - Pedidos pendentes de pagamento
     - Produtos mais vendidos (top 5)
     """
-    today = timezone.now()
-    last_30_days = today - timedelta(days=30)
-    
-    # Total de pedidos
-    total_orders = Order.objects.count()
-    open_orders = Order.objects.filter(is_open=True).count()
-    closed_orders = Order.objects.filter(is_open=False).count()
-    
-    # Receita total (apenas pedidos pagos) - inclui produtos + taxas de entrega
-    total_revenue = Payment.objects.filter(
-        status=PaymentStatus.COMPLETED
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-    
-    # Receita de produtos (apenas total dos pedidos, sem taxa de entrega)
-    total_products_revenue = Order.objects.filter(
-        payment__status=PaymentStatus.COMPLETED
-    ).aggregate(total=Sum('total'))['total'] or Decimal('0.00')
-    
-    # Receita de taxas de entrega
-    total_delivery_fees = Order.objects.filter(
-        payment__status=PaymentStatus.COMPLETED
-    ).aggregate(total=Sum('delivery_fee'))['total'] or Decimal('0.00')
-    
-    # Receita dos últimos 30 dias
-    recent_revenue = Payment.objects.filter(
-        status=PaymentStatus.COMPLETED,
-        paid_at__gte=last_30_days
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-    
-    # Receita de produtos dos últimos 30 dias
-    recent_products_revenue = Order.objects.filter(
-        payment__status=PaymentStatus.COMPLETED,
-        payment__paid_at__gte=last_30_days
-    ).aggregate(total=Sum('total'))['total'] or Decimal('0.00')
-    
-    # Receita de taxas de entrega dos últimos 30 dias
-    recent_delivery_fees = Order.objects.filter(
-        payment__status=PaymentStatus.COMPLETED,
-        payment__paid_at__gte=last_30_days
-    ).aggregate(total=Sum('delivery_fee'))['total'] or Decimal('0.00')
-    
-    # Pedidos pendentes de pagamento
-    pending_payments = Order.objects.filter(
-        Q(payment__isnull=True) | Q(payment__status=PaymentStatus.PENDING)
-    ).count()
-    
-    # Total de despesas
-    total_expenses = Expense.objects.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-    
-    # Despesas dos últimos 30 dias
-    recent_expenses = Expense.objects.filter(
-        created_at__gte=last_30_days
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-    
-    # Lucro (receita - despesas)
-    profit = total_revenue - total_expenses
-    recent_profit = recent_revenue - recent_expenses
-    
-    # Top 5 produtos mais vendidos
-    top_products = OrderItem.objects.values(
-        'product__name', 'product__id'
-    ).annotate(
-        total_quantity=Sum('quantity'),
-        total_revenue=Sum(F('quantity') * F('price'), output_field=DecimalField())
-    ).order_by('-total_quantity')[:5]
-    
-    top_products_list = [
-        {
-            'id': item['product__id'],
-            'name': item['product__name'],
-            'total_quantity': item['total_quantity'],
-            'total_revenue': float(item['total_revenue'])
-        }
-        for item in top_products
-    ]
-    
-    # Pedidos por status
-    orders_by_status = Order.objects.values('status').annotate(
-        count=Count('id')
-    )
-    
-    return Response({
-        'summary': {
-            'total_orders': total_orders,
-            'open_orders': open_orders,
-            'closed_orders': closed_orders,
-            'total_revenue': float(total_revenue),
-            'total_products_revenue': float(total_products_revenue),
-            'total_delivery_fees': float(total_delivery_fees),
-            'recent_revenue': float(recent_revenue),
-            'recent_products_revenue': float(recent_products_revenue),
-            'recent_delivery_fees': float(recent_delivery_fees),
-            'total_expenses': float(total_expenses),
-            'recent_expenses': float(recent_expenses),
-            'profit': float(profit),
-            'recent_profit': float(recent_profit),
-            'pending_payments': pending_payments,
-        },
-        'top_products': top_products_list,
-        'orders_by_status': list(orders_by_status),
-        'period': {
-            'start': last_30_days.isoformat(),
-            'end': today.isoformat()
-        }
-    })
+    return report_response('dashboard', request)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdmin])
+@cached_report('sales', depends_on=REPORTS['sales'].depends_on)
 def sales_report(request):
     """
     Relatório de vendas com filtros por período.
@@ -161,112 +179,12 @@ def sales_report(request):
     - Total de pedidos
     - Vendas por método de pagamento
     """
-    # Parâmetros de data
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    group_by = request.query_params.get('group_by', 'day')
-    payment_method = request.query_params.get('payment_method')
-    
-    # Filtro base: apenas pagamentos completos
-    payments = Payment.objects.filter(status=PaymentStatus.COMPLETED)
-    
-    # Aplicar filtro de método de pagamento
-    if payment_method:
-        payments = payments.filter(method=payment_method)
-    
-    # Aplicar filtro de data
-    if start_date:
-        try:
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            payments = payments.filter(paid_at__gte=start)
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    if end_date:
-        try:
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            # Incluir o dia inteiro
-            end = datetime.combine(end, datetime.max.time())
-            payments = payments.filter(paid_at__lte=end)
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    # Agrupar por período
-    if group_by == 'month':
-        payments_grouped = payments.annotate(
-            period=TruncMonth('paid_at')
-        ).values('period').annotate(
-            total=Sum('amount'),
-            count=Count('id')
-        ).order_by('period')
-    elif group_by == 'year':
-        payments_grouped = payments.annotate(
-            period=TruncYear('paid_at')
-        ).values('period').annotate(
-            total=Sum('amount'),
-            count=Count('id')
-        ).order_by('period')
-    else:  # day (padrão)
-        payments_grouped = payments.annotate(
-            period=TruncDate('paid_at')
-        ).values('period').annotate(
-            total=Sum('amount'),
-            count=Count('id')
-        ).order_by('period')
-    
-    # Total geral
-    total_sales = payments.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-    total_orders = payments.count()
-    
-    # Vendas por método de pagamento
-    sales_by_method = payments.values('method').annotate(
-        total=Sum('amount'),
-        count=Count('id')
-    ).order_by('-total')
-    
-    sales_by_method_list = [
-        {
-            'method': item['method'],
-            'method_display': PaymentMethod(item['method']).label,
-            'total': float(item['total']),
-            'count': item['count']
-        }
-        for item in sales_by_method
-    ]
-    
-    # Formatar dados agrupados
-    grouped_data = [
-        {
-            'period': item['period'].isoformat() if item['period'] else None,
-            'total': float(item['total']),
-            'count': item['count']
-        }
-        for item in payments_grouped
-    ]
-    
-    return Response({
-        'period': {
-            'start_date': start_date,
-            'end_date': end_date,
-            'group_by': group_by
-        },
-        'summary': {
-            'total_sales': float(total_sales),
-            'total_orders': total_orders
-        },
-        'sales_by_period': grouped_data,
-        'sales_by_method': sales_by_method_list
-    })
+    return report_response('sales', request)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdmin])
+@cached_report('products', depends_on=REPORTS['products'].depends_on)
 def products_report(request):
     """
     Relatório de produtos mais vendidos.
@@ -284,134 +202,12 @@ def products_report(request):
     - Total de unidades vendidas
     - Receita por produto
     """
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    limit = int(request.query_params.get('limit', 10))
-    category = request.query_params.get('category')
-    
-    # Base: itens de pedidos pagos
-    order_items = OrderItem.objects.filter(
-        order__payment__status=PaymentStatus.COMPLETED
-    )
-    
-    # Filtrar por data (usando data do pagamento)
-    if start_date:
-        try:
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            order_items = order_items.filter(order__payment__paid_at__gte=start)
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    if end_date:
-        try:
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            end = datetime.combine(end, datetime.max.time())
-            order_items = order_items.filter(order__payment__paid_at__lte=end)
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    # Filtrar por categoria
-    if category:
-        order_items = order_items.filter(product__category=category)
-    
-    # Agrupar por produto - primeiro calculamos a receita base dos produtos
-    products_data = order_items.values(
-        'product__id',
-        'product__name',
-        'product__category',
-        'product__price'
-    ).annotate(
-        total_quantity=Sum('quantity'),
-        total_revenue=Sum(F('quantity') * F('price'), output_field=DecimalField()),
-        order_count=Count('order', distinct=True)
-    ).order_by('-total_quantity')[:limit]
-    
-    # Calcular receita incluindo taxa de entrega
-    # Vamos somar a taxa de entrega diretamente, dividindo igualmente entre os produtos do pedido
-    product_ids = [item['product__id'] for item in products_data]
-    relevant_order_items = order_items.filter(product__id__in=product_ids).select_related('order').prefetch_related('order__items')
-    
-    # Criar um dicionário para armazenar quantos produtos únicos existem por pedido
-    order_product_counts = {}
-    
-    # Processar todos os itens para contar produtos únicos por pedido
-    for order_item in relevant_order_items:
-        order = order_item.order
-        order_id = order.id
-        
-        if order_id not in order_product_counts:
-            # Contar produtos únicos neste pedido
-            unique_products = set()
-            for oi in order.items.all():
-                unique_products.add(oi.product_id)
-            order_product_counts[order_id] = len(unique_products) if unique_products else 1
-    
-    # Agora calcular a receita com taxa de entrega para cada produto
-    products_list = []
-    for item in products_data:
-        product_id = item['product__id']
-        base_revenue = item['total_revenue']
-        delivery_fee_revenue = Decimal('0.00')
-        
-        # Processar todos os pedidos que contêm este produto
-        processed_orders = set()
-        for order_item in relevant_order_items:
-            if order_item.product_id != product_id:
-                continue
-            
-            order = order_item.order
-            order_id = order.id
-            
-            if order_id in processed_orders:
-                continue
-            processed_orders.add(order_id)
-            
-            # Se o pedido tem taxa de entrega, dividir igualmente entre os produtos
-            if order.delivery_fee and order.delivery_fee > 0:
-                num_products = order_product_counts.get(order_id, 1)
-                if num_products > 0:
-                    # Dividir a taxa igualmente entre os produtos do pedido
-                    delivery_fee_revenue += order.delivery_fee / num_products
-        
-        # Receita total = receita base + taxa de entrega dividida igualmente
-        total_revenue_with_delivery = base_revenue + delivery_fee_revenue
-        
-        products_list.append({
-            'id': item['product__id'],
-            'name': item['product__name'],
-            'category': item['product__category'],
-            'current_price': float(item['product__price']),
-            'total_quantity': item['total_quantity'],
-            'total_revenue': float(total_revenue_with_delivery),
-            'order_count': item['order_count']
-        })
-    
-    # Estatísticas gerais
-    total_products_sold = sum(item['total_quantity'] for item in products_list)
-    total_revenue = sum(item['total_revenue'] for item in products_list)
-    
-    return Response({
-        'period': {
-            'start_date': start_date,
-            'end_date': end_date
-        },
-        'summary': {
-            'total_products_sold': total_products_sold,
-            'total_revenue': total_revenue,
-            'products_count': len(products_list)
-        },
-        'products': products_list
-    })
+    return report_response('products', request)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdmin])
+@cached_report('orders', depends_on=REPORTS['orders'].depends_on)
 def orders_report(request):
     """
     Relatório de pedidos.
@@ -430,88 +226,12 @@ def orders_report(request):
     - Pedidos abertos vs fechados
     - Pedidos com/sem pagamento
     """
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    order_status = request.query_params.get('status')
-    is_open_param = request.query_params.get('is_open')
-    
-    orders = Order.objects.all()
-    
-    # Filtrar por data
-    if start_date:
-        try:
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            orders = orders.filter(created_at__gte=start)
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    if end_date:
-        try:
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            end = datetime.combine(end, datetime.max.time())
-            orders = orders.filter(created_at__lte=end)
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    # Filtrar por status
-    if order_status:
-        orders = orders.filter(status=order_status)
-    
-    # Filtrar por is_open
-    if is_open_param is not None:
-        is_open = is_open_param.lower() == 'true'
-        orders = orders.filter(is_open=is_open)
-    
-    # Estatísticas gerais
-    total_orders = orders.count()
-    open_orders = orders.filter(is_open=True).count()
-    closed_orders = orders.filter(is_open=False).count()
-    
-    # Pedidos por status
-    orders_by_status = orders.values('status').annotate(
-        count=Count('id')
-    )
-    
-    # Pedidos com/sem pagamento
-    orders_with_payment = orders.filter(
-        payment__status=PaymentStatus.COMPLETED
-    ).count()
-    orders_without_payment = orders.filter(
-        Q(payment__isnull=True) | Q(payment__status__in=[PaymentStatus.PENDING, PaymentStatus.PROCESSING])
-    ).count()
-    
-    # Valor total dos pedidos
-    total_value = orders.aggregate(total=Sum('total'))['total'] or Decimal('0.00')
-    
-    # Valor médio por pedido
-    avg_order_value = total_value / total_orders if total_orders > 0 else Decimal('0.00')
-    
-    return Response({
-        'period': {
-            'start_date': start_date,
-            'end_date': end_date
-        },
-        'summary': {
-            'total_orders': total_orders,
-            'open_orders': open_orders,
-            'closed_orders': closed_orders,
-            'orders_with_payment': orders_with_payment,
-            'orders_without_payment': orders_without_payment,
-            'total_value': float(total_value),
-            'avg_order_value': float(avg_order_value)
-        },
-        'orders_by_status': list(orders_by_status)
-    })
+    return report_response('orders', request)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdmin])
+@cached_report('financial', depends_on=REPORTS['financial'].depends_on)
 def financial_report(request):
     """
     Relatório financeiro detalhado.
@@ -528,150 +248,39 @@ def financial_report(request):
     - Receita por método de pagamento
     - Estatísticas de pagamentos
     """
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    
-    payments = Payment.objects.all()
-    
-    # Filtrar por data
-    if start_date:
-        try:
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            payments = payments.filter(created_at__gte=start)
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    if end_date:
-        try:
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            end = datetime.combine(end, datetime.max.time())
-            payments = payments.filter(created_at__lte=end)
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    # Receita total (completos) - inclui produtos + taxas de entrega
-    completed_payments_qs = payments.filter(status=PaymentStatus.COMPLETED)
-    total_revenue = completed_payments_qs.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-    
-    # Receita de produtos (apenas total dos pedidos, sem taxa de entrega)
-    products_revenue = Order.objects.filter(
-        payment__in=completed_payments_qs
-    ).aggregate(total=Sum('total'))['total'] or Decimal('0.00')
-    
-    # Receita de taxas de entrega
-    delivery_fees = Order.objects.filter(
-        payment__in=completed_payments_qs
-    ).aggregate(total=Sum('delivery_fee'))['total'] or Decimal('0.00')
-    
-    # Receita pendente
-    pending_revenue = payments.filter(
-        status=PaymentStatus.PENDING
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-    
-    # Receita por método de pagamento
-    revenue_by_method = payments.filter(
-        status=PaymentStatus.COMPLETED
-    ).values('method').annotate(
-        total=Sum('amount'),
-        count=Count('id')
-    ).order_by('-total')
-    
-    revenue_by_method_list = [
-        {
-            'method': item['method'],
-            'method_display': PaymentMethod(item['method']).label,
-            'total': float(item['total']),
-            'count': item['count']
-        }
-        for item in revenue_by_method
-    ]
-    
-    # Pagamentos por status
-    payments_by_status = payments.values('status').annotate(
-        total=Sum('amount'),
-        count=Count('id')
-    )
-    
-    payments_by_status_list = [
-        {
-            'status': item['status'],
-            'status_display': PaymentStatus(item['status']).label,
-            'total': float(item['total']),
-            'count': item['count']
-        }
-        for item in payments_by_status
-    ]
-    
-    # Total de pagamentos
-    total_payments = payments.count()
-    completed_payments = payments.filter(status=PaymentStatus.COMPLETED).count()
-    pending_payments = payments.filter(status=PaymentStatus.PENDING).count()
-    failed_payments = payments.filter(status=PaymentStatus.FAILED).count()
-    
-    # Despesas no período
-    expenses = Expense.objects.all()
-    if start_date:
-        try:
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            expenses = expenses.filter(created_at__gte=start)
-        except ValueError:
-            pass
-    if end_date:
-        try:
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            end = datetime.combine(end, datetime.max.time())
-            expenses = expenses.filter(created_at__lte=end)
-        except ValueError:
-            pass
-    
-    total_expenses = expenses.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-    
-    # Despesas por categoria
-    expenses_by_category = expenses.values('category').annotate(
-        total=Sum('amount'),
-        count=Count('id')
-    ).order_by('-total')
+    return report_response('financial', request)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdmin])
+def batch_report(request):
+    """
+    Vários relatórios em uma única requisição.
     
-    expenses_by_category_list = [
-        {
-            'category': item['category'],
-            'category_display': ExpenseCategory(item['category']).label,
-            'total': float(item['total']),
-            'count': item['count']
-        }
-        for item in expenses_by_category
-    ]
+    Endpoint: GET /api/reports/batch/?reports=dashboard,sales,financial
     
-    # Lucro líquido (receita - despesas)
-    net_profit = total_revenue - total_expenses
+    Query Parameters:
+    - reports: Relatórios a retornar, separados por vírgula
+      (dashboard, sales, products, orders, financial, expenses, heatmap, baskets)
+    - Demais parâmetros: os mesmos dos relatórios individuais, aplicados a
+      todos os relatórios do lote (start_date, end_date, group_by, ...)
     
-    return Response({
-        'period': {
-            'start_date': start_date,
-            'end_date': end_date
-        },
-        'summary': {
-            'total_revenue': float(total_revenue),
-            'products_revenue': float(products_revenue),
-            'delivery_fees': float(delivery_fees),
-            'pending_revenue': float(pending_revenue),
-            'total_expenses': float(total_expenses),
-            'net_profit': float(net_profit),
-            'total_payments': total_payments,
-            'completed_payments': completed_payments,
-            'pending_payments': pending_payments,
-            'failed_payments': failed_payments
-        },
-        'revenue_by_method': revenue_by_method_list,
-        'payments_by_status': payments_by_status_list,
-        'expenses_by_category': expenses_by_category_list
-    })
+    Retorna:
+    - Um objeto com uma chave por relatório, com o mesmo conteúdo do
+      endpoint individual correspondente
+    """
+    try:
+        names = parse_report_names(request.query_params)
+        data, cache_status = run_batch(names, request.query_params)
+    except ReportFilterError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = Response(data)
+    if cache_status:
+        response['X-Report-Cache'] = ','.join(
+            f'{name}={value}' for name, value in cache_status.items()
+        )
+    return response
 
 
 @api_view(['GET'])
@@ -682,59 +291,7 @@ def export_sales_csv(request):
     
     Endpoint: GET /api/reports/sales/export_csv/
     """
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    payment_method = request.query_params.get('payment_method')
-    
-    payments = Payment.objects.filter(status=PaymentStatus.COMPLETED)
-    
-    if payment_method:
-        payments = payments.filter(method=payment_method)
-    
-    if start_date:
-        try:
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            payments = payments.filter(paid_at__gte=start)
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    if end_date:
-        try:
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            end = datetime.combine(end, datetime.max.time())
-            payments = payments.filter(paid_at__lte=end)
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    # Criar CSV
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = f'attachment; filename="relatorio_vendas_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    # Adicionar BOM para UTF-8 (Excel)
-    response.write('\ufeff')
-    
-    writer = csv.writer(response, delimiter=';')
-    
-    # Cabeçalho
-    writer.writerow(['Data', 'Pedido ID', 'Método de Pagamento', 'Valor', 'Status'])
-    
-    # Dados
-    for payment in payments.select_related('order'):
-        writer.writerow([
-            payment.paid_at.strftime('%d/%m/%Y %H:%M:%S') if payment.paid_at else '',
-            payment.order.id,
-            payment.get_method_display(),
-            str(payment.amount).replace('.', ','),
-            payment.get_status_display()
-        ])
-    
-    return response
+    return csv_response('sales', request)
 
 
 @api_view(['GET'])
@@ -745,135 +302,7 @@ def export_products_csv(request):
     
     Endpoint: GET /api/reports/products/export_csv/
     """
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    limit = int(request.query_params.get('limit', 100))
-    category = request.query_params.get('category')
-    
-    order_items = OrderItem.objects.filter(
-        order__payment__status=PaymentStatus.COMPLETED
-    )
-    
-    if start_date:
-        try:
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            order_items = order_items.filter(order__payment__paid_at__gte=start)
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    if end_date:
-        try:
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            end = datetime.combine(end, datetime.max.time())
-            order_items = order_items.filter(order__payment__paid_at__lte=end)
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    if category:
-        order_items = order_items.filter(product__category=category)
-    
-    # Agrupar por produto - primeiro calculamos a receita base dos produtos
-    products_data = order_items.values(
-        'product__id',
-        'product__name',
-        'product__category',
-        'product__price'
-    ).annotate(
-        total_quantity=Sum('quantity'),
-        total_revenue=Sum(F('quantity') * F('price'), output_field=DecimalField()),
-        order_count=Count('order', distinct=True)
-    ).order_by('-total_quantity')[:limit]
-    
-    # Calcular receita incluindo taxa de entrega
-    # Vamos somar a taxa de entrega diretamente, dividindo igualmente entre os produtos do pedido
-    product_ids = [item['product__id'] for item in products_data]
-    relevant_order_items = order_items.filter(product__id__in=product_ids).select_related('order').prefetch_related('order__items')
-    
-    # Criar um dicionário para armazenar quantos produtos únicos existem por pedido
-    order_product_counts = {}
-    
-    # Processar todos os itens para contar produtos únicos por pedido
-    for order_item in relevant_order_items:
-        order = order_item.order
-        order_id = order.id
-        
-        if order_id not in order_product_counts:
-            # Contar produtos únicos neste pedido
-            unique_products = set()
-            for oi in order.items.all():
-                unique_products.add(oi.product_id)
-            order_product_counts[order_id] = len(unique_products) if unique_products else 1
-    
-    # Agora calcular a receita com taxa de entrega para cada produto
-    products_list = []
-    for item in products_data:
-        product_id = item['product__id']
-        base_revenue = item['total_revenue']
-        delivery_fee_revenue = Decimal('0.00')
-        
-        # Processar todos os pedidos que contêm este produto
-        processed_orders = set()
-        for order_item in relevant_order_items:
-            if order_item.product_id != product_id:
-                continue
-            
-            order = order_item.order
-            order_id = order.id
-            
-            if order_id in processed_orders:
-                continue
-            processed_orders.add(order_id)
-            
-            # Se o pedido tem taxa de entrega, dividir igualmente entre os produtos
-            if order.delivery_fee and order.delivery_fee > 0:
-                num_products = order_product_counts.get(order_id, 1)
-                if num_products > 0:
-                    # Dividir a taxa igualmente entre os produtos do pedido
-                    delivery_fee_revenue += order.delivery_fee / num_products
-        
-        # Receita total = receita base + taxa de entrega dividida igualmente
-        total_revenue_with_delivery = base_revenue + delivery_fee_revenue
-        
-        products_list.append({
-            'id': item['product__id'],
-            'name': item['product__name'],
-            'category': item['product__category'],
-            'total_quantity': item['total_quantity'],
-            'total_revenue': total_revenue_with_delivery,
-            'order_count': item['order_count'],
-            'current_price': item['product__price']
-        })
-    
-    # Criar CSV
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = f'attachment; filename="relatorio_produtos_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    # Adicionar BOM para UTF-8 (Excel)
-    response.write('\ufeff')
-    
-    writer = csv.writer(response, delimiter=';')
-    
-    # Cabeçalho
-    writer.writerow(['Produto', 'Categoria', 'Quantidade Vendida', 'Número de Pedidos', 'Receita Total (com taxa de entrega)', 'Preço Atual'])
-    
-    # Dados
-    for item in products_list:
-        writer.writerow([
-            item['name'],
-            item['category'],
-            item['total_quantity'],
-            item['order_count'],
-            str(item['total_revenue']).replace('.', ','),
-            str(item['current_price']).replace('.', ',')
-        ])
-    
-    return response
+    return csv_response('products', request)
 
 
 @api_view(['GET'])
@@ -884,71 +313,7 @@ def export_orders_csv(request):
     
     Endpoint: GET /api/reports/orders/export_csv/
     """
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    order_status = request.query_params.get('status')
-    is_open_param = request.query_params.get('is_open')
-    
-    orders = Order.objects.all()
-    
-    if start_date:
-        try:
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            orders = orders.filter(created_at__gte=start)
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    if end_date:
-        try:
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            end = datetime.combine(end, datetime.max.time())
-            orders = orders.filter(created_at__lte=end)
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    if order_status:
-        orders = orders.filter(status=order_status)
-    
-    if is_open_param is not None:
-        is_open = is_open_param.lower() == 'true'
-        orders = orders.filter(is_open=is_open)
-    
-    # Criar CSV
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = f'attachment; filename="relatorio_pedidos_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    # Adicionar BOM para UTF-8 (Excel)
-    response.write('\ufeff')
-    
-    writer = csv.writer(response, delimiter=';')
-    
-    # Cabeçalho
-    writer.writerow(['ID', 'Cliente', 'Status', 'Aberto', 'Total', 'Data Criação', 'Data Atualização', 'Tem Pagamento', 'Status Pagamento'])
-    
-    # Dados
-    for order in orders.select_related('customer'):
-        has_payment = hasattr(order, 'payment')
-        payment_status = order.payment.get_status_display() if has_payment else 'Sem pagamento'
-        
-        writer.writerow([
-            order.id,
-            order.customer.username,
-            order.get_status_display(),
-            'Sim' if order.is_open else 'Não',
-            str(order.total).replace('.', ','),
-            order.created_at.strftime('%d/%m/%Y %H:%M:%S'),
-            order.updated_at.strftime('%d/%m/%Y %H:%M:%S'),
-            'Sim' if has_payment else 'Não',
-            payment_status
-        ])
-    
-    return response
+    return csv_response('orders', request)
 
 
 @api_view(['GET'])
@@ -959,62 +324,12 @@ def export_financial_csv(request):
     
     Endpoint: GET /api/reports/financial/export_csv/
     """
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    
-    payments = Payment.objects.all()
-    
-    if start_date:
-        try:
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            payments = payments.filter(created_at__gte=start)
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    if end_date:
-        try:
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            end = datetime.combine(end, datetime.max.time())
-            payments = payments.filter(created_at__lte=end)
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    # Criar CSV
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = f'attachment; filename="relatorio_financeiro_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    # Adicionar BOM para UTF-8 (Excel)
-    response.write('\ufeff')
-    
-    writer = csv.writer(response, delimiter=';')
-    
-    # Cabeçalho
-    writer.writerow(['ID Pagamento', 'Pedido ID', 'Método de Pagamento', 'Valor', 'Status', 'Data Criação', 'Data Pagamento', 'ID Transação'])
-    
-    # Dados
-    for payment in payments.select_related('order'):
-        writer.writerow([
-            payment.id,
-            payment.order.id,
-            payment.get_method_display(),
-            str(payment.amount).replace('.', ','),
-            payment.get_status_display(),
-            payment.created_at.strftime('%d/%m/%Y %H:%M:%S'),
-            payment.paid_at.strftime('%d/%m/%Y %H:%M:%S') if payment.paid_at else '',
-            payment.transaction_id or ''
-        ])
-    
-    return response
+    return csv_response('financial', request)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdmin])
+@cached_report('expenses', depends_on=REPORTS['expenses'].depends_on)
 def expenses_report(request):
     """
     Relatório de despesas/saídas.
@@ -1031,73 +346,7 @@ def expenses_report(request):
     - Despesas por categoria
     - Total de despesas
     """
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    category = request.query_params.get('category')
-    
-    expenses = Expense.objects.all()
-    
-    # Filtrar por data
-    if start_date:
-        try:
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            expenses = expenses.filter(created_at__gte=start)
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    if end_date:
-        try:
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            end = datetime.combine(end, datetime.max.time())
-            expenses = expenses.filter(created_at__lte=end)
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    # Filtrar por categoria
-    if category:
-        expenses = expenses.filter(category=category)
-    
-    # Estatísticas gerais
-    total_expenses = expenses.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-    total_count = expenses.count()
-    
-    # Despesas por categoria
-    expenses_by_category = expenses.values('category').annotate(
-        total=Sum('amount'),
-        count=Count('id')
-    ).order_by('-total')
-    
-    expenses_by_category_list = [
-        {
-            'category': item['category'],
-            'category_display': ExpenseCategory(item['category']).label,
-            'total': float(item['total']),
-            'count': item['count']
-        }
-        for item in expenses_by_category
-    ]
-    
-    # Média de despesas
-    avg_expense = total_expenses / total_count if total_count > 0 else Decimal('0.00')
-    
-    return Response({
-        'period': {
-            'start_date': start_date,
-            'end_date': end_date
-        },
-        'summary': {
-            'total_expenses': float(total_expenses),
-            'total_count': total_count,
-            'avg_expense': float(avg_expense)
-        },
-        'expenses_by_category': expenses_by_category_list
-    })
+    return report_response('expenses', request)
 
 
 @api_view(['GET'])
@@ -1108,58 +357,103 @@ def export_expenses_csv(request):
     
     Endpoint: GET /api/reports/expenses/export_csv/
     """
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    category = request.query_params.get('category')
-    
-    expenses = Expense.objects.all()
+    return csv_response('expenses', request)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdmin])
+@cached_report('heatmap', depends_on=REPORTS['heatmap'].depends_on)
+def heatmap_report(request):
+    """
+    Mapa de calor de vendas por hora do dia e dia da semana (horário local).
     
-    if start_date:
-        try:
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            expenses = expenses.filter(created_at__gte=start)
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+    Endpoint: GET /api/reports/heatmap/
     
-    if end_date:
-        try:
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            end = datetime.combine(end, datetime.max.time())
-            expenses = expenses.filter(created_at__lte=end)
-        except ValueError:
-            return Response(
-                {'error': 'Formato de data inválido. Use YYYY-MM-DD.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+    Lê o consolidado por hora (HourlySales), mantido a cada pagamento
+    concluído, então o custo não cresce com o volume de pedidos.
     
-    if category:
-        expenses = expenses.filter(category=category)
+    Query Parameters:
+    - start_date: Data inicial (YYYY-MM-DD)
+    - end_date: Data final (YYYY-MM-DD)
+    - payment_method: Filtrar por método de pagamento
     
-    # Criar CSV
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = f'attachment; filename="relatorio_despesas_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
+    Retorna:
+    - Pedidos e receita por dia da semana x hora
+    - Totais por dia da semana e por hora
+    - Horário de pico
+    """
+    return report_response('heatmap', request)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdmin])
+def export_heatmap_csv(request):
+    """
+    Exporta o mapa de calor em CSV.
     
-    # Adicionar BOM para UTF-8 (Excel)
-    response.write('\ufeff')
+    Endpoint: GET /api/reports/heatmap/export_csv/
+    """
+    return csv_response('heatmap', request)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdmin])
+@cached_report('baskets', depends_on=REPORTS['baskets'].depends_on)
+def baskets_report(request):
+    """
+    Análise de cesta: pares de produtos comprados juntos em pedidos pagos.
     
-    writer = csv.writer(response, delimiter=';')
+    Endpoint: GET /api/reports/baskets/
     
-    # Cabeçalho
-    writer.writerow(['Data', 'Categoria', 'Descrição', 'Valor', 'Usuário', 'Observações'])
+    Query Parameters:
+    - start_date: Data inicial (YYYY-MM-DD)
+    - end_date: Data final (YYYY-MM-DD)
+    - category: Apenas pares com pelo menos um produto da categoria
+    - limit: Número de pares a retornar (padrão: 10)
+    - min_count: Mínimo de pedidos com o par (padrão: 1)
     
-    # Dados
-    for expense in expenses.select_related('user'):
-        writer.writerow([
-            expense.created_at.strftime('%d/%m/%Y %H:%M:%S'),
-            expense.get_category_display(),
-            expense.description,
-            str(expense.amount).replace('.', ','),
-            expense.user.username if expense.user else 'N/A',
-            expense.notes or ''
-        ])
+    Retorna:
+    - Pares mais frequentes com support, confidence (A→B e B→A) e lift
+    - Total de pedidos pagos analisados
+    """
+    return report_response('baskets', request)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdmin])
+def export_baskets_csv(request):
+    """
+    Exporta a análise de cesta em CSV.
     
-    return response
+    Endpoint: GET /api/reports/baskets/export_csv/
+    """
+    return csv_response('baskets', request)
+
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdmin])
+@cached_report('forecast', depends_on=(), per_day=True)
+def forecast_report(request):
+    """
+    Previsão de demanda por produto para o planejamento do preparo.
+    
+    Endpoint: GET /api/reports/forecast/
+    
+    Calculada a partir do consolidado diário por produto (DailyProductSales)
+    até ontem, então o resultado é cacheado até o fim do dia.
+    
+    Query Parameters:
+    - days: Dias a prever a partir de hoje (padrão: 7, máximo: 28; acima, 400)
+    - history: Dias de histórico usados (padrão: 56; acima de 365, usa 365)
+    - category: Filtrar por categoria de produto (ex.: marmitas)
+    
+    Retorna:
+    - Quantidade esperada e sugestão de preparo por produto e dia
+    - Totais por dia
+    - Médias recentes (7 e 28 dias, EWMA) e sazonalidade semanal por produto
+    """
+    try:
+        filters = ReportFilters.from_query_params(request.query_params)
+        return Response(build_forecast(filters))
+    except ReportFilterError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -49,10 +49,16 @@ def open_browser():
         print("Abra manualmente: http://localhost:8000")
 
 if __name__ == '__main__':
+    from core.server import Server
+
+    # Servidor de produção (gunicorn/waitress) ou runserver: ver core/server.py
+    server = Server('0.0.0.0', 8000)
+
     print("=" * 50)
     print("Sistema Marmitaria - Iniciando servidor...")
     print("=" * 50)
     print("\nServidor iniciando em: http://localhost:8000")
+    print(f"Servidor: {server.describe()}")
     print("Pressione Ctrl+C para parar o servidor\n")
     
     # Abrir navegador automaticamente
@@ -61,9 +67,8 @@ if __name__ == '__main__':
     
     # Iniciar servidor na porta 8000
     try:
-        # Usar o comando runserver diretamente
-        from django.core.management import call_command
-        call_command('runserver', '0.0.0.0:8000', use_reloader=False)
+        server.run()
+        print("\n\nServidor encerrado.")
     except KeyboardInterrupt:
         print("\n\nServidor encerrado pelo usuário.")
         sys.exit(0)
@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react';
-import { productService, orderService, paymentService, expenseService } from '../services/api';
+import { productService, orderService, batchService, expenseService } from '../services/api';
 import { useAuth } from '../contexts/AuthContext';
 import Alert from './common/Alert';
 import LoadingSpinner from './common/LoadingSpinner';
@@ -254,63 +254,32 @@ function CaixaPanel() {
       const notes = buildNotes();
       const deliveryAddress = buildDeliveryAddress();
       const feeToSave = orderType === 'delivery' ? parseFloat(deliveryFee || 0) : 0;
-      
-      console.log('Atualizando pedido com taxa de entrega:', feeToSave, 'Tipo:', orderType);
-      
-      await orderService.update(currentOrder.id, {
-        notes: notes,
-        delivery_address: deliveryAddress,
-        delivery_fee: feeToSave,
-      });
-
-      // Recarregar o pedido para garantir que temos os dados atualizados (incluindo delivery_fee)
-      const orderResponse = await orderService.getById(currentOrder.id);
-      const orderData = orderResponse.data?.data || orderResponse.data;
-      
-      console.log('Pedido recarregado após atualização:', orderData);
-      console.log('Taxa de entrega no pedido:', orderData?.delivery_fee);
-      
-      // Atualizar o estado do pedido com os dados atualizados
-      if (orderData) {
-        setCurrentOrder(orderData);
-        // Atualizar a taxa de entrega no estado também
-        if (orderData.delivery_fee !== undefined) {
-          setDeliveryFee(parseFloat(orderData.delivery_fee || 0));
-        }
-      }
 
       // Preparar notas do pagamento incluindo taxa de entrega se houver
       let paymentNotes = `Pagamento via ${paymentMethod.toUpperCase()}`;
-      const finalDeliveryFee = orderData?.delivery_fee || feeToSave;
-      if (orderType === 'delivery' && finalDeliveryFee > 0) {
-        paymentNotes += ` | Taxa de entrega: ${formatCurrency(finalDeliveryFee)}`;
-      }
-      
-      if (orderData?.payment) {
-        setError('Este pedido já possui um pagamento. Não é possível criar outro.');
-        setLoading(false);
-        return;
-      }
-
-      console.log('Criando pagamento para pedido:', currentOrder.id, 'Método:', paymentMethod);
-      const paymentResponse = await paymentService.create({
-        order: currentOrder.id,
-        method: paymentMethod,
-        notes: paymentNotes,
-      });
-
-      // Extrair dados do pagamento (pode estar em response.data ou response.data.data)
-      const paymentData = paymentResponse.data?.data || paymentResponse.data;
-      
-      if (!paymentData || !paymentData.id) {
-        console.error('Resposta inválida ao criar pagamento:', paymentResponse);
-        setError('Erro ao criar pagamento: resposta inválida do servidor');
-        setLoading(false);
-        return;
+      if (orderType === 'delivery' && feeToSave > 0) {
+        paymentNotes += ` | Taxa de entrega: ${formatCurrency(feeToSave)}`;
       }
 
-      console.log('Pagamento criado com sucesso. ID:', paymentData.id);
-      await paymentService.finalize(paymentData.id);
+      // Atualizar o pedido, criar e finalizar o pagamento numa requisição só,
+      // tudo ou nada: se uma etapa falhar, nenhuma alteração fica no banco.
+      // Quem decide se o pedido ainda aceita pagamento é o servidor, dentro
+      // do lote (o currentOrder local pode estar desatualizado): um pedido
+      // já pago ou fechado desfaz o lote com a mensagem do erro
+      await batchService.run([
+        {
+          method: 'PATCH',
+          path: `/orders/${currentOrder.id}/`,
+          body: { notes, delivery_address: deliveryAddress, delivery_fee: feeToSave },
+        },
+        {
+          id: 'pagamento',
+          method: 'POST',
+          path: '/payments/',
+          body: { order: currentOrder.id, method: paymentMethod, notes: paymentNotes },
+        },
+        { method: 'POST', path: '/payments/{{pagamento.data.id}}/finalize/' },
+      ], { atomic: true });
 
       setSuccess('Pagamento finalizado com sucesso!');
       
@@ -370,6 +339,22 @@ function CaixaPanel() {
       }, 1500);
     } catch (err) {
       setError(getErrorMessage(err));
+      // Lote desfeito: mostrar o pedido como está no servidor
+      try {
+        const orderResponse = await orderService.getById(currentOrder.id);
+        const orderData = orderResponse.data?.data || orderResponse.data;
+        if (orderData?.id) {
+          setOrderItems(orderData.items || []);
+          setCurrentOrder(prev => ({
+            ...prev,
+            status: orderData.status,
+            total: orderData.total,
+            payment_status: orderData.payment_status
+          }));
+        }
+      } catch {
+        // Mantém o erro do lote
+      }
     } finally {
       setLoading(false);
     }
@@ -55,8 +55,18 @@ function ReportsPanel({ onNavigate }) {
     try {
       setLoading(true);
       setError(null);
-      const response = await reportsService.getDashboard();
-      setDashboardData(response.data);
+      // Carrega o dashboard e os relatórios das outras abas (sem filtros)
+      // em uma única requisição; abas já carregadas não são sobrescritas
+      const response = await reportsService.getBatch(
+        ['dashboard', 'sales', 'products', 'orders', 'financial', 'expenses']
+      );
+      const data = response.data;
+      setDashboardData(data.dashboard);
+      setSalesData((current) => current ?? data.sales);
+      setProductsData((current) => current ?? data.products);
+      setOrdersData((current) => current ?? data.orders);
+      setFinancialData((current) => current ?? data.financial);
+      setExpensesData((current) => current ?? data.expenses);
     } catch (err) {
       setError('Erro ao carregar dashboard: ' + (err.response?.data?.detail || err.message));
     } finally {
@@ -1,4 +1,4 @@
-import axios from 'axios';
+import axios, { AxiosError } from 'axios';
 
 // Usar URL relativa quando em produção (executável)
 const API_BASE_URL = import.meta.env.PROD 
@@ -26,6 +26,31 @@ api.interceptors.request.use(
   }
 );
 
+// No aplicativo desktop (esquema marmitaria://, backend/core/inprocess.py) a
+// resposta sempre chega com status 200: o status real vem no cabeçalho
+// X-Marmitaria-Status e é restaurado aqui, antes dos demais interceptors
+const applyTransportStatus = (response) => {
+  const status = Number(response.headers?.['x-marmitaria-status']);
+  if (!status || status === response.status) {
+    return response;
+  }
+  response.status = status;
+  const validateStatus = response.config?.validateStatus;
+  if (!validateStatus || validateStatus(status)) {
+    return response;
+  }
+  return Promise.reject(new AxiosError(
+    `Request failed with status code ${status}`,
+    status >= 500 ? AxiosError.ERR_BAD_RESPONSE : AxiosError.ERR_BAD_REQUEST,
+    response.config,
+    response.request,
+    response
+  ));
+};
+
+axios.interceptors.response.use(applyTransportStatus);
+api.interceptors.response.use(applyTransportStatus);
+
 // Interceptor para tratar erros de autenticação e padronizar respostas
 api.interceptors.response.use(
   (response) => {
@@ -135,6 +160,13 @@ export const paymentService = {
   finalize: (id) => api.post(`/payments/${id}/finalize/`),
 };
 
+// Lote de chamadas em uma requisição (POST /api/batch/). Operações:
+// { id, method, path, params, body }; {{id.caminho}} referencia a resposta
+// de uma operação anterior. Com atomic, tudo ou nada.
+export const batchService = {
+  run: (operations, { atomic = false } = {}) => api.post('/batch/', { operations, atomic }),
+};
+
 // Serviços de Autenticação
 export const authService = {
   login: (username, password) => api.post('/token/', { username, password }),
@@ -150,12 +182,19 @@ export const reportsService = {
   getOrdersReport: (params) => api.get('/reports/orders/', { params }),
   getFinancialReport: (params) => api.get('/reports/financial/', { params }),
   getExpensesReport: (params) => api.get('/reports/expenses/', { params }),
+  getHeatmapReport: (params) => api.get('/reports/heatmap/', { params }),
+  getBasketsReport: (params) => api.get('/reports/baskets/', { params }),
+  getForecast: (params) => api.get('/reports/forecast/', { params }),
+  // Vários relatórios em uma requisição: getBatch(['dashboard', 'sales'], params)
+  getBatch: (reports, params) => api.get('/reports/batch/', { params: { ...params, reports: reports.join(',') } }),
   // Exportações
   exportSalesCSV: (params) => api.get('/reports/sales/export_csv/', { params, responseType: 'blob' }),
   exportProductsCSV: (params) => api.get('/reports/products/export_csv/', { params, responseType: 'blob' }),
   exportOrdersCSV: (params) => api.get('/reports/orders/export_csv/', { params, responseType: 'blob' }),
   exportFinancialCSV: (params) => api.get('/reports/financial/export_csv/', { params, responseType: 'blob' }),
   exportExpensesCSV: (params) => api.get('/reports/expenses/export_csv/', { params, responseType: 'blob' }),
+  exportHeatmapCSV: (params) => api.get('/reports/heatmap/export_csv/', { params, responseType: 'blob' }),
+  exportBasketsCSV: (params) => api.get('/reports/baskets/export_csv/', { params, responseType: 'blob' }),
 };
 
 // Serviços de Despesas/Saídas